@@ -0,0 +1,336 @@
+# ai/qwen/batch_summarize.py
+#
+# 문서 이미지 대량 요약 CLI (qwen_domain.py / prompt_test.py의 이미지 1장씩 루프 대체).
+#   - 모델은 한 번만 로드
+#   - 이미지 읽기/디코딩/해시는 스레드 풀에서 미리 (GPU가 노는 시간 제거)
+#   - 예상 이미지 토큰 수가 비슷한 것끼리 묶어 배치 (패딩 낭비 감소)
+#   - 배치마다 비전 타워 1회 → 같은 특징으로 분류 배치 + 유형별 프롬프트 요약 배치
+#   - 결과는 한 장씩 끝나는 대로 JSONL에 추가, 다시 실행하면 끝난 id는 건너뜀 (--fresh: 처음부터)
+#   - images/s와 단계별 시간을 출력하고 {out}.stats.json에 저장
+#
+# 사용:
+#   python batch_summarize.py --input ../data/img --out results_batch.jsonl --batch 8
+#   python batch_summarize.py --manifest docs.jsonl          # 한 줄 = {"id": ..., "path": ...} 또는 경로 문자열
+#   python batch_summarize.py --input ../data/img --feature_store   # 비전 특징을 공용 저장소에 캐시/재사용
+
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR.parent / "backend"))  # data_store
+
+import torch
+from PIL import Image
+
+from data_store.vision_features import (
+    VisionFeatureStore,
+    build_inputs,
+    extract_features,
+    get_or_extract,
+    use_cached_features,
+)
+from model_loader import get_model, get_processor
+from prompts import DOC_TYPE_PROMPT, ELSE_PROMPT, PROMPT_MAP, normalize_doc_type
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+PATCH = 28  # Qwen2.5-VL: 14px 패치 2×2 병합 → 28px 격자
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="문서 이미지 배치 분류+요약")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--input", help="이미지 디렉터리 (하위 폴더 포함)")
+    src.add_argument("--manifest", help='JSONL({"id", "path"}) 또는 한 줄에 경로 하나')
+    ap.add_argument("--out", default="results_batch.jsonl")
+    ap.add_argument("--batch", type=int, default=8)
+    ap.add_argument("--io_workers", type=int, default=4, help="이미지 디코딩 스레드 수")
+    ap.add_argument("--prefetch", type=int, default=4, help="미리 디코딩해 둘 배치 수")
+    ap.add_argument("--bucket_window", type=int, default=8, help="토큰 길이로 정렬할 창 크기 (배치 수 단위)")
+    ap.add_argument("--classify_tokens", type=int, default=16)
+    ap.add_argument("--summary_tokens", type=int, default=512)
+    ap.add_argument("--attn", default=None, help="eager|sdpa|flash_attention_2 (기본: model_loader 설정)")
+    ap.add_argument("--feature_store", action="store_true", help="비전 특징을 공용 저장소에서 읽고/저장")
+    ap.add_argument("--fresh", action="store_true", help="기존 결과 무시하고 처음부터")
+    ap.add_argument("--limit", type=int, default=0)
+    return ap.parse_args(argv)
+
+
+# ------------------------------------------------------------
+# 입력 목록 / 재개
+# ------------------------------------------------------------
+
+def list_documents(args) -> list[dict]:
+    if args.input:
+        root = Path(args.input)
+        paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+        docs = [{"id": str(p.relative_to(root)), "path": str(p)} for p in paths]
+    else:
+        docs = []
+        base = Path(args.manifest).resolve().parent
+        with open(args.manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    row = json.loads(line)
+                    path = row["path"]
+                    doc_id = str(row.get("id", path))
+                else:
+                    path = doc_id = line
+                if not os.path.isabs(path):
+                    path = str(base / path)
+                docs.append({"id": doc_id, "path": path})
+    return docs[:args.limit] if args.limit else docs
+
+
+def load_done(out_path: Path) -> set[str]:
+    done = set()
+    if out_path.exists():
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue  # 중단 시 잘린 마지막 줄
+                if "output" in rec:  # 오류 행은 다음 실행에서 다시 시도
+                    done.add(rec["id"])
+    return done
+
+
+# ------------------------------------------------------------
+# 프리페치 / 길이 버킷
+# ------------------------------------------------------------
+
+def estimate_tokens(w: int, h: int, min_pixels: int, max_pixels: int) -> int:
+    """프로세서 smart_resize와 같은 규칙으로 리사이즈 후 이미지 토큰 수 추정"""
+    hb = max(PATCH, round(h / PATCH) * PATCH)
+    wb = max(PATCH, round(w / PATCH) * PATCH)
+    if hb * wb > max_pixels:
+        beta = math.sqrt(h * w / max_pixels)
+        hb = max(PATCH, math.floor(h / beta / PATCH) * PATCH)
+        wb = max(PATCH, math.floor(w / beta / PATCH) * PATCH)
+    elif hb * wb < min_pixels:
+        beta = math.sqrt(min_pixels / (h * w))
+        hb = math.ceil(h * beta / PATCH) * PATCH
+        wb = math.ceil(w * beta / PATCH) * PATCH
+    return (hb // PATCH) * (wb // PATCH)
+
+
+def _decode(doc: dict, min_pixels: int, max_pixels: int) -> dict:
+    try:
+        with open(doc["path"], "rb") as f:
+            data = f.read()
+        img = Image.open(io.BytesIO(data)).convert("RGB")
+        return dict(doc, image=img, sha256=hashlib.sha256(data).hexdigest(),
+                    tokens=estimate_tokens(img.width, img.height, min_pixels, max_pixels))
+    except Exception as e:
+        return dict(doc, error=f"{type(e).__name__}: {e}")
+
+
+def prefetch(docs, workers: int, lookahead: int, min_pixels: int, max_pixels: int):
+    """입력 순서대로 디코딩 결과를 내보내되, 앞쪽 lookahead개는 항상 스레드 풀에서 미리 처리 중"""
+    it = iter(docs)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = deque(ex.submit(_decode, d, min_pixels, max_pixels) for d in islice(it, lookahead))
+        while futs:
+            fut = futs.popleft()
+            nxt = next(it, None)
+            if nxt is not None:
+                futs.append(ex.submit(_decode, nxt, min_pixels, max_pixels))
+            yield fut.result()
+
+
+def bucketed(decoded, batch: int, window: int):
+    """window개씩 모아 예상 토큰 수로 정렬한 뒤 batch 크기로 자른다 (스트리밍 유지)"""
+    buf = []
+    for d in decoded:
+        buf.append(d)
+        if len(buf) >= batch * window:
+            buf.sort(key=lambda x: x["tokens"])
+            for i in range(0, len(buf), batch):
+                yield buf[i:i + batch]
+            buf = []
+    buf.sort(key=lambda x: x["tokens"])
+    for i in range(0, len(buf), batch):
+        yield buf[i:i + batch]
+
+
+# ------------------------------------------------------------
+# 추론
+# ------------------------------------------------------------
+
+def _sync():
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+def _chat(prompt: str) -> list:
+    return [{"role": "user", "content": [{"type": "image"}, {"type": "text", "text": prompt}]}]
+
+
+def generate(model, processor, prompts, features, max_new_tokens) -> list[str]:
+    texts = [processor.apply_chat_template(_chat(p), tokenize=False, add_generation_prompt=True) for p in prompts]
+    inputs = build_inputs(processor, texts, features, model.device)
+    with torch.no_grad(), use_cached_features(model, features):
+        out = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False)
+    gen = out[:, inputs["input_ids"].shape[1]:]  # 왼쪽 패딩이라 프롬프트 길이가 행마다 같음
+    return [t.strip() for t in processor.batch_decode(gen, skip_special_tokens=True, clean_up_tokenization_spaces=False)]
+
+
+def run_batch(model, processor, store, docs: list[dict], classify_tokens: int, summary_tokens: int):
+    """(결과 행 목록, 단계별 시간)"""
+    stages = {}
+    images = [d["image"] for d in docs]
+
+    _sync(); t = time.perf_counter()
+    if store is not None:
+        feats = get_or_extract(store, model, processor, {d["sha256"]: d["image"] for d in docs})
+        features = [feats[d["sha256"]] for d in docs]
+    else:
+        features = extract_features(model, processor, images)
+    _sync(); stages["vision"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    labels = generate(model, processor, [DOC_TYPE_PROMPT] * len(docs), features, classify_tokens)
+    doc_types = [normalize_doc_type(x) for x in labels]
+    _sync(); stages["classify"] = time.perf_counter() - t
+
+    # 유형별 프롬프트는 길이가 달라서 같은 유형끼리 묶어 요약 (프롬프트 패딩 최소화)
+    t = time.perf_counter()
+    outputs = [None] * len(docs)
+    for doc_type in dict.fromkeys(doc_types):
+        idx = [i for i, x in enumerate(doc_types) if x == doc_type]
+        prompt = PROMPT_MAP.get(doc_type, ELSE_PROMPT)
+        res = generate(model, processor, [prompt] * len(idx), [features[i] for i in idx], summary_tokens)
+        for i, r in zip(idx, res):
+            outputs[i] = r
+    _sync(); stages["summarize"] = time.perf_counter() - t
+
+    per_image = sum(stages.values()) / len(docs)
+    records = [
+        {
+            "id": d["id"],
+            "path": d["path"],
+            "sha256": d["sha256"],
+            "doc_type": dt,
+            "doc_type_raw": raw,
+            "output": out,
+            "infer_time": round(per_image, 3),
+            "batch_size": len(docs),
+        }
+        for d, dt, raw, out in zip(docs, doc_types, labels, outputs)
+    ]
+    return records, stages
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_path = Path(args.out)
+
+    docs = list_documents(args)
+    if args.fresh and out_path.exists():
+        out_path.unlink()
+    done = load_done(out_path)
+    pending = [d for d in docs if d["id"] not in done]
+    print(f"[batch] 문서 {len(docs)}개 / 완료 {len(docs) - len(pending)} / 남음 {len(pending)}")
+    if not pending:
+        return
+
+    t_load = time.perf_counter()
+    model = (get_model(args.attn) if args.attn else get_model()).eval()
+    processor = get_processor()
+    print(f"✅ 모델 로드 완료 ({time.perf_counter() - t_load:.1f}s, 디바이스: {model.device})")
+    store = VisionFeatureStore.for_model(model, processor) if args.feature_store else None
+    ip = processor.image_processor
+    min_px, max_px = ip.min_pixels, ip.max_pixels
+
+    decoded = prefetch(pending, args.io_workers, args.batch * args.prefetch, min_px, max_px)
+    totals = {"vision": 0.0, "classify": 0.0, "summarize": 0.0}
+    n_ok = n_err = 0
+    t0 = time.perf_counter()
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        def write(rec):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+
+        def good_only(items):
+            nonlocal n_err
+            for d in items:
+                if "error" in d:
+                    n_err += 1
+                    print(f"⚠️ 이미지 열기 실패: {d['path']} - {d['error']}")
+                    write({"id": d["id"], "path": d["path"], "error": d["error"]})
+                else:
+                    yield d
+
+        for bucket in bucketed(good_only(decoded), args.batch, args.bucket_window):
+            stack = [bucket]  # OOM이면 반으로 나눠 다시 쌓음
+            while stack:
+                batch = stack.pop()
+                try:
+                    records, stages = run_batch(
+                        model, processor, store, batch, args.classify_tokens, args.summary_tokens
+                    )
+                except torch.cuda.OutOfMemoryError:
+                    torch.cuda.empty_cache()
+                    if len(batch) == 1:
+                        n_err += 1
+                        print(f"💥 CUDA OOM — {batch[0]['id']} 건너뜀")
+                        write({"id": batch[0]["id"], "path": batch[0]["path"], "error": "CUDA OOM"})
+                        continue
+                    half = len(batch) // 2
+                    print(f"💥 CUDA OOM — 배치 {len(batch)} → {half}/{len(batch) - half}로 나눠 재시도")
+                    stack.extend([batch[half:], batch[:half]])
+                    continue
+                except Exception as e:
+                    # 문서 하나의 문제(깨진 이미지 특징, 토큰 길이 등)가 배치 전체를 죽이지 않게:
+                    # 반으로 나눠 원인 문서만 오류 행으로 남기고 나머지는 계속 (오류 행은 다음 실행에서 재시도)
+                    if len(batch) == 1:
+                        n_err += 1
+                        err = f"{type(e).__name__}: {e}"
+                        print(f"❌ 처리 실패 — {batch[0]['id']}: {err}")
+                        write({"id": batch[0]["id"], "path": batch[0]["path"], "error": err})
+                        continue
+                    half = len(batch) // 2
+                    print(f"❌ 배치 {len(batch)} 실패({type(e).__name__}) → {half}/{len(batch) - half}로 나눠 재시도")
+                    stack.extend([batch[half:], batch[:half]])
+                    continue
+
+                for rec in records:
+                    write(rec)
+                for k, v in stages.items():
+                    totals[k] += v
+                n_ok += len(records)
+                el = time.perf_counter() - t0
+                print(f"📝 {n_ok}/{len(pending)}  배치 {len(batch)}  "
+                      + " ".join(f"{k}={v:.2f}s" for k, v in stages.items())
+                      + f"  누적 {n_ok / el:.3f} images/s")
+
+    wall = time.perf_counter() - t0
+    report = {
+        "images": n_ok,
+        "errors": n_err,
+        "wall_sec": round(wall, 2),
+        "images_per_sec": round(n_ok / wall, 4) if wall > 0 else 0.0,
+        "stage_sec": {k: round(v, 2) for k, v in totals.items()},
+        "batch": args.batch,
+        "feature_store": store.stats if store is not None else None,
+    }
+    Path(str(out_path) + ".stats.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+# ai/qwen/bench_infer.py
+#
+# Qwen2.5-VL 추론 벤치마크 (qwen_compare.py / qwen_final.py / comparison_time.py / trans_infer_time.py 대체).
+#   설정 행렬: attention 구현 × dtype × 양자화 × 배치 크기 × max_new_tokens × 이미지 픽셀 예산 × 작업(분류/요약)
+#   설정마다 워밍업 후 반복 측정 → prefill(첫 토큰까지) / decode / 전체 시간의 p50·p90·p99,
+#   tokens/sec, 최대 메모리를 JSON으로 저장하고, 저장된 기준(baseline) 결과와 비교해 회귀를 표시한다.
+#   모델은 (dtype, quant) 조합마다 한 번만 올리고, attention 구현은 같은 가중치에서 전환한다 (재로딩 없음).
+#
+# 실행 예:
+#   python bench_infer.py --attn sdpa,flash_attention_2 --batch 1,4 --max_new_tokens 64,256
+#   python bench_infer.py --dtype float16,bfloat16 --quant none,4bit --out bench/fp16_vs_4bit.json
+#   python bench_infer.py --baseline bench/baseline.json --fail_on_regression     # 회귀 시 종료코드 1
+#   python bench_infer.py --tiny                                                  # CI용 초소형 모델, CPU
+
+import argparse
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import torch
+from PIL import Image
+from transformers import AutoProcessor, Qwen2_5_VLForConditionalGeneration
+from transformers.generation.streamers import BaseStreamer
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "backend"))  # langserve_app.attention
+from langserve_app.attention import use_attention
+
+from prompts import DOC_TYPE_PROMPT, ELSE_PROMPT, PROMPT_MAP, domain_from_image_name
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+IMAGE_DIR = BASE_DIR / "data" / "img"
+MODEL_ID = os.environ.get("QWEN_MODEL_ID", "Qwen/Qwen2.5-VL-7B-Instruct")
+TINY_MODEL_ID = os.environ.get("BENCH_TINY_MODEL", "trl-internal-testing/tiny-Qwen2_5_VLForConditionalGeneration")
+
+DTYPES = {"float16": torch.float16, "bfloat16": torch.bfloat16, "float32": torch.float32}
+PATCH = 28  # Qwen2.5-VL: 14px 패치 2×2 병합 → 28px 격자
+
+# 회귀 판정 지표: (경로, 높을수록 좋은지)
+REGRESSION_METRICS = [
+    ("e2e_s.p50", False),
+    ("e2e_s.p90", False),
+    ("prefill_s.p50", False),
+    ("decode_tok_s.p50", True),
+    ("peak_mem_mb", False),
+]
+
+
+def _csv(cast=str):
+    return lambda s: [cast(x.strip()) for x in s.split(",") if x.strip()]
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Qwen2.5-VL 추론 벤치마크")
+    ap.add_argument("--attn", type=_csv(), default=["sdpa"], help="eager,sdpa,flash_attention_2")
+    ap.add_argument("--dtype", type=_csv(), default=["float16"], help="float16,bfloat16,float32")
+    ap.add_argument("--quant", type=_csv(), default=["none"], help="none,8bit,4bit (bitsandbytes)")
+    ap.add_argument("--batch", type=_csv(int), default=[1])
+    ap.add_argument("--max_new_tokens", type=_csv(int), default=[256])
+    ap.add_argument("--max_pixels", type=_csv(int), default=[1280 * 28 * 28],
+                    help="이미지 픽셀 예산 (초과하면 28px 격자에 맞춰 축소)")
+    ap.add_argument("--task", type=_csv(), default=["classify", "summarize"])
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--trials", type=int, default=3, help="설정마다 반복 횟수 (한 번에 --images 장을 모두 돈다)")
+    ap.add_argument("--images", type=int, default=8, help="data/img에서 사용할 이미지 수")
+    ap.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    ap.add_argument("--tiny", action="store_true",
+                    help="초소형 랜덤 모델 + CPU + float32 (CI 스모크 테스트용, 수치 의미 없음)")
+    ap.add_argument("--out", type=str, default=None, help="결과 JSON 경로 (기본: bench/{시각}.json)")
+    ap.add_argument("--baseline", type=str, default=None, help="비교할 기준 결과 JSON")
+    ap.add_argument("--save_baseline", type=str, default=None, help="이번 결과를 기준 파일로도 저장")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="회귀 허용 비율 (0.10 = 10%%)")
+    ap.add_argument("--fail_on_regression", action="store_true")
+    args = ap.parse_args(argv)
+    if args.tiny:
+        args.device = "cpu"
+        args.dtype = ["float32"]
+        args.quant = ["none"]
+        args.attn = [a for a in args.attn if a != "flash_attention_2"] or ["sdpa"]
+        args.max_pixels = [min(p, 8 * PATCH * PATCH) for p in args.max_pixels]
+        args.max_new_tokens = [min(n, 16) for n in args.max_new_tokens]
+        args.images = min(args.images, 2)
+    return args
+
+
+# ------------------------------------------------------------
+# 통계
+# ------------------------------------------------------------
+
+def percentile(xs, q: float) -> float | None:
+    """선형 보간 백분위 (numpy.percentile 기본과 동일). 빈 목록이면 None (JSON에 NaN 대신 null)"""
+    if not xs:
+        return None
+    s = sorted(xs)
+    k = (len(s) - 1) * q / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def summarize(xs) -> dict:
+    return {
+        "p50": percentile(xs, 50),
+        "p90": percentile(xs, 90),
+        "p99": percentile(xs, 99),
+        "mean": sum(xs) / len(xs) if xs else None,
+        "n": len(xs),
+    }
+
+
+def _get(d: dict, path: str):
+    for k in path.split("."):
+        if not isinstance(d, dict) or k not in d:
+            return None
+        d = d[k]
+    return d
+
+
+# ------------------------------------------------------------
+# 모델/입력
+# ------------------------------------------------------------
+
+def load_model(model_id: str, attn: str, dtype: str, quant: str, device: str):
+    kwargs = dict(torch_dtype=DTYPES[dtype], attn_implementation=attn)
+    if quant in ("4bit", "8bit"):
+        from transformers import BitsAndBytesConfig
+
+        kwargs["quantization_config"] = (
+            BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_compute_dtype=DTYPES[dtype], bnb_4bit_quant_type="nf4")
+            if quant == "4bit" else BitsAndBytesConfig(load_in_8bit=True)
+        )
+    elif quant != "none":
+        raise ValueError(f"unknown quant: {quant}")
+    kwargs["device_map"] = {"": device}
+    model = Qwen2_5_VLForConditionalGeneration.from_pretrained(model_id, **kwargs)
+    return model.eval()
+
+
+def free_model(model):
+    del model
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def fit_pixels(img: Image.Image, max_pixels: int) -> Image.Image:
+    """w*h가 예산 이하가 되도록 28px 격자에 맞춰 축소 (프로세서 smart_resize와 같은 격자)"""
+    w, h = img.size
+    if w * h <= max_pixels and w % PATCH == 0 and h % PATCH == 0:
+        return img
+    scale = min(1.0, math.sqrt(max_pixels / (w * h)))
+    nw = max(PATCH, int(w * scale) // PATCH * PATCH)
+    nh = max(PATCH, int(h * scale) // PATCH * PATCH)
+    return img.resize((nw, nh), Image.BICUBIC)
+
+
+def load_images(n: int, tiny: bool):
+    files = sorted(list(IMAGE_DIR.glob("*.jpg")) + list(IMAGE_DIR.glob("*.png")))[:n]
+    out = []
+    for p in files:
+        with Image.open(p) as im:
+            out.append((p.name, im.convert("RGB")))
+    if not out and tiny:
+        out = [("synthetic.png", Image.new("RGB", (224, 224), "white"))]
+    if not out:
+        raise SystemExit(f"이미지가 없습니다: {IMAGE_DIR}")
+    return out
+
+
+def build_batch(processor, images, task: str, max_pixels: int, device: str):
+    texts, pil = [], []
+    for name, img in images:
+        img = fit_pixels(img, max_pixels)
+        prompt = DOC_TYPE_PROMPT if task == "classify" else PROMPT_MAP.get(domain_from_image_name(name), ELSE_PROMPT)
+        messages = [{"role": "user", "content": [
+            {"type": "image", "image": img},
+            {"type": "text", "text": prompt},
+        ]}]
+        texts.append(processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True))
+        pil.append(img)
+    return processor(text=texts, images=pil, padding=True, return_tensors="pt").to(device)
+
+
+# ------------------------------------------------------------
+# 측정
+# ------------------------------------------------------------
+
+def _sync(device: str):
+    if device.startswith("cuda"):
+        torch.cuda.synchronize()
+
+
+class StepTimer(BaseStreamer):
+    """generate()가 토큰을 내보낼 때 호출됨. 첫 호출은 프롬프트, 두 번째 호출이 첫 생성 토큰(= prefill 끝)"""
+
+    def __init__(self, device: str):
+        self.device = device
+        self.prompt_seen = False
+        self.t_first = None
+
+    def put(self, value):
+        if not self.prompt_seen:
+            self.prompt_seen = True
+        elif self.t_first is None:
+            _sync(self.device)
+            self.t_first = time.perf_counter()
+
+    def end(self):
+        pass
+
+
+def run_once(model, processor, inputs, max_new_tokens: int, device: str) -> dict:
+    pad_id = processor.tokenizer.pad_token_id
+    timer = StepTimer(device)
+    if device.startswith("cuda"):
+        torch.cuda.reset_peak_memory_stats()
+    _sync(device)
+    t0 = time.perf_counter()
+    with torch.no_grad():
+        out = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False, streamer=timer)
+    _sync(device)
+    t1 = time.perf_counter()
+
+    gen = out[:, inputs["input_ids"].shape[1]:]
+    new_tokens = int((gen != pad_id).sum()) if pad_id is not None else gen.numel()
+    batch = gen.shape[0]
+    t_first = timer.t_first or t1
+    prefill, decode = t_first - t0, t1 - t_first
+    if device.startswith("cuda"):
+        peak_mb = torch.cuda.max_memory_allocated() / 2**20
+    else:
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # 프로세스 최대 RSS (Linux: KB)
+    return {
+        "prefill_s": prefill,
+        "decode_s": decode,
+        "e2e_s": t1 - t0,
+        "input_tokens": int(inputs["attention_mask"].sum()),
+        "new_tokens": new_tokens,
+        # 첫 토큰은 prefill에 포함되므로 decode 처리량에서는 배치당 1개씩 뺀다
+        "decode_tok_s": (new_tokens - batch) / decode if decode > 0 and new_tokens > batch else 0.0,
+        "e2e_tok_s": new_tokens / (t1 - t0),
+        "peak_mem_mb": peak_mb,
+    }
+
+
+def config_key(cfg: dict) -> str:
+    return ",".join(f"{k}={cfg[k]}" for k in
+                    ("attn", "dtype", "quant", "task", "batch", "max_new_tokens", "max_pixels"))
+
+
+def bench_config(model, processor, images, cfg: dict, args) -> dict:
+    b = cfg["batch"]
+    # 이미지를 배치 크기만큼 순환해서 묶음 (마지막 배치도 꽉 채움)
+    batches = [[images[(i + j) % len(images)] for j in range(b)] for i in range(0, len(images), b)]
+    for _ in range(args.warmup):
+        inputs = build_batch(processor, batches[0], cfg["task"], cfg["max_pixels"], args.device)
+        run_once(model, processor, inputs, cfg["max_new_tokens"], args.device)
+
+    runs = []
+    for _ in range(args.trials):
+        for batch in batches:
+            inputs = build_batch(processor, batch, cfg["task"], cfg["max_pixels"], args.device)
+            runs.append(run_once(model, processor, inputs, cfg["max_new_tokens"], args.device))
+
+    res = {"key": config_key(cfg), "config": cfg, "runs": len(runs)}
+    for m in ("prefill_s", "decode_s", "e2e_s", "decode_tok_s", "e2e_tok_s"):
+        res[m] = summarize([r[m] for r in runs])
+    res["input_tokens"] = sum(r["input_tokens"] for r in runs) / len(runs)
+    res["new_tokens"] = sum(r["new_tokens"] for r in runs) / len(runs)
+    res["peak_mem_mb"] = max(r["peak_mem_mb"] for r in runs)
+    return res
+
+
+# ------------------------------------------------------------
+# 기준 비교
+# ------------------------------------------------------------
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """같은 key끼리 지표 비교. 허용치보다 나빠진 항목 목록을 반환"""
+    base = {r["key"]: r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    for r in results:
+        b = base.get(r["key"])
+        if b is None or "error" in r:
+            continue
+        for path, higher_is_better in REGRESSION_METRICS:
+            new, old = _get(r, path), _get(b, path)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            r.setdefault("vs_baseline", {})[path] = round(change, 4)
+            if worse > tolerance:
+                regressions.append({"key": r["key"], "metric": path, "baseline": old, "current": new,
+                                    "change": round(change, 4)})
+    return regressions
+
+
+def print_table(results: list):
+    print(f"\n{'config':<88} {'prefill p50':>11} {'e2e p50':>8} {'e2e p90':>8} {'e2e p99':>8} {'dec tok/s':>9} {'mem MB':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['key']:<88} ❌ {r['error']}")
+            continue
+        print(f"{r['key']:<88} {r['prefill_s']['p50']:>11.3f} {r['e2e_s']['p50']:>8.3f} {r['e2e_s']['p90']:>8.3f} "
+              f"{r['e2e_s']['p99']:>8.3f} {r['decode_tok_s']['p50']:>9.1f} {r['peak_mem_mb']:>8.0f}")
+
+
+def environment(args, model_id: str) -> dict:
+    import transformers
+
+    env = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "model": model_id,
+        "tiny": args.tiny,
+        "device": args.device,
+        "warmup": args.warmup,
+        "trials": args.trials,
+        "images": args.images,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+    }
+    if args.device.startswith("cuda"):
+        env["gpu"] = torch.cuda.get_device_name(0)
+    return env
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_id = TINY_MODEL_ID if args.tiny else MODEL_ID
+    processor = AutoProcessor.from_pretrained(model_id, use_fast=True)
+    processor.tokenizer.padding_side = "left"  # 배치 생성은 왼쪽 패딩
+    images = load_images(args.images, args.tiny)
+
+    results = []
+    axes = list(itertools.product(args.task, args.batch, args.max_new_tokens, args.max_pixels))
+    for dtype, quant in itertools.product(args.dtype, args.quant):
+        try:
+            model = load_model(model_id, "sdpa", dtype, quant, args.device)  # 어디서나 로드 가능한 구현으로 올리고 전환
+        except Exception as e:
+            print(f"❌ 모델 로드 실패 (dtype={dtype} quant={quant}): {e}", flush=True)
+            results.extend(
+                {"key": config_key(c), "config": c, "error": f"load: {e}"}
+                for c in (dict(attn=a, dtype=dtype, quant=quant, task=t, batch=b, max_new_tokens=n, max_pixels=p)
+                          for a in args.attn for t, b, n, p in axes)
+            )
+            continue
+        for attn in args.attn:
+            cfgs = [dict(attn=attn, dtype=dtype, quant=quant, task=t, batch=b, max_new_tokens=n, max_pixels=p)
+                    for t, b, n, p in axes]
+            print(f"\n=== attn={attn} dtype={dtype} quant={quant} ({len(cfgs)}개 설정) ===", flush=True)
+            try:
+                with use_attention(model, attn):
+                    for cfg in cfgs:
+                        try:
+                            res = bench_config(model, processor, images, cfg, args)
+                            print(f"  {res['key']}  e2e p50={res['e2e_s']['p50']:.3f}s", flush=True)
+                        except Exception as e:  # OOM 등은 기록하고 다음 설정으로
+                            res = {"key": config_key(cfg), "config": cfg, "error": str(e)}
+                            print(f"  {res['key']}  ❌ {e}", flush=True)
+                            if args.device.startswith("cuda"):
+                                torch.cuda.empty_cache()
+                        results.append(res)
+            except ValueError as e:  # 전환 불가 (flash-attn 미설치 등)
+                print(f"❌ attention 전환 실패: {e}", flush=True)
+                results.extend({"key": config_key(c), "config": c, "error": f"attn: {e}"} for c in cfgs)
+        free_model(model)
+
+    report = {"env": environment(args, model_id), "results": results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "regressions": regressions}
+
+    print_table(results)
+    out = Path(args.out) if args.out else Path(__file__).resolve().parent / "bench" / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n✅ 결과 저장: {out}")
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"✅ 기준 저장: {args.save_baseline}")
+
+    if regressions:
+        print(f"\n⚠️ 기준 대비 회귀 {len(regressions)}건 (허용 {args.tolerance:.0%})")
+        for r in regressions:
+            print(f"  {r['key']}  {r['metric']}: {r['baseline']:.4g} → {r['current']:.4g} ({r['change']:+.1%})")
+        if args.fail_on_regression:
+            sys.exit(1)
+    elif args.baseline:
+        print("기준 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
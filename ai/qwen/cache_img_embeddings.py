@@ -1,39 +1,92 @@
+# ai/qwen/cache_img_embeddings.py
+#
+# 이미지 폴더의 비전 타워 출력(이미지 임베딩)을 미리 계산해 공용 feature store에 저장.
+# 저장소 형식/키는 backend/data_store/vision_features.py 참고 (이미지 sha256 + 모델/프로세서/dtype 버전).
+# 백엔드 세션과 qwen_test.py 등 평가 스크립트가 같은 저장소(VISION_CACHE_DIR)에서 읽는다.
+#
+# 사용:
+#   python cache_img_embeddings.py                       # ai/data/img/*.jpg|png
+#   python cache_img_embeddings.py --images /path/to/img --batch 16 --max_pixels 1003520
+#   python cache_img_embeddings.py --loader backend      # 백엔드 모델(bf16 + 어댑터) 기준으로 미리 채움
+#   python cache_img_embeddings.py --validate            # 저장소 무결성만 확인
+
+import argparse
 import sys
+import time
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR.parent / "backend"))  # data_store
 
-from PIL import Image      # ✅ 이거 꼭 필요
-import torch
+from PIL import Image
 from tqdm import tqdm
 
-from model_loader import get_model, get_processor
-from qwen_vl_utils import process_vision_info
+from data_store.vision_features import VisionFeatureStore, extract_features, image_key_for_path
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", default=str(ROOT_DIR / "data" / "img"))
+    ap.add_argument("--store", default=None, help="저장소 루트 (기본: VISION_CACHE_DIR)")
+    ap.add_argument("--batch", type=int, default=8, help="비전 타워 1회 호출에 묶을 이미지 수")
+    ap.add_argument("--loader", choices=["ai", "backend"], default="ai",
+                    help="ai: ai/qwen/model_loader (평가용), backend: langserve_app.model_loader (서비스용)")
+    ap.add_argument("--min_pixels", type=int, default=None, help="지정 시 프로세서 기본값 대신 사용 (버전 키가 달라짐)")
+    ap.add_argument("--max_pixels", type=int, default=None)
+    ap.add_argument("--validate", action="store_true")
+    return ap.parse_args()
 
 
-# 경로 설정
-base_dir = Path(__file__).resolve().parent.parent
-image_dir = base_dir / "data" / "img"
-save_dir = base_dir / "qwen" / "cached_embeds"
-save_dir.mkdir(parents=True, exist_ok=True)
+def main():
+    args = parse_args()
+    if args.loader == "backend":
+        from langserve_app.model_loader import get_model, get_processor
+    else:
+        from model_loader import get_model, get_processor
+    model = get_model()
+    processor = get_processor()
+    # 해상도 제한은 image_processor에 걸어야 실제로 적용되고, 버전 키에도 반영된다
+    ip = processor.image_processor
+    if args.min_pixels or args.max_pixels:
+        ip.min_pixels = args.min_pixels or ip.min_pixels
+        ip.max_pixels = args.max_pixels or ip.max_pixels
+        ip.size = {"shortest_edge": ip.min_pixels, "longest_edge": ip.max_pixels}
 
-# 모델과 프로세서 로딩 (재사용 가능하게)
-model = get_model()
-processor = get_processor()
+    store = VisionFeatureStore.for_model(model, processor, args.store)
+    print(f"[store] {store.dir}  (기존 {len(store)}개)")
+    if args.validate:
+        problems = store.validate(ip.merge_size)
+        print("\n".join(problems) if problems else "✅ 이상 없음")
+        return
 
-# processor pixel 제한 설정
-processor.min_pixels = 256 * 14 * 14
-processor.max_pixels = 1280 * 14 * 14
+    image_dir = Path(args.images)
+    paths = sorted(list(image_dir.glob("*.jpg")) + list(image_dir.glob("*.png")))
+    todo = []
+    for p in paths:
+        key = image_key_for_path(p)
+        if key not in store:
+            todo.append((key, p))
+    print(f"[store] 이미지 {len(paths)}개 중 새로 계산 {len(todo)}개")
 
-# 캐싱 루프
-image_files = list(image_dir.glob("*.jpg"))
+    # 비슷한 크기끼리 묶음 (배치 안 패치 수 편차 감소)
+    def area(item):
+        with Image.open(item[1]) as im:
+            return im.size[0] * im.size[1]
+    todo.sort(key=area)
 
-for img_path in tqdm(image_files, desc="이미지 임베딩 캐싱 중"):
-    image = Image.open(img_path).convert("RGB")
+    start, done = time.time(), 0
+    for i in tqdm(range(0, len(todo), args.batch), desc="이미지 임베딩 캐싱 중"):
+        chunk = todo[i:i + args.batch]
+        images = [Image.open(p).convert("RGB") for _, p in chunk]
+        feats = extract_features(model, processor, images)
+        store.put_many({key: f for (key, _), f in zip(chunk, feats)})
+        done += len(chunk)
 
-    with torch.no_grad():
-        image_inputs, _ = process_vision_info(image)
+    if done:
+        el = time.time() - start
+        print(f"✅ {done}개 저장 ({el:.1f}s, {done / el:.2f} images/s) → {store.dir}")
 
-    torch.save(image_inputs, save_dir / f"{img_path.stem}.pt")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# ai/qwen/fake_judge.py
+#
+# OpenAI chat.completions를 흉내 내는 로컬 심사(judge) 서버 (qwen_test_LLM_as_judge.py 오프라인 실행용).
+#   POST /v1/chat/completions → 시스템 프롬프트가 Aggregator면 4개 항목 점수 JSON, 아니면 {"score", "comment"} JSON
+# 점수는 (시스템 프롬프트, 요약) 해시로 정해지므로 같은 입력이면 항상 같은 결과.
+# latency: 응답 지연(초), fail_every=N: N번째 요청마다 429 (재시도 경로 확인용)
+#
+# 단독 실행: python fake_judge.py --port 8089
+#   → OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python qwen_test_LLM_as_judge.py
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AGG_KEYS = ["설명력", "이해도", "정서적 배려", "논리 정확성"]
+
+
+def _score(*parts: str) -> int:
+    h = hashlib.sha256("\0".join(parts).encode("utf-8")).digest()
+    return 50 + h[0] % 51  # 50~100
+
+
+def judge_reply(system: str, user: str) -> str:
+    if "Aggregator" in system:
+        try:
+            agents = json.loads(user).get("agents", [])
+            base = sum(a["score"] for a in agents if a["score"] >= 0) / max(1, len(agents))
+        except Exception:
+            base = 70
+        out = {k: int(min(100, max(0, base + (_score(k, user) - 75) / 5))) for k in AGG_KEYS}
+        out["comment"] = "무난한 설명"
+        return json.dumps(out, ensure_ascii=False)
+    return json.dumps({"score": _score(system, user), "comment": "이해하기 쉬움"}, ensure_ascii=False)
+
+
+class FakeJudge:
+    def __init__(self, latency: float = 0.0, fail_every: int = 0, port: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        judge = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with judge._lock:
+                    judge.requests += 1
+                    n = judge.requests
+                    judge._in_flight += 1
+                    judge.max_in_flight = max(judge.max_in_flight, judge._in_flight)
+                try:
+                    if judge.latency:
+                        time.sleep(judge.latency)
+                    if judge.fail_every and n % judge.fail_every == 0:
+                        return self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}})
+                    msgs = body.get("messages", [])
+                    system = next((m["content"] for m in msgs if m["role"] == "system"), "")
+                    user = msgs[-1]["content"] if msgs else ""
+                    content = judge_reply(system, user)
+                    prompt_tokens = (len(system) + len(user)) // 2  # 한국어 대략 2자/토큰
+                    completion_tokens = len(content) // 2
+                    return self._send(200, {
+                        "id": f"chatcmpl-fake-{n}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                  "total_tokens": prompt_tokens + completion_tokens},
+                    })
+                finally:
+                    with judge._lock:
+                        judge._in_flight -= 1
+
+            def _send(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.3)
+    ap.add_argument("--fail_every", type=int, default=0)
+    a = ap.parse_args()
+    with FakeJudge(a.latency, a.fail_every, a.port) as fj:
+        print(f"fake judge: {fj.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -21,13 +21,19 @@ fill_ocr_and_generate_dpo_v2.py
   python fill_ocr_and_generate_dpo_v2.py
   python fill_ocr_and_generate_dpo_v2.py --auto_pairs
   python fill_ocr_and_generate_dpo_v2.py --ocr_csv ../data/ocr_texts.csv
+  python fill_ocr_and_generate_dpo_v2.py --auto_pairs --stream --workers 8
+  python fill_ocr_and_generate_dpo_v2.py --auto_pairs --stream --resume      # 중단된 지점부터
+  python fill_ocr_and_generate_dpo_v2.py --benchmark 100000
 """
 
 import argparse
 import csv
 import json
+import multiprocessing as mp
 import os
 import re
+import threading
+import time
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -53,6 +59,19 @@ def parse_args():
                     help="DPO chosen/rejected를 규칙기반으로 자동 생성(없을 때만)")
     ap.add_argument("--overwrite", action="store_true",
                     help="출력 파일이 있어도 덮어쓰기")
+    ap.add_argument("--out_sft", type=str, default=OUT_SFT)
+    ap.add_argument("--out_dpo", type=str, default=OUT_DPO)
+    # 스트리밍 모드
+    ap.add_argument("--stream", action="store_true",
+                    help="줄 단위 스트리밍 + 프로세스 풀 처리, 출력은 순서대로 바로 기록")
+    ap.add_argument("--workers", type=int, default=0, help="워커 프로세스 수 (0=CPU 수)")
+    ap.add_argument("--chunksize", type=int, default=256)
+    ap.add_argument("--checkpoint_every", type=int, default=10_000,
+                    help="이 줄 수마다 출력 fsync + 체크포인트 기록")
+    ap.add_argument("--resume", action="store_true",
+                    help="--stream: 체크포인트(출력파일.ckpt.json)부터 이어서 처리")
+    ap.add_argument("--benchmark", type=int, default=0,
+                    help="합성 데이터 N행으로 기존/스트리밍 모드 속도 비교 후 종료")
     return ap.parse_args()
 
 # ------------------------------------------------------------
@@ -131,13 +150,15 @@ def load_ocr_map(ocr_csv: Path) -> Dict[str, str]:
                 by_num[n] = (fn, txt)
     return {"__EXACT__": exact, "__BYNUM__": {k:v[1] for k,v in by_num.items()}}
 
+_source_tag_re = re.compile(r"source_image=([^)]+)\)")
+_img_name_re = re.compile(r"([A-Za-z0-9_\-\/.]*img[_-]?\d+\.(?:png|jpg|jpeg))", re.IGNORECASE)
 def get_filename_from_text(txt: str) -> Optional[str]:
     # (source_image=...) 꼬리표
-    m = re.search(r"source_image=([^)]+)\)", txt or "")
+    m = _source_tag_re.search(txt or "")
     if m:
         return m.group(1)
     # img_###.ext 패턴
-    m = re.search(r"([A-Za-z0-9_\-\/.]*img[_-]?\d+\.(?:png|jpg|jpeg))", txt or "", re.IGNORECASE)
+    m = _img_name_re.search(txt or "")
     if m:
         return os.path.basename(m.group(1))
     return None
@@ -170,38 +191,43 @@ def kr_digit_group_readable(n: int) -> str:
 
 _money_re = re.compile(r"(?P<num>\d{1,3}(?:,\d{3})+|\d+)\s*원")
 
+def _money_rep(m):
+    num = m.group("num").replace(",", "")
+    try:
+        val = int(num)
+    except:
+        return m.group(0)
+    return f"{kr_digit_group_readable(val)}원"
+
 def to_readable_money(expr: str) -> str:
     """
     "117,430원" -> "11만 7천 430원"
     """
-    def _rep(m):
-        num = m.group("num").replace(",", "")
-        try:
-            val = int(num)
-        except:
-            return m.group(0)
-        return f"{kr_digit_group_readable(val)}원"
-    return _money_re.sub(_rep, expr)
+    return _money_re.sub(_money_rep, expr)
 
 _time_re = re.compile(r"\b(?P<h>\d{1,2}):(?P<m>\d{2})\b")
+def _time_rep(m):
+    h = int(m.group("h")); mnt = int(m.group("m"))
+    ap = "오전" if h < 12 else "오후"
+    h12 = h if 1 <= h <= 12 else (h-12 if h>12 else 12)
+    if mnt == 0:
+        return f"{ap} {h12}시"
+    return f"{ap} {h12}시 {mnt}분"
+
 def to_readable_time(s: str) -> str:
     """
     09:30 -> 오전 9시 30분 / 13:05 -> 오후 1시 5분
     """
-    def _rep(m):
-        h = int(m.group("h")); mnt = int(m.group("m"))
-        ap = "오전" if h < 12 else "오후"
-        h12 = h if 1 <= h <= 12 else (h-12 if h>12 else 12)
-        if mnt == 0:
-            return f"{ap} {h12}시"
-        return f"{ap} {h12}시 {mnt}분"
-    return _time_re.sub(_rep, s)
+    return _time_re.sub(_time_rep, s)
 
 _date1 = re.compile(r"(?P<y>20\d{2})[./-]\s*(?P<m>\d{1,2})[./-]\s*(?P<d>\d{1,2})")
 _date2 = re.compile(r"(?P<m>\d{1,2})\s*월\s*(?P<d>\d{1,2})\s*일")
+def _date_rep(m):
+    return f"{int(m.group('m'))}월 {int(m.group('d'))}일"
+
 def to_readable_date(s: str) -> str:
-    s = _date1.sub(lambda m: f"{int(m.group('m'))}월 {int(m.group('d'))}일", s)
-    s = _date2.sub(lambda m: f"{int(m.group('m'))}월 {int(m.group('d'))}일", s)
+    s = _date1.sub(_date_rep, s)
+    s = _date2.sub(_date_rep, s)
     return s
 
 def normalize_read_friendly(s: str) -> str:
@@ -224,19 +250,21 @@ def find_first_money(text: str, keywords: Tuple[str,...]=()) -> Optional[str]:
     m = _money_re.search(text)
     return m.group(0) if m else None
 
+_bare_month_day_re = re.compile(r"\b월\s*\d{1,2}\s*일\b")
+_month_day_re = re.compile(r"\d{1,2}\s*월\s*\d{1,2}\s*일")
 def find_date_like(text: str, keywords: Tuple[str,...]=()) -> Optional[str]:
     cand = None
     for line in text.splitlines():
         if keywords and not any(k in line for k in keywords):
             continue
         s = to_readable_date(line)
-        if re.search(r"\b월\s*\d{1,2}\s*일\b", s):
-            cand = re.search(r"\d{1,2}\s*월\s*\d{1,2}\s*일", s)
+        if _bare_month_day_re.search(s):
+            cand = _month_day_re.search(s)
             if cand:
                 return cand.group(0)
     # 전체에서 검색
     s = to_readable_date(text)
-    m = re.search(r"\d{1,2}\s*월\s*\d{1,2}\s*일", s)
+    m = _month_day_re.search(s)
     return m.group(0) if m else None
 
 _phone = re.compile(r"\b\d{2,3}-\d{3,4}-\d{4}\b")
@@ -338,93 +366,479 @@ def build_rejected_summary(text: str, domain: str) -> str:
         return f"{subj} 관련 안내. 한도, 금리, 기한 잘 모름. 필요하면 검색."
     return "안내 있음. 끝."
 
+# ------------------------------------------------------------
+# 단일 패스 스캔 (스트리밍 모드용)
+#   위 추출/정규화 함수들은 문서 하나에 정규식을 여러 번(라인별 포함) 돌린다.
+#   금액/시간/날짜/전화 패턴을 lookahead 하나로 합쳐 문서당 한 번만 훑고,
+#   그 위치 정보로 같은 결과를 만든다. 패턴끼리 겹치거나 맞닿으면(드묾) 기존 함수로 계산.
+# ------------------------------------------------------------
+
+_SCAN_KINDS = ("money", "time", "date1", "date2", "phone")
+# 한 위치에서 두 종류가 동시에 시작할 수 없으므로(다음 글자가 원/:/./월/- 로 갈림) 교대(|)로 충분
+# 앞의 (?=\d)는 숫자가 아닌 위치를 엔진이 빠르게 건너뛰게 함 (모든 패턴이 숫자로 시작)
+_scan_re = re.compile(
+    r"(?=\d)(?=(?P<money>(?:\d{1,3}(?:,\d{3})+|\d+)\s*원)"
+    r"|(?P<time>\b\d{1,2}:\d{2}\b)"
+    r"|(?P<date1>20\d{2}[./-]\s*\d{1,2}[./-]\s*\d{1,2})"
+    r"|(?P<date2>\d{1,2}\s*월\s*\d{1,2}\s*일)"
+    r"|(?P<phone>\b\d{2,3}-\d{3,4}-\d{4}\b))"
+)
+_NORM_STEPS = (("money", _money_re, _money_rep), ("time", _time_re, _time_rep),
+               ("date1", _date1, _date_rep), ("date2", _date2, _date_rep))
+
+def _leftmost_nonoverlapping(spans: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
+    # 각 위치의 매치 중 re.finditer가 고르는 것만 남김
+    out, last_end = [], 0
+    for st, en in spans:
+        if st >= last_end:
+            out.append((st, en))
+            last_end = en
+    return out
+
+class DocScan:
+    """문서 한 개의 패턴 위치 색인. build_*_summary_fast가 사용"""
+    __slots__ = ("text", "all", "spans", "_lines", "_date_text")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.all = {k: [] for k in _SCAN_KINDS}   # 시작 위치마다의 매치 (겹침 포함)
+        for m in _scan_re.finditer(text):
+            k = m.lastgroup
+            self.all[k].append(m.span(k))
+        self.spans = {k: _leftmost_nonoverlapping(v) for k, v in self.all.items()}
+        self._lines = None
+        self._date_text = None
+
+    def lines(self) -> List[Tuple[int,int,str]]:
+        # (시작, 줄바꿈 제외 끝, 내용) — str.splitlines와 같은 경계
+        if self._lines is None:
+            out, pos = [], 0
+            for raw in self.text.splitlines(keepends=True):
+                line = raw.splitlines()[0]
+                out.append((pos, pos + len(line), line))
+                pos += len(raw)
+            self._lines = out
+        return self._lines
+
+    def first_money(self, keywords: Tuple[str,...]=()) -> Optional[str]:
+        """find_first_money와 동일"""
+        if keywords:
+            money = self.all["money"]
+            for ls, le, line in self.lines():
+                if any(k in line for k in keywords):
+                    for st, en in money:
+                        if st >= le:
+                            break
+                        if st >= ls and en <= le:
+                            return self.text[st:en]
+        spans = self.spans["money"]
+        return self.text[spans[0][0]:spans[0][1]] if spans else None
+
+    def first_phone(self) -> Optional[str]:
+        spans = self.spans["phone"]
+        return self.text[spans[0][0]:spans[0][1]] if spans else None
+
+    def date_like(self, keywords: Tuple[str,...]=()) -> Optional[str]:
+        """find_date_like와 동일. 라인별 분기는 '월' 글자가 있는 줄에서만 결과가 나오므로 그 줄만 검사"""
+        if "월" in self.text:
+            for _, _, line in self.lines():
+                if "월" not in line or (keywords and not any(k in line for k in keywords)):
+                    continue
+                s = to_readable_date(line)
+                if _bare_month_day_re.search(s):
+                    cand = _month_day_re.search(s)
+                    if cand:
+                        return cand.group(0)
+        if not (self.spans["date1"] or self.spans["date2"]):
+            return None
+        if self._date_text is None:
+            self._date_text = to_readable_date(self.text)
+        m = _month_day_re.search(self._date_text)
+        return m.group(0) if m else None
+
+    def first_raw_date(self) -> Optional[str]:
+        for k in ("date1", "date2"):
+            if self.spans[k]:
+                st, en = self.spans[k][0]
+                return self.text[st:en]
+        return None
+
+    def normalized(self) -> str:
+        """normalize_read_friendly와 동일 (한 번의 조립으로 4단계 치환)"""
+        edits = []
+        for kind, pat, fn in _NORM_STEPS:
+            edits.extend((st, en, kind, pat, fn) for st, en in self.spans[kind])
+        if not edits:
+            return self.text
+        edits.sort()
+        # 다른 종류의 매치가 겹치거나 맞닿으면 앞 단계 치환이 뒤 단계 매치를 바꿀 수 있음 → 순차 치환
+        # (date1 앞이 숫자면 치환 결과 "6월"이 앞 숫자와 붙어 date2에 다시 걸림: "02024.06.30" → "06월 30일")
+        max_end, max_kind = -1, None
+        for st, en, kind, _, _ in edits:
+            if (st <= max_end and kind != max_kind) or (kind == "date1" and st and self.text[st-1].isdecimal()):
+                return normalize_read_friendly(self.text)
+            if en > max_end:
+                max_end, max_kind = en, kind
+        out, pos = [], 0
+        for st, en, _, pat, fn in edits:
+            out.append(self.text[pos:st])
+            out.append(pat.sub(fn, self.text[st:en]))
+            pos = en
+        out.append(self.text[pos:])
+        return "".join(out)
+
+def build_chosen_summary_fast(text: str, domain: str, scan: Optional[DocScan] = None) -> str:
+    """build_chosen_summary와 같은 결과를 DocScan 한 번으로 계산"""
+    sc = scan or DocScan(text)
+    subj = guess_subject(text, domain)
+    money_main = sc.first_money(("납기내","금액","요금","등록금","보험료")) if domain=="고지서" else sc.first_money()
+    money_late = sc.first_money(("납기후","가산금")) if domain=="고지서" else None
+    deadline = sc.date_like(("납부","납기","마감","까지") if domain=="고지서" else ("신청","마감","까지","접수"))
+
+    money_main = normalize_read_friendly(money_main or "") if money_main else None
+    money_late = normalize_read_friendly(money_late or "") if money_late else None
+    deadline   = normalize_read_friendly(deadline or "") if deadline else None
+
+    if domain == "고지서":
+        s1 = f"어르신, {subj} 고지서예요."
+        s2 = f"{('납기내 금액은 ' + money_main) if money_main else '금액 안내가 없어요.'}"
+        s3 = f"납부 기한은 {deadline}이고" if deadline else "납부 기한 안내가 없고"
+        s3 += (f", 기한이 지나면 {money_late}로 늘어요." if money_late else " 추가 금액 안내는 없어요.")
+        return " ".join([s1, s2, s3])
+
+    if domain == "안내문-건강":
+        s1 = f"어르신, {subj}가 있어요."
+        when = deadline or DocScan(sc.normalized()).date_like()
+        s2 = f"일시는 {when}이고" if when else "일시 안내는 없고"
+        s2 += " 장소는 안내문에 표시돼 있어요."  # 장소 정밀 추출은 생략
+        s3 = "대상·비용·신청 방법은 안내문을 참고하시고, 정확한 안내가 없어 확인이 필요해요."
+        return " ".join([s1, s2, s3])
+
+    if domain == "안내문-생활":
+        s1 = f"어르신, {subj} 소식이에요."
+        when = deadline or DocScan(sc.normalized()).date_like()
+        s2 = f"{when}에 진행되며" if when else "일정은 별도 안내이고"
+        s2 += " 장소·신청 방법은 안내문에 있어요."
+        s3 = "정원·비용 등 핵심 정보는 간단히 확인 후 신청해 주세요."
+        return " ".join([s1, s2, s3])
+
+    if domain == "안내문-금융":
+        s1 = f"어르신, {subj} 안내예요."
+        s2 = "대상·혜택·한도·금리 등 핵심 조건이 있고, " \
+             + (f"신청·신고 기한은 {deadline}까지예요." if deadline else "신청·신고 기한 안내는 없어요.")
+        s3 = "자세한 방법과 준비서류는 안내문을 확인해 주세요."
+        return " ".join([s1, s2, s3])
+
+    return "어르신, 안내가 있어요. 핵심 정보는 안내문을 확인해 주세요. 정확한 안내가 없어 확인이 필요해요."
+
+def build_rejected_summary_fast(text: str, domain: str, scan: Optional[DocScan] = None) -> str:
+    sc = scan or DocScan(text)
+    if domain not in ("고지서", "안내문-건강"):
+        return build_rejected_summary(text, domain)  # 정규식을 쓰지 않는 분기
+    subj = guess_subject(text, domain)
+    raw_money_s = sc.first_money() or "금액 안내 없음"
+    when_raw = sc.first_raw_date()
+    if domain == "고지서":
+        return f"{subj} 고지서임. 금액 {raw_money_s}. 기한 {when_raw or '미정'}. 자세한 건 알아서 확인."
+    return f"{subj} 있음. {when_raw or '일정 미정'}. 장소/대상/비용 등은 생략."
+
 # ------------------------------------------------------------
 # 메인 로직: OCR 붙이기 + (옵션) chosen/rejected 생성
 # ------------------------------------------------------------
 
+def load_lookup(meta_p: Path, ocr_p: Path) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str], Dict[int, str]]:
+    meta_map = load_metadata(meta_p)             # filename -> row
+    ocr_map  = load_ocr_map(ocr_p)
+    return meta_map, ocr_map.get("__EXACT__", {}), ocr_map.get("__BYNUM__", {})
+
+def lookup_ocr(exact: Dict[str, str], bynum: Dict[int, str],
+               filename_hint: Optional[str], fallback_idx: Optional[int]) -> str:
+    if filename_hint and filename_hint in exact:
+        return exact[filename_hint]
+    if fallback_idx and fallback_idx in bynum:
+        return bynum[fallback_idx]
+    return ""
+
+def _row_domain(ex: Dict[str, Any], meta_map, fname: Optional[str]) -> Optional[str]:
+    dom = ex.get("domain") or (meta_map.get(fname,{}).get("doc_category_hint") if fname else None)
+    if not dom:
+        # 파일명에서 번호로 추정
+        dom = infer_domain_from_idx(idx_from_name(fname))
+    return dom
+
+def fill_sft_row(ex: Dict[str, Any], meta_map, exact, bynum) -> Dict[str, Any]:
+    """SFT: input에 OCR 텍스트 주입"""
+    inp = ex.get("input","")
+    fname = get_filename_from_text(inp)
+    dom = _row_domain(ex, meta_map, fname)
+    idx = idx_from_name(fname or "")
+    ocr_txt = lookup_ocr(exact, bynum, fname, idx)
+    if ocr_txt:
+        ocr_txt = ocr_txt.strip()
+    # input을 OCR 텍스트 + source_image 꼬리표로 교체/보강
+    new_input = (ocr_txt or "__OCR_TEXT_MISSING__") + (f"\n(source_image={fname})" if fname else "")
+    ex["input"] = new_input
+    if dom: ex["domain"] = dom
+    return ex
+
+def fill_dpo_row(ex: Dict[str, Any], meta_map, exact, bynum, auto_pairs: bool, fast: bool = False) -> Dict[str, Any]:
+    """DPO: prompt 유지 + (옵션) chosen/rejected 자동 생성. fast=True면 단일 패스 스캔 사용(결과 동일)"""
+    prompt_full = ex.get("prompt","")
+    fname = get_filename_from_text(prompt_full)
+    dom = _row_domain(ex, meta_map, fname)
+    idx = idx_from_name(fname or "")
+    ocr_txt = lookup_ocr(exact, bynum, fname, idx).strip()
+
+    chosen = ex.get("chosen","") or ""
+    rejected = ex.get("rejected","") or ""
+
+    if auto_pairs and ocr_txt:
+        scan = DocScan(ocr_txt) if fast and not (chosen and rejected) else None
+        # 기존 값이 비었을 때만 자동 생성
+        if not chosen:
+            chosen = (build_chosen_summary_fast(ocr_txt, dom or "기타", scan) if fast
+                      else build_chosen_summary(ocr_txt, dom or "기타"))
+        if not rejected:
+            rejected = (build_rejected_summary_fast(ocr_txt, dom or "기타", scan) if fast
+                        else build_rejected_summary(ocr_txt, dom or "기타"))
+
+        # 후처리: 읽기 친화 표기 강화
+        chosen = normalize_read_friendly(chosen)
+        # rejected는 의도적으로 원시 표기 남기기도 함
+
+    ex["chosen"] = chosen
+    ex["rejected"] = rejected
+    if dom: ex["domain"] = dom
+    return ex
+
+def run_legacy(args):
+    """전체 파일을 메모리에 올려 처리 (기본 모드)"""
+    meta_map, exact, bynum = load_lookup(Path(args.meta), Path(args.ocr_csv))
+    sft_rows = read_jsonl(Path(args.sft))
+    dpo_rows = read_jsonl(Path(args.dpo))
+
+    filled_sft = [fill_sft_row(ex, meta_map, exact, bynum) for ex in sft_rows]
+    write_jsonl(Path(args.out_sft), filled_sft)
+    print(f"[OK] {args.out_sft}: {len(filled_sft)}줄")
+
+    filled_dpo = [fill_dpo_row(ex, meta_map, exact, bynum, args.auto_pairs) for ex in dpo_rows]
+    write_jsonl(Path(args.out_dpo), filled_dpo)
+    print(f"[OK] {args.out_dpo}: {len(filled_dpo)}줄")
+
+# ------------------------------------------------------------
+# 스트리밍 모드 (--stream)
+#   입력 JSONL을 한 줄씩 읽어 프로세스 풀(순서 유지 imap)로 넘기고, 결과를 도착 순서대로 바로 append.
+#   metadata/OCR 매핑은 조인 테이블이라 워커마다 한 번만 올린다(initializer).
+#   checkpoint_every 줄마다 출력 fsync 후 {출력}.ckpt.json에 (입력 바이트 오프셋, 출력 크기)를 기록 →
+#   --resume 시 출력을 그 크기로 자르고 입력을 그 오프셋부터 다시 읽는다.
+# ------------------------------------------------------------
+
+_CTX: Dict[str, Any] = {}
+
+def _init_worker(meta_map, exact, bynum, auto_pairs: bool):
+    _CTX.update(meta_map=meta_map, exact=exact, bynum=bynum, auto_pairs=auto_pairs)
+
+def _fill_line(task: Tuple[str, int, bytes]) -> Tuple[int, bytes]:
+    """(종류, 입력 끝 오프셋, 원본 줄) -> (입력 끝 오프셋, 출력 줄). read_jsonl과 같이 잘못된 줄은 빈 바이트"""
+    kind, end, line = task
+    line = line.strip()
+    if not line:
+        return end, b""
+    try:
+        ex = json.loads(line)
+    except Exception:
+        return end, b""
+    if not isinstance(ex, dict):
+        return end, b""
+    if kind == "sft":
+        ex = fill_sft_row(ex, _CTX["meta_map"], _CTX["exact"], _CTX["bynum"])
+    else:
+        ex = fill_dpo_row(ex, _CTX["meta_map"], _CTX["exact"], _CTX["bynum"], _CTX["auto_pairs"], fast=True)
+    return end, (json.dumps(ex, ensure_ascii=False) + "\n").encode("utf-8")
+
+def _ckpt_path(out_p: Path) -> Path:
+    return out_p.with_name(out_p.name + ".ckpt.json")
+
+def _save_ckpt(path: Path, state: Dict[str, Any]):
+    tmp = path.with_name(path.name + ".part")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def stream_file(kind: str, in_p: Path, out_p: Path, pool, chunksize: int,
+                checkpoint_every: int, resume: bool, max_pending: int) -> Dict[str, Any]:
+    ckpt = _ckpt_path(out_p)
+    state = {"input": str(in_p), "offset": 0, "out_size": 0, "rows_in": 0, "rows_out": 0, "done": False}
+    if resume and ckpt.exists():
+        with ckpt.open(encoding="utf-8") as f:
+            prev = json.load(f)
+        if prev.get("input") == str(in_p):
+            state = prev
+    if state["done"]:
+        print(f"[skip] {out_p}: 이미 완료 ({state['rows_out']}줄)")
+        return state
+    if not in_p.exists():
+        out_p.write_bytes(b"")
+        state["done"] = True
+        _save_ckpt(ckpt, state)
+        return state
+
+    # 체크포인트 이후에 쓰인 꼬리는 버리고 이어쓰기
+    with out_p.open("ab") as f:
+        f.truncate(state["out_size"])
+
+    pending = threading.BoundedSemaphore(max_pending)  # 풀에 들어간 미처리 줄 수 상한 (메모리 고정)
+
+    def tasks():
+        with in_p.open("rb") as f:
+            f.seek(state["offset"])
+            pos = state["offset"]
+            for line in f:
+                pos += len(line)
+                pending.acquire()
+                yield kind, pos, line
+
+    since = 0
+    with out_p.open("ab") as out:
+        for end, data in pool.imap(_fill_line, tasks(), chunksize):
+            pending.release()
+            state["rows_in"] += 1
+            state["offset"] = end
+            if data:
+                out.write(data)
+                state["rows_out"] += 1
+            since += 1
+            if since >= checkpoint_every:
+                out.flush()
+                os.fsync(out.fileno())
+                state["out_size"] = out.tell()
+                _save_ckpt(ckpt, state)
+                since = 0
+        out.flush()
+        os.fsync(out.fileno())
+        state["out_size"] = out.tell()
+    state["done"] = True
+    _save_ckpt(ckpt, state)
+    print(f"[OK] {out_p}: {state['rows_out']}줄 (stream)")
+    return state
+
+class _InlinePool:
+    """워커 1개면 프로세스 간 직렬화 비용만 드니 현재 프로세스에서 바로 처리"""
+    def imap(self, fn, it, chunksize=1):
+        return map(fn, it)
+
+def run_stream(args):
+    meta_map, exact, bynum = load_lookup(Path(args.meta), Path(args.ocr_csv))
+    workers = args.workers or os.cpu_count() or 1
+    max_pending = max(1024, args.chunksize * workers * 4)
+    jobs = [("sft", args.sft, args.out_sft), ("dpo", args.dpo, args.out_dpo)]
+    if workers == 1:
+        _init_worker(meta_map, exact, bynum, args.auto_pairs)
+        for kind, in_p, out_p in jobs:
+            stream_file(kind, Path(in_p), Path(out_p), _InlinePool(), args.chunksize,
+                        args.checkpoint_every, args.resume, max_pending)
+        return
+    with mp.Pool(workers, initializer=_init_worker,
+                 initargs=(meta_map, exact, bynum, args.auto_pairs)) as pool:
+        for kind, in_p, out_p in jobs:
+            stream_file(kind, Path(in_p), Path(out_p), pool, args.chunksize,
+                        args.checkpoint_every, args.resume, max_pending)
+
+# ------------------------------------------------------------
+# 벤치마크 (--benchmark N): 합성 데이터로 기존 모드 vs 스트리밍 모드 비교 + 출력 동일성 확인
+# ------------------------------------------------------------
+
+_BENCH_DOCS = [
+    ("고지서", "2024년 자동차세 고지서\n납기내 금액 117,430원\n납부기한 2024.06.30 까지\n납기후 금액 120,950원\n문의 02-123-4567"),
+    ("고지서", "전기요금 청구서\n요금 45,210원 (납기 7월 25일까지)\n가산금 포함 46,566원\n고객센터 123-4567-8901"),
+    ("안내문-건강", "○○보건소 독감 예방접종 안내\n일시: 2024-10-15 09:30 ~ 17:00\n대상: 만 65세 이상 무료\n문의 031-555-0100"),
+    ("안내문-건강", "건강검진 안내\n검진 기간 11월 1일 ~ 11월 30일\n접수 마감 11월 20일\n비용 0원"),
+    ("안내문-생활", "어르신 스마트폰 교실 모집\n신청 9월 3일부터 9월 10일까지\n수업 14:00 ~ 16:00\n재료비 5000원"),
+    ("안내문-금융", "해외금융계좌 신고 안내\n신고 기한 2024/06/30 까지\n과태료 최대 20억원\n국세청 126"),
+    ("기타", "공지사항\n자세한 내용은 홈페이지 참고"),
+]
+
+# 실제 OCR 결과처럼 본문 줄을 덧붙임 (숫자 없는 안내 문구 + 표 형태 숫자 줄)
+_BENCH_BODY = "\n".join([
+    "본 안내문은 관련 법령에 따라 발송되었습니다.",
+    "자세한 사항은 담당 부서로 문의하시기 바랍니다.",
+    "구분 | 내역 | 비고",
+    "기본 | 1,250원 | 월 기준",
+    "사용량 | 312 | kWh",
+    "처리 기간 14일 이내",
+    "※ 기한 내 미납 시 가산금이 부과될 수 있습니다.",
+    "※ 신분증을 지참하여 방문해 주시기 바랍니다.",
+    "주민센터 운영시간 09:00 ~ 18:00 (점심시간 12:00 ~ 13:00)",
+    "홈페이지 www.example.go.kr",
+] * 2)
+
+def _write_bench_inputs(d: Path, n: int):
+    n_img = min(n, 10_000)
+    with (d / "ocr_texts.csv").open("w", encoding="utf-8", newline="") as f:
+        wr = csv.writer(f)
+        wr.writerow(["filename", "ocr_text"])
+        for i in range(1, n_img + 1):
+            _, txt = _BENCH_DOCS[i % len(_BENCH_DOCS)]
+            wr.writerow([f"img_{i:03d}.jpg", f"{txt}\n{_BENCH_BODY}\n관리번호 {i}"])
+    with (d / "metadata.csv").open("w", encoding="utf-8", newline="") as f:
+        wr = csv.writer(f)
+        wr.writerow(["filename", "doc_category_hint"])
+        for i in range(1, n_img + 1):
+            wr.writerow([f"img_{i:03d}.jpg", _BENCH_DOCS[i % len(_BENCH_DOCS)][0]])
+    with (d / "sft.jsonl").open("w", encoding="utf-8") as fs, (d / "dpo_pairs.jsonl").open("w", encoding="utf-8") as fd:
+        for r in range(n):
+            fn = f"img_{r % n_img + 1:03d}.jpg"
+            fs.write(json.dumps({"instruction": "문서를 요약해 주세요.", "input": f"(source_image={fn})",
+                                 "output": ""}, ensure_ascii=False) + "\n")
+            fd.write(json.dumps({"prompt": f"문서를 요약해 주세요.\n(source_image={fn})",
+                                 "chosen": "", "rejected": ""}, ensure_ascii=False) + "\n")
+
+def run_benchmark(args):
+    import tempfile
+    n = args.benchmark
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        _write_bench_inputs(d, n)
+        base = dict(meta=str(d / "metadata.csv"), sft=str(d / "sft.jsonl"), dpo=str(d / "dpo_pairs.jsonl"),
+                    ocr_csv=str(d / "ocr_texts.csv"), auto_pairs=True, workers=args.workers,
+                    chunksize=args.chunksize, checkpoint_every=args.checkpoint_every, resume=False)
+        results = {}
+        for mode, fn in (("legacy", run_legacy), ("stream", run_stream)):
+            ns = argparse.Namespace(**base, out_sft=str(d / f"{mode}_sft.jsonl"), out_dpo=str(d / f"{mode}_dpo.jsonl"))
+            t0 = time.perf_counter()
+            fn(ns)
+            results[mode] = time.perf_counter() - t0
+        for name in ("sft", "dpo"):
+            a = (d / f"legacy_{name}.jsonl").read_bytes()
+            b = (d / f"stream_{name}.jsonl").read_bytes()
+            if a != b:
+                raise SystemExit(f"[벤치마크] {name} 출력이 다릅니다 (legacy {len(a)}B / stream {len(b)}B)")
+    rows = 2 * n
+    print(f"[벤치마크] rows={rows} workers={args.workers or os.cpu_count()} 출력 동일")
+    for mode, sec in results.items():
+        print(f"  {mode:6s} {sec:7.2f}s  {rows / sec:9.0f} rows/s")
+    print(f"  speedup x{results['legacy'] / results['stream']:.2f}")
+
 def main():
     args = parse_args()
-    meta_p = Path(args.meta)
-    sft_p  = Path(args.sft)
-    dpo_p  = Path(args.dpo)
-    ocr_p  = Path(args.ocr_csv)
+    if args.benchmark:
+        run_benchmark(args)
+        return
 
+    ocr_p  = Path(args.ocr_csv)
     if not ocr_p.exists():
         raise FileNotFoundError(f"OCR CSV가 없습니다: {ocr_p}")
 
-    if (Path(OUT_SFT).exists() or Path(OUT_DPO).exists()) and not args.overwrite:
+    if (Path(args.out_sft).exists() or Path(args.out_dpo).exists()) and not (args.overwrite or args.resume):
         print(f"[중단] 출력 파일이 이미 있습니다. --overwrite 옵션을 사용하세요.")
         return
 
-    meta_map = load_metadata(meta_p)             # filename -> row
-    sft_rows = read_jsonl(sft_p)
-    dpo_rows = read_jsonl(dpo_p)
-    ocr_map  = load_ocr_map(ocr_p)
-
-    exact = ocr_map.get("__EXACT__", {})
-    bynum = ocr_map.get("__BYNUM__", {})
-
-    def lookup_ocr(filename_hint: Optional[str], fallback_idx: Optional[int]) -> str:
-        if filename_hint and filename_hint in exact:
-            return exact[filename_hint]
-        if fallback_idx and fallback_idx in bynum:
-            return bynum[fallback_idx]
-        return ""
-
-    # --- SFT: input에 OCR 텍스트 주입 ---
-    filled_sft = []
-    for ex in sft_rows:
-        inp = ex.get("input","")
-        fname = get_filename_from_text(inp)
-        dom = ex.get("domain") or (meta_map.get(fname,{}).get("doc_category_hint") if fname else None)
-        if not dom:
-            # 파일명에서 번호로 추정
-            dom = infer_domain_from_idx(idx_from_name(fname))
-        idx = idx_from_name(fname or "")
-        ocr_txt = lookup_ocr(fname, idx)
-        if ocr_txt:
-            ocr_txt = ocr_txt.strip()
-        # input을 OCR 텍스트 + source_image 꼬리표로 교체/보강
-        new_input = (ocr_txt or "__OCR_TEXT_MISSING__") + (f"\n(source_image={fname})" if fname else "")
-        ex["input"] = new_input
-        if dom: ex["domain"] = dom
-        filled_sft.append(ex)
-
-    write_jsonl(Path(OUT_SFT), filled_sft)
-    print(f"[OK] {OUT_SFT}: {len(filled_sft)}줄")
-
-    # --- DPO: prompt 유지 + (옵션) chosen/rejected 자동 생성 ---
-    filled_dpo = []
-    for ex in dpo_rows:
-        prompt_full = ex.get("prompt","")
-        fname = get_filename_from_text(prompt_full)
-        dom = ex.get("domain") or (meta_map.get(fname,{}).get("doc_category_hint") if fname else None)
-        if not dom:
-            dom = infer_domain_from_idx(idx_from_name(fname))
-        idx = idx_from_name(fname or "")
-        ocr_txt = lookup_ocr(fname, idx).strip()
-
-        chosen = ex.get("chosen","") or ""
-        rejected = ex.get("rejected","") or ""
-
-        if args.auto_pairs and ocr_txt:
-            # 기존 값이 비었을 때만 자동 생성
-            if not chosen:
-                chosen = build_chosen_summary(ocr_txt, dom or "기타")
-            if not rejected:
-                rejected = build_rejected_summary(ocr_txt, dom or "기타")
-
-            # 후처리: 읽기 친화 표기 강화
-            chosen = normalize_read_friendly(chosen)
-            # rejected는 의도적으로 원시 표기 남기기도 함
-
-        ex["chosen"] = chosen
-        ex["rejected"] = rejected
-        if dom: ex["domain"] = dom
-        filled_dpo.append(ex)
-
-    write_jsonl(Path(OUT_DPO), filled_dpo)
-    print(f"[OK] {OUT_DPO}: {len(filled_dpo)}줄")
+    if args.stream:
+        run_stream(args)
+    else:
+        run_legacy(args)
     print("✅ 완료")
 
 def infer_domain_from_idx(idx: Optional[int]) -> str:
@@ -1,8 +1,14 @@
 # ai/qwen/model_loader.py
+import sys
 from functools import lru_cache
+from pathlib import Path
 import torch, gc, os
 from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
 
+# langserve_app.attention 공유. 맨 앞이 아니라 뒤에 붙여 backend의 test/models/config 등이 ai 쪽 같은 이름 모듈을 가리지 않게
+sys.path.append(str(Path(__file__).resolve().parents[2] / "backend"))
+from langserve_app.attention import AttnBoundModel
+
 # 선택: 환경변수로 제어 (없으면 기본값 사용)
 DEFAULT_IMPL = os.environ.get("ATTENTION_IMPL", "flash_attention_2")  # "eager" | "sdpa" | "flash_attention_2"
 DEFAULT_DEVICE = os.environ.get("CUDA_VISIBLE_DEVICES", "1")          # "0", "1", ...
@@ -11,20 +17,30 @@ os.environ["CUDA_VISIBLE_DEVICES"] = DEFAULT_DEVICE
 gc.collect(); torch.cuda.empty_cache()
 
 @lru_cache(maxsize=None)
-def get_model(attn_impl: str = DEFAULT_IMPL, device_idx: str = DEFAULT_DEVICE):
-    # 주의: lru_cache 키에 attn_impl, device_idx가 포함되어 설정별로 따로 로드되게 함
+def _load_weights(device_idx: str = DEFAULT_DEVICE):
+    # 가중치는 디바이스당 한 번만 로드. attention 구현은 호출마다 바꿀 수 있으므로 캐시 키에 넣지 않음
     kwargs = dict(
         pretrained_model_name_or_path="Qwen/Qwen2.5-VL-7B-Instruct",
         torch_dtype=torch.float16,
         device_map={"": f"cuda:{device_idx}"}
     )
-    # attn 구현 선택
-    if attn_impl:
-        kwargs["attn_implementation"] = attn_impl  # "eager" | "sdpa" | "flash_attention_2"
+    if DEFAULT_IMPL:
+        kwargs["attn_implementation"] = DEFAULT_IMPL  # "eager" | "sdpa" | "flash_attention_2"
 
     model = Qwen2_5_VLForConditionalGeneration.from_pretrained(**kwargs)
     return model.eval()
 
+@lru_cache(maxsize=None)
+def get_model(attn_impl: str | None = None, device_idx: str = DEFAULT_DEVICE):
+    """attn_impl=None: 로드한 구현 그대로인 모델.
+    attn_impl 지정: 같은 가중치를 공유하면서 호출마다 그 구현으로 전환되는 뷰 (재로딩 없음).
+      cls = get_model("flash_attention_2"); summ = get_model("sdpa")   # 두 뷰, 가중치 1벌
+    """
+    model = _load_weights(device_idx)
+    if attn_impl is None:
+        return model
+    return AttnBoundModel(model, attn_impl)
+
 @lru_cache(maxsize=None)
 def get_processor():
     return AutoProcessor.from_pretrained("Qwen/Qwen2.5-VL-7B-Instruct", use_fast=True)
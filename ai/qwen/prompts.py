@@ -1,15 +1,9 @@
-import torch, gc
-from model_loader import get_model, get_processor
-from PIL import Image
-import time, json
-from pathlib import Path
+# ai/qwen/prompts.py
+#
+# 실험 스크립트마다 복사돼 있던 분류/요약 프롬프트 (기존 qwen_compare.py 기준).
+# 벤치마크/배치 처리 스크립트가 같은 프롬프트를 쓰도록 여기서 가져다 쓴다.
 
-
-# ===== 경로 설정 =====
-base_dir = Path(__file__).resolve().parent.parent
-out_path = base_dir / "qwen" / "results_hybrid_seq.jsonl"
-image_dir = base_dir / "data" / "img"
-image_files = sorted(list(image_dir.glob("*.jpg")) + list(image_dir.glob("*.png")))
+import re
 
 # ====== 분류용 프롬프트 ======
 DOC_TYPE_PROMPT = """
@@ -136,77 +130,24 @@ PROMPT_MAP = {
     "기타": ELSE_PROMPT,
 }
 
-MAX_NEW_TOKENS = 256
-WARMUP = 0
-# VRAM 여유가 크면 True로 두 모델 동시 로드(빠름), 부족하면 False로 매번 교체 로드(안정)
-HOLD_BOTH_MODELS = False
-
-for img_path in image_files:
-    try:
-        # 파일 핸들 즉시 해제되도록 with 사용
-        with Image.open(img_path) as im:
-            image = im.convert("RGB")
-    except Exception as e:
-        print(f"이미지 열기 실패: {img_path} - {e}")
-        continue
-
-    # ----- 분류 (Flash ON 우선) -----
-    if HOLD_BOTH_MODELS:
-        m_cls = model_cls
-    else:
-        clear_model_cache()
-        try:
-            m_cls = get_model(attn_impl="flash_attention_2").eval()
-        except Exception as e:
-            print(f"⚠️ FlashAttention 분류 모델 로드 실패: {e}\n→ sdpa로 대체")
-            m_cls = get_model(attn_impl="sdpa").eval()
-
-    doc_type, t_cls = classify_document(image, m_cls, processor)
-    prompt_text = PROMPT_MAP.get(doc_type, ELSE_PROMPT)
-
-    # 분류 모델 즉시 해제(메모리 회수) — cpu() 내리지 않음
-    if not HOLD_BOTH_MODELS:
-        try:
-            del m_cls
-        except Exception:
-            pass
-        get_model.cache_clear()
-        torch.cuda.synchronize()
-        torch.cuda.empty_cache()
-        torch.cuda.synchronize()
-
-    # ----- 요약 (SDPA) -----
-    if HOLD_BOTH_MODELS:
-        m_sum = model_sum
-    else:
-        clear_model_cache()
-        m_sum = get_model(attn_impl="sdpa").eval()
-
-    output, t_sum = summarize_document(image, prompt_text, m_sum, processor, MAX_NEW_TOKENS)
-
-    if not HOLD_BOTH_MODELS:
-        try:
-            del m_sum
-        except Exception:
-            pass
-        get_model.cache_clear()
-        torch.cuda.synchronize()
-        torch.cuda.empty_cache()
-        torch.cuda.synchronize()
-
-    total_s = round(t_cls + t_sum, 4)
-    rec = {
-        "mode": "Hybrid-Sequential(FlashON-CLS,SDPA-SUM)",
-        "image": img_path.name,
-        "doc_type": doc_type,
-        "output": output,
-        "classify_s": round(t_cls, 4),
-        "summary_s": round(t_sum, 4),
-        "total_s": total_s,
-        "attn_impl_cls": "flash_attention_2" if HOLD_BOTH_MODELS or "flash_attn" in rec.get("mode","").lower() else "flash_attention_2",
-        "attn_impl_sum": "sdpa",
-        "max_new_tokens": MAX_NEW_TOKENS,
-    }
-    save_jsonl(rec)
-    print(f"🖼️ {img_path.name} | {doc_type} | cls {rec['classify_s']}s / sum {rec['summary_s']}s / total {total_s}s")
-    print(f"→ 요약: {output}\n")
\ No newline at end of file
+
+def domain_from_image_name(name: str) -> str:
+    """data/img 샘플 번호 → 문서 유형 (img_001~010 고지서, 011~020 건강, 021~030 생활, 031~040 금융)"""
+    m = re.findall(r"(\d+)", name)
+    idx = int(m[-1]) if m else 0
+    if 1 <= idx <= 10:  return "고지서"
+    if 11 <= idx <= 20: return "안내문-건강"
+    if 21 <= idx <= 30: return "안내문-생활"
+    if 31 <= idx <= 40: return "안내문-금융"
+    return "기타"
+
+
+def normalize_doc_type(result: str) -> str:
+    """분류 출력 → PROMPT_MAP 키 (백엔드 ConversationSession.classify_document와 같은 규칙)"""
+    return (
+        "고지서" if "고지서" in result else
+        "안내문-건강" if ("안내문-건강" in result or "건강" in result) else
+        "안내문-생활" if ("안내문-생활" in result or "생활" in result) else
+        "안내문-금융" if ("안내문-금융" in result or "금융" in result) else
+        "기타"
+    )
@@ -1,4 +1,14 @@
 # qwen_multiagent_debate.py
+#
+# 손자(설명) → 할머니(질문) → 도우미(최종 정리) 3단계 멀티에이전트 요약.
+#   --mode shared (기본): 이미지 여러 장을 한 배치로 묶어
+#       1) [시스템 + 이미지] 접두부를 한 번만 인코딩/prefill 하고 (vision tower 1회)
+#       2) 세 역할은 그 KV 캐시 뒤에 역할 텍스트만 이어 붙여 배치로 디코딩, 끝나면 접두부 길이로 잘라 재사용
+#     → 이미지당 vision + 이미지 prefill이 3회 → 1회, 역할 단계는 배치 크기만큼 묶여서 실행
+#     접두부를 공유하려고 역할 프롬프트는 system이 아니라 이미지 뒤 user 텍스트 앞머리에 붙는다.
+#   --mode sequential: 기존 방식 (이미지 1장씩, 역할마다 query_qwen 전체 호출) — 품질/속도 비교용
+# 결과 JSONL에는 output / infer_time(이미지당, 배치면 배치 시간을 장수로 나눈 값)과 단계별 시간(stages)을 기록.
+import argparse
 import sys
 from pathlib import Path
 
@@ -9,6 +19,7 @@ sys.path.insert(0, str(ROOT_DIR))
 from datetime import datetime
 from PIL import Image
 import torch
+import inspect
 import json
 import time
 
@@ -106,21 +117,224 @@ def query_qwen(pil_image, system_prompt, user_prompt, max_new_tokens=300):
     return output_text.strip()
 
 # ====== 결과 저장 ======
-def save_final_prompt(final_output, elapsed_time):
+def save_final_prompt(final_output, elapsed_time, **extra):
     result_path.parent.mkdir(parents=True, exist_ok=True)
     record = {
         "output": final_output,
-        "infer_time": round(elapsed_time, 2)
+        "infer_time": round(elapsed_time, 2),
+        **extra,
     }
     with open(result_path, "a", encoding="utf-8") as f:
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-# ====== 메인 루프 ======
-def main():
-    if not image_files:
-        print(f"⚠️ 이미지가 없습니다: {image_dir}")
-        return
+# ====== 역할별 사용자 프롬프트 ======
+EXPLAINER_USER = "아래 문서를 어르신께 설명해 주세요. 핵심을 먼저 말하고, 예시를 1개만 들어주세요."
+
+
+def grandma_user(summary):
+    return f"손자가 이렇게 설명했어요:\n\n{summary}\n\n이 설명을 듣고 궁금한 점을 1~2문장으로 물어봐 주세요."
+
+
+def helper_user(summary, grandma_reply):
+    return f"설명자(손자): {summary}\n\n할머니: {grandma_reply}\n\n위 대화를 바탕으로 최종 어르신 요약을 2~3문장으로 작성해 주세요."
+
+
+# ====== 공유 접두부(shared prefix) 파이프라인 ======
+_ROLE_MARK = "<<ROLE_TEXT>>"
+# 접두부 prefill / 역할 텍스트 prefill에서는 마지막 토큰 logits만 필요 (이미지 토큰 전체 × 어휘 크기 logits 방지)
+_FWD_PARAMS = inspect.signature(model.forward).parameters
+_KEEP_LAST = (
+    {"logits_to_keep": 1} if "logits_to_keep" in _FWD_PARAMS else
+    {"num_logits_to_keep": 1} if "num_logits_to_keep" in _FWD_PARAMS else {}
+)
+_get_rope_index = getattr(model, "get_rope_index", None) or model.model.get_rope_index
+_eos = model.generation_config.eos_token_id
+EOS_IDS = set(_eos if isinstance(_eos, (list, tuple)) else [_eos]) | {processor.tokenizer.eos_token_id}
+PAD_ID = processor.tokenizer.pad_token_id if processor.tokenizer.pad_token_id is not None else processor.tokenizer.eos_token_id
+
+
+def _template_parts():
+    """채팅 템플릿을 [시스템 + user(이미지)] 접두부와 [역할 텍스트 + assistant 시작] 꼬리로 나눈다."""
+    text = processor.apply_chat_template(
+        [{"role": "user", "content": [{"type": "image"}, {"type": "text", "text": _ROLE_MARK}]}],
+        tokenize=False,
+        add_generation_prompt=True,
+    )
+    head, tail = text.split(_ROLE_MARK)
+    return head, tail  # head는 <|vision_end|>로 끝남 (특수 토큰 경계라 따로 토크나이즈해도 같은 토큰)
+
+
+PREFIX_TEXT, SUFFIX_TAIL = _template_parts()
+
+
+def _sync():
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+def _tokenize(texts, side):
+    tok = processor.tokenizer
+    old = tok.padding_side
+    tok.padding_side = side
+    try:
+        return tok(texts, add_special_tokens=False, padding=True, return_tensors="pt")
+    finally:
+        tok.padding_side = old
+
+
+class ImagePrefix:
+    """배치 이미지의 [시스템 + 이미지] 접두부 KV 캐시.
+
+    행마다 접두부 길이가 달라 오른쪽 패딩으로 맞추고, 역할 텍스트는 그 뒤에 왼쪽 패딩으로 붙인다
+    ([접두부_i, pad, 역할텍스트_i]). 가운데 pad는 attention_mask=0이고 mrope 위치는 직접 넘겨서
+    행마다 접두부 바로 다음 위치부터 이어지게 한다.
+    """
+
+    def __init__(self, images):
+        tok = processor.tokenizer
+        old = tok.padding_side
+        tok.padding_side = "right"
+        try:
+            inputs = processor(text=[PREFIX_TEXT] * len(images), images=images, return_tensors="pt", padding=True)
+        finally:
+            tok.padding_side = old
+        inputs = {k: v.to(model.device) if hasattr(v, "to") else v for k, v in inputs.items()}
+
+        self.mask = inputs["attention_mask"]
+        position_ids, _ = _get_rope_index(
+            inputs["input_ids"], image_grid_thw=inputs["image_grid_thw"], attention_mask=self.mask
+        )
+        # 다음 텍스트 토큰의 위치 = 유효 토큰 위치 최댓값 + 1 (3개 축 모두 같음)
+        self.next_pos = position_ids.max(0).values.masked_fill(self.mask == 0, -1).max(-1).values + 1
+        with torch.no_grad():
+            out = model(**inputs, position_ids=position_ids, use_cache=True, **_KEEP_LAST)
+        self.cache = out.past_key_values
+        self.length = self.mask.shape[1]
+
+    def generate(self, role_texts, max_new_tokens):
+        """행마다 역할 텍스트를 접두부 뒤에 붙여 greedy 디코딩. 끝나면 캐시를 접두부 길이로 되돌린다."""
+        enc = _tokenize([t + SUFFIX_TAIL for t in role_texts], side="left")
+        ids = enc["input_ids"].to(model.device)
+        smask = enc["attention_mask"].to(model.device)
+        bsz = ids.shape[0]
+        try:
+            pos = self.next_pos[:, None] + (smask.cumsum(-1) - 1).clamp(min=0)
+            mask = torch.cat([self.mask, smask], dim=1)
+            with torch.no_grad():
+                out = model(
+                    input_ids=ids, attention_mask=mask, position_ids=pos[None].expand(3, -1, -1),
+                    past_key_values=self.cache, use_cache=True, **_KEEP_LAST,
+                )
+                cur = pos[:, -1] + 1
+                done = torch.zeros(bsz, dtype=torch.bool, device=model.device)
+                eos = torch.tensor(sorted(EOS_IDS), device=model.device)
+                generated = []
+                for _ in range(max_new_tokens):
+                    nxt = out.logits[:, -1].argmax(-1)
+                    nxt = nxt.masked_fill(done, PAD_ID)
+                    generated.append(nxt)
+                    done |= torch.isin(nxt, eos)
+                    if bool(done.all()):
+                        break
+                    mask = torch.cat([mask, torch.ones_like(mask[:, :1])], dim=1)
+                    out = model(
+                        input_ids=nxt[:, None], attention_mask=mask, position_ids=cur[None, :, None].expand(3, -1, 1),
+                        past_key_values=self.cache, use_cache=True,
+                    )
+                    cur = cur + 1
+        finally:
+            self.cache.crop(self.length)  # 역할 텍스트/생성 토큰 KV 제거 → 다음 역할이 접두부 재사용
+
+        rows = torch.stack(generated, dim=1).tolist() if generated else [[] for _ in range(bsz)]
+        texts = []
+        for row in rows:
+            cut = next((i for i, t in enumerate(row) if t in EOS_IDS), len(row))
+            texts.append(row[:cut])
+        return [t.strip() for t in processor.batch_decode(
+            texts, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )]
 
+
+def run_shared_batch(images):
+    """이미지 배치 하나를 3단계로 처리. (최종 요약 목록, 단계별 시간) 반환"""
+    stages = {}
+
+    _sync(); t = time.perf_counter()
+    prefix = ImagePrefix(images)
+    _sync(); stages["vision_prefill"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    summaries = prefix.generate([f"{EXPLAINER_PROMPT}\n\n{EXPLAINER_USER}"] * len(images), max_new_tokens=350)
+    _sync(); stages["explainer"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    replies = prefix.generate([f"{GRANDMA_PROMPT}\n\n{grandma_user(s)}" for s in summaries], max_new_tokens=120)
+    _sync(); stages["grandma"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    finals = prefix.generate(
+        [f"{HELPER_PROMPT}\n\n{helper_user(s, r)}" for s, r in zip(summaries, replies)], max_new_tokens=200
+    )
+    _sync(); stages["helper"] = time.perf_counter() - t
+
+    del prefix
+    return finals, stages
+
+
+def _image_area(path):
+    with Image.open(path) as im:
+        return im.size[0] * im.size[1]
+
+
+def main_shared(batch_size):
+    # 비슷한 크기끼리 묶어 접두부(이미지 토큰 수) 패딩을 줄임
+    paths = sorted(image_files, key=_image_area)
+    pending = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    total_imgs, total_time = 0, 0.0
+
+    while pending:
+        chunk = pending.pop(0)
+        images, names = [], []
+        for p in chunk:
+            try:
+                images.append(Image.open(p).convert("RGB"))
+                names.append(p.name)
+            except Exception as e:
+                print(f"⚠️ 이미지 열기 실패: {p} - {e}")
+        if not images:
+            continue
+
+        try:
+            start_time = time.time()
+            finals, stages = run_shared_batch(images)
+            elapsed = time.time() - start_time
+        except torch.cuda.OutOfMemoryError:
+            torch.cuda.empty_cache()
+            if len(chunk) == 1:
+                print(f"💥 CUDA OOM 발생 — {chunk[0].name} 건너뜀")
+                continue
+            half = len(chunk) // 2
+            print(f"💥 CUDA OOM 발생 — 배치 {len(chunk)} → {half}/{len(chunk) - half}로 나눠 재시도")
+            pending[:0] = [chunk[:half], chunk[half:]]
+            continue
+        except Exception as e:
+            print(f"⚠️ 처리 중 오류: {names} - {e}")
+            continue
+
+        per_image = elapsed / len(images)
+        stage_rec = {k: round(v, 3) for k, v in stages.items()}
+        for name, final in zip(names, finals):
+            save_final_prompt(final, per_image, image=name, batch_size=len(images), stages=stage_rec)
+        total_imgs += len(images)
+        total_time += elapsed
+        print(f"✅ 배치 {len(images)}장 완료 (⏱ {elapsed:.2f}s, 장당 {per_image:.2f}s) "
+              + " ".join(f"{k}={v:.2f}s" for k, v in stages.items()))
+
+    if total_imgs:
+        print(f"📊 {total_imgs}장 / {total_time:.1f}s → {total_imgs / total_time:.3f} images/s")
+
+
+def main_sequential():
     for img_path in image_files:
         try:
             image = Image.open(img_path).convert("RGB")
@@ -129,35 +343,27 @@ def main():
             continue
 
         start_time = time.time()
+        stages = {}
 
         try:
             # 1) 손자 설명
-            summary = query_qwen(
-                image,
-                EXPLAINER_PROMPT,
-                "아래 문서를 어르신께 설명해 주세요. 핵심을 먼저 말하고, 예시를 1개만 들어주세요.",
-                max_new_tokens=350,
-            )
+            t = time.time()
+            summary = query_qwen(image, EXPLAINER_PROMPT, EXPLAINER_USER, max_new_tokens=350)
+            stages["explainer"] = round(time.time() - t, 3)
 
             # 2) 할머니 질문 (설명 요약에 기반해 추가 질문 유도)
-            grandma_reply = query_qwen(
-                image,
-                GRANDMA_PROMPT,
-                f"손자가 이렇게 설명했어요:\n\n{summary}\n\n이 설명을 듣고 궁금한 점을 1~2문장으로 물어봐 주세요.",
-                max_new_tokens=120,
-            )
+            t = time.time()
+            grandma_reply = query_qwen(image, GRANDMA_PROMPT, grandma_user(summary), max_new_tokens=120)
+            stages["grandma"] = round(time.time() - t, 3)
 
             # 3) 도우미 최종 정리
-            helper_final = query_qwen(
-                image,
-                HELPER_PROMPT,
-                f"설명자(손자): {summary}\n\n할머니: {grandma_reply}\n\n위 대화를 바탕으로 최종 어르신 요약을 2~3문장으로 작성해 주세요.",
-                max_new_tokens=200,
-            )
+            t = time.time()
+            helper_final = query_qwen(image, HELPER_PROMPT, helper_user(summary, grandma_reply), max_new_tokens=200)
+            stages["helper"] = round(time.time() - t, 3)
 
             elapsed_time = time.time() - start_time
             print(f"✅ {img_path.name} 요약 완료 (⏱ {elapsed_time:.2f}s): {helper_final[:60]}...")
-            save_final_prompt(helper_final, elapsed_time)
+            save_final_prompt(helper_final, elapsed_time, image=img_path.name, batch_size=1, stages=stages)
 
         except torch.cuda.OutOfMemoryError:
             print("💥 CUDA OOM 발생 — empty_cache() 후 다음 이미지로 진행합니다.")
@@ -167,5 +373,22 @@ def main():
             print(f"⚠️ 처리 중 오류: {img_path.name} - {e}")
             continue
 
+
+# ====== 메인 ======
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["shared", "sequential"], default="shared")
+    ap.add_argument("--batch", type=int, default=8, help="shared 모드에서 한 번에 묶을 이미지 수")
+    args = ap.parse_args()
+
+    if not image_files:
+        print(f"⚠️ 이미지가 없습니다: {image_dir}")
+        return
+
+    if args.mode == "shared":
+        main_shared(max(1, args.batch))
+    else:
+        main_sequential()
+
 if __name__ == "__main__":
     main()
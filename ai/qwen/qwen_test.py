@@ -4,8 +4,8 @@ import sys
 from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR.parent / "backend"))  # data_store (비전 특징 저장소)
 
-from qwen_vl_utils import process_vision_info
 from PIL import Image
 from datetime import datetime
 import json
@@ -15,12 +15,13 @@ import time
 
 # ✅ 모델과 프로세서는 이곳에서 import
 from model_loader import get_model, get_processor
+from data_store.vision_features import VisionFeatureStore, build_inputs, get_or_extract, image_key_for_path, use_cached_features
 
 total_time = 0 # 시간 계산용
 base_dir = Path(__file__).resolve().parent.parent # 현재 파일 기준으로 경로 설정 : KSEB/ai
 result_path = base_dir / "qwen" / "results.jsonl"
-embedding_dir = base_dir / "qwen" / "cached_embeds" # 캐시된 임베딩 경로 (사용 안 할 땐 None)
-embedding_files = [embedding_dir / f"img_{i:03d}.pt" for i in range(1, 11)]  # img_001 ~ img_010
+image_dir = base_dir / "data" / "img"
+image_files = [image_dir / f"img_{i:03d}.jpg" for i in range(1, 11)]  # img_001 ~ img_010 (임베딩은 feature store에서, 없으면 계산 후 저장)
 
 # ====== 설정 ======
 # 1️⃣ 이미지 경로 (사용 안 할 땐 None)
@@ -59,15 +60,16 @@ def save_result_jsonl(image_id, prompt, output, path=result_path):
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
 # ====== 루프 실행 ======
-for embed_file in embedding_files:
-    if not embed_file.exists():
-        print(f"⚠️ 임베딩 파일 없음: {embed_file}")
+store = VisionFeatureStore.for_model(model, processor)
+for img_file in image_files:
+    if not img_file.exists():
+        print(f"⚠️ 이미지 파일 없음: {img_file}")
         continue
 
-    # 캐시된 임베딩 불러오기
-    image_inputs = torch.load(embed_file, weights_only=False)
-    video_inputs = None
-    image_id = embed_file.stem  # 예: img_001
+    # 캐시된 임베딩 불러오기 (cache_img_embeddings.py로 미리 채워두면 비전 타워를 건너뜀)
+    key = image_key_for_path(img_file)
+    features = [get_or_extract(store, model, processor, {key: Image.open(img_file).convert("RGB")})[key]]
+    image_id = img_file.stem  # 예: img_001
 
     for prompt_text in prompt_list:
         messages = [
@@ -77,17 +79,10 @@ for embed_file in embedding_files:
             ]}
         ]
         text = processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        inputs = processor(
-            text=[text],
-            images=image_inputs,
-            videos=video_inputs,
-            padding=True,
-            return_tensors="pt",
-        )
-        inputs = inputs.to(model.device)
+        inputs = build_inputs(processor, text, features, model.device)
 
         # ====== 추론 ======
-        with torch.no_grad(): # no_grad : 추론시에만 사용. gradient를 계산하지 않는다는 뜻
+        with torch.no_grad(), use_cached_features(model, features): # no_grad : 추론시에만 사용. gradient를 계산하지 않는다는 뜻
             infer_start = time.time() # 추론 시간 측정
             generated_ids = model.generate(
                 **inputs,
@@ -96,7 +91,7 @@ for embed_file in embedding_files:
             )
             infer_end = time.time() # 추론 시간 측정 종료
             generated_ids_trimmed = [
-                out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
+                out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs["input_ids"], generated_ids)
             ]
             output_text = processor.batch_decode(
                 generated_ids_trimmed,
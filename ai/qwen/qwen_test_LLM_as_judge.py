@@ -1,16 +1,47 @@
+# ai/qwen/qwen_test_LLM_as_judge.py
+#
+# Step 2: 요약 결과(results_final.jsonl)를 4명의 에이전트 + Aggregator(LLM-as-judge)로 채점.
+#   - 비동기: 라인 여러 개와 한 라인의 에이전트 4명을 동시에 호출, 전체 API 동시 호출 수는 --concurrency로 제한
+#   - 응답 캐시: (모델, 시스템 프롬프트, 사용자 프롬프트, max_tokens, temperature) → 응답을 --cache JSONL에 저장,
+#     재실행·프롬프트 일부 수정 시 바뀌지 않은 호출은 API를 다시 부르지 않음
+#   - 재개: 끝난 라인은 바로 출력 파일에 추가되고, 다시 실행하면 이미 있는 idx는 건너뜀 (--fresh: 처음부터)
+#     오류/파싱 실패(-1)가 섞인 라인은 건너뛰지 않고 다시 채점
+#   - 비용/지연: 호출 수, 캐시 적중, 토큰, 예상 비용(USD), 호출/라인 지연 분위수 → {output}.stats.json
+#   - 429 / 5xx / 타임아웃은 지수 백오프(+jitter)로 재시도
+#
+# 사용:
+#   python qwen_test_LLM_as_judge.py --concurrency 16
+#   python qwen_test_LLM_as_judge.py --fake --limit 50     # 로컬 가짜 심사 서버(fake_judge.py)로 오프라인 실행
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python qwen_test_LLM_as_judge.py   # 따로 띄운 fake_judge.py 사용
+
+import argparse
+import asyncio
+import hashlib
 import json
-from pathlib import Path
-import time
 import os
+import random
 import re
+import time
+from pathlib import Path
+
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
 
 load_dotenv()
-OPENAI_API = os.getenv("OPENAI_API")
-client = OpenAI(api_key="OPENAI_API")
+OPENAI_API = os.getenv("OPENAI_API") or os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+MODEL_NAME = os.getenv("JUDGE_MODEL", "gpt-4o")  # 비용 줄이려면 "gpt-4o-mini"로 교체
+
+# 1M 토큰당 USD (입력, 출력) — 표에 없는 모델은 0으로 계산
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+AGG_KEYS = ["설명력", "이해도", "정서적 배려", "논리 정확성"]
+
 
-MODEL_NAME = "gpt-4o"  # 비용 줄이려면 "gpt-4o-mini"로 교체
 def force_int_0_100(x):
     try:
         n = int(float(x))
@@ -18,6 +49,7 @@ def force_int_0_100(x):
         return -1
     return max(0, min(100, n))
 
+
 # ====== Agent별 시스템 프롬프트 (JSON 강제) ======
 BASE_AGENT_SUFFIX = """
 출력 형식은 반드시 아래 JSON 한 줄만 출력하세요. 다른 말/라벨/코드블록 금지.
@@ -69,30 +101,9 @@ AGGREGATOR_PROMPT = """
 {"설명력": <int>, "이해도": <int>, "정서적 배려": <int>, "논리 정확성": <int>, "comment": "<20자 이내 요약코멘트>"}
 """
 
-def call_with_retry(fn, *args, **kwargs):
-    """간단 백오프 재시도"""
-    delay = 1.0
-    for attempt in range(5):
-        try:
-            return fn(*args, **kwargs)
-        except Exception as e:
-            if attempt == 4:
-                raise
-            time.sleep(delay)
-            delay *= 2
-
-def chat_json(system_prompt: str, user_prompt: str, max_tokens: int = 64, temperature: float = 0):
-    resp = call_with_retry(
-        client.chat.completions.create,
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
-    content = resp.choices[0].message.content.strip()
+
+def parse_json(content: str):
+    content = (content or "").strip()
     # 일부 모델이 코드펜스 붙이는 경우 제거
     if content.startswith("```"):
         content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content, flags=re.DOTALL).strip()
@@ -106,79 +117,363 @@ def chat_json(system_prompt: str, user_prompt: str, max_tokens: int = 64, temper
         # 완전 실패
         return None
 
-def get_agent_opinion(role: str, summary_text: str) -> tuple[int, str]:
-    payload = chat_json(
-        SYSTEM_PROMPTS[role],
-        f"요약 내용:\n{summary_text}",
-        max_tokens=64,
-        temperature=0
-    )
-    if not payload or "score" not in payload:
-        return -1, "파싱실패"
-    score = force_int_0_100(payload.get("score", -1))
-    comment = (payload.get("comment") or "").strip()
-    return score, comment
-
-def get_final_scores_from_aggregator(summary_text: str, agent_feedbacks: dict) -> dict:
-    debate = {
-        "summary": summary_text,
-        "agents": [
-            {"name": name, "score": s, "comment": c}
-            for name, (s, c) in agent_feedbacks.items()
-        ]
-    }
-    payload = chat_json(
-        AGGREGATOR_PROMPT,
-        json.dumps(debate, ensure_ascii=False),
-        max_tokens=96,
-        temperature=0
-    )
-    if not payload:
-        return {"설명력": -1, "이해도": -1, "정서적 배려": -1, "논리 정확성": -1, "comment": "파싱실패"}
-    # 클램프
-    for k in ["설명력", "이해도", "정서적 배려", "논리 정확성"]:
-        payload[k] = force_int_0_100(payload.get(k, -1))
-    payload["comment"] = (payload.get("comment") or "").strip()
-    return payload
-
-# ====== 경로 ======
-input_path = Path("./results_final.jsonl")
-output_path = Path("./results_dom_score_final.jsonl")
-
-# ====== 실행 ======
-idx = 0
-with open(input_path, "r", encoding="utf-8") as infile, open(output_path, "w", encoding="utf-8") as outfile:
-    for line in infile:
-        if not line.strip():
-            continue  # 빈 줄 스킵 (721줄 문제 방지)
+
+def percentile(xs, q):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    k = (len(xs) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+class ResponseCache:
+    """API 응답 캐시 (JSONL 추가 기록). 한 줄 = {"key", "content", "usage", "latency"}"""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.entries = {}
+        if path and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                        self.entries[e["key"]] = e
+                    except Exception:
+                        continue  # 중간에 끊긴 마지막 줄
+        self._f = open(path, "a", encoding="utf-8") if path else None
+
+    @staticmethod
+    def key(model, system_prompt, user_prompt, max_tokens, temperature) -> str:
+        raw = json.dumps([model, system_prompt, user_prompt, max_tokens, temperature], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, entry: dict):
+        self.entries[entry["key"]] = entry
+        if self._f:
+            self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._f.flush()
+
+    def close(self):
+        if self._f:
+            self._f.close()
+
+
+class Stats:
+    def __init__(self, model: str):
+        self.price_in, self.price_out = PRICES.get(model, (0.0, 0.0))
+        self.calls = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.failures = 0
+        self.parse_failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+        self.call_latency = []
+        self.line_latency = []
+
+    def usd(self, prompt_tokens, completion_tokens) -> float:
+        return (prompt_tokens * self.price_in + completion_tokens * self.price_out) / 1e6
+
+    def report(self, lines: int, wall: float) -> dict:
+        return {
+            "lines": lines,
+            "wall_sec": round(wall, 2),
+            "lines_per_sec": round(lines / wall, 3) if wall > 0 else 0.0,
+            "api_calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "retries": self.retries,
+            "failures": self.failures,
+            "parse_failures": self.parse_failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.usd(self.prompt_tokens, self.completion_tokens), 4),
+            "cache_saved_usd": round(self.usd(self.saved_prompt_tokens, self.saved_completion_tokens), 4),
+            "call_latency_sec": {f"p{q}": round(percentile(self.call_latency, q), 3) for q in (50, 90, 99)},
+            "line_latency_sec": {f"p{q}": round(percentile(self.line_latency, q), 3) for q in (50, 90, 99)},
+        }
+
+
+class Judge:
+    def __init__(self, client, model: str, concurrency: int, cache: ResponseCache, stats: Stats,
+                 max_retries: int = 6):
+        self.client = client
+        self.model = model
+        self.sema = asyncio.Semaphore(concurrency)
+        self.cache = cache
+        self.stats = stats
+        self.max_retries = max_retries
+
+    async def _create(self, messages, max_tokens, temperature):
+        """지수 백오프 재시도 (429 / 5xx / 연결·타임아웃만, 나머지 4xx는 바로 실패)"""
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.sema:
+                    t0 = time.perf_counter()
+                    resp = await self.client.chat.completions.create(
+                        model=self.model, messages=messages,
+                        temperature=temperature, max_tokens=max_tokens,
+                    )
+                    return resp, time.perf_counter() - t0
+            except (APIStatusError, APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                if status is not None and status != 429 and status < 500:
+                    raise
+                if attempt == self.max_retries:
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, 30.0)
+
+    async def chat_json(self, system_prompt: str, user_prompt: str, max_tokens: int = 64, temperature: float = 0):
+        key = ResponseCache.key(self.model, system_prompt, user_prompt, max_tokens, temperature)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.stats.cache_hits += 1
+            usage = hit.get("usage") or {}
+            self.stats.saved_prompt_tokens += usage.get("prompt_tokens", 0)
+            self.stats.saved_completion_tokens += usage.get("completion_tokens", 0)
+            return parse_json(hit["content"])
+
         try:
-            data = json.loads(line)
+            resp, latency = await self._create(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                max_tokens, temperature,
+            )
         except Exception:
-            # 깨진 라인 방지
-            continue
-        summary = (data.get("output") or "").strip()
-        if not summary:
-            continue
-
-        agent_feedbacks = {}
-        for agent in SYSTEM_PROMPTS:
-            try:
-                s, c = get_agent_opinion(agent, summary)
-            except Exception as e:
-                s, c = -1, f"오류:{type(e).__name__}"
-            agent_feedbacks[agent] = (s, c)
+            self.stats.failures += 1
+            raise
+        content = (resp.choices[0].message.content or "").strip()
+        usage = {
+            "prompt_tokens": resp.usage.prompt_tokens if resp.usage else 0,
+            "completion_tokens": resp.usage.completion_tokens if resp.usage else 0,
+        }
+        self.stats.calls += 1
+        self.stats.prompt_tokens += usage["prompt_tokens"]
+        self.stats.completion_tokens += usage["completion_tokens"]
+        self.stats.call_latency.append(latency)
+
+        payload = parse_json(content)
+        if payload is None:
+            self.stats.parse_failures += 1  # 파싱 실패 응답은 캐시하지 않음 (다음 실행 때 다시 시도)
+        else:
+            self.cache.put({"key": key, "content": content, "usage": usage, "latency": round(latency, 3)})
+        return payload
+
+    async def get_agent_opinion(self, role: str, summary_text: str) -> tuple[int, str]:
+        payload = await self.chat_json(
+            SYSTEM_PROMPTS[role],
+            f"요약 내용:\n{summary_text}",
+            max_tokens=64,
+            temperature=0
+        )
+        if not payload or "score" not in payload:
+            return -1, "파싱실패"
+        score = force_int_0_100(payload.get("score", -1))
+        comment = (payload.get("comment") or "").strip()
+        return score, comment
+
+    async def get_final_scores_from_aggregator(self, summary_text: str, agent_feedbacks: dict) -> dict:
+        debate = {
+            "summary": summary_text,
+            "agents": [
+                {"name": name, "score": s, "comment": c}
+                for name, (s, c) in agent_feedbacks.items()
+            ]
+        }
+        payload = await self.chat_json(
+            AGGREGATOR_PROMPT,
+            json.dumps(debate, ensure_ascii=False),
+            max_tokens=96,
+            temperature=0
+        )
+        if not payload:
+            return {**{k: -1 for k in AGG_KEYS}, "comment": "파싱실패"}
+        # 클램프
+        for k in AGG_KEYS:
+            payload[k] = force_int_0_100(payload.get(k, -1))
+        payload["comment"] = (payload.get("comment") or "").strip()
+        return payload
+
+    async def _agent(self, agent: str, summary: str) -> tuple[int, str]:
+        try:
+            return await self.get_agent_opinion(agent, summary)
+        except Exception as e:
+            return -1, f"오류:{type(e).__name__}"
+
+    async def judge_line(self, idx: int, summary: str) -> dict:
+        t0 = time.perf_counter()
+        # 에이전트 4명은 서로 독립 → 동시에, Aggregator는 그 결과를 받아서
+        results = await asyncio.gather(*(self._agent(a, summary) for a in SYSTEM_PROMPTS))
+        agent_feedbacks = dict(zip(SYSTEM_PROMPTS, results))
 
         try:
-            final_scores = get_final_scores_from_aggregator(summary, agent_feedbacks)
+            final_scores = await self.get_final_scores_from_aggregator(summary, agent_feedbacks)
         except Exception as e:
-            final_scores = {"설명력": -1, "이해도": -1, "정서적 배려": -1, "논리 정확성": -1, "comment": f"오류:{type(e).__name__}"}
+            final_scores = {**{k: -1 for k in AGG_KEYS}, "comment": f"오류:{type(e).__name__}"}
 
-        record = {
+        self.stats.line_latency.append(time.perf_counter() - t0)
+        return {
             "idx": idx,
             "final": final_scores,
             "agents": {k: {"score": v[0], "comment": v[1]} for k, v in agent_feedbacks.items()}
         }
-        outfile.write(json.dumps(record, ensure_ascii=False) + "\n")
-        idx += 1
 
-print("✅ Step 2 완료: Aggregator 최종 점수(+에이전트 상세) → results_dom_score_final.jsonl")
+
+def load_summaries(input_path: Path) -> list[tuple[int, str]]:
+    """(idx, 요약) 목록. idx는 요약이 있는 라인만 0부터 센다 (기존 결과 파일과 같은 번호)."""
+    items = []
+    with open(input_path, "r", encoding="utf-8") as infile:
+        for line in infile:
+            if not line.strip():
+                continue  # 빈 줄 스킵 (721줄 문제 방지)
+            try:
+                data = json.loads(line)
+            except Exception:
+                # 깨진 라인 방지
+                continue
+            summary = (data.get("output") or "").strip()
+            if summary:
+                items.append((len(items), summary))
+    return items
+
+
+def is_failed(rec: dict) -> bool:
+    """호출 오류("오류:…")나 파싱 실패(-1 점수)가 섞인 기록"""
+    parts = [rec.get("final") or {}, *(rec.get("agents") or {}).values()]
+    for p in parts:
+        if str(p.get("comment", "")).startswith("오류:"):
+            return True
+        if any(v == -1 for k, v in p.items() if k != "comment"):
+            return True
+    return not rec.get("final")
+
+
+def load_done(output_path: Path) -> dict[int, dict]:
+    done = {}
+    if output_path.exists():
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    idx = rec["idx"]
+                except Exception:
+                    continue  # 중단 시 잘린 마지막 줄
+                if not is_failed(rec):  # 오류 행은 다음 실행에서 다시 채점 (batch_summarize와 같음)
+                    done[idx] = rec
+    return done
+
+
+def write_sorted(output_path: Path, records: dict[int, dict]):
+    tmp = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for idx in sorted(records):
+            f.write(json.dumps(records[idx], ensure_ascii=False) + "\n")
+    os.replace(tmp, output_path)
+
+
+async def run(args, base_url: str | None, api_key: str | None) -> dict:
+    input_path, output_path = Path(args.input), Path(args.output)
+    items = load_summaries(input_path)
+    if args.limit:
+        items = items[:args.limit]
+
+    done = {} if args.fresh else load_done(output_path)
+    if args.fresh and output_path.exists():
+        output_path.unlink()
+    pending = [(i, s) for i, s in items if i not in done]
+    print(f"[judge] 전체 {len(items)} / 완료 {len(items) - len(pending)} / 남음 {len(pending)} "
+          f"(model={args.model}, concurrency={args.concurrency})")
+
+    cache = ResponseCache(None if args.no_cache else Path(args.cache))
+    stats = Stats(args.model)
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=args.timeout, max_retries=0)
+    judge = Judge(client, args.model, args.concurrency, cache, stats, args.max_retries)
+
+    # 동시에 진행하는 라인 수 제한: 라인당 호출이 에이전트 4 → Aggregator 1 순서라
+    # API 동시 호출 수만큼 라인을 열어 두면 세마포어가 비지 않는다.
+    line_sema = asyncio.Semaphore(max(1, args.concurrency))
+    t0 = time.perf_counter()
+    finished = 0
+
+    with open(output_path, "a", encoding="utf-8") as outfile:
+        async def one(idx, summary):
+            nonlocal finished
+            async with line_sema:
+                rec = await judge.judge_line(idx, summary)
+            # 체크포인트: 라인이 끝나는 즉시 기록 (중단돼도 다음 실행에서 이어감)
+            outfile.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            outfile.flush()
+            done[idx] = rec
+            finished += 1
+            if finished % args.log_every == 0:
+                el = time.perf_counter() - t0
+                print(f"[judge] {finished}/{len(pending)}  {finished / el:.2f} lines/s  "
+                      f"calls={stats.calls} hits={stats.cache_hits} "
+                      f"${stats.usd(stats.prompt_tokens, stats.completion_tokens):.3f}")
+
+        try:
+            await asyncio.gather(*(one(i, s) for i, s in pending))
+        finally:
+            cache.close()
+            await client.close()
+
+    wall = time.perf_counter() - t0
+    write_sorted(output_path, done)  # 완료 순서로 쌓인 라인을 idx 순으로 정리
+    report = stats.report(len(pending), wall)
+    report.update({"model": args.model, "concurrency": args.concurrency, "total_lines": len(done)})
+    return report
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default="./results_final.jsonl")
+    ap.add_argument("--output", default="./results_dom_score_final.jsonl")
+    ap.add_argument("--model", default=MODEL_NAME)
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("JUDGE_CONCURRENCY", "16")),
+                    help="동시 API 호출 수 상한")
+    ap.add_argument("--max_retries", type=int, default=6)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--cache", default="./judge_cache.jsonl")
+    ap.add_argument("--no_cache", action="store_true")
+    ap.add_argument("--fresh", action="store_true", help="기존 출력 무시하고 처음부터")
+    ap.add_argument("--limit", type=int, default=0, help="앞에서 N개 라인만 (0=전체)")
+    ap.add_argument("--log_every", type=int, default=50)
+    ap.add_argument("--base_url", default=OPENAI_BASE_URL, help="OpenAI 호환 엔드포인트 (기본: OPENAI_BASE_URL)")
+    ap.add_argument("--fake", action="store_true", help="로컬 가짜 심사 서버(fake_judge.py)를 띄워서 사용")
+    ap.add_argument("--fake_latency", type=float, default=0.3)
+    ap.add_argument("--fake_fail_every", type=int, default=0)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.fake:
+        from fake_judge import FakeJudge
+
+        with FakeJudge(args.fake_latency, args.fake_fail_every) as fj:
+            report = asyncio.run(run(args, fj.base_url, "fake"))
+            report["fake_max_in_flight"] = fj.max_in_flight
+    else:
+        if not OPENAI_API and not args.base_url:
+            raise SystemExit("OPENAI_API(또는 OPENAI_API_KEY)가 설정되지 않았습니다. (--fake로 오프라인 실행 가능)")
+        report = asyncio.run(run(args, args.base_url, OPENAI_API or "none"))
+
+    stats_path = Path(args.output + ".stats.json")
+    stats_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"✅ Step 2 완료: Aggregator 최종 점수(+에이전트 상세) → {args.output}  (통계: {stats_path})")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,7 @@ APP_SERVER_URL = os.getenv("APP_SERVER_URL")
 
 NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
 NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# 관리자 API(/api/admin/*) 토큰. 비어 있으면 관리자 API 비활성
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
\ No newline at end of file
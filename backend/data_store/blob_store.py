@@ -0,0 +1,205 @@
+# backend/data_store/blob_store.py
+#
+# 내용 해시(sha256) 기반 문서 이미지 저장소.
+# 같은 바이트는 한 번만 저장되고, recent_docs.path가 blob 경로를 가리킨다.
+#   {BLOB_DIR}/ab/cd/abcd....jpg           원본
+#   {BLOB_DIR}/derived/ab/abcd..._640.jpg  축소본(요청 시 생성)
+# 참조 수는 REFERENCES(최근 문서, 개선 대기 중인 👎 피드백, 처리 전 개선 작업)에서
+# 같은 path를 가진 행 수로 계산한다 (별도 카운터 없음). retention의 고아 정리도 같은 목록을 쓴다.
+
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from db_config import BASE_DIR, SessionLocal
+from models import Feedback, FeedbackJob, RecentDoc
+
+BLOB_DIR = Path(os.getenv("BLOB_DIR", os.path.join(BASE_DIR, "data", "blobs")))
+DERIVED_DIR = BLOB_DIR / "derived"
+BLOB_EXT = ".jpg"
+CHUNK = 1024 * 1024
+# 방금 재사용된 blob은 동시 업로드와 경합하지 않도록 삭제 유예
+RELEASE_GRACE_SEC = 60
+# 중복 업로드의 존재 확인+mtime 갱신과 release/GC의 확인+삭제가 서로 끼어들지 않게 (프로세스 내)
+_lock = threading.Lock()
+
+# 이미지를 아직 쓸 수 있는 참조: (경로 컬럼, 추가 조건)
+REFERENCES = [
+    (RecentDoc.path, ()),
+    (Feedback.image_path, (Feedback.feedback == "bad", Feedback.improved.is_(None))),
+    (FeedbackJob.image_path, (FeedbackJob.status.in_(("pending", "running")),)),
+]
+
+
+def _blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / digest[2:4] / f"{digest}{BLOB_EXT}"
+
+
+def digest_of(path: str | os.PathLike) -> str | None:
+    """blob 경로면 파일명에서 해시를 꺼낸다 (blob이 아니면 None)"""
+    p = Path(path)
+    try:
+        p.resolve().relative_to(BLOB_DIR.resolve())
+    except ValueError:
+        return None
+    stem = p.name[: -len(BLOB_EXT)] if p.name.endswith(BLOB_EXT) else p.stem
+    return stem if len(stem) == 64 else None
+
+
+def is_blob(path: str | None) -> bool:
+    return bool(path) and digest_of(path) is not None
+
+
+def put_fileobj(fileobj) -> str:
+    """스트림을 해시하며 임시 파일에 쓰고, 같은 해시가 없을 때만 원자적으로 rename"""
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=BLOB_DIR, prefix=".incoming-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+
+        dest = _blob_path(h.hexdigest())
+        with _lock:
+            if dest.exists():
+                # 중복 업로드: 디스크 추가 사용 없음. 유예 판단용으로 mtime만 갱신
+                os.utime(dest)
+                return str(dest)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dest)
+            tmp = None
+            return str(dest)
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def put_bytes(data: bytes) -> str:
+    from io import BytesIO
+    return put_fileobj(BytesIO(data))
+
+
+def refcount(path: str) -> int:
+    db = SessionLocal()
+    try:
+        return sum(db.query(col).filter(col == path, *conds).count() for col, conds in REFERENCES)
+    finally:
+        db.close()
+
+
+def referenced_paths() -> set[str]:
+    """REFERENCES 전체의 절대 경로 (retention 고아 정리용)"""
+    db = SessionLocal()
+    try:
+        refs = set()
+        for col, conds in REFERENCES:
+            refs.update(p for (p,) in db.query(col).filter(col.isnot(None), *conds))
+        return {os.path.abspath(p) for p in refs}
+    finally:
+        db.close()
+
+
+def _remove_derivatives(digest: str) -> int:
+    freed = 0
+    if not digest:
+        return 0
+    ddir = DERIVED_DIR / digest[:2]
+    if not ddir.is_dir():
+        return 0
+    for p in ddir.glob(f"{digest}_*"):
+        try:
+            freed += p.stat().st_size
+            p.unlink()
+        except FileNotFoundError:
+            pass
+    return freed
+
+
+def release(path: str | None) -> bool:
+    """참조가 0이 된 blob과 파생 이미지 삭제. 삭제했으면 True"""
+    digest = digest_of(path) if path else None
+    if not digest:
+        return False
+    p = Path(path)
+    try:
+        with _lock:
+            if refcount(str(p)) > 0:
+                return False
+            if time.time() - p.stat().st_mtime < RELEASE_GRACE_SEC:
+                return False
+            p.unlink()
+    except FileNotFoundError:
+        return False
+    _remove_derivatives(digest)
+    return True
+
+
+def derivative_path(path: str, max_side: int, fmt: str = "JPEG") -> Path:
+    digest = digest_of(path) or hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+    ext = ".webp" if fmt.upper() == "WEBP" else ".jpg"
+    return DERIVED_DIR / digest[:2] / f"{digest}_{max_side}{ext}"
+
+
+def derivative(path: str, max_side: int, fmt: str = "JPEG", quality: int = 80) -> str:
+    """긴 변이 max_side 이하인 축소본 경로. 없으면 만들어서 캐시"""
+    dest = derivative_path(path, max_side, fmt)
+    if dest.exists():
+        return str(dest)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(path) as im:
+        # JPEG는 draft로 디코딩 단계에서 먼저 줄여 CPU/메모리 절약
+        # (두 변 모두 요청 크기 이상일 때만 줄이므로 비율을 유지한 목표 크기를 넘긴다)
+        w, h = im.size
+        scale = min(1.0, max_side / max(w, h))
+        im.draft("RGB", (math.ceil(w * scale), math.ceil(h * scale)))
+        img = im.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".incoming-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            img.save(out, format=fmt.upper(), quality=quality)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return str(dest)
+
+
+def gc_orphans(referenced: set[str], grace_sec: int = 3600) -> dict:
+    """어떤 참조에도 걸리지 않은 blob 정리 (retention 작업에서 호출)"""
+    removed, freed = 0, 0
+    if not BLOB_DIR.is_dir():
+        return {"files": "blobs", "removed": 0, "bytes": 0}
+    deadline = time.time() - grace_sec
+    for p in BLOB_DIR.glob(f"??/??/*{BLOB_EXT}"):
+        if os.path.abspath(p) in referenced:
+            continue
+        try:
+            with _lock:
+                st = p.stat()
+                if st.st_mtime > deadline:
+                    continue
+                p.unlink()
+            removed += 1
+            freed += st.st_size
+            freed += _remove_derivatives(digest_of(p))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] blob_store: 삭제 실패 {p}: {e}")
+    return {"files": "blobs", "removed": removed, "bytes": freed}
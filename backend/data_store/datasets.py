@@ -0,0 +1,282 @@
+# backend/data_store/datasets.py
+#
+# 피드백에서 쌓이는 SFT/DPO 학습 데이터(JSONL) 적재기.
+# 데이터셋마다 writer 스레드 하나가 큐에 모인 행을 묶어서 append 하고(파일 잠금 + fsync),
+# 활성 파일이 크기/시간 기준을 넘으면 zstd 샤드로 회전시킨 뒤 manifest.json에 기록한다.
+#   {dir}/{name}.jsonl                         활성 파일 (append 전용)
+#   {dir}/shards/{name}-{ts}-{seq}.jsonl.zst   회전된 샤드
+#   {dir}/manifest.json                        샤드 목록 (파일/행 수/바이트/sha256)
+# 학습 쪽은 iter_rows()로 샤드 → 활성 파일 순서로 스트리밍해서 읽는다.
+
+import atexit
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import zstandard
+
+try:
+    import fcntl
+    HAVE_FCNTL = True
+except Exception:  # Windows 개발 환경
+    HAVE_FCNTL = False
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]   # .../backend
+DATA_BASE   = BACKEND_DIR / "data"
+SFT_DIR     = DATA_BASE / "sft_train"
+DPO_DIR     = DATA_BASE / "dpo_train"
+SFT_JSONL   = SFT_DIR / "sft.jsonl"
+DPO_JSONL   = DPO_DIR / "dpo_dataset.jsonl"
+
+DATASET_BATCH = int(os.getenv("DATASET_BATCH", "256"))
+DATASET_FLUSH_SEC = float(os.getenv("DATASET_FLUSH_SEC", "1.0"))
+DATASET_ROTATE_BYTES = int(os.getenv("DATASET_ROTATE_BYTES", str(64 * 1024 * 1024)))
+DATASET_ROTATE_SEC = int(os.getenv("DATASET_ROTATE_SEC", str(24 * 60 * 60)))
+DATASET_FSYNC = os.getenv("DATASET_FSYNC", "1") == "1"
+ZSTD_LEVEL = 10
+
+_FLUSH = object()
+_STOP = object()
+
+
+class _FileLock:
+    """프로세스 간 잠금 (uvicorn 워커 여러 개가 같은 파일에 쓰는 경우)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, "a+b")
+        if HAVE_FCNTL:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if HAVE_FCNTL:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        self._f.close()
+
+
+def _load_manifest(path: Path, name: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"name": name, "shards": [], "active_started_at": None}
+
+
+def _save_manifest(path: Path, manifest: dict):
+    tmp = path.with_suffix(".json.part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class DatasetSink:
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        name: str,
+        rotate_bytes: int = DATASET_ROTATE_BYTES,
+        rotate_sec: int = DATASET_ROTATE_SEC,
+        batch: int = DATASET_BATCH,
+        flush_sec: float = DATASET_FLUSH_SEC,
+        fsync: bool = DATASET_FSYNC,
+    ):
+        self.dir = Path(directory)
+        self.name = name
+        self.active = self.dir / f"{name}.jsonl"
+        self.shard_dir = self.dir / "shards"
+        self.manifest_path = self.dir / "manifest.json"
+        self.lock_path = self.dir / f".{name}.lock"
+        self.rotate_bytes = rotate_bytes
+        self.rotate_sec = rotate_sec
+        self.batch = batch
+        self.flush_sec = flush_sec
+        self.fsync = fsync
+
+        self._q: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.stats = {"rows": 0, "batches": 0, "rotations": 0, "errors": 0}
+
+    # ---------- 호출자 쪽 API (논블로킹) ----------
+    def append(self, row: dict):
+        self._ensure_thread()
+        self._q.put(row)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """지금까지 append 된 행이 디스크에 쓰일 때까지 대기"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._q.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def rotate(self) -> dict | None:
+        """대기 중인 행을 쓰고 활성 파일을 즉시 샤드로 회전 (학습 직전 스냅샷용)"""
+        self.flush()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with _FileLock(self.lock_path):
+            return self._rotate_locked()
+
+    def close(self, timeout: float = 10.0):
+        if self._thread is not None and self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- writer 스레드 ----------
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"dataset-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._q.get(timeout=self.flush_sec)
+            except queue.Empty:
+                continue
+            rows, waiters = [], []
+            # 첫 행 이후 짧게 모아서 한 번에 쓴다
+            deadline = time.monotonic() + min(self.flush_sec, 0.05)
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, tuple) and item and item[0] is _FLUSH:
+                    waiters.append(item[1])
+                else:
+                    rows.append(item)
+                if stop or len(rows) >= self.batch:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if rows:
+                try:
+                    self._write_batch(rows)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"[datasets] {self.name} write error: {e}", flush=True)
+            for w in waiters:
+                w.set()
+
+    def _write_batch(self, rows: list[dict]):
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with _FileLock(self.lock_path):
+            manifest = None
+            if not self.active.exists() or self.active.stat().st_size == 0:
+                manifest = _load_manifest(self.manifest_path, self.name)
+                manifest["active_started_at"] = time.time()
+                _save_manifest(self.manifest_path, manifest)
+            with open(self.active, "ab") as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.stats["rows"] += len(rows)
+            self.stats["batches"] += 1
+
+            size = self.active.stat().st_size
+            manifest = manifest or _load_manifest(self.manifest_path, self.name)
+            started = manifest.get("active_started_at") or time.time()
+            if size >= self.rotate_bytes or time.time() - started >= self.rotate_sec:
+                self._rotate_locked(manifest)
+
+    def _rotate_locked(self, manifest: dict | None = None) -> dict | None:
+        if not self.active.exists() or self.active.stat().st_size == 0:
+            return None
+        manifest = manifest or _load_manifest(self.manifest_path, self.name)
+        seq = len(manifest["shards"])
+        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        out_path = self.shard_dir / f"{self.name}-{ts}-{seq:06d}.jsonl.zst"
+        tmp_path = out_path.with_suffix(".zst.part")
+
+        rows, raw_bytes = 0, 0
+        sha = hashlib.sha256()
+        with open(self.active, "rb") as src, open(tmp_path, "wb") as raw:
+            with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False) as zf:
+                for line in src:
+                    if not line.endswith(b"\n"):
+                        line += b"\n"  # 비정상 종료로 잘린 마지막 줄
+                    zf.write(line)
+                    sha.update(line)
+                    rows += 1
+                    raw_bytes += len(line)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, out_path)
+
+        entry = {
+            "file": str(out_path.relative_to(self.dir)),
+            "rows": rows,
+            "bytes": raw_bytes,
+            "compressed_bytes": out_path.stat().st_size,
+            "sha256": sha.hexdigest(),
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        manifest["shards"].append(entry)
+        manifest["active_started_at"] = None
+        # 샤드가 manifest에 기록된 뒤에만 활성 파일을 비운다
+        _save_manifest(self.manifest_path, manifest)
+        os.truncate(self.active, 0)
+        self.stats["rotations"] += 1
+        print(f"[datasets] rotated {self.name}: {entry['file']} rows={rows}", flush=True)
+        return entry
+
+
+def list_shards(directory: str | os.PathLike) -> list[Path]:
+    d = Path(directory)
+    manifest = _load_manifest(d / "manifest.json", "")
+    return [d / s["file"] for s in manifest["shards"]]
+
+
+def iter_shard(path: str | os.PathLike):
+    """샤드 한 개(.jsonl.zst 또는 .jsonl)를 한 줄씩 스트리밍"""
+    path = Path(path)
+    with open(path, "rb") as raw:
+        stream = zstandard.ZstdDecompressor().stream_reader(raw) if path.suffix == ".zst" else raw
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            # 쓰는 중인 마지막 미완성 줄은 건너뜀
+            if line.endswith("\n") and line.strip():
+                yield json.loads(line)
+
+
+def iter_rows(directory: str | os.PathLike, name: str | None = None, include_active: bool = True):
+    """샤드(회전 순서) → 활성 파일 순서로 행을 스트리밍. 일관된 스냅샷이 필요하면 먼저 sink.rotate()"""
+    d = Path(directory)
+    manifest = _load_manifest(d / "manifest.json", name or "")
+    for s in manifest["shards"]:
+        yield from iter_shard(d / s["file"])
+    name = name or manifest.get("name")
+    if include_active and name and (d / f"{name}.jsonl").exists():
+        yield from iter_shard(d / f"{name}.jsonl")
+
+
+SFT_SINK = DatasetSink(SFT_DIR, "sft")
+DPO_SINK = DatasetSink(DPO_DIR, "dpo_dataset")
+
+
+def close_all():
+    for sink in (SFT_SINK, DPO_SINK):
+        sink.close()
+
+
+atexit.register(close_all)
@@ -0,0 +1,185 @@
+# backend/data_store/feedback_jobs.py
+# 👎 피드백 개선 작업 큐 (SQLite 영속). 워커는 claim → complete/retry 순으로 사용한다.
+
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from db_config import SessionLocal
+from models import Feedback, FeedbackJob
+
+
+def dedup_key(doc_id: str | None, output: str) -> str:
+    return hashlib.sha256(f"{doc_id or ''}\0{output or ''}".encode("utf-8")).hexdigest()
+
+
+def _reuse_existing(db, existing: FeedbackJob, feedback_id: int):
+    """같은 키의 기존 작업 재사용. 이미 끝난 작업이면 결과를 새 피드백 행에 바로 채움"""
+    if existing.status == "done":
+        row = (
+            db.query(Feedback.improved)
+            .filter(Feedback.doc_id == existing.doc_id, Feedback.output == existing.output,
+                    Feedback.improved.isnot(None))
+            .first()
+        )
+        if row is not None:
+            (
+                db.query(Feedback)
+                .filter(Feedback.id == feedback_id, Feedback.improved.is_(None))
+                .update({Feedback.improved: row[0]}, synchronize_session=False)
+            )
+            db.commit()
+            return
+    if existing.status in ("done", "failed"):
+        # 실패로 끝났거나, 결과를 가진 피드백 행이 보존 작업으로 정리된 경우: 다시 대기열에 올림
+        existing.status = "pending"
+        existing.attempts = 0
+        existing.next_run_at = datetime.utcnow()
+        existing.updated_at = datetime.utcnow()
+        db.commit()
+    # pending/running이면 complete_job이 같은 (doc_id, output)의 새 행까지 채움
+
+
+# 적재 (같은 문서의 같은 출력이면 기존 작업을 재사용). (job_id, 새로 만들었는지) 반환
+def enqueue_job(feedback_id: int, user_id, doc_id, image_path, prompt: str, output: str) -> tuple[int, bool]:
+    key = dedup_key(doc_id, output)
+    db = SessionLocal()
+    try:
+        existing = db.query(FeedbackJob).filter_by(dedup_key=key).first()
+        if existing:
+            _reuse_existing(db, existing, feedback_id)
+            return existing.id, False
+        job = FeedbackJob(
+            feedback_id=feedback_id,
+            dedup_key=key,
+            user_id=user_id,
+            doc_id=doc_id,
+            image_path=image_path,
+            prompt=prompt,
+            output=output,
+            status="pending",
+            attempts=0,
+            next_run_at=datetime.utcnow(),
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # 동시에 같은 키가 들어온 경우
+            db.rollback()
+            existing = db.query(FeedbackJob).filter_by(dedup_key=key).first()
+            _reuse_existing(db, existing, feedback_id)
+            return existing.id, False
+        return job.id, True
+    finally:
+        db.close()
+
+
+# 실행할 작업을 running으로 바꾸며 가져옴 (단일 프로세스 워커 기준)
+def claim_jobs(limit: int) -> list[dict]:
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        jobs = (
+            db.query(FeedbackJob)
+            .filter(FeedbackJob.status == "pending", FeedbackJob.next_run_at <= now)
+            .order_by(FeedbackJob.next_run_at, FeedbackJob.id)
+            .limit(limit)
+            .all()
+        )
+        out = []
+        for j in jobs:
+            j.status = "running"
+            j.attempts = (j.attempts or 0) + 1
+            j.updated_at = now
+            out.append({
+                "id": j.id, "feedback_id": j.feedback_id, "user_id": j.user_id, "doc_id": j.doc_id,
+                "image_path": j.image_path, "prompt": j.prompt, "output": j.output, "attempts": j.attempts,
+            })
+        db.commit()
+        return out
+    finally:
+        db.close()
+
+
+# 성공: 작업 완료 + 같은 (doc_id, output)의 피드백 행에 개선 결과 반영
+def complete_job(job_id: int, improved: str, latency_s: float | None = None):
+    db = SessionLocal()
+    try:
+        job = db.query(FeedbackJob).filter_by(id=job_id).first()
+        if not job:
+            return
+        job.status = "done"
+        job.last_error = None
+        job.latency_s = latency_s
+        job.updated_at = datetime.utcnow()
+        (
+            db.query(Feedback)
+            .filter(Feedback.doc_id == job.doc_id, Feedback.output == job.output, Feedback.improved.is_(None))
+            .update({Feedback.improved: improved}, synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# 실패: 재시도 가능하면 backoff 후 pending, 아니면 failed
+def fail_job(job_id: int, error: str, retry_in: float | None):
+    db = SessionLocal()
+    try:
+        job = db.query(FeedbackJob).filter_by(id=job_id).first()
+        if not job:
+            return
+        job.last_error = (error or "")[:1000]
+        job.updated_at = datetime.utcnow()
+        if retry_in is None:
+            job.status = "failed"
+        else:
+            job.status = "pending"
+            job.next_run_at = datetime.utcnow() + timedelta(seconds=retry_in)
+        db.commit()
+    finally:
+        db.close()
+
+
+# 서버 재시작 시 running으로 남은 작업 복구
+def reset_running_jobs() -> int:
+    db = SessionLocal()
+    try:
+        n = (
+            db.query(FeedbackJob)
+            .filter(FeedbackJob.status == "running")
+            .update({FeedbackJob.status: "pending"}, synchronize_session=False)
+        )
+        db.commit()
+        return n
+    finally:
+        db.close()
+
+
+def queue_stats(window_sec: int = 300) -> dict:
+    db = SessionLocal()
+    try:
+        counts = dict(db.query(FeedbackJob.status, func.count()).group_by(FeedbackJob.status).all())
+        oldest = (
+            db.query(func.min(FeedbackJob.created_at))
+            .filter(FeedbackJob.status.in_(("pending", "running")))
+            .scalar()
+        )
+        since = datetime.utcnow() - timedelta(seconds=window_sec)
+        done_recent, avg_latency = (
+            db.query(func.count(), func.avg(FeedbackJob.latency_s))
+            .filter(FeedbackJob.status == "done", FeedbackJob.updated_at >= since)
+            .one()
+        )
+        return {
+            "counts": counts,
+            "backlog": counts.get("pending", 0) + counts.get("running", 0),
+            "oldest_pending_age_s": (datetime.utcnow() - oldest).total_seconds() if oldest else None,
+            "throughput_per_min": round(done_recent * 60 / window_sec, 3),
+            "avg_latency_s": round(avg_latency, 3) if avg_latency is not None else None,
+        }
+    finally:
+        db.close()
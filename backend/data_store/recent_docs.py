@@ -2,6 +2,7 @@
 
 from db_config import SessionLocal
 from models import RecentDoc
+from data_store import blob_store
 from datetime import datetime, timezone
 
 def _to_utc_datetime(ts: float | None) -> datetime:
@@ -32,6 +33,27 @@ def add_recent_doc(user_id, doc_id, path, title=None, doc_type=None, ts=None):
     finally:
         db.close()
 
+# 제목/유형만 갱신 (path 참조는 그대로 유지). 행이 없으면 False
+def update_recent_doc(user_id, doc_id, title=None, doc_type=None):
+    db = SessionLocal()
+    try:
+        values = {}
+        if title is not None:
+            values[RecentDoc.title] = title or "문서"
+        if doc_type is not None:
+            values[RecentDoc.doc_type] = doc_type or "기타"
+        if not values:
+            return db.query(RecentDoc).filter_by(user_id=user_id, doc_id=doc_id).count() > 0
+        updated = (
+            db.query(RecentDoc)
+            .filter_by(user_id=user_id, doc_id=doc_id)
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return updated > 0
+    finally:
+        db.close()
+
 # 조회
 def list_recent_docs(user_id: str, limit: int = 20):
     db = SessionLocal()
@@ -61,17 +83,26 @@ def list_recent_docs(user_id: str, limit: int = 20):
     finally:
         db.close()
 
-# 삭제 (파일 삭제는 하지 않고 DB 레코드만 제거)
+# 삭제 (DB 레코드 제거 후, blob 이미지는 더 이상 참조가 없을 때만 삭제)
 def delete_recent_doc(user_id: str, doc_id: str, path: str | None = None):
     db = SessionLocal()
     removed = False
+    stored_paths = []
     try:
         q = db.query(RecentDoc).filter_by(user_id=user_id, doc_id=doc_id)
+        # 클라이언트가 보낸 path는 신뢰하지 않고 DB에 저장된 경로만 사용
+        stored_paths = [r.path for r in q.all() if r.path]
         removed = q.delete(synchronize_session=False) > 0
         db.commit()
     finally:
         db.close()
-    return {"removed": removed, "file_removed": False}
+    file_removed = False
+    for p in stored_paths:
+        try:
+            file_removed = blob_store.release(p) or file_removed
+        except Exception as e:
+            print(f"[WARN] blob release 실패: {p}: {e}")
+    return {"removed": removed, "file_removed": file_removed}
 
 # 단건 조회 (세션 복원을 위해 사용)
 def get_recent_doc(user_id: str, doc_id: str) -> dict | None:
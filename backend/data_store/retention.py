@@ -0,0 +1,246 @@
+# backend/data_store/retention.py
+#
+# 보존(retention) 작업: 오래된 DB 행은 JSONL+zstd 아카이브로 옮기고,
+# 어디에서도 참조하지 않는 업로드 이미지(/tmp 레거시 + blob 저장소)는 지우고, SQLite 파일은 incremental VACUUM으로 줄인다.
+# 서버 시작 시 백그라운드 루프로 돌거나 `python -m data_store.retention`으로 수동 실행한다.
+
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import zstandard
+from sqlalchemy import text
+
+from db_config import BASE_DIR, DB_PATH, SessionLocal, engine
+from models import Conversation, Feedback, RecentDoc
+from data_store import blob_store
+
+# 삭제가 일어나는 작업이라 기본은 꺼 둔다. 서버에서 켜려면 RETENTION_ENABLED=1
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "0") == "1"
+RETENTION_INTERVAL_SEC = int(os.getenv("RETENTION_INTERVAL_SEC", str(6 * 60 * 60)))
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "data", "archive")))
+ARCHIVE_BATCH = 1000
+ZSTD_LEVEL = 10
+
+# 테이블별 정책: days 이전(ts 컬럼 기준) 행을 아카이브 후 삭제. 0이면 비활성화
+TABLE_POLICIES = {
+    "conversations": {
+        "model": Conversation,
+        "ts_col": "ts",
+        "days": int(os.getenv("RETENTION_CONVERSATION_DAYS", "90")),
+    },
+    "feedbacks": {
+        "model": Feedback,
+        "ts_col": "ts",
+        "days": int(os.getenv("RETENTION_FEEDBACK_DAYS", "180")),
+    },
+    "recent_docs": {
+        "model": RecentDoc,
+        "ts_col": "mtime",
+        "days": int(os.getenv("RETENTION_RECENT_DOC_DAYS", "30")),
+    },
+}
+
+# 파일 정책: 업로드 디렉터리에서 이름 패턴에 맞고 참조가 끊긴 파일을 grace 이후 삭제
+FILE_POLICIES = {
+    "uploads": {
+        "dir": os.getenv("UPLOAD_DIR", "/tmp"),
+        "pattern": re.compile(r"^[0-9a-f]{32}_\d+\.jpg$"),
+        "grace_sec": int(os.getenv("UPLOAD_ORPHAN_GRACE_SEC", "3600")),
+    },
+}
+
+INCREMENTAL_VACUUM_PAGES = int(os.getenv("INCREMENTAL_VACUUM_PAGES", "0"))  # 0이면 freelist 전체
+
+
+def _row_to_dict(row, columns) -> dict:
+    out = {}
+    for c in columns:
+        v = getattr(row, c.name)
+        out[c.name] = v.isoformat() if isinstance(v, datetime) else v
+    return out
+
+
+def _archive_path(out_dir: Path, now: datetime) -> Path:
+    """같은 초(또는 같은 now)에 여러 번 돌아도 기존 아카이브를 덮어쓰지 않도록 번호를 붙인다"""
+    stem = now.strftime("%Y%m%d_%H%M%S_%f")
+    out_path = out_dir / f"{stem}.jsonl.zst"
+    n = 1
+    while out_path.exists() or out_path.with_suffix(".zst.part").exists():
+        out_path = out_dir / f"{stem}-{n}.jsonl.zst"
+        n += 1
+    return out_path
+
+
+def archive_table(name: str, policy: dict, now: datetime | None = None) -> dict:
+    """cutoff 이전 행을 ARCHIVE_DIR/{name}/*.jsonl.zst로 옮긴 뒤 DB에서 삭제"""
+    days = policy["days"]
+    if days <= 0:
+        return {"table": name, "archived": 0, "archive": None}
+
+    model = policy["model"]
+    ts_col = getattr(model, policy["ts_col"])
+    now = now or datetime.now(timezone.utc)
+    # 과거 데이터는 naive UTC로 저장되어 있으므로 비교도 naive로
+    cutoff = (now - timedelta(days=days)).replace(tzinfo=None)
+    columns = list(model.__table__.columns)
+
+    out_dir = ARCHIVE_DIR / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = _archive_path(out_dir, now)
+    tmp_path = out_path.with_suffix(".zst.part")
+
+    archived = 0
+    db = SessionLocal()
+    try:
+        with open(tmp_path, "wb") as raw:
+            with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) as zf:
+                last_id = 0
+                while True:
+                    rows = (
+                        db.query(model)
+                        .filter(ts_col < cutoff, model.id > last_id)
+                        .order_by(model.id)
+                        .limit(ARCHIVE_BATCH)
+                        .all()
+                    )
+                    if not rows:
+                        break
+                    for r in rows:
+                        line = json.dumps(_row_to_dict(r, columns), ensure_ascii=False) + "\n"
+                        zf.write(line.encode("utf-8"))
+                    last_id = rows[-1].id
+                    archived += len(rows)
+
+        if archived == 0:
+            tmp_path.unlink(missing_ok=True)
+            return {"table": name, "archived": 0, "archive": None}
+
+        # 아카이브 파일이 완성된 뒤에만 삭제 (중간 실패 시 원본 유지)
+        os.replace(tmp_path, out_path)
+        db.query(model).filter(ts_col < cutoff, model.id <= last_id).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        db.close()
+
+    return {"table": name, "archived": archived, "archive": str(out_path)}
+
+
+def _referenced_paths() -> set[str]:
+    """아직 쓰일 수 있는 이미지 경로 (blob_store.REFERENCES: 최근 문서, 개선 대기 피드백/작업)"""
+    return blob_store.referenced_paths()
+
+
+def sweep_orphan_files(name: str, policy: dict, referenced: set[str] | None = None) -> dict:
+    """패턴에 맞고 참조되지 않으며 grace 시간이 지난 파일 삭제"""
+    base = Path(policy["dir"])
+    if not base.is_dir():
+        return {"files": name, "removed": 0, "bytes": 0}
+    referenced = _referenced_paths() if referenced is None else referenced
+    deadline = time.time() - policy["grace_sec"]
+
+    removed, freed = 0, 0
+    for entry in os.scandir(base):
+        if not entry.is_file() or not policy["pattern"].match(entry.name):
+            continue
+        if os.path.abspath(entry.path) in referenced:
+            continue
+        try:
+            st = entry.stat()
+            if st.st_mtime > deadline:
+                continue
+            os.remove(entry.path)
+            removed += 1
+            freed += st.st_size
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] retention: 파일 삭제 실패 {entry.path}: {e}")
+    return {"files": name, "removed": removed, "bytes": freed}
+
+
+def incremental_vacuum(pages: int = INCREMENTAL_VACUUM_PAGES) -> dict:
+    """freelist 페이지를 파일에서 반환. auto_vacuum이 꺼져 있으면 최초 1회 전환(VACUUM)"""
+    before = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+        if mode != 2:
+            # INCREMENTAL(2) 모드는 VACUUM 이후에만 적용됨
+            conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+        else:
+            # incremental_vacuum은 step마다 한 페이지씩 해제됨.
+            # execute()는 한 번만 step하므로 끝까지 실행하는 executescript 사용
+            arg = f"({int(pages)})" if pages > 0 else ""
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum{arg};")
+    after = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
+    return {"db_bytes_before": before, "db_bytes_after": after, "bytes": max(0, before - after)}
+
+
+def run_retention() -> dict:
+    """정책 전체를 한 번 실행하고 회수한 바이트를 보고"""
+    started = time.time()
+    report = {"tables": [], "files": [], "vacuum": None}
+
+    for name, policy in TABLE_POLICIES.items():
+        try:
+            report["tables"].append(archive_table(name, policy))
+        except Exception as e:
+            print(f"[WARN] retention: {name} 아카이브 실패: {e}")
+
+    try:
+        referenced = _referenced_paths()
+    except Exception as e:
+        # 참조 목록을 모르면 파일은 건드리지 않음
+        print(f"[WARN] retention: 참조 경로 조회 실패 -> 파일 정리 생략: {e}")
+        referenced = None
+    if referenced is not None:
+        for name, policy in FILE_POLICIES.items():
+            try:
+                report["files"].append(sweep_orphan_files(name, policy, referenced))
+            except Exception as e:
+                print(f"[WARN] retention: {name} 파일 정리 실패: {e}")
+        try:
+            report["files"].append(blob_store.gc_orphans(referenced, FILE_POLICIES["uploads"]["grace_sec"]))
+        except Exception as e:
+            print(f"[WARN] retention: blob 정리 실패: {e}")
+
+    try:
+        report["vacuum"] = incremental_vacuum()
+    except Exception as e:
+        print(f"[WARN] retention: VACUUM 실패: {e}")
+
+    report["bytes_reclaimed"] = (
+        sum(f["bytes"] for f in report["files"])
+        + (report["vacuum"]["bytes"] if report["vacuum"] else 0)
+    )
+    report["elapsed_s"] = round(time.time() - started, 2)
+    archived = sum(t["archived"] for t in report["tables"])
+    removed = sum(f["removed"] for f in report["files"])
+    print(
+        f"🧹 retention: rows_archived={archived} files_removed={removed} "
+        f"bytes_reclaimed={report['bytes_reclaimed']} ({report['elapsed_s']}s)"
+    )
+    return report
+
+
+async def retention_loop():
+    """RETENTION_INTERVAL_SEC 주기로 run_retention을 스레드에서 실행"""
+    while True:
+        try:
+            await asyncio.to_thread(run_retention)
+        except Exception as e:
+            print(f"[WARN] retention loop error: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_SEC)
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_retention(), ensure_ascii=False, indent=2))
@@ -0,0 +1,342 @@
+# backend/data_store/vision_features.py
+#
+# 비전 타워 출력(이미지 임베딩) 영구 캐시. 백엔드 세션과 ai/qwen 평가 스크립트가 같이 쓴다.
+# 같은 이미지라도 모델 가중치/프로세서 설정(해상도 등)/dtype이 바뀌면 임베딩이 달라지므로
+# 그 조합의 해시로 네임스페이스를 나누고, 이미지는 원본 바이트 sha256으로 찾는다.
+#   {root}/{version}/manifest.json           모델 id / revision / 프로세서 설정 / dtype / 포맷 버전
+#   {root}/{version}/index.json              이미지 키 -> {shard, tokens, grid_thw}
+#   {root}/{version}/shard-{ts}-{n}.safetensors
+#       "{key}/embeds"   (토큰 수, hidden) 병합 후 비전 토큰 — 언어 모델 입력에 그대로 들어가는 값
+#       "{key}/grid_thw" (3,) int64
+# safetensors는 mmap으로 열리므로 필요한 이미지 텐서만 읽힌다.
+#
+# 추론 시에는 use_cached_features()로 감싸면 모델의 visual.forward가 픽셀 대신 캐시된 임베딩을 돌려준다
+# (mrope 위치 계산 등 나머지 경로는 transformers 그대로).
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from data_store.datasets import DATA_BASE, _FileLock
+
+try:
+    import torch
+    from safetensors import safe_open
+    from safetensors.torch import save_file
+    HAVE_SAFETENSORS = True
+except Exception:
+    HAVE_SAFETENSORS = False
+
+FORMAT_VERSION = 1
+VISION_CACHE_DIR = Path(os.getenv("VISION_CACHE_DIR", DATA_BASE / "vision_features"))
+VISION_CACHE_SHARD_BYTES = int(os.getenv("VISION_CACHE_SHARD_BYTES", str(256 * 1024 * 1024)))
+IMAGE_TOKEN = "<|image_pad|>"
+
+# 프로세서 설정 중 출력에 영향 없는 항목
+_PROC_IGNORE = {"processor_class", "image_processor_type", "_processor_class"}
+
+
+def image_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_key_for_path(path: str | os.PathLike) -> str:
+    with open(path, "rb") as f:
+        return image_key(f.read())
+
+
+def processor_config(processor) -> dict:
+    ip = getattr(processor, "image_processor", processor)
+    cfg = ip.to_dict() if hasattr(ip, "to_dict") else dict(ip)
+    return {k: v for k, v in sorted(cfg.items()) if k not in _PROC_IGNORE and not k.startswith("_")}
+
+
+def _visual(model):
+    """Qwen2.5-VL 비전 타워 (버전/PEFT 래핑에 따라 위치가 다름)"""
+    for path in ("visual", "model.visual", "base_model.model.visual", "base_model.model.model.visual"):
+        obj = model
+        try:
+            for name in path.split("."):
+                obj = getattr(obj, name)
+            return obj
+        except AttributeError:
+            continue
+    raise AttributeError("vision tower(visual)를 찾을 수 없습니다")
+
+
+def model_fingerprint(model) -> tuple[str, str, str]:
+    """(model_id, revision, dtype). 비전 타워에 LoRA가 붙어 있으면 어댑터 경로도 revision에 포함"""
+    config = getattr(model, "config", None)
+    model_id = getattr(config, "_name_or_path", "") or "unknown"
+    revision = getattr(config, "_commit_hash", None) or "unknown"
+    visual = _visual(model)
+    if any("lora_" in name for name, _ in visual.named_modules()):
+        paths = sorted(str(getattr(c, "base_model_name_or_path", "")) + ":" + name
+                       for name, c in (getattr(model, "peft_config", None) or {}).items())
+        revision += "+lora:" + hashlib.sha256(json.dumps(paths).encode()).hexdigest()[:12]
+    dtype = str(next(visual.parameters()).dtype).replace("torch.", "")
+    return model_id, revision, dtype
+
+
+def version_key(model_id: str, revision: str, proc_cfg: dict, dtype: str) -> str:
+    raw = json.dumps([FORMAT_VERSION, model_id, revision, proc_cfg, dtype], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class VisionFeatureStore:
+    def __init__(self, root: str | os.PathLike, model_id: str, revision: str, proc_cfg: dict, dtype: str):
+        if not HAVE_SAFETENSORS:
+            raise RuntimeError("safetensors/torch가 설치되어 있지 않습니다")
+        self.manifest = {
+            "format_version": FORMAT_VERSION,
+            "model_id": model_id,
+            "revision": revision,
+            "processor_config": proc_cfg,
+            "dtype": dtype,
+        }
+        self.version = version_key(model_id, revision, proc_cfg, dtype)
+        self.dir = Path(root) / self.version
+        self.index_path = self.dir / "index.json"
+        self.lock_path = self.dir / ".lock"
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] = {}
+        self._index_mtime = None
+        self._handles: dict[str, object] = {}
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._check_manifest()
+
+    @classmethod
+    def for_model(cls, model, processor, root: str | os.PathLike | None = None) -> "VisionFeatureStore":
+        model_id, revision, dtype = model_fingerprint(model)
+        return cls(root or VISION_CACHE_DIR, model_id, revision, processor_config(processor), dtype)
+
+    # ---------- 메타데이터 ----------
+    def _check_manifest(self):
+        path = self.dir / "manifest.json"
+        if path.exists():
+            on_disk = json.loads(path.read_text(encoding="utf-8"))
+            on_disk.pop("created", None)
+            if on_disk != json.loads(json.dumps(self.manifest)):
+                raise ValueError(f"vision cache manifest 불일치: {path}")
+
+    def _write_manifest(self):
+        path = self.dir / "manifest.json"
+        if not path.exists():
+            self.dir.mkdir(parents=True, exist_ok=True)
+            _write_json(path, dict(self.manifest, created=time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    def _refresh_index(self):
+        """다른 프로세스(배치 추출 스크립트 등)가 추가한 항목 반영"""
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._index_mtime:
+            self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self._index_mtime = mtime
+
+    # ---------- 읽기 ----------
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._index:
+                self._refresh_index()
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_index()
+            return len(self._index)
+
+    def _handle(self, shard: str):
+        h = self._handles.get(shard)
+        if h is None:
+            h = safe_open(str(self.dir / shard), framework="pt", device="cpu")
+            self._handles[shard] = h
+        return h
+
+    def get(self, key: str):
+        """(embeds, grid_thw) 또는 None"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._refresh_index()
+                entry = self._index.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            h = self._handle(entry["shard"])
+            self.stats["hits"] += 1
+            return h.get_tensor(f"{key}/embeds"), h.get_tensor(f"{key}/grid_thw")
+
+    # ---------- 쓰기 ----------
+    def put_many(self, items: dict):
+        """{key: (embeds, grid_thw)}를 새 샤드 파일(들)로 기록하고 index에 합친다."""
+        items = {k: v for k, v in items.items() if k not in self}
+        if not items:
+            return
+        self._write_manifest()
+        shards, cur, size = [], {}, 0
+        for key, (embeds, grid) in items.items():
+            cur[key] = (embeds, grid)
+            size += embeds.numel() * embeds.element_size()
+            if size >= VISION_CACHE_SHARD_BYTES:
+                shards.append(cur)
+                cur, size = {}, 0
+        if cur:
+            shards.append(cur)
+
+        new_entries = {}
+        for n, chunk in enumerate(shards):
+            name = f"shard-{time.time_ns()}-{os.getpid()}-{n}.safetensors"
+            tensors = {}
+            for key, (embeds, grid) in chunk.items():
+                tensors[f"{key}/embeds"] = embeds.detach().to("cpu").contiguous()
+                tensors[f"{key}/grid_thw"] = grid.detach().to("cpu", torch.int64).reshape(3).contiguous()
+                new_entries[key] = {"shard": name, "tokens": int(embeds.shape[0]),
+                                    "grid_thw": tensors[f"{key}/grid_thw"].tolist()}
+            tmp = self.dir / f".{name}.part"
+            save_file(tensors, str(tmp), metadata={"format_version": str(FORMAT_VERSION), "version": self.version})
+            os.replace(tmp, self.dir / name)
+
+        with self._lock, _FileLock(self.lock_path):
+            self._index_mtime = None
+            self._refresh_index()
+            self._index.update(new_entries)
+            _write_json(self.index_path, self._index)
+            self._index_mtime = self.index_path.stat().st_mtime_ns
+            self.stats["writes"] += len(new_entries)
+
+    def put(self, key: str, embeds, grid_thw):
+        self.put_many({key: (embeds, grid_thw)})
+
+    def validate(self, merge_size: int = 2) -> list[str]:
+        """index의 각 항목이 샤드에 있고 토큰 수가 grid_thw와 맞는지 확인. 문제 목록 반환"""
+        problems = []
+        with self._lock:
+            self._refresh_index()
+            entries = dict(self._index)
+        for key, e in entries.items():
+            path = self.dir / e["shard"]
+            if not path.exists():
+                problems.append(f"{key}: shard 없음 {e['shard']}")
+                continue
+            with safe_open(str(path), framework="pt", device="cpu") as h:
+                names = set(h.keys())
+                if f"{key}/embeds" not in names or f"{key}/grid_thw" not in names:
+                    problems.append(f"{key}: 텐서 없음")
+                    continue
+                t, hh, w = h.get_tensor(f"{key}/grid_thw").tolist()
+                tokens = h.get_slice(f"{key}/embeds").get_shape()[0]
+            if tokens != t * hh * w // (merge_size ** 2):
+                problems.append(f"{key}: 토큰 수 {tokens} != grid {t}x{hh}x{w}")
+        return problems
+
+
+def _write_json(path: Path, obj):
+    tmp = path.with_suffix(".json.part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ---------- 추출 ----------
+def extract_features(model, processor, images) -> list:
+    """PIL 이미지 목록 → [(embeds(cpu), grid_thw)] (비전 타워 1회 호출, 크기가 달라도 한 번에)"""
+    visual = _visual(model)
+    px = processor.image_processor(images=images, return_tensors="pt")
+    param = next(visual.parameters())
+    grid = px["image_grid_thw"].to(param.device)
+    with torch.no_grad():
+        embeds = visual(px["pixel_values"].to(param.device, param.dtype), grid_thw=grid)
+    merge = getattr(processor.image_processor, "merge_size", 2)
+    sizes = (grid.prod(-1) // merge ** 2).tolist()
+    return [(e.to("cpu"), g.to("cpu")) for e, g in zip(embeds.split(sizes), grid)]
+
+
+def get_or_extract(store: "VisionFeatureStore", model, processor, images: dict) -> dict:
+    """{key: PIL 이미지} → {key: (embeds, grid_thw)}. 없는 것만 한 번에 추출해서 저장"""
+    out, missing = {}, {}
+    for key, img in images.items():
+        hit = store.get(key)
+        if hit is None:
+            missing[key] = img
+        else:
+            out[key] = hit
+    if missing:
+        feats = extract_features(model, processor, list(missing.values()))
+        new = dict(zip(missing, feats))
+        store.put_many(new)
+        out.update(new)
+    return out
+
+
+# ---------- 추론 ----------
+_local = threading.local()
+
+
+def _install_hook(visual):
+    if getattr(visual, "_cached_features_hook", False):
+        return
+    original = visual.forward
+
+    def forward(*args, **kwargs):
+        feats = getattr(_local, "features", None)
+        if feats is None:
+            return original(*args, **kwargs)
+        param = next(visual.parameters())
+        return torch.cat([e for e, _ in feats]).to(param.device, param.dtype)
+
+    visual.forward = forward
+    visual._cached_features_hook = True
+
+
+@contextmanager
+def use_cached_features(model, features: list):
+    """이 블록 안(현재 스레드)의 모델 호출에서 비전 타워 대신 features(이미지 순서대로)를 쓴다."""
+    _install_hook(_visual(model))
+    prev = getattr(_local, "features", None)
+    _local.features = features
+    try:
+        yield
+    finally:
+        _local.features = prev
+
+
+def build_inputs(processor, text, features: list, device=None) -> dict:
+    """processor(text, images)와 같은 입력을 이미지 없이 만든다.
+
+    채팅 템플릿의 이미지 토큰을 이미지별 토큰 수만큼 펼치고, pixel_values는 비전 타워 경로를 타게 하는
+    자리표시자만 넣는다 (실제 값은 use_cached_features가 공급).
+    text가 리스트면 배치 입력 (features는 모든 행의 이미지를 순서대로, 생성용 왼쪽 패딩).
+    """
+    texts = [text] if isinstance(text, str) else list(text)
+    pad = getattr(processor, "image_token", IMAGE_TOKEN)
+    expanded, pos = [], 0
+    for t in texts:
+        parts = t.split(pad)
+        feats = features[pos:pos + len(parts) - 1]
+        pos += len(parts) - 1
+        expanded.append(parts[0] + "".join(pad * int(e.shape[0]) + p for (e, _), p in zip(feats, parts[1:])))
+    if pos != len(features):
+        raise ValueError(f"이미지 토큰 {pos}개, 캐시 특징 {len(features)}개")
+
+    tok = processor.tokenizer
+    old = tok.padding_side
+    tok.padding_side = "left"
+    try:
+        enc = tok(expanded, padding=True, return_tensors="pt")
+    finally:
+        tok.padding_side = old
+    inputs = {
+        "input_ids": enc["input_ids"],
+        "attention_mask": enc["attention_mask"],
+        "pixel_values": torch.zeros(1, 1),
+        "image_grid_thw": torch.stack([g.to(torch.int64).reshape(3) for _, g in features]),
+    }
+    if device is not None:
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+    return inputs
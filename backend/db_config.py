@@ -6,7 +6,7 @@ import os
 
 # 항상 backend 디렉터리 내부의 app.db를 사용하도록 절대 경로로 지정
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "app.db")
+DB_PATH = os.getenv("DB_PATH", os.path.join(BASE_DIR, "app.db"))  # 부하 테스트 등은 임시 DB로
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 engine = create_engine(
@@ -14,6 +14,10 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # SQLite 멀티스레드 허용
 )
 
+# 요청/작업 span 안에서 실행된 쿼리를 db.query span으로 기록
+from infrastructure.tracing import instrument_engine
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
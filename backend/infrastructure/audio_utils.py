@@ -0,0 +1,147 @@
+# backend/infrastructure/audio_utils.py
+#
+# STT 입력 오디오를 메모리에서만 다루는 유틸.
+# 매직 바이트로 포맷을 판별하고, 길이를 확인하고, Naver CSR이 받지 않는 포맷(webm/m4a 등)만
+# PyAV로 메모리 안에서 16kHz mono WAV로 변환한다. 정상 경로에서는 디스크를 쓰지 않는다.
+
+import io
+import os
+import struct
+
+# PyAV는 선택적 의존성 (없으면 지원 포맷만 통과, 길이는 WAV만 확인)
+try:
+    import av
+    HAVE_AV = True
+except Exception:
+    HAVE_AV = False
+
+STT_MAX_BYTES = int(os.getenv("STT_MAX_BYTES", str(10 * 1024 * 1024)))
+STT_MAX_SECONDS = float(os.getenv("STT_MAX_SECONDS", "60"))  # Naver CSR 최대 60초
+STT_SAMPLE_RATE = 16000
+
+# Naver CSR이 그대로 받는 포맷
+STT_NATIVE_FORMATS = {"mp3", "aac", "ac3", "ogg", "flac", "wav"}
+
+
+class AudioError(ValueError):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def sniff_format(data: bytes) -> str | None:
+    head = data[:16]
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE6 == 0xE2):
+        return "mp3"
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xF6 == 0xF0:
+        return "aac"  # ADTS
+    if head[:2] == b"\x0b\x77":
+        return "ac3"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    return None
+
+
+def _wav_duration(data: bytes) -> float | None:
+    """RIFF 청크를 훑어 fmt/data에서 길이(초) 계산"""
+    pos, byte_rate = 12, None
+    while pos + 8 <= len(data):
+        cid, size = data[pos:pos + 4], struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if cid == b"fmt " and pos + 20 <= len(data):
+            byte_rate = struct.unpack("<I", data[pos + 16:pos + 20])[0]
+        elif cid == b"data" and byte_rate:
+            # 스트리밍 녹음은 size가 0/최대값일 수 있으므로 실제 길이로 보정
+            size = min(size, len(data) - pos - 8)
+            return size / byte_rate
+        pos += 8 + size + (size & 1)
+    return None
+
+
+def probe_duration(data: bytes, fmt: str | None) -> float | None:
+    if fmt == "wav":
+        return _wav_duration(data)
+    if not HAVE_AV:
+        return None
+    try:
+        with av.open(io.BytesIO(data), mode="r") as container:
+            if container.duration:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration and stream.time_base:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        return None
+    return None
+
+
+def transcode_to_wav(data: bytes) -> bytes:
+    """메모리 안에서 16kHz mono PCM WAV로 변환"""
+    if not HAVE_AV:
+        raise AudioError(415, "이 오디오 형식을 변환할 수 없습니다 (PyAV 미설치).")
+    out = io.BytesIO()
+    with av.open(io.BytesIO(data), mode="r") as src, av.open(out, mode="w", format="wav") as dst:
+        ostream = dst.add_stream("pcm_s16le", rate=STT_SAMPLE_RATE, layout="mono")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=STT_SAMPLE_RATE)
+        for frame in src.decode(audio=0):
+            for rframe in resampler.resample(frame):
+                for packet in ostream.encode(rframe):
+                    dst.mux(packet)
+        for rframe in resampler.resample(None):
+            for packet in ostream.encode(rframe):
+                dst.mux(packet)
+        for packet in ostream.encode(None):
+            dst.mux(packet)
+    return out.getvalue()
+
+
+def prepare_for_stt(data: bytes) -> tuple[bytes, dict]:
+    """크기/길이 제한 확인 후 필요할 때만 변환. (보낼 바이트, 메타) 반환"""
+    if not data:
+        raise AudioError(422, "빈 오디오입니다.")
+    if len(data) > STT_MAX_BYTES:
+        raise AudioError(413, f"오디오가 너무 큽니다 (최대 {STT_MAX_BYTES} bytes).")
+
+    fmt = sniff_format(data)
+    duration = probe_duration(data, fmt)
+    if duration is not None and duration > STT_MAX_SECONDS:
+        raise AudioError(413, f"오디오가 너무 깁니다 (최대 {int(STT_MAX_SECONDS)}초).")
+
+    meta = {"format": fmt, "duration_s": duration, "bytes_in": len(data), "transcoded": False}
+    if fmt in STT_NATIVE_FORMATS:
+        return data, meta
+    try:
+        wav = transcode_to_wav(data)
+    except AudioError:
+        raise
+    except Exception as e:
+        raise AudioError(415, f"지원하지 않는 오디오 형식입니다: {e}")
+    meta.update(transcoded=True, bytes_out=len(wav))
+    return wav, meta
+
+
+async def read_limited(stream, max_bytes: int = STT_MAX_BYTES, chunk_size: int = 64 * 1024) -> bytes:
+    """UploadFile 또는 async 바이트 이터레이터를 상한까지만 메모리로 읽음"""
+    buf = bytearray()
+    if hasattr(stream, "read"):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            buf += chunk
+            if len(buf) > max_bytes:
+                raise AudioError(413, f"오디오가 너무 큽니다 (최대 {max_bytes} bytes).")
+    else:
+        async for chunk in stream:
+            buf += chunk
+            if len(buf) > max_bytes:
+                raise AudioError(413, f"오디오가 너무 큽니다 (최대 {max_bytes} bytes).")
+    return bytes(buf)
@@ -0,0 +1,144 @@
+# backend/infrastructure/feedback_worker.py
+#
+# 👎 피드백 개선 워커: feedback_jobs 테이블을 큐로 사용.
+# 동시 실행 수 제한 + 토큰 버킷 속도 제한 + 지수 백오프 재시도.
+# 성공하면 Feedback.improved를 채우고 DPO 데이터셋에 한 줄을 적재한다.
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+
+from data_store import feedback_jobs
+from data_store.datasets import DPO_SINK
+from infrastructure import openai_client, tracing
+
+FEEDBACK_WORKER_ENABLED = os.getenv("FEEDBACK_WORKER_ENABLED", "1") == "1"
+FEEDBACK_WORKER_CONCURRENCY = int(os.getenv("FEEDBACK_WORKER_CONCURRENCY", "4"))
+FEEDBACK_RATE_PER_MIN = float(os.getenv("FEEDBACK_RATE_PER_MIN", "60"))
+FEEDBACK_MAX_ATTEMPTS = int(os.getenv("FEEDBACK_MAX_ATTEMPTS", "5"))
+FEEDBACK_BACKOFF_SEC = float(os.getenv("FEEDBACK_BACKOFF_SEC", "5"))
+FEEDBACK_POLL_SEC = float(os.getenv("FEEDBACK_POLL_SEC", "5"))
+
+
+class TokenBucket:
+    """rate개/초로 채워지고 최대 capacity개까지 모이는 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+WORKER_STATS = {"processed": 0, "succeeded": 0, "retried": 0, "failed": 0, "in_flight": 0}
+_wakeup: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def notify():
+    """새 작업이 들어왔을 때 폴링 주기를 기다리지 않고 깨움 (스레드풀의 동기 라우트에서도 호출 가능)"""
+    if _wakeup is not None and _loop is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def _backoff(attempts: int) -> float:
+    return FEEDBACK_BACKOFF_SEC * (2 ** (attempts - 1)) * (0.5 + random.random())
+
+
+async def process_job(job: dict, bucket: TokenBucket):
+    # 작업마다 별도 trace (요청과 분리된 백그라운드 작업). request id = feedback-<job id>
+    with tracing.span("feedback.job", request_id=f"feedback-{job['id']}", root=True,
+                      job_id=job["id"], attempt=job["attempts"]):
+        await _process_job(job, bucket)
+
+
+async def _process_job(job: dict, bucket: TokenBucket):
+    WORKER_STATS["in_flight"] += 1
+    try:
+        with tracing.span("image.encode") as sp:
+            data_url, nbytes = await asyncio.to_thread(openai_client.encode_image_as_data_url, job["image_path"])
+            sp.set(bytes=nbytes)
+        print(f"[feedback_worker] job={job['id']} attempt={job['attempts']} image_bytes={nbytes}", flush=True)
+        with tracing.span("feedback.rate_limit"):
+            await bucket.acquire()
+        improved, latency = await openai_client.improve_summary(job["prompt"], data_url)
+        if not improved:
+            raise RuntimeError("empty completion")
+
+        await asyncio.to_thread(feedback_jobs.complete_job, job["id"], improved, latency)
+        DPO_SINK.append({
+            "image_path": job["image_path"],
+            "prompt": job["prompt"],
+            "chosen": improved,
+            "rejected": job["output"],
+            "ts": datetime.utcnow().isoformat(),
+            "user_id": job["user_id"],
+            "doc_id": job["doc_id"],
+            "chosen_source": "openai",
+        })
+        WORKER_STATS["succeeded"] += 1
+        print(f"[feedback_worker] job={job['id']} done latency_sec={latency:.2f}", flush=True)
+    except Exception as e:
+        retry_in = _backoff(job["attempts"]) if job["attempts"] < FEEDBACK_MAX_ATTEMPTS else None
+        await asyncio.to_thread(feedback_jobs.fail_job, job["id"], str(e), retry_in)
+        WORKER_STATS["retried" if retry_in is not None else "failed"] += 1
+        tracing.set_attrs(error=str(e), retry_in=retry_in)
+        print(f"[feedback_worker] job={job['id']} error={e} retry_in={retry_in}", flush=True)
+    finally:
+        WORKER_STATS["processed"] += 1
+        WORKER_STATS["in_flight"] -= 1
+
+
+async def worker_loop():
+    global _wakeup, _loop
+    _wakeup = asyncio.Event()
+    _loop = asyncio.get_running_loop()
+    bucket = TokenBucket(FEEDBACK_RATE_PER_MIN / 60.0, max(1.0, FEEDBACK_WORKER_CONCURRENCY))
+    running: set[asyncio.Task] = set()
+
+    def _done(task: asyncio.Task):
+        running.discard(task)
+        _wakeup.set()  # 슬롯이 비었으니 바로 다음 작업 확인
+
+    n = await asyncio.to_thread(feedback_jobs.reset_running_jobs)
+    if n:
+        print(f"[feedback_worker] recovered {n} running jobs", flush=True)
+
+    while True:
+        try:
+            _wakeup.clear()
+            free = FEEDBACK_WORKER_CONCURRENCY - len(running)
+            jobs = await asyncio.to_thread(feedback_jobs.claim_jobs, free) if free > 0 else []
+            for job in jobs:
+                task = asyncio.create_task(process_job(job, bucket))
+                running.add(task)
+                task.add_done_callback(_done)
+            if jobs and len(running) < FEEDBACK_WORKER_CONCURRENCY:
+                continue  # 밀린 작업이 더 있을 수 있음
+        except Exception as e:
+            print(f"[feedback_worker] loop error: {e}", flush=True)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=FEEDBACK_POLL_SEC)
+        except asyncio.TimeoutError:
+            pass
+
+
+def stats() -> dict:
+    out = feedback_jobs.queue_stats()
+    out["worker"] = dict(WORKER_STATS)
+    out["image_cache"] = openai_client.image_cache_stats()
+    return out
@@ -0,0 +1,102 @@
+# backend/infrastructure/http_client.py
+#
+# 외부 API(Naver STT/TTS 등) 공용 비동기 HTTP 클라이언트.
+# 프로세스당 하나의 httpx.AsyncClient(커넥션 풀/keep-alive)를 공유하고,
+# 동시 요청 수 제한 + 타임아웃 + 지수 백오프 재시도를 제공한다.
+
+import asyncio
+import os
+import random
+
+import httpx
+
+HTTP_MAX_CONCURRENCY = int(os.getenv("EXTERNAL_HTTP_CONCURRENCY", "8"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("EXTERNAL_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT = httpx.Timeout(
+    float(os.getenv("EXTERNAL_HTTP_TIMEOUT", "30")),
+    connect=float(os.getenv("EXTERNAL_HTTP_CONNECT_TIMEOUT", "5")),
+)
+HTTP_RETRIES = int(os.getenv("EXTERNAL_HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("EXTERNAL_HTTP_BACKOFF", "0.5"))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client: httpx.AsyncClient | None = None
+_sema: asyncio.Semaphore | None = None
+_loop: asyncio.AbstractEventLoop | None = None  # 풀/세마포어가 묶인 이벤트 루프
+
+
+class ExternalAPIError(RuntimeError):
+    def __init__(self, name: str, status: int, body: str):
+        super().__init__(f"{name} 요청 실패: {status} - {body}")
+        self.status = status
+
+
+def _bind_loop():
+    """다른 이벤트 루프(스크립트의 asyncio.run 반복 등)에서 호출되면 풀을 새로 만든다"""
+    global _client, _sema, _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        _client, _sema, _loop = None, None, loop
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    _bind_loop()
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+def _get_sema() -> asyncio.Semaphore:
+    global _sema
+    _bind_loop()
+    if _sema is None:
+        _sema = asyncio.Semaphore(HTTP_MAX_CONCURRENCY)
+    return _sema
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), 30.0)
+            except ValueError:
+                pass
+    # 지수 백오프 + 지터
+    return HTTP_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+
+
+async def request(method: str, url: str, *, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+    """재시도 가능한 오류(연결/타임아웃, 429/5xx)는 백오프 후 재시도. 최종 응답을 그대로 반환"""
+    client = get_client()
+    attempt = 0
+    while True:
+        response = None
+        try:
+            async with _get_sema():
+                response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+        except (httpx.TransportError, httpx.TimeoutException):
+            if attempt >= retries:
+                raise
+        await asyncio.sleep(_retry_delay(attempt, response))
+        attempt += 1
+
+
+async def aclose():
+    """앱 종료 시 커넥션 풀 정리"""
+    global _client, _sema, _loop
+    if _client is not None and _loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _sema = None
+    _loop = None
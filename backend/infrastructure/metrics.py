@@ -0,0 +1,315 @@
+# backend/infrastructure/metrics.py
+#
+# Prometheus 텍스트 형식(/metrics) 지표. 외부 의존성 없음 (prometheus_client 미사용).
+#   Counter / Histogram: 요청 경로에서 갱신. 스레드별 배열(shard)에만 더하므로 락이 없고,
+#                        스크레이프 때 shard를 합산한다 (이벤트 루프는 스레드 하나라 경합 자체가 없음).
+#   gauge / counter_fn:  스크레이프 시점에 콜백으로 읽음 (_q_count, 세션 수, GPU 메모리, 기존 *_STATS 등).
+# 모델 단계/DB/외부 API 지연은 tracing의 span 리스너(observe_span)로 채운다. 계측 지점을 두 번 만들지 않기 위함.
+#   REQUESTS = metrics.counter("siseon_x", "설명", ["kind"]); REQUESTS.labels(kind="a").inc()
+#   metrics.gauge("siseon_queue_length", "설명", lambda: _q_count)
+
+import bisect
+import math
+import threading
+import weakref
+
+from infrastructure import tracing
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MODEL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+TPS_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200)
+
+_registry: dict[str, "_Metric"] = {}
+_registry_lock = threading.Lock()
+
+
+class _Owner:
+    """스레드 로컬에만 두는 표식. 스레드가 끝나 로컬이 해제되면 함께 사라지며 finalize가 불린다"""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Shards:
+    """스레드별 누적 배열. 갱신은 자기 스레드 배열에만 (락 없음), 수집 시 합산.
+    스레드가 끝나면 그 배열을 _base에 더하고 목록에서 뺀다 (짧게 사는 스레드가 많아도 배열은 살아 있는 스레드 수만큼)"""
+
+    __slots__ = ("size", "_local", "_live", "_base", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._live: dict[int, list[float]] = {}
+        self._base = [0.0] * size
+        self._lock = threading.Lock()
+
+    def mine(self) -> list[float]:
+        arr = getattr(self._local, "arr", None)
+        if arr is None:
+            arr = [0.0] * self.size
+            owner = _Owner()
+            with self._lock:  # 스레드당 한 번
+                self._live[id(owner)] = arr
+            weakref.finalize(owner, self._fold, id(owner))
+            self._local.arr, self._local.owner = arr, owner
+        return arr
+
+    def _fold(self, key: int):
+        with self._lock:
+            arr = self._live.pop(key, None)
+            if arr is not None:
+                for i, v in enumerate(arr):
+                    self._base[i] += v
+
+    def total(self) -> list[float]:
+        with self._lock:
+            arrs = [self._base, *self._live.values()]
+            return [sum(col) for col in zip(*arrs)]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames=()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, **kv):
+        key = tuple(str(kv.get(n, "")) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """(접미사, 라벨 dict, 값) 목록"""
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shards.mine()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._shards.total()[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield "_total", dict(zip(self.labelnames, key)), child.value
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._shards = _Shards(len(bounds) + 2)  # 구간별 개수(+Inf 포함) + 합계
+
+    def observe(self, value: float):
+        arr = self._shards.mine()
+        arr[bisect.bisect_left(self._bounds, value)] += 1
+        arr[-1] += value
+
+    def snapshot(self) -> tuple[list[float], float]:
+        arr = self._shards.total()
+        return arr[:-1], arr[-1]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, doc, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            counts, total = child.snapshot()
+            cum = 0.0
+            for bound, c in zip(self.bounds + (math.inf,), counts):
+                cum += c
+                yield "_bucket", {**labels, "le": _fmt(bound)}, cum
+            yield "_sum", labels, total
+            yield "_count", labels, cum
+
+
+class _Callback(_Metric):
+    """스크레이프 때 fn() 호출. 라벨이 있으면 fn은 {라벨값 튜플(또는 문자열): 값}을 반환"""
+
+    def __init__(self, name, doc, fn, labelnames=(), kind="gauge"):
+        self.fn = fn
+        self.kind = kind
+        super().__init__(name, doc, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def samples(self):
+        suffix = "_total" if self.kind == "counter" else ""
+        value = self.fn()
+        if value is None:
+            return
+        if not self.labelnames:
+            yield suffix, {}, value
+            return
+        for key, v in value.items():
+            key = key if isinstance(key, tuple) else (key,)
+            if v is not None:
+                yield suffix, dict(zip(self.labelnames, map(str, key))), v
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        old = _registry.get(metric.name)
+        if old is not None:
+            return old  # 모듈 재import 시 같은 지표 재사용
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, doc: str, labelnames=()) -> Counter:
+    """name은 _total 없이 (노출 시 붙임)"""
+    return _register(Counter(name, doc, labelnames))
+
+
+def histogram(name: str, doc: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, doc, labelnames, buckets))
+
+
+def gauge(name: str, doc: str, fn, labelnames=()):
+    return _register(_Callback(name, doc, fn, labelnames, "gauge"))
+
+
+def counter_fn(name: str, doc: str, fn, labelnames=()):
+    """이미 다른 곳에서 세고 있는 누적값(*_STATS 등)을 counter로 노출"""
+    return _register(_Callback(name, doc, fn, labelnames, "counter"))
+
+
+# ---------- 텍스트 형식 ----------
+
+def _fmt(v) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if v != v:
+        return "NaN"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """Prometheus text exposition format 0.0.4"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for m in metrics:
+        try:
+            samples = list(m.samples())
+        except Exception as e:
+            lines.append(f"# {m.name} 수집 실패: {e}")
+            continue
+        lines.append(f"# HELP {m.name} {m.doc}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for suffix, labels, value in samples:
+            lab = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            lines.append(f"{m.name}{suffix}{{{lab}}} {_fmt(value)}" if lab else f"{m.name}{suffix} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- span -> 지표 ----------
+
+HTTP_LATENCY = histogram("siseon_http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍은 끝까지)",
+                         ["method", "route", "status"])
+GATE_WAIT = histogram("siseon_gate_wait_seconds", "동시성 게이트 대기 시간")
+GATE_REJECTED = counter("siseon_gate_rejected", "큐가 가득 차 429로 거절된 요청 수")
+MODEL_PHASE = histogram("siseon_model_phase_seconds", "모델 단계별 시간 (prefill/decode/classify/chat 등)",
+                        ["phase"], MODEL_BUCKETS)
+MODEL_TOKENS = counter("siseon_model_generated_tokens", "생성한 토큰 수", ["task"])
+MODEL_TPS = histogram("siseon_model_decode_tokens_per_second", "decode 속도 (토큰/초)", ["task"], TPS_BUCKETS)
+DB_LATENCY = histogram("siseon_db_query_seconds", "SQL 쿼리 시간", ["operation"], DB_BUCKETS)
+EXTERNAL_LATENCY = histogram("siseon_external_request_seconds", "외부 API 호출 시간 (재시도 포함)",
+                             ["service", "outcome"])
+STAGE_LATENCY = histogram("siseon_stage_seconds", "요청 내부 단계/백그라운드 작업 시간 (span 이름)", ["stage"],
+                          MODEL_BUCKETS)
+
+_MODEL_PHASES = {"model.prefill", "model.decode", "model.classify", "model.chat", "processor",
+                 "chat_template", "batch_decode",
+                 "vision.preprocess", "vision.features", "image.decode"}
+_EXTERNAL = {"stt": "naver_stt", "tts": "naver_tts", "openai.chat": "openai"}
+
+
+def _outcome(s) -> str:
+    if s.error:
+        return "error"
+    status = s.attrs.get("http.status_code")
+    return str(status) if status is not None else "ok"
+
+
+def observe_span(s):
+    name = s.name
+    dur = (s.end_ns - s.start_ns) / 1e9
+    if s.parent_id is None and s.kind == tracing.SERVER:
+        HTTP_LATENCY.labels(method=s.attrs.get("http.method"), route=s.attrs.get("http.route", "other"),
+                            status=s.attrs.get("http.status_code", 500)).observe(dur)
+    elif name == "db.query":
+        DB_LATENCY.labels(operation=s.attrs.get("db.operation", "")).observe(dur)
+    elif name in _EXTERNAL:
+        EXTERNAL_LATENCY.labels(service=_EXTERNAL[name], outcome=_outcome(s)).observe(dur)
+    elif name == "queue.wait":
+        if s.attrs.get("rejected"):
+            GATE_REJECTED.inc()
+        else:
+            GATE_WAIT.observe(dur)
+    elif name in _MODEL_PHASES:
+        MODEL_PHASE.labels(phase=name[len("model."):] if name.startswith("model.") else name).observe(dur)
+        if name == "model.decode":
+            task = s.attrs.get("task", "chat")
+            tokens = s.attrs.get("output_tokens") or 0
+            MODEL_TOKENS.labels(task=task).inc(tokens)
+            if tokens and dur > 0:
+                MODEL_TPS.labels(task=task).observe(tokens / dur)
+    else:
+        STAGE_LATENCY.labels(stage=name).observe(dur)
+
+
+tracing.add_listener(observe_span)
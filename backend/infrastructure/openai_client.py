@@ -0,0 +1,176 @@
+# backend/infrastructure/openai_client.py
+# 👎 피드백 개선 요약 생성용 OpenAI 호출 (비동기 클라이언트 1개 공유)
+
+import base64
+import hashlib
+import math
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image
+
+from config.settings import OPENAI_API_KEY
+from data_store import blob_store
+from infrastructure import tracing
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # 로컬 스텁 등으로 교체할 때
+OPENAI_MODEL = os.getenv("OPENAI_IMPROVE_MODEL", "gpt-4o-mini")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+MAX_SIDE = 1600  # 긴 변 상한(전송/비용 안정화)
+JPEG_QUALITY = 92
+
+# 인코딩된 이미지 payload 캐시 (같은 문서에 👎가 여러 번 와도 디코딩/리사이즈/재압축은 한 번)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("OPENAI_IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_image_cache: "OrderedDict[tuple, tuple[str, int, float]]" = OrderedDict()  # key -> (data_url, 바이트, 인코딩 CPU 초)
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_key_locks: dict[tuple, threading.Lock] = {}
+IMAGE_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes_saved": 0, "encode_cpu_s": 0.0, "cpu_s_saved": 0.0}
+
+SYS_PROMPT = (
+    "너는 한국어 요약 전문가다. 한자 금지. 사람 신원/나이/성별/민감특성 추정 금지. "
+    "배경·물체·표지 텍스트 등 비식별 정보 중심으로 간결·정확하게 2~3문장 요약."
+)
+
+_client = None
+
+
+def get_client():
+    """API 키가 없으면 None (피드백 저장은 계속 동작)"""
+    global _client
+    if _client is None and (OPENAI_API_KEY or OPENAI_BASE_URL):
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY or "stub",
+            base_url=OPENAI_BASE_URL,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=0,  # 재시도는 피드백 워커가 담당
+        )
+    return _client
+
+
+def _content_hash(path: str) -> str:
+    """blob 경로면 파일명의 해시를 그대로 쓰고, 아니면 파일 내용을 해시"""
+    digest = blob_store.digest_of(path)
+    if digest:
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode(path: str, mime: str) -> bytes:
+    with Image.open(path) as im:
+        # JPEG는 draft로 디코딩 단계에서 1/2^n 축소 (전체 해상도 디코딩 생략).
+        # draft는 두 변 모두 요청 크기 이상일 때만 줄이므로 비율을 유지한 목표 크기를 넘긴다
+        w, h = im.size
+        scale = min(1.0, MAX_SIDE / max(w, h))
+        im.draft("RGB", (math.ceil(w * scale), math.ceil(h * scale)))
+        img = im.convert("RGB")
+    # reducing_gap: 먼저 정수배 reduce()로 줄인 뒤 LANCZOS로 마무리
+    img.thumbnail((MAX_SIDE, MAX_SIDE), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    buf = BytesIO()
+    ext = "JPEG" if mime.endswith(("jpeg", "jpg")) else "PNG"
+    img.save(buf, format=ext, optimize=True, quality=JPEG_QUALITY if ext == "JPEG" else None)
+    return buf.getvalue()
+
+
+def encode_image_as_data_url(path: str) -> tuple[str | None, int]:
+    """(data URL, 인코딩 바이트 수). 같은 이미지 내용 + MAX_SIDE/품질이면 캐시된 결과 재사용"""
+    if not (path and os.path.exists(path)):
+        return None, 0
+    try:
+        mime, _ = mimetypes.guess_type(path)
+        if not mime:
+            mime = "image/jpeg"
+        key = (_content_hash(path), MAX_SIDE, JPEG_QUALITY, mime)
+
+        with _cache_lock:
+            hit = _image_cache.get(key)
+            if hit is None:
+                key_lock = _key_locks.setdefault(key, threading.Lock())
+        if hit is None:
+            # 같은 이미지를 여러 워커가 동시에 인코딩하지 않도록 키 단위 잠금
+            with key_lock:
+                with _cache_lock:
+                    hit = _image_cache.get(key)
+                if hit is None:
+                    t0 = time.thread_time()
+                    b = _encode(path, mime)
+                    data_url = f"data:{mime};base64,{base64.b64encode(b).decode('ascii')}"
+                    cpu_s = time.thread_time() - t0
+                    with _cache_lock:
+                        _key_locks.pop(key, None)
+                        IMAGE_CACHE_STATS["misses"] += 1
+                        IMAGE_CACHE_STATS["encode_cpu_s"] += cpu_s
+                        _store_locked(key, (data_url, len(b), cpu_s))
+                    return data_url, len(b)
+
+        data_url, nbytes, cpu_s = hit
+        with _cache_lock:
+            if key in _image_cache:
+                _image_cache.move_to_end(key)
+            IMAGE_CACHE_STATS["hits"] += 1
+            IMAGE_CACHE_STATS["bytes_saved"] += nbytes
+            IMAGE_CACHE_STATS["cpu_s_saved"] += cpu_s
+        return data_url, nbytes
+    except Exception as e:
+        print(f"[openai_client] encode_image_as_data_url error: {e}", flush=True)
+        return None, 0
+
+
+def _store_locked(key: tuple, value: tuple[str, int, float]):
+    global _cache_bytes
+    _image_cache[key] = value
+    _cache_bytes += len(value[0])
+    while _cache_bytes > IMAGE_CACHE_MAX_BYTES and len(_image_cache) > 1:
+        _, (data_url, _, _) = _image_cache.popitem(last=False)
+        _cache_bytes -= len(data_url)
+        IMAGE_CACHE_STATS["evictions"] += 1
+
+
+def image_cache_stats() -> dict:
+    with _cache_lock:
+        out = dict(IMAGE_CACHE_STATS)
+        out.update(entries=len(_image_cache), bytes=_cache_bytes)
+    out["encode_cpu_s"] = round(out["encode_cpu_s"], 4)
+    out["cpu_s_saved"] = round(out["cpu_s_saved"], 4)
+    return out
+
+
+def build_messages(prompt: str, data_url: str | None) -> list[dict]:
+    user_text = f"이미지를 참고해 다음 지시에 맞게 2~3문장 요약을 생성해줘.\n[지시]\n{prompt}"
+    content = [{"type": "text", "text": user_text}]
+    if data_url:
+        content.append({"type": "image_url", "image_url": {"url": data_url, "detail": "high"}})
+    return [
+        {"role": "system", "content": SYS_PROMPT},
+        {"role": "user", "content": content},
+    ]
+
+
+async def improve_summary(prompt: str, data_url: str | None) -> tuple[str | None, float]:
+    """(개선 요약, 지연 초). 오류는 호출자(워커)가 재시도 판단하도록 그대로 전파"""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("OpenAI client is None (no API key)")
+    t0 = time.time()
+    with tracing.span("openai.chat", kind=tracing.CLIENT, model=OPENAI_MODEL) as sp:
+        r = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_messages(prompt, data_url),
+            temperature=0.2,
+            max_tokens=200,
+        )
+        usage = getattr(r, "usage", None)
+        if usage is not None:
+            sp.set(input_tokens=usage.prompt_tokens, output_tokens=usage.completion_tokens)
+    text = (r.choices[0].message.content or "").strip()
+    return text or None, time.time() - t0
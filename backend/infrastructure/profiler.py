@@ -0,0 +1,258 @@
+# backend/infrastructure/profiler.py
+#
+# 관리자가 켜는 샘플링 프로파일러. arm(n) 뒤 @profiled로 감싼 호출(ConversationSession.ask / classify_document)
+# n번을 잡아서 PROFILE_DIR에 남긴다. 지연이 늘었을 때 apply_chat_template / processor(이미지 리사이즈) /
+# generate / batch_decode 중 어디서 시간이 가는지 보기 위함.
+#   <id>.folded            Python 스택 샘플 (flamegraph.pl, speedscope, inferno에 그대로)
+#   <id>.trace.json        Chrome trace: 단계 span(X 이벤트) + 스택 샘플(samples/stackFrames). Perfetto/chrome://tracing
+#   <id>.torch.trace.json  torch.profiler (CPU/CUDA 연산자). torch가 올라와 있을 때만, 동시에 하나만
+# 꺼져 있을 때 비용은 전역 정수 하나 비교 (샘플러 스레드/torch 프로파일러는 잡는 호출에서만 돈다).
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from infrastructure import tracing
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BACKEND_DIR / "data" / "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_REQUESTS = int(os.getenv("PROFILE_MAX_REQUESTS", "20"))
+PROFILE_MAX_SAMPLES = 100_000
+
+_lock = threading.Lock()
+_remaining = 0          # 남은 캡처 수. 0이면 @profiled는 바로 원래 함수 호출
+_options = {"torch": True, "interval_ms": PROFILE_INTERVAL_MS}
+_torch_busy = threading.Lock()  # torch.profiler는 프로세스 전역이라 한 번에 하나
+_active: list["_Capture"] = []
+_seq = 0
+PROFILE_STATE = {"captured": 0, "errors": 0, "recent": deque(maxlen=50)}
+
+
+def arm(requests: int, torch: bool = True, interval_ms: float | None = None) -> dict:
+    """다음 requests번의 호출을 캡처 (이미 켜져 있으면 덮어씀)"""
+    global _remaining
+    if requests < 0 or requests > PROFILE_MAX_REQUESTS:
+        raise ValueError(f"requests는 0~{PROFILE_MAX_REQUESTS}")
+    with _lock:
+        _options["torch"] = torch
+        _options["interval_ms"] = max(1.0, interval_ms or PROFILE_INTERVAL_MS)
+        _remaining = requests
+    return status()
+
+
+def disarm() -> dict:
+    return arm(0)
+
+
+def status() -> dict:
+    with _lock:
+        return {
+            "remaining": _remaining,
+            "in_progress": len(_active),
+            "options": dict(_options),
+            "captured": PROFILE_STATE["captured"],
+            "errors": PROFILE_STATE["errors"],
+            "recent": list(PROFILE_STATE["recent"]),
+            "dir": str(PROFILE_DIR),
+        }
+
+
+def _claim() -> tuple[str, dict] | None:
+    global _remaining, _seq
+    with _lock:
+        if _remaining <= 0:
+            return None
+        _remaining -= 1
+        _seq += 1
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{_seq:04d}", dict(_options)
+
+
+class _StackSampler(threading.Thread):
+    """대상 스레드의 Python 스택을 interval마다 읽음 (sys._current_frames)"""
+
+    def __init__(self, target_ident: int, interval_s: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target = target_ident
+        self.interval = interval_s
+        self.samples: list[tuple[int, tuple[str, ...]]] = []  # (time_ns, 바깥->안 프레임)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                co = frame.f_code
+                stack.append(f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})")
+                frame = frame.f_back
+            self.samples.append((time.time_ns(), tuple(reversed(stack))))
+            if len(self.samples) >= PROFILE_MAX_SAMPLES:
+                break
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(1.0)
+
+
+class _Capture:
+    def __init__(self, capture_id: str, name: str, options: dict):
+        self.id = capture_id
+        self.name = name
+        self.options = options
+        self.trace = None
+        self.t0 = time.time_ns()
+        self.spans: list = []
+        self.sampler = _StackSampler(threading.get_ident(), options["interval_ms"] / 1000)
+        self.torch_prof = None
+
+    def start(self, root_span):
+        self.trace = getattr(root_span, "trace", None)
+        if self.options["torch"]:
+            self.torch_prof = _start_torch()
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        if self.torch_prof is not None:
+            try:
+                self.torch_prof.__exit__(None, None, None)
+            finally:
+                _torch_busy.release()
+
+
+def _start_torch():
+    torch = sys.modules.get("torch")  # 여기서 torch를 새로 올리지 않음 (FAKE_MODEL 등)
+    if torch is None or not _torch_busy.acquire(blocking=False):
+        return None
+    try:
+        acts = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            acts.append(torch.profiler.ProfilerActivity.CUDA)
+        prof = torch.profiler.profile(activities=acts, record_shapes=True)
+        prof.__enter__()
+        return prof
+    except Exception as e:
+        _torch_busy.release()
+        print(f"[WARN] torch profiler 시작 실패: {e}", flush=True)
+        return None
+
+
+def _collect_span(s):
+    """캡처 중인 호출과 같은 trace에서 캡처 시작 이후 시작한 span 수집"""
+    if not _active:
+        return
+    for cap in list(_active):
+        if s.trace is cap.trace and s.start_ns >= cap.t0:
+            cap.spans.append(s)
+
+
+tracing.add_listener(_collect_span)
+
+
+# ---------- 출력 ----------
+
+def folded(samples) -> str:
+    """flamegraph 접힌 스택 형식: 'outer;inner count'"""
+    counts = Counter(";".join(stack) for _, stack in samples)
+    return "".join(f"{k} {v}\n" for k, v in counts.most_common())
+
+
+def chrome_trace(cap: _Capture) -> dict:
+    pid = os.getpid()
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "siseon-eum"}}]
+    for s in sorted(cap.spans, key=lambda s: s.start_ns):
+        events.append({
+            "name": s.name, "cat": "span", "ph": "X", "pid": pid, "tid": 1,
+            "ts": s.start_ns / 1000, "dur": (s.end_ns - s.start_ns) / 1000,
+            "args": {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in s.attrs.items()},
+        })
+    # 스택 샘플: stackFrames(트리) + samples. 같은 경로는 같은 프레임 id
+    frames, ids, samples = {}, {}, []
+    for ts, stack in cap.sampler.samples:
+        parent = None
+        for i in range(len(stack)):
+            key = stack[: i + 1]
+            fid = ids.get(key)
+            if fid is None:
+                fid = ids[key] = len(ids) + 1
+                frames[str(fid)] = {"name": stack[i], "category": "python"}
+                if parent is not None:
+                    frames[str(fid)]["parent"] = str(parent)
+            parent = fid
+        if parent is not None:
+            samples.append({"cpu": 0, "tid": 2, "ts": ts / 1000, "name": "python", "sf": str(parent), "weight": 1})
+    events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 1, "args": {"name": "spans"}})
+    events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 2, "args": {"name": "python samples"}})
+    return {"traceEvents": events, "stackFrames": frames, "samples": samples, "displayTimeUnit": "ms",
+            "otherData": {"capture": cap.id, "call": cap.name, "request_id": getattr(cap.trace, "request_id", None)}}
+
+
+def _write(cap: _Capture, elapsed_s: float, error: str | None):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = f"{cap.id}-{cap.name}"
+    files = [f"{stem}.folded", f"{stem}.trace.json"]
+    (PROFILE_DIR / files[0]).write_text(folded(cap.sampler.samples), encoding="utf-8")
+    (PROFILE_DIR / files[1]).write_text(json.dumps(chrome_trace(cap), ensure_ascii=False), encoding="utf-8")
+    if cap.torch_prof is not None:
+        files.append(f"{stem}.torch.trace.json")
+        cap.torch_prof.export_chrome_trace(str(PROFILE_DIR / files[-1]))
+    entry = {"id": cap.id, "call": cap.name, "request_id": getattr(cap.trace, "request_id", None),
+             "elapsed_s": round(elapsed_s, 4), "samples": len(cap.sampler.samples), "files": files, "error": error}
+    with _lock:
+        PROFILE_STATE["captured"] += 1
+        PROFILE_STATE["recent"].append(entry)
+    print(f"[profiler] {cap.id} {cap.name} {elapsed_s:.3f}s samples={entry['samples']} -> {PROFILE_DIR}", flush=True)
+
+
+def _capture_call(name: str, claimed, fn, args, kwargs):
+    capture_id, options = claimed
+    cap = _Capture(capture_id, name, options)
+    error = None
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"profile.{name}", capture=capture_id) as root:
+            with _lock:
+                _active.append(cap)
+            cap.start(root)
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                cap.stop()
+    finally:
+        # profile.* span까지 끝난 뒤에 기록 (자식 span이 다 모인 상태)
+        with _lock:
+            _active.remove(cap)
+        try:
+            _write(cap, time.perf_counter() - t0, error)
+        except Exception as e:
+            PROFILE_STATE["errors"] += 1
+            print(f"[WARN] profile 저장 실패: {e}", flush=True)
+
+
+def profiled(name: str):
+    """@profiled("ask"): 켜져 있을 때만 캡처. 꺼져 있으면 정수 비교 한 번"""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _remaining:
+                return fn(*args, **kwargs)
+            claimed = _claim()
+            if claimed is None:
+                return fn(*args, **kwargs)
+            return _capture_call(name, claimed, fn, args, kwargs)
+
+        return wrapper
+
+    return deco
@@ -1,35 +1,50 @@
-import requests
+import asyncio
+import os
 from pathlib import Path
 from config.settings import NAVER_CLIENT_ID, NAVER_CLIENT_SECRET
+from infrastructure import http_client, tracing
+from infrastructure.audio_utils import prepare_for_stt, read_limited
 
-STT_URL = "https://naveropenapi.apigw.ntruss.com/recog/v1/stt"
+STT_URL = os.getenv("NAVER_STT_URL", "https://naveropenapi.apigw.ntruss.com/recog/v1/stt")
 LANG = "Kor"  # 한국어
 
 
-def speech_to_text(audio_path: str) -> str:
-    path = Path(audio_path)
-    if not path.exists():
-        raise FileNotFoundError(f"음성 파일이 존재하지 않습니다: {audio_path}")
-    
-    with open(path, "rb") as f:
-        audio_data = f.read()
-
+async def speech_to_text_bytes(audio_data: bytes) -> str:
     headers = {
-        "x-ncp-apigw-api-key-id": NAVER_CLIENT_ID,
-        "x-ncp-apigw-api-key": NAVER_CLIENT_SECRET,
+        "x-ncp-apigw-api-key-id": NAVER_CLIENT_ID or "",
+        "x-ncp-apigw-api-key": NAVER_CLIENT_SECRET or "",
         "Content-Type": "application/octet-stream"
     }
-    
-    with open(audio_path, "rb") as f:
-        audio_data = f.read()
 
-    response = requests.post(
-        f"{STT_URL}?lang={LANG}",
-        headers=headers,
-        data=audio_data
-    )
+    with tracing.span("stt", kind=tracing.CLIENT, audio_bytes=len(audio_data)) as sp:
+        response = await http_client.request(
+            "POST",
+            STT_URL,
+            params={"lang": LANG},
+            headers=headers,
+            content=audio_data,
+        )
+        sp.set(**{"http.status_code": response.status_code})
 
     if response.status_code == 200:
         return response.json().get("text", "")
-    else:
-        raise RuntimeError(f"STT 요청 실패: {response.status_code} - {response.text}")
\ No newline at end of file
+    raise http_client.ExternalAPIError("STT", response.status_code, response.text)
+
+
+async def speech_to_text(audio_path: str) -> str:
+    path = Path(audio_path)
+    if not path.exists():
+        raise FileNotFoundError(f"음성 파일이 존재하지 않습니다: {audio_path}")
+    return await speech_to_text_bytes(await asyncio.to_thread(path.read_bytes))
+
+
+async def speech_to_text_audio(audio_data: bytes) -> tuple[str, dict]:
+    """메모리 상의 오디오를 검사/필요 시 변환한 뒤 인식. (텍스트, 오디오 메타) 반환"""
+    with tracing.span("audio.prepare", input_bytes=len(audio_data)):
+        payload, meta = await asyncio.to_thread(prepare_for_stt, audio_data)
+    return await speech_to_text_bytes(payload), meta
+
+
+async def speech_to_text_stream(stream) -> tuple[str, dict]:
+    """UploadFile/async 이터레이터를 크기 상한까지만 읽어 바로 인식 (임시 파일 없음)"""
+    return await speech_to_text_audio(await read_limited(stream))
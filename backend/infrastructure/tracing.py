@@ -0,0 +1,447 @@
+# backend/infrastructure/tracing.py
+#
+# 요청 단위 트레이싱 (외부 의존성 없음).
+# 요청마다 request id(= trace) 하나를 만들고, 업로드/이미지 디코드/비전 전처리/분류/prefill/decode/DB/STT/TTS/
+# 피드백 작업을 span으로 기록한다. 흩어져 있던 print("[DEBUG] ⏳ ...") 대신 한 요청의 단계별 시간을 한 줄로 모아
+# 집계할 수 있게 하는 것이 목적.
+#   with tracing.span("classify", doc_type=...) as sp: ...; sp.set(output_tokens=n)
+#   tracing.add_span("model.prefill", start_ns, end_ns, input_tokens=n)   # 끝난 뒤 시각으로 기록
+#   loop.run_in_executor(None, tracing.wrap(fn))                          # 스레드로 넘길 때 현재 span 유지
+#
+# 내보내기: 루트 span이 끝나면 그 요청의 span 전체를 OTLP/JSON(ExportTraceServiceRequest) 한 줄로
+# TRACE_DIR/traces-YYYYMMDD.jsonl에 추가한다 (OpenTelemetry Collector의 otlpjsonfile 리시버로 그대로 읽힘).
+# TRACE_OTLP_ENDPOINT(예: http://localhost:4318/v1/traces)를 주면 같은 본문을 OTLP/HTTP로도 보낸다.
+# 파일은 TRACE_RETENTION_DAYS보다 오래되면 지우고, 전체가 TRACE_MAX_MB를 넘으면 오래된 날부터 지운다
+# (오늘 파일 하나로 넘으면 그날은 파일 기록만 멈춤, capped로 집계).
+# 응답에는 X-Request-ID와 Server-Timing 헤더(헤더 전송 시점까지 끝난 span들의 합계)가 붙는다.
+# add_listener로 끝난 span을 받아 볼 수 있다 (metrics가 span으로 히스토그램을 채움). 리스너가 있으면
+# TRACE_ENABLED=0이어도 span은 기록하되 내보내기/헤더만 끈다.
+
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+TRACE_DIR = Path(os.getenv("TRACE_DIR", BACKEND_DIR / "data" / "traces"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # 내보내기 비율 (헤더는 항상 붙음)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT") or None
+TRACE_LOG = os.getenv("TRACE_LOG", "1") == "1"  # 요청마다 단계별 시간 한 줄 출력
+TRACE_RETENTION_DAYS = float(os.getenv("TRACE_RETENTION_DAYS", "7"))  # 0이면 기간으로는 지우지 않음
+TRACE_MAX_MB = float(os.getenv("TRACE_MAX_MB", "512"))  # traces-*.jsonl 전체 상한 (0이면 무제한)
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "siseon-eum-backend")
+TRACE_SKIP_PATHS = {"/metrics", "/health"}  # 스크레이프/헬스체크는 기록하지 않음
+
+# OTLP span kind
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("trace_span", default=None)
+
+TRACE_STATS = {"traces": 0, "spans": 0, "exported": 0, "dropped": 0, "export_errors": 0, "capped": 0, "pruned": 0}
+_listeners: list = []
+
+
+def add_listener(fn):
+    """끝난 span마다 fn(span) 호출 (span을 끝낸 스레드에서 바로 불리므로 가벼워야 함)"""
+    _listeners.append(fn)
+
+
+def recording() -> bool:
+    return TRACE_ENABLED or bool(_listeners)
+
+
+class _Trace:
+    """요청 하나. 끝난 span을 모아 두었다가 루트가 끝나면 한 번에 내보냄"""
+
+    __slots__ = ("trace_id", "request_id", "sampled", "spans", "lock", "closed")
+
+    def __init__(self, request_id: str | None):
+        self.trace_id = secrets.token_hex(16)
+        self.request_id = request_id or self.trace_id[:16]
+        self.sampled = random.random() < TRACE_SAMPLE_RATE
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+
+class Span:
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start_ns", "end_ns", "attrs", "error", "trace")
+
+    def __init__(self, name: str, trace: _Trace, parent_id: str | None, kind: int, attrs: dict,
+                 start_ns: int | None = None):
+        self.name = name
+        self.kind = kind
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns = None
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    @property
+    def request_id(self) -> str:
+        return self.trace.request_id
+
+
+class _NoopSpan:
+    request_id = None
+    duration_s = 0.0
+
+    def set(self, **attrs):
+        return self
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def request_id() -> str | None:
+    s = _current.get()
+    return s.trace.request_id if s is not None else None
+
+
+def set_attrs(**attrs):
+    """현재 span에 속성 추가 (span 밖이면 무시)"""
+    s = _current.get()
+    if s is not None:
+        s.attrs.update(attrs)
+
+
+def _start(name: str, kind: int, attrs: dict, request_id: str | None = None, root: bool = False) -> Span:
+    parent = None if root else _current.get()
+    if parent is None:
+        TRACE_STATS["traces"] += 1
+        return Span(name, _Trace(request_id), None, kind, attrs)
+    return Span(name, parent.trace, parent.span_id, kind, attrs)
+
+
+def _finish(s: Span):
+    if s.end_ns is None:
+        s.end_ns = time.time_ns()
+    trace = s.trace
+    TRACE_STATS["spans"] += 1
+    for fn in _listeners:
+        try:
+            fn(s)
+        except Exception as e:
+            print(f"[WARN] span listener 실패: {e}", flush=True)
+    if not TRACE_ENABLED:
+        return
+    with trace.lock:
+        if trace.closed:
+            # 루트가 끝난 뒤에 끝난 span (예: 클라이언트가 끊긴 뒤 마저 돈 generate) -> 단독으로 내보냄
+            batch = [s]
+        else:
+            trace.spans.append(s)
+            if s.parent_id is not None:
+                return
+            trace.closed = True
+            batch = trace.spans
+    if s.parent_id is None and TRACE_LOG:
+        print(f"[trace] {summary_line(s)}", flush=True)
+    if trace.sampled:
+        _export(batch)
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, request_id: str | None = None, root: bool = False, **attrs):
+    """현재 span의 자식 span. 현재 span이 없거나 root=True면 새 trace의 루트가 된다.
+    요청/작업 입구는 root=True: keep-alive 연결에서는 이전 요청의 context가 다음 요청 task로 이어질 수 있음"""
+    if not recording():
+        yield _NOOP
+        return
+    s = _start(name, kind, attrs, request_id, root)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _finish(s)
+
+
+def add_span(name: str, start_ns: int, end_ns: int, kind: int = INTERNAL, **attrs):
+    """이미 끝난 구간을 현재 span의 자식으로 기록 (prefill/decode처럼 끝난 뒤에야 경계를 아는 경우)"""
+    parent = _current.get()
+    if parent is None or not recording():
+        return None
+    s = Span(name, parent.trace, parent.span_id, kind, attrs, start_ns=start_ns)
+    s.end_ns = end_ns
+    _finish(s)
+    return s
+
+
+def wrap(fn, *args, **kwargs):
+    """run_in_executor / Thread로 넘길 함수에 현재 context(span)를 묶음. asyncio.to_thread는 알아서 복사함"""
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# ---------- 요약 / Server-Timing ----------
+
+def _durations(spans: list[Span]) -> dict[str, float]:
+    """span 이름별 합계(초). 루트는 제외"""
+    out: dict[str, float] = {}
+    for s in spans:
+        if s.parent_id is not None and s.end_ns is not None:
+            out[s.name] = out.get(s.name, 0.0) + (s.end_ns - s.start_ns) / 1e9
+    return out
+
+
+def server_timing(root: Span, limit: int = 24) -> str:
+    """Server-Timing 헤더 값: 지금까지 끝난 span 이름별 합계 + total (ms)"""
+    with root.trace.lock:
+        durs = _durations(root.trace.spans)
+    parts = [f"{_token(n)};dur={d * 1000:.1f}" for n, d in list(durs.items())[:limit]]
+    parts.append(f"total;dur={root.duration_s * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _token(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in name)
+
+
+def summary_line(root: Span) -> str:
+    status = root.attrs.get("http.status_code", "error" if root.error else "ok")
+    durs = " ".join(f"{n}={d:.3f}s" for n, d in _durations(root.trace.spans).items())
+    return f"rid={root.trace.request_id} {root.name} {status} {root.duration_s:.3f}s {durs}".rstrip()
+
+
+# ---------- OTLP/JSON 변환 ----------
+
+def _value(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _attrs(d: dict) -> list[dict]:
+    return [{"key": k, "value": _value(v)} for k, v in d.items() if v is not None]
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """ExportTraceServiceRequest (OTLP/JSON)"""
+    out = []
+    for s in spans:
+        attrs = dict(s.attrs)
+        attrs["request.id"] = s.trace.request_id
+        item = {
+            "traceId": s.trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _attrs(attrs),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        out.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attrs({"service.name": SERVICE_NAME, "process.pid": os.getpid()})},
+        "scopeSpans": [{"scope": {"name": "siseon-eum.tracing"}, "spans": out}],
+    }]}
+
+
+# ---------- 백그라운드 내보내기 ----------
+# 요청 경로에서는 큐에 넣기만 하고 파일 쓰기/HTTP 전송은 전용 스레드가 한다. 큐가 차면 버림(dropped).
+
+_queue: "queue.Queue[list[Span]]" = queue.Queue(maxsize=10000)
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def _export(batch: list[Span]):
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_writer_loop, name="trace-writer", daemon=True)
+                _writer.start()
+    try:
+        _queue.put_nowait(list(batch))
+    except queue.Full:
+        TRACE_STATS["dropped"] += len(batch)
+
+
+def trace_file() -> Path:
+    return TRACE_DIR / f"traces-{time.strftime('%Y%m%d')}.jsonl"
+
+
+def prune_traces(current: Path | None = None) -> int:
+    """기간/용량을 넘은 trace 파일 삭제 (오래된 날부터, current는 남김). 지운 파일 수"""
+    files = []
+    for p in sorted(TRACE_DIR.glob("traces-*.jsonl")):  # 이름이 날짜라 정렬 = 오래된 순
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        files.append((p, st.st_size, st.st_mtime))
+    cutoff = time.time() - TRACE_RETENTION_DAYS * 86400
+    limit = TRACE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for p, size, mtime in files:
+        if p == current:
+            continue
+        if not ((TRACE_RETENTION_DAYS and mtime < cutoff) or (limit and total > limit)):
+            continue
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    TRACE_STATS["pruned"] += removed
+    return removed
+
+
+def _writer_loop():
+    client = None
+    if TRACE_OTLP_ENDPOINT:
+        import httpx
+
+        client = httpx.Client(timeout=5.0)
+    current, size, since_prune = None, 0, 0
+    while True:
+        batches = [_queue.get()]
+        while len(batches) < 256:
+            try:
+                batches.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            data = ("\n".join(json.dumps(to_otlp(b), ensure_ascii=False) for b in batches) + "\n").encode("utf-8")
+            path = trace_file()
+            limit = TRACE_MAX_MB * 1024 * 1024
+            # 날짜가 바뀌었거나 상한의 1/10만큼 더 썼으면 정리
+            if path != current or (limit and since_prune > limit / 10):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                prune_traces(path)
+                current, since_prune = path, 0
+                size = path.stat().st_size if path.exists() else 0
+            n = sum(map(len, batches))
+            written = not (limit and size + len(data) > limit)
+            if written:
+                with open(path, "ab") as f:
+                    f.write(data)
+                size += len(data)
+                since_prune += len(data)
+            else:
+                TRACE_STATS["capped"] += n
+            if client is not None:
+                merged = {"resourceSpans": [rs for b in batches for rs in to_otlp(b)["resourceSpans"]]}
+                client.post(TRACE_OTLP_ENDPOINT, json=merged).raise_for_status()
+            if written or client is not None:
+                TRACE_STATS["exported"] += n
+        except Exception as e:
+            TRACE_STATS["export_errors"] += 1
+            print(f"[WARN] trace export 실패: {e}", flush=True)
+        finally:
+            for _ in batches:
+                _queue.task_done()
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """큐에 쌓인 span을 다 쓸 때까지 대기 (종료 훅/테스트용)"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def stats() -> dict:
+    return {**TRACE_STATS, "queued": _queue.qsize(), "enabled": TRACE_ENABLED, "file": str(trace_file())}
+
+
+# ---------- SQLAlchemy / ASGI 연동 ----------
+
+def instrument_engine(engine):
+    """쿼리마다 db.query span (요청/작업 span 안에서 실행된 것만 기록)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("trace_t0", []).append(time.time_ns())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("trace_t0")
+        if starts and _current.get() is not None:
+            op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            add_span("db.query", starts.pop(), time.time_ns(),
+                     **{"db.operation": op, "db.statement": statement[:200], "db.rows": cursor.rowcount})
+
+    return engine
+
+
+class TracingMiddleware:
+    """요청마다 루트 span. X-Request-ID(들어온 값 우선)와 Server-Timing 헤더를 붙임 (순수 ASGI: 스트리밍 끝까지 측정)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in TRACE_SKIP_PATHS:
+            return await self.app(scope, receive, send)
+
+        rid = None
+        for k, v in scope.get("headers") or []:
+            if k == b"x-request-id":
+                rid = v.decode("latin-1")[:64]
+                break
+        rid = rid or uuid.uuid4().hex[:16]
+        if not recording():
+            async def send_rid(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", []).append((b"x-request-id", rid.encode("latin-1")))
+                await send(message)
+            return await self.app(scope, receive, send_rid)
+
+        name = f"{scope.get('method', 'GET')} {scope.get('path', '')}"
+        with span(name, kind=SERVER, request_id=rid, root=True, **{"http.method": scope.get("method"),
+                                                        "http.target": scope.get("path")}) as root:
+            async def send_traced(message):
+                if message["type"] == "http.response.start":
+                    root.set(**{"http.status_code": message["status"]})
+                    headers = message.setdefault("headers", [])
+                    headers.append((b"x-request-id", rid.encode("latin-1")))
+                    if TRACE_ENABLED:
+                        headers.append((b"server-timing", server_timing(root).encode("latin-1")))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                # 라우팅 후 scope에 남는 경로 템플릿 (/api/image/{name} 등). 정적 파일 등 매칭 안 된 경로는 other
+                root.set(**{"http.route": getattr(scope.get("route"), "path", None) or "other"})
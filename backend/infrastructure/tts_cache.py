@@ -0,0 +1,155 @@
+# backend/infrastructure/tts_cache.py
+#
+# TTS 결과 디스크 캐시 (크기 상한 LRU).
+# 키 = sha256(text + speaker + speed + format). 파일은 static/audio/tts/<key>.<format>에 저장되어
+# /static 마운트로 바로 서빙된다. 히트 시 mtime을 갱신해 LRU 순서로 사용한다.
+# URL을 돌려준 뒤 클라이언트가 받아 가기 전에 지워지지 않도록, 최근 TTS_EVICT_GRACE_SEC 안에
+# 쓰였거나 조회된 항목은 용량을 넘어도 제거하지 않는다 (다음 store 때 다시 정리).
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", BACKEND_DIR / "static" / "audio" / "tts"))
+TTS_CACHE_URL_PREFIX = "/static/audio/tts"
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TTS_EVICT_GRACE_SEC = float(os.getenv("TTS_EVICT_GRACE_SEC", "60"))
+
+_lock = threading.Lock()
+_index: "OrderedDict[str, tuple[int, float]] | None" = None  # 파일명 -> (크기, 마지막 사용 시각), 오래된 것부터
+_total_bytes = 0
+_inflight: dict[str, asyncio.Future] = {}
+
+# coalesced: 같은 키의 진행 중인 미스에 합류한 호출 (API 호출은 없지만 캐시 적중도 아님)
+TTS_CACHE_STATS = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "evicted_bytes": 0}
+
+# get_or_create가 돌려주는 캐시 상태 (X-TTS-Cache 헤더 값과 같음)
+HIT, MISS, COALESCED = "hit", "miss", "coalesced"
+
+
+def cache_key(text: str, speaker: str, speed: str, fmt: str) -> str:
+    raw = json.dumps([text, speaker, str(speed), fmt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _filename(key: str, fmt: str) -> str:
+    return f"{key}.{fmt}"
+
+
+def _load_index():
+    """최초 1회 디렉터리를 스캔해 mtime 순 인덱스 구성 (재시작 후에도 캐시 유지)"""
+    global _index, _total_bytes
+    if _index is not None:
+        return
+    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for e in os.scandir(TTS_CACHE_DIR):
+        if e.is_file() and not e.name.startswith("."):
+            st = e.stat()
+            entries.append((st.st_mtime, e.name, st.st_size))
+    entries.sort()
+    _index = OrderedDict((name, (size, mtime)) for mtime, name, size in entries)
+    _total_bytes = sum(size for size, _ in _index.values())
+
+
+def _evict_locked():
+    global _total_bytes
+    recent = time.time() - TTS_EVICT_GRACE_SEC
+    while _total_bytes > TTS_CACHE_MAX_BYTES and len(_index) > 1:
+        name, (size, touched) = next(iter(_index.items()))
+        if touched > recent:
+            break  # LRU 순서라 뒤쪽은 모두 더 최근
+        del _index[name]
+        try:
+            os.remove(TTS_CACHE_DIR / name)
+        except FileNotFoundError:
+            pass
+        _total_bytes -= size
+        TTS_CACHE_STATS["evictions"] += 1
+        TTS_CACHE_STATS["evicted_bytes"] += size
+
+
+def lookup(key: str, fmt: str) -> Path | None:
+    name = _filename(key, fmt)
+    with _lock:
+        _load_index()
+        if name not in _index:
+            return None
+        path = TTS_CACHE_DIR / name
+        if not path.exists():
+            _index.pop(name, None)
+            return None
+        _index[name] = (_index[name][0], time.time())
+        _index.move_to_end(name)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store(key: str, fmt: str, data: bytes) -> Path:
+    global _total_bytes
+    name = _filename(key, fmt)
+    path = TTS_CACHE_DIR / name
+    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=TTS_CACHE_DIR, prefix=".incoming-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    with _lock:
+        _load_index()
+        _total_bytes -= _index.pop(name, (0, 0))[0]
+        _index[name] = (len(data), time.time())
+        _total_bytes += len(data)
+        _evict_locked()
+    return path
+
+
+def url_for(path: Path) -> str:
+    return f"{TTS_CACHE_URL_PREFIX}/{path.name}"
+
+
+async def get_or_create(key: str, fmt: str, producer) -> tuple[Path, str]:
+    """(캐시 파일 경로, HIT/MISS/COALESCED). 같은 키 동시 미스는 producer를 한 번만 호출"""
+    path = await asyncio.to_thread(lookup, key, fmt)
+    if path is not None:
+        TTS_CACHE_STATS["hits"] += 1
+        return path, HIT
+
+    fut = _inflight.get(key)
+    if fut is not None:
+        TTS_CACHE_STATS["coalesced"] += 1
+        return await asyncio.shield(fut), COALESCED
+
+    TTS_CACHE_STATS["misses"] += 1
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        data = await producer()
+        path = await asyncio.to_thread(store, key, fmt, data)
+        fut.set_result(path)
+        return path, MISS
+    except BaseException as e:
+        fut.set_exception(e)
+        # 대기자가 없으면 "Future exception was never retrieved" 경고 방지
+        fut.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def stats() -> dict:
+    with _lock:
+        _load_index()
+        out = dict(TTS_CACHE_STATS, entries=len(_index), bytes=_total_bytes, max_bytes=TTS_CACHE_MAX_BYTES)
+    lookups = out["hits"] + out["misses"] + out["coalesced"]
+    out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+    return out
@@ -1,34 +1,50 @@
-import uuid
+import asyncio
+import os
 from pathlib import Path
-import requests
-from config.settings import NAVER_CLIENT_ID, NAVER_CLIENT_SECRET, APP_SERVER_URL
+from config.settings import NAVER_CLIENT_ID, NAVER_CLIENT_SECRET
+from infrastructure import http_client, tracing, tts_cache
 
-TTS_URL = "https://naveropenapi.apigw.ntruss.com/tts-premium/v1/tts"
+TTS_URL = os.getenv("NAVER_TTS_URL", "https://naveropenapi.apigw.ntruss.com/tts-premium/v1/tts")
+DEFAULT_SPEAKER = "nara"
+DEFAULT_SPEED = "0"
+DEFAULT_FORMAT = "mp3"
 
-def text_to_speech(text: str) -> bytes:
-    print(f"[TTS 요청 텍스트 길이] {len(text)}자")
-    filename = f"{uuid.uuid4().hex}.mp3"
-    path = Path("static/audio") / filename
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True) # 폴더 없을 경우 생성
-    except FileExistsError:
-        pass
 
+async def synthesize(text: str, speaker: str = DEFAULT_SPEAKER, speed: str = DEFAULT_SPEED,
+                     fmt: str = DEFAULT_FORMAT) -> bytes:
+    """캐시 없이 Naver TTS API를 직접 호출"""
+    print(f"[TTS 요청 텍스트 길이] {len(text)}자")
     headers = {
-        "x-ncp-apigw-api-key-id": NAVER_CLIENT_ID,
-        "x-ncp-apigw-api-key": NAVER_CLIENT_SECRET,
+        "x-ncp-apigw-api-key-id": NAVER_CLIENT_ID or "",
+        "x-ncp-apigw-api-key": NAVER_CLIENT_SECRET or "",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = {
-        "speaker": "nara",
-        "speed": "0",
+        "speaker": speaker,
+        "speed": str(speed),
         "text": text,
-        "format" : "mp3", # 파일 포맷 설정
+        "format" : fmt, # 파일 포맷 설정
     }
 
-    response = requests.post(TTS_URL, headers=headers, data=data)
-    print("[TTS 요청]", data)
+    with tracing.span("tts", kind=tracing.CLIENT, chars=len(text), speaker=speaker) as sp:
+        response = await http_client.request("POST", TTS_URL, headers=headers, data=data)
+        sp.set(**{"http.status_code": response.status_code, "audio_bytes": len(response.content)})
     if response.status_code == 200:
         return response.content
-    else:
-        raise RuntimeError(f"TTS 요청 실패: {response.status_code} - {response.text}")
+    raise http_client.ExternalAPIError("TTS", response.status_code, response.text)
+
+
+async def text_to_speech_file(text: str, speaker: str = DEFAULT_SPEAKER, speed: str = DEFAULT_SPEED,
+                              fmt: str = DEFAULT_FORMAT) -> tuple[Path, str]:
+    """캐시된 음성 파일 경로와 캐시 상태(hit/miss/coalesced). 미스일 때만 API 호출"""
+    key = tts_cache.cache_key(text, speaker, speed, fmt)
+    with tracing.span("tts.cached", chars=len(text)) as sp:
+        path, cache = await tts_cache.get_or_create(key, fmt, lambda: synthesize(text, speaker, speed, fmt))
+        sp.set(cache=cache)
+    return path, cache
+
+
+async def text_to_speech(text: str, speaker: str = DEFAULT_SPEAKER, speed: str = DEFAULT_SPEED,
+                         fmt: str = DEFAULT_FORMAT) -> bytes:
+    path, _ = await text_to_speech_file(text, speaker, speed, fmt)
+    return await asyncio.to_thread(path.read_bytes)
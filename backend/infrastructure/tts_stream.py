@@ -0,0 +1,76 @@
+# backend/infrastructure/tts_stream.py
+#
+# 문장 단위 스트리밍 TTS: 답변을 한국어 문장으로 나눠 제한된 병렬도로 합성하고,
+# 끝난 청크부터 원래 순서대로 흘려보낸다. 문장별 결과는 TTS 캐시를 그대로 재사용한다.
+
+import asyncio
+import os
+import re
+import time
+
+from infrastructure.tts_client import text_to_speech, DEFAULT_SPEAKER, DEFAULT_SPEED, DEFAULT_FORMAT
+
+TTS_STREAM_PARALLEL = int(os.getenv("TTS_STREAM_PARALLEL", "3"))
+# 너무 짧은 문장은 앞 문장에 붙여 API 호출 수를 줄임
+MIN_CHUNK_CHARS = 8
+MAX_CHUNK_CHARS = 200
+
+# 마침표/물음표/느낌표/말줄임 + 공백, 또는 "~요." "~다." 뒤 줄바꿈에서 자름
+_SENT_END = re.compile(r"(?<=[.!?。…])\s+|(?<=[요다죠까])\s*\n+|\n{2,}")
+
+
+def split_sentences(text: str) -> list[str]:
+    parts = [p.strip() for p in _SENT_END.split(text or "") if p and p.strip()]
+    chunks: list[str] = []
+    for p in parts:
+        # 긴 문장은 쉼표 기준으로 한 번 더 나눔 (API 1회 길이/첫 음성 지연 제한)
+        while len(p) > MAX_CHUNK_CHARS:
+            cut = p.rfind(",", 0, MAX_CHUNK_CHARS)
+            cut = cut + 1 if cut > 0 else MAX_CHUNK_CHARS
+            chunks.append(p[:cut].strip())
+            p = p[cut:].strip()
+        if chunks and len(p) < MIN_CHUNK_CHARS:
+            chunks[-1] = f"{chunks[-1]} {p}"
+        elif p:
+            chunks.append(p)
+    return chunks
+
+
+def pop_sentences(buffer: str) -> tuple[list[str], str]:
+    """스트리밍 중인 텍스트에서 완성된 문장만 떼어내고 (문장들, 남은 버퍼) 반환"""
+    out = []
+    start = 0
+    for m in _SENT_END.finditer(buffer):
+        piece = buffer[start:m.start()].strip()
+        if len(piece) >= MIN_CHUNK_CHARS:
+            out.append(piece)
+            start = m.end()
+    return out, buffer[start:]
+
+
+async def stream_tts(text: str, speaker: str = DEFAULT_SPEAKER, speed: str = DEFAULT_SPEED,
+                     fmt: str = DEFAULT_FORMAT, parallel: int = TTS_STREAM_PARALLEL, timings: dict | None = None):
+    """문장별 오디오 바이트를 순서대로 yield. 앞 문장이 끝나는 즉시 내보낸다"""
+    sentences = split_sentences(text)
+    sema = asyncio.Semaphore(max(1, parallel))
+    started = time.perf_counter()
+
+    async def synth(sentence: str) -> bytes:
+        async with sema:
+            return await text_to_speech(sentence, speaker, speed, fmt)
+
+    tasks = [asyncio.create_task(synth(s)) for s in sentences]
+    try:
+        for i, task in enumerate(tasks):
+            audio = await task
+            if i == 0 and timings is not None:
+                timings["tts_first_audio_s"] = round(time.perf_counter() - started, 4)
+            yield audio
+        if timings is not None:
+            timings["tts_total_s"] = round(time.perf_counter() - started, 4)
+            timings["tts_chunks"] = len(tasks)
+    finally:
+        # 클라이언트가 중간에 끊으면 남은 합성 취소
+        for t in tasks:
+            if not t.done():
+                t.cancel()
@@ -0,0 +1,150 @@
+# backend/langserve_app/attention.py
+#
+# 한 번 올린 가중치로 attention 구현(eager / sdpa / flash_attention_2)을 호출마다 바꿔 쓰기.
+# transformers의 attention 모듈은 forward 때마다 config._attn_implementation을 읽으므로
+# 설정 값만 바꾸면 되고 가중치는 그대로다 (예전 qwen_final.py는 이걸 위해 이미지마다 7B를 다시 로드했다).
+#
+# 여러 스레드가 같은 모델을 쓰므로 구현 전환은 "같은 구현끼리는 동시에, 다른 구현은 앞 호출이 다 끝난 뒤"로
+# 제한한다 (실행 중인 generate 도중에 구현이 바뀌지 않게).
+#   with use_attention(model, "sdpa"): model.generate(...)
+#   view = AttnBoundModel(model, "flash_attention_2")   # generate / forward / __call__이 자동으로 감싸짐
+
+import threading
+from contextlib import contextmanager
+
+ATTN_IMPLS = ("eager", "sdpa", "flash_attention_2")
+
+
+def _base(model):
+    """PEFT 래퍼/AttnBoundModel을 벗긴 실제 transformers 모델"""
+    if isinstance(model, AttnBoundModel):
+        model = model.model
+    get_base = getattr(model, "get_base_model", None)
+    return get_base() if callable(get_base) else model
+
+
+def current_attention(model) -> str:
+    return getattr(_base(model).config, "_attn_implementation", None)
+
+
+def check_attention(model, impl: str):
+    if impl not in ATTN_IMPLS:
+        raise ValueError(f"unknown attention implementation: {impl} (가능: {', '.join(ATTN_IMPLS)})")
+    if impl == "flash_attention_2":
+        from transformers.utils import is_flash_attn_2_available
+
+        if not is_flash_attn_2_available():
+            raise ValueError("flash_attention_2를 쓸 수 없습니다 (flash-attn 미설치 또는 GPU 미지원)")
+
+
+def _set_attention(model, impl: str):
+    base = _base(model)
+    # vision / text 하위 config까지 모듈마다 자기 config를 보므로 전부 바꾼다
+    seen = set()
+    for m in base.modules():
+        cfg = getattr(m, "config", None)
+        if cfg is not None and id(cfg) not in seen and hasattr(cfg, "_attn_implementation"):
+            seen.add(id(cfg))
+            cfg._attn_implementation = impl
+    for name in getattr(base.config, "sub_configs", None) or {}:
+        sub = getattr(base.config, name, None)
+        if sub is not None and hasattr(sub, "_attn_implementation"):
+            sub._attn_implementation = impl
+
+
+class _AttnState:
+    def __init__(self, impl):
+        self.cond = threading.Condition()
+        self.impl = impl
+        self.active = 0     # 현재 구현으로 실행 중인 호출 수
+        self.waiting = 0    # 다른 구현을 기다리는 호출 수 (있으면 같은 구현 새 호출도 줄을 선다)
+        self.switches = 0
+
+
+_states_lock = threading.Lock()
+
+
+def _state(model) -> _AttnState:
+    base = _base(model)
+    with _states_lock:
+        st = base.__dict__.get("_attn_state")
+        if st is None:
+            st = _AttnState(current_attention(base))
+            base.__dict__["_attn_state"] = st
+        return st
+
+
+def attention_stats(model) -> dict:
+    st = _state(model)
+    with st.cond:
+        return {"impl": st.impl, "active": st.active, "waiting": st.waiting, "switches": st.switches}
+
+
+@contextmanager
+def use_attention(model, impl: str | None):
+    """이 블록 안의 호출은 impl로 실행. None이면 아무것도 안 함 (로드 시 구현 그대로)"""
+    if impl is None:
+        yield model
+        return
+    st = _state(model)
+    with st.cond:
+        queued = False
+        while True:
+            if st.impl == impl and not st.waiting:
+                break
+            if st.active == 0:
+                if st.impl != impl:
+                    check_attention(model, impl)
+                    _set_attention(model, impl)
+                    st.impl = impl
+                    st.switches += 1
+                break
+            if not queued:
+                st.waiting += 1
+                queued = True
+            st.cond.wait()
+        if queued:
+            st.waiting -= 1
+        st.active += 1
+    try:
+        yield model
+    finally:
+        with st.cond:
+            st.active -= 1
+            st.cond.notify_all()
+
+
+class AttnBoundModel:
+    """같은 가중치를 공유하면서 attention 구현만 고정한 모델 뷰.
+
+    generate / forward / __call__은 use_attention으로 감싸고, 나머지 속성(device, config, visual 등)은
+    원래 모델 것을 그대로 돌려준다.
+    """
+
+    def __init__(self, model, impl: str):
+        check_attention(model, impl)
+        self.__dict__["model"] = model
+        self.__dict__["attn_impl"] = impl
+
+    def generate(self, *args, **kwargs):
+        with use_attention(self.model, self.attn_impl):
+            return self.model.generate(*args, **kwargs)
+
+    def forward(self, *args, **kwargs):
+        with use_attention(self.model, self.attn_impl):
+            return self.model(*args, **kwargs)
+
+    __call__ = forward
+
+    def eval(self):
+        self.model.eval()
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.model, name, value)
+
+    def __repr__(self):
+        return f"AttnBoundModel({self.attn_impl}, {type(self.model).__name__})"
@@ -10,6 +10,9 @@ class ImageChatRunnable(Runnable):
     def invoke(self, input_text: str) -> str:
         return self.session.ask(input_text)
 
+    def invoke_stream(self, input_text: str):
+        return self.session.ask_stream(input_text)
+
     def classify(self) -> str:
         return self.session.classify_document()
 
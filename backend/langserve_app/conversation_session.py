@@ -6,22 +6,74 @@ from langserve_app.model_loader import get_model, get_processor
 from qwen_vl_utils import process_vision_info
 from langchain.memory import ConversationBufferMemory
 from langchain.schema import HumanMessage, AIMessage
+import os
 import time
+from contextlib import nullcontext
 
 from functools import lru_cache
 import numpy as np
 
+from data_store import vision_features
+from infrastructure import profiler, tracing
+
+# 비전 타워 출력 영구 캐시 (같은 이미지는 재업로드/재시작 후에도 비전 타워를 다시 돌리지 않음)
+VISION_CACHE = os.getenv("VISION_CACHE", "1") == "1" and vision_features.HAVE_SAFETENSORS
+# 작업별 attention 구현 (예: 분류 flash_attention_2 / 대화 sdpa). 비우면 로드 시 구현 그대로, 가중치는 공유
+CLASSIFY_ATTN_IMPL = os.getenv("CLASSIFY_ATTN_IMPL") or None
+CHAT_ATTN_IMPL = os.getenv("CHAT_ATTN_IMPL") or None
+
 @lru_cache
-def _get_model():
-    return get_model()
+def _get_model(attn_impl=None):
+    return get_model(attn_impl)
 
 @lru_cache
 def _get_processor():
     return get_processor()
 
+@lru_cache
+def _get_feature_store():
+    return vision_features.VisionFeatureStore.for_model(_get_model(), _get_processor())
+
+class _GenTimer:
+    """generate의 streamer 자리에 끼워 prefill(첫 토큰까지)/decode 구간을 재는 래퍼. inner streamer가 있으면 그대로 전달.
+    generate는 프롬프트로 put을 한 번 부른 뒤 토큰마다 put을 부르므로, 두 번째 put 시각이 prefill 끝이다."""
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.start_ns = time.time_ns()
+        self.first_ns = None
+        self.end_ns = None
+        self.calls = 0
+        self.new_tokens = 0
+
+    def put(self, value):
+        if self.calls:
+            if self.first_ns is None:
+                self.first_ns = time.time_ns()
+            self.new_tokens += 1
+        self.calls += 1
+        if self.inner is not None:
+            self.inner.put(value)
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        if self.inner is not None:
+            self.inner.end()
+
+    def record(self, task: str, input_tokens: int):
+        end = self.end_ns or time.time_ns()
+        first = self.first_ns or end
+        decode_s = (end - first) / 1e9
+        tracing.add_span("model.prefill", self.start_ns, first, task=task, input_tokens=input_tokens)
+        tracing.add_span("model.decode", first, end, task=task, output_tokens=self.new_tokens,
+                         tokens_per_s=round(self.new_tokens / decode_s, 2) if decode_s > 0 else None)
+
+
 class ConversationSession:
     def __init__(self, img_path):
-        self.image = Image.open(img_path).convert("RGB")
+        with tracing.span("image.decode") as sp:
+            self.image = Image.open(img_path).convert("RGB")
+            sp.set(width=self.image.width, height=self.image.height)
         self.memory = ConversationBufferMemory(return_messages=True)
 
         # 최초 메시지는 이미지만
@@ -29,6 +81,7 @@ class ConversationSession:
             {"role": "user", "content": [{"type": "image", "image": self.image}]}
         ]
         self.image_inputs = self._extract_cached_vision_inputs(self.image)
+        self.features = self._load_vision_features(img_path) if VISION_CACHE else None
         self.last_response = None
 
         # 유형 분류 및 요약용 프롬프트
@@ -155,50 +208,125 @@ class ConversationSession:
     def _extract_cached_vision_inputs(self, image):
         """이미지 전처리 후 pixel_values와 attention_mask만 캐시"""
         messages = [{"role": "user", "content": [{"type": "image", "image": self.image}]}]
-        start_embedd = time.time()
-        with torch.no_grad():
+        with tracing.span("vision.preprocess"), torch.no_grad():
             image_inputs, _ = process_vision_info(messages)
-        end_embedd = time.time()
-        print(f"[DEBUG] process_vision_info 소요 시간: {round(end_embedd - start_embedd, 2)}초")
         # Qwen-VL 유틸은 images를 리스트(PIL.Image 등)로 반환하며, processor(images=...)에 그대로 넣어야 함
         return image_inputs
 
-    def ask(self, user_input: str) -> str:
+    def _load_vision_features(self, img_path):
+        """비전 타워 출력(이미지 임베딩)을 캐시에서 읽고, 없으면 한 번 계산해서 저장. 실패 시 None(기존 경로)"""
+        try:
+            key = vision_features.image_key_for_path(img_path)
+            store = _get_feature_store()
+            with tracing.span("vision.features") as sp:
+                misses = store.stats["misses"]
+                feats = vision_features.get_or_extract(store, _get_model(), _get_processor(), {key: self.image})
+                sp.set(cache_hit=store.stats["misses"] == misses)
+            return [feats[key]]
+        except Exception as e:
+            print(f"[WARN] vision feature cache 사용 불가: {e} -> 매 호출 이미지 인코딩")
+            return None
+
+    def _model_inputs(self, text: str):
+        # 캐시 경로는 dict, processor 경로는 BatchFeature → 사용하는 쪽은 inputs["input_ids"]로 접근
+        with tracing.span("processor", cached_vision=self.features is not None):
+            if self.features is not None:
+                return vision_features.build_inputs(_get_processor(), text, self.features, _get_model().device)
+            return _get_processor()(text=[text], images=self.image_inputs, return_tensors="pt").to(_get_model().device)
+
+    def _vision(self):
+        """generate 호출을 감싸서 캐시된 이미지 임베딩을 쓰게 함 (캐시 미사용 시 아무것도 안 함)"""
+        if self.features is None:
+            return nullcontext()
+        return vision_features.use_cached_features(_get_model(), self.features)
+
+    def _generate(self, task: str, attn_impl, inputs, max_new_tokens: int, streamer=None):
+        """greedy generate + model.{task} span (입력/출력 토큰 수, prefill/decode 구간)"""
+        input_tokens = int(inputs["input_ids"].shape[-1])
+        with tracing.span(f"model.{task}", attn_impl=attn_impl, input_tokens=input_tokens,
+                          cached_vision=self.features is not None) as sp:
+            timer = _GenTimer(streamer) if tracing.current_span() is not None else None
+            with torch.no_grad(), self._vision(): # no_grad : 추론시에만 사용. gradient를 계산하지 않는다는 뜻
+                generated_ids = _get_model(attn_impl).generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=False,
+                    temperature=None,   # 불필요한 파라미터 제거
+                    streamer=timer or streamer,
+                )
+            if timer is not None:
+                timer.record(task, input_tokens)
+                sp.set(output_tokens=timer.new_tokens)
+        return generated_ids
+
+    def _prepare_ask(self, user_input: str):
         # 사용자 입력 추가
         self.messages.append({"role": "user", "content": [{"type": "text", "text": user_input}]})
         self.memory.chat_memory.add_user_message(user_input)
 
         # 템플릿 생성
-        text = _get_processor().apply_chat_template(self.messages, tokenize=False, add_generation_prompt=True)
+        with tracing.span("chat_template"):
+            text = _get_processor().apply_chat_template(self.messages, tokenize=False, add_generation_prompt=True)
 
-        # 텍스트 + 이미지 동시 토크나이즈 (이미지는 캐시된 image_inputs를 재사용)
-        inputs = _get_processor()(text=[text], images=self.image_inputs, return_tensors="pt").to(_get_model().device)
+        # 텍스트 + 이미지 동시 토크나이즈 (이미지 임베딩은 캐시 재사용)
+        return self._model_inputs(text)
 
-        # 추론
-        inference_start = time.time()
-        with torch.no_grad(): # no_grad : 추론시에만 사용. gradient를 계산하지 않는다는 뜻
-            generated_ids = _get_model().generate(
-                **inputs,
-                max_new_tokens=128,
-                do_sample=False,
-                temperature=None,   # 불필요한 파라미터 제거
-            )
-        inference_end = time.time()
-        # 출력 후처리
-        generated_ids_trimmed = [
-            out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-        ]
-        output = _get_processor().batch_decode(
-            generated_ids_trimmed,
-            skip_special_tokens=True,
-            clean_up_tokenization_spaces=False
-        )[0]
+    def _finish_ask(self, output: str) -> str:
         # 응답 저장
         self.messages.append({"role": "assistant", "content": output})
         self.memory.chat_memory.add_ai_message(output)
         self.last_response = output
         return output
 
+    def ask_stream(self, user_input: str):
+        """ask와 같지만 디코딩되는 대로 텍스트 조각을 yield (TTS를 첫 문장부터 시작하기 위함)"""
+        from threading import Thread
+        from transformers import TextIteratorStreamer
+
+        inputs = self._prepare_ask(user_input)
+        streamer = TextIteratorStreamer(
+            _get_processor().tokenizer, skip_prompt=True, skip_special_tokens=True,
+            clean_up_tokenization_spaces=False,
+        )
+        errors = []
+
+        def _run():
+            try:
+                self._generate("chat", CHAT_ATTN_IMPL, inputs, 128, streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        worker = Thread(target=tracing.wrap(_run), daemon=True)
+        worker.start()
+        pieces = []
+        for piece in streamer:
+            pieces.append(piece)
+            yield piece
+        worker.join()
+        if errors:
+            raise errors[0]
+        self._finish_ask("".join(pieces))
+
+    @profiler.profiled("ask")
+    def ask(self, user_input: str) -> str:
+        inputs = self._prepare_ask(user_input)
+
+        # 추론
+        generated_ids = self._generate("chat", CHAT_ATTN_IMPL, inputs, 128)
+        # 출력 후처리
+        generated_ids_trimmed = [
+            out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs["input_ids"], generated_ids)
+        ]
+        with tracing.span("batch_decode"):
+            output = _get_processor().batch_decode(
+                generated_ids_trimmed,
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=False
+            )[0]
+        return self._finish_ask(output)
+
+    @profiler.profiled("classify")
     def classify_document(self) -> str:
         """이미지에 대해 문서 유형을 간단히 분류합니다."""
         messages = [
@@ -210,25 +338,19 @@ class ConversationSession:
                 ],
             }
         ]
-        text = _get_processor().apply_chat_template(
-            messages, tokenize=False, add_generation_prompt=True
-        )
-        inputs = _get_processor()(text=[text], images=self.image_inputs, return_tensors="pt").to(
-            _get_model().device
-        )
-        with torch.no_grad():
-            generated_ids = _get_model().generate(
-                **inputs,
-                max_new_tokens=16,
-                do_sample=False,
-                temperature=None,
+        with tracing.span("chat_template"):
+            text = _get_processor().apply_chat_template(
+                messages, tokenize=False, add_generation_prompt=True
             )
+        inputs = self._model_inputs(text)
+        generated_ids = self._generate("classify", CLASSIFY_ATTN_IMPL, inputs, 16)
         generated_ids_trimmed = [
-            out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
+            out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs["input_ids"], generated_ids)
         ]
-        result = _get_processor().batch_decode(
-            generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
-        )[0].strip()
+        with tracing.span("batch_decode"):
+            result = _get_processor().batch_decode(
+                generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
+            )[0].strip()
 
         # 라벨 정규화
         normalized = (
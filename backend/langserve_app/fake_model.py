@@ -0,0 +1,82 @@
+# backend/langserve_app/fake_model.py
+#
+# 부하 테스트용 가짜 모델 (FAKE_MODEL=1 이면 session_router가 ImageChatRunnable 대신 사용).
+# GPU/모델 없이 서비스 전체 경로(게이트, DB, TTS, 스트리밍)를 돌려보기 위한 것으로,
+# 같은 입력에는 항상 같은 출력을 내고 prefill/decode 지연은 실제 모델처럼 호출 스레드를 막는다(time.sleep).
+#   FAKE_VISION_SEC        세션 생성 시 이미지 전처리 시간
+#   FAKE_PREFILL_SEC       prefill 기본 시간 (이미지 + 프롬프트)
+#   FAKE_PREFILL_PER_1K    대화 기록 1000자당 추가 prefill 시간
+#   FAKE_DECODE_TOK_SEC    토큰당 decode 시간
+#   FAKE_MAX_NEW_TOKENS    답변 최대 토큰 수 (실제 설정과 같은 128)
+
+import hashlib
+import os
+import time
+
+from PIL import Image
+
+from infrastructure import profiler, tracing
+
+FAKE_VISION_SEC = float(os.getenv("FAKE_VISION_SEC", "0.05"))
+FAKE_PREFILL_SEC = float(os.getenv("FAKE_PREFILL_SEC", "0.35"))
+FAKE_PREFILL_PER_1K = float(os.getenv("FAKE_PREFILL_PER_1K", "0.05"))
+FAKE_DECODE_TOK_SEC = float(os.getenv("FAKE_DECODE_TOK_SEC", "0.025"))
+FAKE_MAX_NEW_TOKENS = int(os.getenv("FAKE_MAX_NEW_TOKENS", "128"))
+
+DOC_TYPES = ["고지서", "안내문-건강", "안내문-생활", "안내문-금융", "기타"]
+_WORDS = ["어르신,", "이", "문서는", "납부", "안내예요.", "금액은", "3만", "원이고", "기한은",
+          "10월", "31일까지예요.", "보건소에서", "검진이", "있어요.", "신분증을", "챙기세요."]
+
+
+def _digest(*parts: str) -> bytes:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+    return h.digest()
+
+
+class FakeImageChatRunnable:
+    """ImageChatRunnable과 같은 인터페이스 (invoke / invoke_stream / classify / prompt_for)"""
+
+    def __init__(self, image_path: str):
+        with Image.open(image_path) as im:
+            im.verify()  # 깨진 업로드는 실제처럼 여기서 실패
+        with open(image_path, "rb") as f:
+            self.image_key = hashlib.sha256(f.read()).hexdigest()
+        self.history_chars = 0
+        time.sleep(FAKE_VISION_SEC)
+
+    def _tokens(self, input_text: str) -> list[str]:
+        d = _digest(self.image_key, input_text, str(self.history_chars))
+        n = min(FAKE_MAX_NEW_TOKENS, 24 + d[0] % 64)
+        return [_WORDS[(d[i % len(d)] + i) % len(_WORDS)] for i in range(n)]
+
+    def _prefill(self, input_text: str):
+        self.history_chars += len(input_text)
+        time.sleep(FAKE_PREFILL_SEC + FAKE_PREFILL_PER_1K * self.history_chars / 1000)
+
+    def invoke_stream(self, input_text: str):
+        with tracing.span("model.prefill", input_chars=len(input_text)):
+            self._prefill(input_text)
+        out = []
+        t_decode = time.time_ns()
+        for tok in self._tokens(input_text):
+            time.sleep(FAKE_DECODE_TOK_SEC)
+            piece = tok + " "
+            out.append(piece)
+            yield piece
+        tracing.add_span("model.decode", t_decode, time.time_ns(), task="chat", output_tokens=len(out))
+        self.history_chars += sum(map(len, out))
+
+    @profiler.profiled("ask")
+    def invoke(self, input_text: str) -> str:
+        return "".join(self.invoke_stream(input_text)).strip()
+
+    @profiler.profiled("classify")
+    def classify(self) -> str:
+        time.sleep(FAKE_PREFILL_SEC + 3 * FAKE_DECODE_TOK_SEC)
+        return DOC_TYPES[_digest(self.image_key)[0] % len(DOC_TYPES)]
+
+    def prompt_for(self, doc_type: str) -> str:
+        return f"{doc_type} 문서를 어르신이 이해하기 쉽게 2~3문장으로 요약해 주세요."
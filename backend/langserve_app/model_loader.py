@@ -4,8 +4,12 @@ from functools import lru_cache
 import os, gc, torch
 from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
 
+from langserve_app.attention import AttnBoundModel
+
 MODEL_BASE = os.getenv("MODEL_BASE", "Qwen/Qwen2.5-VL-7B-Instruct")
 ADAPTER_DIR = os.getenv("ADAPTER_DIR", "backend/outputs/dpo/policy")
+# 로드 시 attention 구현. 호출별 전환은 get_model(attn_impl=...) 뷰로 (가중치 재로딩 없음)
+ATTN_IMPL = os.getenv("ATTN_IMPL", "flash_attention_2")
 # os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 
 # peft는 선택적 의존성으로 처리 (없어도 베이스로 기동)
@@ -20,7 +24,7 @@ if torch.cuda.is_available():
     torch.cuda.empty_cache()
 
 @lru_cache()
-def get_model():
+def _load_model():
     torch.backends.cuda.matmul.allow_tf32 = True
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
@@ -28,7 +32,7 @@ def get_model():
     base = Qwen2_5_VLForConditionalGeneration.from_pretrained(
         MODEL_BASE,
         torch_dtype=torch.bfloat16,
-        attn_implementation="flash_attention_2",
+        attn_implementation=ATTN_IMPL,
         # device_map={"": "cuda:0"},
     ).to(device)
 
@@ -48,6 +52,14 @@ def get_model():
             print(f"[WARN] adapter dir not found: {ADAPTER_DIR} -> using base model")
         return base.eval()
 
+@lru_cache()
+def get_model(attn_impl: str | None = None):
+    """attn_impl=None: 공유 모델 그대로. 지정 시 같은 가중치에서 그 구현으로 실행되는 뷰"""
+    model = _load_model()
+    if attn_impl is None:
+        return model
+    return AttnBoundModel(model, attn_impl)
+
 @lru_cache()
 def get_processor():
     # 베이스와 동일한 프로세서 사용
@@ -1,19 +1,26 @@
 # backend/langserve_app/session_router.py
 
 from fastapi import APIRouter, UploadFile, Response, Request, Cookie, HTTPException
-import uuid, shutil
-from .conversation_chain import ImageChatRunnable
+import uuid
 import os
+# 부하 테스트: 모델 없이 지연만 흉내 내는 가짜 모델로 기동
+if os.getenv("FAKE_MODEL") == "1":
+    from .fake_model import FakeImageChatRunnable as ImageChatRunnable
+else:
+    from .conversation_chain import ImageChatRunnable
 import time
 from data_store.conversations import append_message, get_conversation
 from data_store.recent_docs import (
     add_recent_doc,
+    update_recent_doc,
     list_recent_docs,
     delete_recent_doc,
     get_recent_doc,
     get_recent_doc_by_doc_id,
     get_latest_doc_for_user,
 )
+from data_store import blob_store
+from infrastructure import metrics, tracing
 
 router = APIRouter(prefix="/api")
 sessions = {}
@@ -35,20 +42,61 @@ class QueueFull(HTTPException):
 
 async def acquire_slot():
     global _q_count
-    async with _q_lock:
-        if _q_count >= MAX_QUEUE:
-            raise QueueFull()
-        _q_count += 1
-    await _sema.acquire()
+    with tracing.span("queue.wait") as sp:
+        async with _q_lock:
+            if _q_count >= MAX_QUEUE:
+                sp.set(rejected=True)
+                raise QueueFull()
+            _q_count += 1
+            sp.set(queued=_q_count)
+        await _sema.acquire()
 
 async def release_slot():
     global _q_count
     _sema.release()
     async with _q_lock:
         _q_count -= 1
+
+
+# /metrics: 스크레이프 때 읽음 (요청 경로 비용 없음)
+metrics.gauge("siseon_gate_queue_length", "게이트에 들어온 요청 수 (대기 + 실행 중)", lambda: _q_count)
+metrics.gauge("siseon_gate_in_use", "모델 슬롯 사용 중", lambda: MAX_CONCURRENCY - _sema._value)
+metrics.gauge("siseon_gate_capacity", "MAX_CONCURRENCY / MAX_QUEUE", lambda: {"concurrency": MAX_CONCURRENCY,
+                                                                           "queue": MAX_QUEUE}, ["limit"])
+metrics.gauge("siseon_sessions", "메모리에 올라와 있는 대화 세션 수", lambda: len(sessions))
 # ============================
 
 
+def restore_session(user_id: str | None, doc_id: str | None) -> bool:
+    """sessions에 user_id 세션이 있으면 True. 없으면 DB의 최근 문서로 복원 시도"""
+    if user_id in sessions:
+        return True
+    # 1) doc_id+user_id로 복원 시도
+    restored = False
+    if user_id and doc_id:
+        doc = get_recent_doc(user_id=user_id, doc_id=doc_id) or get_recent_doc_by_doc_id(doc_id)
+        if doc and doc.get("path") and os.path.exists(doc["path"]):
+            try:
+                with tracing.span("session.restore"):
+                    sessions[user_id] = ImageChatRunnable(doc["path"])  # 세션 복원
+                latest_doc_id_by_user[user_id] = doc.get("doc_id", doc_id)
+                restored = True
+            except Exception as e:
+                print(f"[WARN] 세션 복원 실패: user_id={user_id} doc_id={doc_id} error={e}")
+    # 2) user_id만 있고 doc_id 없으면 가장 최근 문서로 복원
+    if not restored and user_id and not doc_id:
+        doc = get_latest_doc_for_user(user_id)
+        if doc and doc.get("path") and os.path.exists(doc["path"]):
+            try:
+                with tracing.span("session.restore"):
+                    sessions[user_id] = ImageChatRunnable(doc["path"])  # 세션 복원
+                latest_doc_id_by_user[user_id] = doc.get("doc_id")
+                restored = True
+            except Exception as e:
+                print(f"[WARN] 세션 복원(최근문서) 실패: user_id={user_id} error={e}")
+    return user_id in sessions
+
+
 @router.post("/start_session")
 async def start_session(image: UploadFile, response: Response, user_id: str = Cookie(None)):
     await acquire_slot()
@@ -56,45 +104,53 @@ async def start_session(image: UploadFile, response: Response, user_id: str = Co
         # 기존 쿠키가 있으면 재사용하여 기록 누적
         if not user_id:
             user_id = uuid.uuid4().hex
-        # 문서 식별자(밀리초 타임스탬프 기반)로 파일명 유니크 보장
+        # 문서 식별자(밀리초 타임스탬프 기반)
         doc_id = str(int(time.time() * 1000))
-        temp_path = f"/tmp/{user_id}_{doc_id}.jpg"
-
-        with open(temp_path, "wb") as f:
-            shutil.copyfileobj(image.file, f)
-        sessions[user_id] = ImageChatRunnable(temp_path) # 세션 초기화
-        latest_doc_id_by_user[user_id] = doc_id
-        # 문서 유형 분류 및 유형별 프롬프트 선택
+        # 내용 해시 기반 blob 저장소에 보관 (같은 이미지는 한 번만 저장)
+        with tracing.span("upload") as sp:
+            temp_path = blob_store.put_fileobj(image.file)
+            sp.set(bytes=os.path.getsize(temp_path), content_type=image.content_type)
+        # 모델이 도는 동안에도 blob이 참조되도록 최근 문서 행을 먼저 기록
+        # (같은 이미지를 올린 다른 사용자가 그 사이 문서를 지워도 release가 파일을 지우지 않음)
+        add_recent_doc(user_id=user_id, doc_id=doc_id, path=temp_path)
         try:
-            start_classify = time.time()
-            doc_type = sessions[user_id].classify()
-            end_classify = time.time()
-            print(f"[DEBUG] ⏳ 문서분류 소요 시간: {round(end_classify - start_classify, 2)}초")
-            prompt_text = sessions[user_id].prompt_for(doc_type)
-            # 분류 로그 (pm2 stdout 수집)
-            print(f"📝 문서유형: {doc_type}")
-        except Exception as e:
-            print(f"[WARN] 문서 유형 분류 실패: user_id={user_id} doc_id={doc_id} error={e}")
-            doc_type = "기타"
-            prompt_text = sessions[user_id].prompt_for(doc_type)
-        
-        start_invoke = time.time()
-        initial_summary = sessions[user_id].invoke(prompt_text) # 유형별 프롬프트로 초기 요약 생성
-        end_invoke = time.time()
-        print(f"[DEBUG] ⏳ 요약 소요 시간: {round(end_invoke - start_invoke, 2)}초")
+            with tracing.span("session.init"):
+                sessions[user_id] = ImageChatRunnable(temp_path) # 세션 초기화
+            latest_doc_id_by_user[user_id] = doc_id
+            # 문서 유형 분류 및 유형별 프롬프트 선택
+            try:
+                with tracing.span("classify") as sp:
+                    doc_type = sessions[user_id].classify()
+                    sp.set(doc_type=doc_type)
+                prompt_text = sessions[user_id].prompt_for(doc_type)
+                # 분류 로그 (pm2 stdout 수집)
+                print(f"📝 문서유형: {doc_type} rid={tracing.request_id()}")
+            except Exception as e:
+                print(f"[WARN] 문서 유형 분류 실패: user_id={user_id} doc_id={doc_id} error={e}")
+                doc_type = "기타"
+                prompt_text = sessions[user_id].prompt_for(doc_type)
+
+            with tracing.span("summarize", doc_type=doc_type):
+                initial_summary = sessions[user_id].invoke(prompt_text) # 유형별 프롬프트로 초기 요약 생성
+        except Exception:
+            # 요약까지 못 갔으면 미리 넣은 최근 문서 행을 거둬 참조를 반납
+            try:
+                delete_recent_doc(user_id, doc_id)
+            except Exception as e:
+                print(f"[WARN] delete_recent_doc 실패: {e}")
+            raise
 
         append_message(user_id, doc_id, "assistant", initial_summary)
-        # 최근 문서 기록 저장 (RAG 비활성화 대체)
+        # 최근 문서 제목/유형 갱신 (RAG 비활성화 대체)
         try:
-            add_recent_doc(
+            update_recent_doc(
                 user_id=user_id,
                 doc_id=doc_id,
-                path=temp_path,
                 title=initial_summary[:60] if initial_summary else "문서",
                 doc_type=doc_type,
             )
         except Exception as e:
-            print(f"[WARN] add_recent_doc 실패: {e}")
+            print(f"[WARN] update_recent_doc 실패: {e}")
         # (RAG 제거) 임베딩 저장 로직 제거
 
         # 쿠키로 user_id 저장 (7일 유효). 이미 있더라도 갱신만 수행
@@ -127,30 +183,8 @@ async def ask_question(request: Request, user_id: str = Cookie(None)):
         doc_id = body.get("doc_id") or latest_doc_id_by_user.get(user_id)
 
         # 세션이 유실된 경우 DB에서 복구 시도
-        if user_id not in sessions:
-            # 1) doc_id+user_id로 복원 시도
-            restored = False
-            if user_id and doc_id:
-                doc = get_recent_doc(user_id=user_id, doc_id=doc_id) or get_recent_doc_by_doc_id(doc_id)
-                if doc and doc.get("path") and os.path.exists(doc["path"]):
-                    try:
-                        sessions[user_id] = ImageChatRunnable(doc["path"])  # 세션 복원
-                        latest_doc_id_by_user[user_id] = doc.get("doc_id", doc_id)
-                        restored = True
-                    except Exception as e:
-                        print(f"[WARN] 세션 복원 실패: user_id={user_id} doc_id={doc_id} error={e}")
-            # 2) user_id만 있고 doc_id 없으면 가장 최근 문서로 복원
-            if not restored and user_id and not doc_id:
-                doc = get_latest_doc_for_user(user_id)
-                if doc and doc.get("path") and os.path.exists(doc["path"]):
-                    try:
-                        sessions[user_id] = ImageChatRunnable(doc["path"])  # 세션 복원
-                        latest_doc_id_by_user[user_id] = doc.get("doc_id")
-                        restored = True
-                    except Exception as e:
-                        print(f"[WARN] 세션 복원(최근문서) 실패: user_id={user_id} error={e}")
-            if user_id not in sessions:
-                return {"error": "세션이 존재하지 않습니다. 먼저 /start_session 호출하세요."}
+        if not restore_session(user_id, doc_id):
+            return {"error": "세션이 존재하지 않습니다. 먼저 /start_session 호출하세요."}
 
         if not doc_id:
             return {"error": "대화 문서 식별자(doc_id)가 없습니다. 먼저 /start_session을 호출하세요."}
@@ -161,7 +195,8 @@ async def ask_question(request: Request, user_id: str = Cookie(None)):
         except Exception as e:
             print(f"[WARN] append_message(question) 실패: user_id={user_id} doc_id={doc_id} error={e}")
 
-        response_text = sessions[user_id].invoke(question)
+        with tracing.span("answer"):
+            response_text = sessions[user_id].invoke(question)
 
         try:
             append_message(user_id, doc_id, "assistant", response_text)
@@ -188,14 +223,6 @@ async def recent_docs(user_id: str = Cookie(None)):
     except Exception as e:
         return {"items": [], "error": str(e)}
 
-from fastapi.responses import FileResponse
-@router.get("/image")
-async def serve_image(path: str):
-    # 보안 주의: 실제 서비스에서는 사용자 스코프/화이트리스트 검증 필요
-    if not path or not os.path.exists(path):
-        return {"error": "이미지를 찾을 수 없습니다."}
-    return FileResponse(path)
-
 @router.post("/delete_doc")
 async def delete_doc(request: Request, user_id: str = Cookie(None)):
     if not user_id:
@@ -5,10 +5,13 @@ print("✅ 앱 시작")
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from langserve import add_routes
 from routes.stt_router import router as stt_router
 from routes.tts_router import router as tts_router
 from routes.feedback_router import router as feedback_router
+from routes.image_router import router as image_router
+from routes.voice_router import router as voice_router
+from routes.metrics_router import router as metrics_router
+from routes.admin_router import router as admin_router
 from langserve_app.session_router import router as session_router
 
 app = FastAPI()
@@ -16,7 +19,7 @@ app = FastAPI()
 # DB 테이블 보장 생성 (서버 시작 시 한 번)
 try:
     from db_config import Base, engine
-    from models import Conversation, RecentDoc  # noqa: F401
+    from models import Conversation, RecentDoc, Feedback, FeedbackJob  # noqa: F401
     Base.metadata.create_all(bind=engine)
     print("✅ DB 테이블 준비 완료")
 except Exception as e:
@@ -37,8 +40,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing"],
 )
 
+# 요청 단위 트레이싱 (X-Request-ID / Server-Timing 헤더, span은 data/traces에 OTLP/JSON으로 기록)
+from infrastructure.tracing import TracingMiddleware
+app.add_middleware(TracingMiddleware)
+
 # 정적 파일 서빙
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -47,6 +55,43 @@ app.include_router(stt_router)
 app.include_router(tts_router)
 app.include_router(session_router)
 app.include_router(feedback_router)
+app.include_router(image_router)
+app.include_router(voice_router)
+app.include_router(metrics_router)  # Prometheus /metrics
+app.include_router(admin_router)    # /api/admin/* (ADMIN_TOKEN)
+
+# 보존 작업(아카이브/고아 이미지 정리/VACUUM) 백그라운드 루프
+@app.on_event("startup")
+async def start_retention():
+    from data_store.retention import RETENTION_ENABLED, retention_loop
+    if RETENTION_ENABLED:
+        import asyncio
+        app.state.retention_task = asyncio.create_task(retention_loop())
+        print("✅ retention 루프 시작")
+
+# 👎 피드백 개선 작업 워커 (feedback_jobs 큐 소비)
+@app.on_event("startup")
+async def start_feedback_worker():
+    from infrastructure.feedback_worker import FEEDBACK_WORKER_ENABLED, worker_loop
+    if FEEDBACK_WORKER_ENABLED:
+        import asyncio
+        app.state.feedback_worker_task = asyncio.create_task(worker_loop())
+        print("✅ feedback 워커 시작")
+
+@app.on_event("shutdown")
+async def close_http_client():
+    from infrastructure import http_client
+    await http_client.aclose()
+
+@app.on_event("shutdown")
+def flush_traces():
+    from infrastructure import tracing
+    tracing.flush()
+
+@app.on_event("shutdown")
+def flush_datasets():
+    from data_store.datasets import close_all
+    close_all()
 
 @app.get("/")
 def read_root():
@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float
 from datetime import datetime
 from db_config import Base
 
@@ -37,3 +37,23 @@ class Feedback(Base):
     improved = Column(Text)
     note = Column(Text)
     ts = Column(DateTime, default=datetime.utcnow)
+
+# 👎 피드백 개선(OpenAI 재생성) 작업 큐. (doc_id, output) 해시로 중복 제거
+class FeedbackJob(Base):
+    __tablename__ = "feedback_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feedback_id = Column(Integer, index=True)
+    dedup_key = Column(String, unique=True, index=True)
+    user_id = Column(String)
+    doc_id = Column(String, index=True)
+    image_path = Column(Text)
+    prompt = Column(Text)
+    output = Column(Text)
+    status = Column(String, index=True, default="pending")  # pending | running | done | failed
+    attempts = Column(Integer, default=0)
+    next_run_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_error = Column(Text)
+    latency_s = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,58 @@
+# backend/routes/admin_router.py
+#
+# 운영용 관리자 API. X-Admin-Token 헤더가 ADMIN_TOKEN과 같아야 하며, ADMIN_TOKEN이 없으면 전부 403.
+#   POST   /api/admin/profile {"requests": 5, "torch": true, "interval_ms": 5}   다음 5번의 ask/classify 캡처
+#   GET    /api/admin/profile                                                  상태 + 최근 캡처 파일 목록
+#   DELETE /api/admin/profile                                                  남은 캡처 취소
+#   GET    /api/admin/profile/files/{name}                                     결과 파일 다운로드
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from config.settings import ADMIN_TOKEN
+from infrastructure import profiler
+
+CONTENT_TYPES = {".folded": "text/plain; charset=utf-8", ".json": "application/json"}
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="admin only")
+
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+class ProfileRequest(BaseModel):
+    requests: int = 5
+    torch: bool = True
+    interval_ms: float | None = None
+
+
+@router.post("/profile")
+def start_profile(req: ProfileRequest):
+    try:
+        return profiler.arm(req.requests, torch=req.torch, interval_ms=req.interval_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/profile")
+def profile_status():
+    return profiler.status()
+
+
+@router.delete("/profile")
+def stop_profile():
+    return profiler.disarm()
+
+
+@router.get("/profile/files/{name}")
+def profile_file(name: str):
+    path = (profiler.PROFILE_DIR / name).resolve()
+    if path.parent != profiler.PROFILE_DIR.resolve() or not path.is_file():
+        raise HTTPException(status_code=404, detail="not found")
+    return FileResponse(path, media_type=CONTENT_TYPES.get(path.suffix, "application/octet-stream"))
@@ -0,0 +1,158 @@
+# backend/routes/image_router.py
+#
+# 문서 이미지 서빙: 쿠키 user_id가 가진 문서만, 크기별 축소본(WebP/JPEG)은 첫 요청 때 만들어 디스크 캐시.
+# 강한 ETag + Cache-Control, If-None-Match(304), Range(FileResponse 기본 지원)를 처리한다.
+# /api/image/stats는 운영용이라 관리자 토큰(X-Admin-Token)이 필요하다.
+
+import hashlib
+import os
+import threading
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from data_store import blob_store
+from data_store.recent_docs import get_recent_doc, list_recent_docs
+from routes.admin_router import require_admin
+
+router = APIRouter(prefix="/api", tags=["Image"])
+
+# 허용 썸네일 크기 (요청 w는 가장 가까운 큰 값으로 올림 → 캐시 파일 수 제한)
+THUMB_SIZES = (160, 320, 640, 1280)
+# blob은 내용 주소라 바뀌지 않음. 사용자 스코프이므로 private
+CACHE_CONTROL_BLOB = "private, max-age=31536000, immutable"
+CACHE_CONTROL_LEGACY = "private, max-age=3600"
+
+_stats_lock = threading.Lock()
+IMAGE_STATS = {
+    "requests": 0,
+    "not_modified": 0,
+    "bytes_served": 0,
+    "derived_hits": 0,
+    "derived_misses": 0,
+}
+
+
+def _count(**kw):
+    with _stats_lock:
+        for k, v in kw.items():
+            IMAGE_STATS[k] += v
+
+
+# 원본은 업로드 바이트 그대로라 확장자(.jpg)와 실제 형식이 다를 수 있음 → 앞부분 매직 바이트로 판별
+_MAGIC = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+
+def _sniff_media_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(16)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    for magic, media_type in _MAGIC:
+        if head.startswith(magic):
+            return media_type
+    return "application/octet-stream"
+
+
+def _snap_size(w: int) -> int:
+    for s in THUMB_SIZES:
+        if w <= s:
+            return s
+    return THUMB_SIZES[-1]
+
+
+def _etag_for(path: str, variant: str) -> str:
+    digest = blob_store.digest_of(path)
+    if not digest:
+        # /tmp 레거시 파일: 경로+크기+mtime로 식별
+        st = os.stat(path)
+        digest = hashlib.sha256(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+    return f'"{digest[:32]}-{variant}"'
+
+
+def _if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [t.strip() for t in header.split(",")]
+
+
+def _resolve_owned_path(user_id: str | None, doc_id: str | None, path: str | None) -> str:
+    if not user_id:
+        raise HTTPException(status_code=401, detail="no user")
+    if doc_id:
+        doc = get_recent_doc(user_id=user_id, doc_id=doc_id)
+        if not doc or not doc.get("path"):
+            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+        return doc["path"]
+    if path:
+        # 구 클라이언트 호환(path=...): 본인 최근 문서 경로일 때만 허용
+        owned = {d["path"] for d in list_recent_docs(user_id=user_id, limit=1000)}
+        if path not in owned:
+            raise HTTPException(status_code=403, detail="forbidden")
+        return path
+    raise HTTPException(status_code=400, detail="doc_id 또는 path가 필요합니다.")
+
+
+@router.get("/image")
+async def serve_image(
+    request: Request,
+    doc_id: str | None = None,
+    path: str | None = None,
+    w: int | None = None,
+    fmt: str = "webp",
+    user_id: str = Cookie(None),
+):
+    src = await run_in_threadpool(_resolve_owned_path, user_id, doc_id, path)
+    if not os.path.exists(src):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+
+    if w:
+        size = _snap_size(w)
+        codec = "WEBP" if fmt.lower() == "webp" else "JPEG"
+        variant = f"{size}.{codec.lower()}"
+        media_type = "image/webp" if codec == "WEBP" else "image/jpeg"
+    else:
+        variant = "orig"
+        media_type = None  # 304가 아닐 때만 파일을 열어 판별
+
+    etag = _etag_for(src, variant)
+    cache_control = CACHE_CONTROL_BLOB if blob_store.is_blob(src) else CACHE_CONTROL_LEGACY
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Cookie"}
+
+    _count(requests=1)
+    if _if_none_match(request, etag):
+        _count(not_modified=1)
+        return Response(status_code=304, headers=headers)
+
+    if w:
+        existed = os.path.exists(blob_store.derivative_path(src, size, codec))
+        serve_path = await run_in_threadpool(blob_store.derivative, src, size, codec)
+        _count(**({"derived_hits": 1} if existed else {"derived_misses": 1}))
+    else:
+        serve_path = src
+        media_type = await run_in_threadpool(_sniff_media_type, src)
+
+    # Range 요청이면 실제 전송량은 더 작지만, 근사치로 파일 크기를 집계
+    _count(bytes_served=os.path.getsize(serve_path))
+    return FileResponse(serve_path, media_type=media_type, headers=headers)
+
+
+@router.get("/image/stats", dependencies=[Depends(require_admin)])
+async def image_stats():
+    with _stats_lock:
+        stats = dict(IMAGE_STATS)
+    lookups = stats["derived_hits"] + stats["derived_misses"]
+    stats["derived_hit_rate"] = round(stats["derived_hits"] / lookups, 4) if lookups else None
+    return stats
@@ -0,0 +1,78 @@
+# backend/routes/metrics_router.py
+#
+# Prometheus 스크레이프용 /metrics (prefix 없음: Prometheus 기본 경로).
+# 요청 경로 지표(게이트 대기, 모델 단계, DB, 외부 API)는 infrastructure.metrics가 span으로 채우고,
+# 여기서는 이미 모듈마다 세고 있는 캐시/워커 통계와 GPU 메모리를 스크레이프 시점에 읽어 노출한다.
+#   scrape_configs: - job_name: siseon-eum / static_configs: - targets: ["localhost:8000"]
+
+import sys
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from infrastructure import feedback_worker, metrics, openai_client, tracing, tts_cache
+from routes import image_router
+
+router = APIRouter(tags=["Metrics"])
+
+
+def _vision_store():
+    """비전 피처 저장소는 실제 모델 경로에서 한 번 만들어진 뒤에만 (여기서 모델/torch를 올리지 않음)"""
+    cs = sys.modules.get("langserve_app.conversation_session")
+    if cs is None or not cs._get_feature_store.cache_info().currsize:
+        return None
+    return cs._get_feature_store()
+
+
+def _cache_counts() -> dict[str, dict[str, float]]:
+    """캐시 이름 -> {결과: 횟수}. 결과는 hit/miss (+ tts는 진행 중인 미스에 합류한 coalesced)"""
+    with image_router._stats_lock:
+        image = dict(image_router.IMAGE_STATS)
+    tts = tts_cache.TTS_CACHE_STATS
+    out = {
+        "tts": {"hit": tts["hits"], "miss": tts["misses"], "coalesced": tts["coalesced"]},
+        "image_derived": {"hit": image["derived_hits"], "miss": image["derived_misses"]},
+        "openai_image": {"hit": openai_client.IMAGE_CACHE_STATS["hits"],
+                         "miss": openai_client.IMAGE_CACHE_STATS["misses"]},
+    }
+    store = _vision_store()
+    if store is not None:
+        out["vision_features"] = {"hit": store.stats["hits"], "miss": store.stats["misses"]}
+    return out
+
+
+def _cache_lookups():
+    return {(name, result): n for name, counts in _cache_counts().items() for result, n in counts.items()}
+
+
+def _cache_hit_ratio():
+    """디스크/메모리 캐시에서 바로 응답한 비율 (coalesced는 분모에만)"""
+    return {name: counts["hit"] / sum(counts.values())
+            for name, counts in _cache_counts().items() if sum(counts.values())}
+
+
+def _gpu_memory():
+    torch = sys.modules.get("torch")  # FAKE_MODEL 등 torch를 안 올린 프로세스에서는 노출 안 함
+    if torch is None or not torch.cuda.is_available():
+        return None
+    out = {}
+    for i in range(torch.cuda.device_count()):
+        out[(str(i), "allocated")] = torch.cuda.memory_allocated(i)
+        out[(str(i), "reserved")] = torch.cuda.memory_reserved(i)
+        out[(str(i), "max_allocated")] = torch.cuda.max_memory_allocated(i)
+    return out
+
+
+metrics.counter_fn("siseon_cache_lookups", "캐시 조회 수 (hit/miss/coalesced)", _cache_lookups, ["cache", "result"])
+metrics.gauge("siseon_cache_hit_ratio", "누적 캐시 적중률", _cache_hit_ratio, ["cache"])
+metrics.gauge("siseon_gpu_memory_bytes", "GPU 메모리 (torch 할당기 기준)", _gpu_memory, ["device", "kind"])
+metrics.counter_fn("siseon_feedback_jobs", "피드백 개선 작업 처리 결과", lambda: {
+    k: feedback_worker.WORKER_STATS[k] for k in ("succeeded", "retried", "failed")}, ["outcome"])
+metrics.gauge("siseon_feedback_jobs_in_flight", "실행 중인 피드백 개선 작업", lambda: feedback_worker.WORKER_STATS["in_flight"])
+metrics.counter_fn("siseon_trace_spans", "트레이스 span 내보내기 상태", lambda: {
+    k: tracing.TRACE_STATS[k] for k in ("exported", "dropped", "export_errors")}, ["state"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
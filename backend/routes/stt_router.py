@@ -1,25 +1,19 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from infrastructure.stt_client import speech_to_text
-import tempfile
+from infrastructure.audio_utils import AudioError
+from infrastructure.stt_client import speech_to_text_stream
 
 router = APIRouter(prefix="/api")
 
 @router.post("/stt")
 async def recognize_speech(file: UploadFile = File(...)):
     try:
-        # 1. bytes 읽기
-        audio_bytes = await file.read()
-        
-        # 2. 임시 파일 생성
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name  # 여기가 str 경로!
-
-        # 3. 경로로 STT 처리
-        result_text = speech_to_text(temp_audio_path)
-
+        # 업로드를 메모리로만 읽어(크기 제한) 바로 STT 처리. 디스크 임시 파일 없음
+        result_text, meta = await speech_to_text_stream(file)
+        print(f"[STT] {meta}")
         return result_text
 
+    except AudioError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
     except Exception as e:
         print("[🔥 STT ERROR]", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
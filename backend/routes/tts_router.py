@@ -1,18 +1,62 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from infrastructure.tts_client import text_to_speech
-from fastapi.responses import Response
+from infrastructure import tts_cache
+from infrastructure.tts_client import text_to_speech_file, DEFAULT_SPEAKER, DEFAULT_SPEED
+from infrastructure.tts_stream import stream_tts
+from fastapi.responses import FileResponse, StreamingResponse
+from routes.admin_router import require_admin
 
 router = APIRouter(prefix="/api")
 
 class TTSRequest(BaseModel):
     text: str
+    speaker: str = DEFAULT_SPEAKER
+    speed: str = DEFAULT_SPEED
 
 @router.post("/tts")
-def generate_tts(req: TTSRequest):
+async def generate_tts(req: TTSRequest):
     try:
-        audio_bytes = text_to_speech(req.text)
-        return Response(content=audio_bytes, media_type="audio/mpeg")
+        path, cache = await text_to_speech_file(req.text, req.speaker, req.speed)
+        return FileResponse(path, media_type="audio/mpeg", headers={"X-TTS-Cache": cache})
     except Exception as e:
         print("[❌ TTS 에러 발생]", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 캐시 파일의 /static URL만 반환 (브라우저가 직접 스트리밍/캐시)
+@router.post("/tts/url")
+async def generate_tts_url(req: TTSRequest):
+    try:
+        path, cache = await text_to_speech_file(req.text, req.speaker, req.speed)
+        # cache: "hit" / "miss" / "coalesced"(진행 중인 같은 합성에 합류)
+        return {"url": tts_cache.url_for(path), "cache": cache}
+    except Exception as e:
+        print("[❌ TTS 에러 발생]", str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 문장 단위로 합성해 앞 문장부터 바로 재생되도록 MP3 프레임을 이어서 스트리밍
+# <audio src>로 바로 재생할 수 있도록 GET(쿼리)도 허용
+@router.post("/tts/stream")
+async def generate_tts_stream(req: TTSRequest):
+    return _stream_response(req)
+
+@router.get("/tts/stream")
+async def generate_tts_stream_get(text: str, speaker: str = DEFAULT_SPEAKER, speed: str = DEFAULT_SPEED):
+    return _stream_response(TTSRequest(text=text, speaker=speaker, speed=speed))
+
+def _stream_response(req: TTSRequest) -> StreamingResponse:
+    async def body():
+        timings = {}
+        try:
+            async for chunk in stream_tts(req.text, req.speaker, req.speed, timings=timings):
+                yield chunk
+        except Exception as e:
+            # 헤더가 이미 나갔으므로 로그만 남기고 스트림 종료
+            print("[❌ TTS 스트림 에러]", str(e))
+        finally:
+            print(f"[TTS stream] {timings}")
+
+    return StreamingResponse(body(), media_type="audio/mpeg")
+
+@router.get("/tts/stats", dependencies=[Depends(require_admin)])
+async def tts_stats():
+    return tts_cache.stats()
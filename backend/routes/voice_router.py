@@ -0,0 +1,213 @@
+# backend/routes/voice_router.py
+#
+# 음성 질문 한 번에 처리: STT → (동시성 게이트) 질문 → 문장별 TTS.
+# 응답은 NDJSON 스트림으로 보내며, 디코딩 중 첫 문장이 완성되면 바로 TTS를 시작한다.
+#   {"type": "transcript", "text": ...}
+#   {"type": "delta", "text": ...}           모델 출력 조각
+#   {"type": "audio", "seq": 0, "format": "mp3", "data": <base64>}
+#   {"type": "answer", "text": ..., "doc_id": ...}
+#   {"type": "done", "timings": {...}}      단계별 소요 시간(초)
+#   {"type": "error", "detail": ...}
+
+import asyncio
+import base64
+import json
+import time
+
+from fastapi import APIRouter, Cookie, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from data_store.conversations import append_message
+from infrastructure import tracing
+from infrastructure.audio_utils import AudioError
+from infrastructure.stt_client import speech_to_text_stream
+from infrastructure.tts_client import text_to_speech, DEFAULT_FORMAT
+from infrastructure.tts_stream import TTS_STREAM_PARALLEL, pop_sentences
+from langserve_app.session_router import (
+    acquire_slot,
+    latest_doc_id_by_user,
+    release_slot,
+    restore_session,
+    sessions,
+)
+
+router = APIRouter(prefix="/api", tags=["Voice"])
+
+_DONE = object()
+
+
+def _line(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _Slot:
+    """acquire_slot으로 얻은 게이트 슬롯 1개. release는 몇 번 불려도 한 번만 반납"""
+
+    def __init__(self):
+        self.owned_by_body = False  # 스트림 본문이 시작되면 본문(과 그 뒤 drain)이 반납을 맡음
+        self._released = False
+
+    async def release(self):
+        if not self._released:
+            self._released = True
+            # 취소 중인 태스크(연결 끊김)에서 불려도 _q_count까지 확실히 되돌리도록
+            await asyncio.shield(release_slot())
+
+
+class _GatedStreamingResponse(StreamingResponse):
+    """응답이 어떻게 끝나든(첫 바이트 전 연결 끊김, 전송 오류 포함) 슬롯이 반납되도록 보장.
+    시작되지 않은 async generator는 finally가 돌지 않고, BackgroundTask는 예외로 끝나면 실행되지 않으므로
+    모델 생성 전이면 여기서 반납하고, 생성이 시작됐으면 본문을 닫아 본문의 finally에 맡긴다"""
+
+    def __init__(self, content, slot: _Slot, **kw):
+        super().__init__(content, **kw)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slot.owned_by_body:
+                await self.body_iterator.aclose()
+            else:
+                await self.slot.release()
+
+
+@router.post("/voice_ask")
+async def voice_ask(
+    file: UploadFile = File(...),
+    doc_id: str | None = Form(None),
+    user_id: str = Cookie(None),
+):
+    t0 = time.perf_counter()
+    timings = {}
+
+    # 1) STT (GPU 게이트 밖에서 처리)
+    try:
+        question, audio_meta = await speech_to_text_stream(file)
+    except AudioError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    except Exception as e:
+        print("[🔥 voice STT ERROR]", str(e))
+        raise HTTPException(status_code=502, detail=str(e))
+    timings["stt_s"] = round(time.perf_counter() - t0, 4)
+    question = (question or "").strip()
+    if not question:
+        raise HTTPException(status_code=422, detail="음성 인식 결과가 비어있습니다.")
+
+    # 2) 동시성 게이트 (큐가 가득 차면 429). 여기부터 응답 객체가 만들어질 때까지 실패하면 바로 반납
+    t_queue = time.perf_counter()
+    await acquire_slot()
+    slot = _Slot()
+    try:
+        timings["queue_wait_s"] = round(time.perf_counter() - t_queue, 4)
+        doc_id = doc_id or latest_doc_id_by_user.get(user_id)
+        ok = await asyncio.to_thread(restore_session, user_id, doc_id)
+        if not ok or not doc_id:
+            raise HTTPException(status_code=409, detail="세션이 존재하지 않습니다. 먼저 /start_session 호출하세요.")
+        session = sessions[user_id]
+    except BaseException:
+        await slot.release()
+        raise
+    loop = asyncio.get_running_loop()
+
+    async def body():
+        out: asyncio.Queue = asyncio.Queue()
+        tts_sema = asyncio.Semaphore(TTS_STREAM_PARALLEL)
+        tts_tasks: asyncio.Queue = asyncio.Queue()  # 문장 순서대로 쌓이는 TTS 작업
+
+        async def synth(sentence: str) -> bytes:
+            async with tts_sema:
+                return await text_to_speech(sentence)
+
+        def generate():
+            # 모델 스레드: 토큰 조각을 이벤트 루프 큐로 전달
+            try:
+                with tracing.span("answer"):
+                    for piece in session.invoke_stream(question):
+                        loop.call_soon_threadsafe(out.put_nowait, ("piece", piece))
+                loop.call_soon_threadsafe(out.put_nowait, ("gen_done", None))
+            except Exception as e:
+                loop.call_soon_threadsafe(out.put_nowait, ("gen_error", e))
+
+        async def emit_audio():
+            seq = 0
+            while True:
+                task = await tts_tasks.get()
+                if task is _DONE:
+                    break
+                try:
+                    audio = await task
+                except Exception as e:
+                    await out.put(("event", {"type": "error", "detail": f"TTS 실패: {e}"}))
+                    continue
+                if seq == 0:
+                    timings["tts_first_audio_s"] = round(time.perf_counter() - t0, 4)
+                await out.put(("event", {
+                    "type": "audio", "seq": seq, "format": DEFAULT_FORMAT,
+                    "data": base64.b64encode(audio).decode("ascii"),
+                }))
+                seq += 1
+            await out.put(("audio_done", None))
+
+        yield _line({"type": "transcript", "text": question, "audio": audio_meta})
+        try:
+            await asyncio.to_thread(append_message, user_id, doc_id, "user", question)
+        except Exception as e:
+            print(f"[WARN] append_message(question) 실패: user_id={user_id} doc_id={doc_id} error={e}")
+
+        t_gen = time.perf_counter()
+        slot.owned_by_body = True  # 모델 생성이 시작되면 반납 시점은 아래 finally가 결정
+        loop.run_in_executor(None, tracing.wrap(generate))  # 모델 스레드에서도 이 요청의 span 아래로 기록
+        audio_task = asyncio.create_task(emit_audio())
+        buffer, pieces = "", []
+        gen_running, audio_running = True, True
+        try:
+            while gen_running or audio_running:
+                kind, payload = await out.get()
+                if kind == "piece":
+                    if not pieces:
+                        timings["first_token_s"] = round(time.perf_counter() - t0, 4)
+                    pieces.append(payload)
+                    yield _line({"type": "delta", "text": payload})
+                    sentences, buffer = pop_sentences(buffer + payload)
+                    for s in sentences:
+                        tts_tasks.put_nowait(asyncio.create_task(synth(s)))
+                elif kind in ("gen_done", "gen_error"):
+                    gen_running = False
+                    timings["generate_s"] = round(time.perf_counter() - t_gen, 4)
+                    await slot.release()
+                    if kind == "gen_error":
+                        yield _line({"type": "error", "detail": f"답변 생성 실패: {payload}"})
+                    if buffer.strip():
+                        tts_tasks.put_nowait(asyncio.create_task(synth(buffer.strip())))
+                    tts_tasks.put_nowait(_DONE)
+                    answer = "".join(pieces)
+                    if kind == "gen_done":
+                        try:
+                            await asyncio.to_thread(append_message, user_id, doc_id, "assistant", answer)
+                        except Exception as e:
+                            print(f"[WARN] append_message(answer) 실패: user_id={user_id} doc_id={doc_id} error={e}")
+                        yield _line({"type": "answer", "text": answer, "doc_id": doc_id})
+                elif kind == "audio_done":
+                    audio_running = False
+                else:
+                    yield _line(payload)
+            timings["total_s"] = round(time.perf_counter() - t0, 4)
+            tracing.set_attrs(**{f"voice.{k}": v for k, v in timings.items()})
+            print(f"[voice_ask] rid={tracing.request_id()} {timings}")
+            yield _line({"type": "done", "timings": timings})
+        finally:
+            # 클라이언트가 끊겨도 게이트는 모델 생성이 끝난 뒤에만 반납 (GPU 점유 보호)
+            if gen_running:
+                async def _drain():
+                    while (await out.get())[0] not in ("gen_done", "gen_error"):
+                        pass
+                    await slot.release()
+                asyncio.create_task(_drain())
+            else:
+                await slot.release()
+            if not audio_task.done():
+                audio_task.cancel()
+
+    return _GatedStreamingResponse(body(), slot, media_type="application/x-ndjson")
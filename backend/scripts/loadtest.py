@@ -0,0 +1,359 @@
+# backend/scripts/loadtest.py
+#
+# 서비스 단위 부하 테스트.
+# main.app을 가짜 모델(FAKE_MODEL=1, langserve_app/fake_model.py)로 uvicorn에 띄우고,
+# 가상 사용자(VU)들이 실제 사용 흐름대로 /api/start_session → /api/ask, /api/conversation, /api/tts를 섞어 호출한다.
+# 동시 사용자 수는 단계(stage)별로 올리며, 단계마다 처리량 / 엔드포인트별 지연 백분위 / 429 비율 /
+# 서버 이벤트 루프 지연(lag)을 보고한다. DB/blob/TTS 캐시는 임시 디렉터리를 쓰고 Naver TTS는 로컬 스텁으로 대체.
+#
+# 실행 예 (backend 디렉터리에서):
+#   python scripts/loadtest.py                                   # 기본: 2→4→8명, 단계당 20초
+#   python scripts/loadtest.py --stages 4:30,16:30,64:30 --mix ask=0.5,conversation=0.3,tts=0.2
+#   MAX_CONCURRENCY=2 python scripts/loadtest.py --max_queue 8 --out loadtest.json
+#   FAKE_DECODE_TOK_SEC=0.01 python scripts/loadtest.py           # 가짜 모델 지연 조절 (fake_model.py 참고)
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+IMAGE_DIR = BACKEND_DIR.parent / "ai" / "data" / "img"
+QUESTIONS = [
+    "이거 언제까지 내야 돼?",
+    "금액이 얼마라고?",
+    "어디로 가면 돼?",
+    "무슨 내용인지 다시 쉽게 말해줘.",
+    "준비물이 뭐야?",
+]
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="시선이음 백엔드 부하 테스트 (가짜 모델)")
+    ap.add_argument("--stages", type=str, default="2:20,4:20,8:20",
+                    help="동시 사용자 수:지속 초 목록 (예: 4:30,16:30)")
+    ap.add_argument("--mix", type=str, default="ask=0.5,conversation=0.3,tts=0.15,start_session=0.05",
+                    help="세션 시작 후 각 사용자의 요청 비율")
+    ap.add_argument("--think", type=float, default=1.0, help="요청 사이 평균 대기(초, 지수분포)")
+    ap.add_argument("--max_concurrency", type=int, default=int(os.getenv("MAX_CONCURRENCY", "1")))
+    ap.add_argument("--max_queue", type=int, default=int(os.getenv("MAX_QUEUE", "200")))
+    ap.add_argument("--tts_latency", type=float, default=0.15, help="Naver TTS 스텁 응답 지연(초)")
+    ap.add_argument("--images", type=int, default=8, help="업로드에 쓸 샘플 이미지 수 (ai/data/img)")
+    ap.add_argument("--lag_interval", type=float, default=0.01, help="이벤트 루프 지연 측정 주기(초)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=str, default=None, help="결과 JSON 경로")
+    return ap.parse_args(argv)
+
+
+def parse_stages(spec: str) -> list[tuple[int, float]]:
+    out = []
+    for part in spec.split(","):
+        users, dur = part.split(":")
+        out.append((int(users), float(dur)))
+    return out
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        k, v = part.split("=")
+        mix[k.strip()] = float(v)
+    unknown = set(mix) - {"ask", "conversation", "tts", "start_session"}
+    if unknown:
+        raise ValueError(f"unknown endpoints in mix: {sorted(unknown)}")
+    return mix
+
+
+def percentile(xs, q: float) -> float | None:
+    if not xs:
+        return None
+    s = sorted(xs)
+    k = (len(s) - 1) * q / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def load_images(n: int) -> list[bytes]:
+    files = sorted(IMAGE_DIR.glob("*.jpg"))[:n]
+    if files:
+        return [p.read_bytes() for p in files]
+    # 샘플이 없으면 작은 합성 이미지
+    from io import BytesIO
+
+    from PIL import Image
+
+    out = []
+    for i in range(max(1, n)):
+        buf = BytesIO()
+        Image.new("RGB", (64, 64), (i * 30 % 256, 200, 200)).save(buf, "JPEG")
+        out.append(buf.getvalue())
+    return out
+
+
+# ------------------------------------------------------------
+# 서버: 별도 스레드의 이벤트 루프에서 uvicorn 실행 + 루프 지연 측정
+# ------------------------------------------------------------
+
+class AppServer:
+    def __init__(self, lag_interval: float):
+        self.lag_interval = lag_interval
+        self.lag = []  # (측정 시각, 지연 초)
+        self.loop = None
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        import uvicorn
+
+        from main import app  # 환경변수 설정 후에 import 해야 함
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            probe = self.loop.create_task(self._probe())
+            try:
+                self.loop.run_until_complete(self._server.serve(sockets=[sock]))
+            finally:
+                probe.cancel()
+                self.loop.run_until_complete(asyncio.gather(probe, return_exceptions=True))
+                self.loop.close()
+
+        self._thread = threading.Thread(target=run, name="loadtest-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("server did not start")
+            time.sleep(0.02)
+        return self
+
+    async def _probe(self):
+        # 잠든 시간보다 늦게 깨어난 만큼이 루프가 막혀 있던 시간
+        while True:
+            t = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            self.lag.append((time.monotonic(), time.perf_counter() - t - self.lag_interval))
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(30)
+
+
+# ------------------------------------------------------------
+# 가상 사용자
+# ------------------------------------------------------------
+
+class LoadRun:
+    def __init__(self, base_url: str, images: list[bytes], mix: dict[str, float], think: float, seed: int):
+        self.base_url = base_url
+        self.images = images
+        self.mix = mix
+        self.think = think
+        self.seed = seed
+        self.records = []   # (시작 monotonic, 엔드포인트, 상태코드, 지연초)
+        self.target = 0     # 현재 단계의 목표 동시 사용자 수
+
+    async def _call(self, client, endpoint: str, method: str, url: str, **kw):
+        t0 = time.monotonic()
+        try:
+            r = await client.request(method, url, **kw)
+            status = r.status_code
+        except httpx.HTTPError:
+            r, status = None, 0  # 연결 오류/타임아웃
+        self.records.append((t0, endpoint, status, time.monotonic() - t0))
+        return r
+
+    async def _start_session(self, client, rng, state):
+        img = self.images[rng.randrange(len(self.images))]
+        headers = {"Cookie": f"user_id={state['user_id']}"} if state.get("user_id") else {}
+        r = await self._call(client, "start_session", "POST", "/api/start_session",
+                             files={"image": ("doc.jpg", img, "image/jpeg")}, headers=headers)
+        if r is not None and r.status_code == 200:
+            # secure 쿠키는 http에서 자동 전송되지 않으므로 직접 보관
+            state["user_id"] = r.cookies.get("user_id") or state.get("user_id")
+            body = r.json()
+            state["doc_id"] = body.get("doc_id")
+            state["last_answer"] = body.get("answer") or ""
+            return True
+        return False
+
+    async def user(self, idx: int, client: httpx.AsyncClient):
+        rng = random.Random(self.seed * 100_003 + idx)
+        state = {}
+        endpoints, weights = zip(*self.mix.items())
+        while idx < self.target:
+            if not state.get("doc_id"):
+                if not await self._start_session(client, rng, state):
+                    await asyncio.sleep(rng.expovariate(1 / self.think) if self.think else 0)
+                    continue
+            await asyncio.sleep(rng.expovariate(1 / self.think) if self.think else 0)
+            if idx >= self.target:
+                break
+            ep = rng.choices(endpoints, weights)[0]
+            cookie = {"Cookie": f"user_id={state['user_id']}"}
+            if ep == "start_session":
+                await self._start_session(client, rng, state)
+            elif ep == "ask":
+                r = await self._call(client, "ask", "POST", "/api/ask", headers=cookie,
+                                     json={"question": rng.choice(QUESTIONS), "doc_id": state["doc_id"]})
+                if r is not None and r.status_code == 200:
+                    state["last_answer"] = r.json().get("answer") or state["last_answer"]
+            elif ep == "conversation":
+                await self._call(client, "conversation", "GET", "/api/conversation", headers=cookie,
+                                 params={"doc_id": state["doc_id"]})
+            elif ep == "tts":
+                text = (state.get("last_answer") or "안녕하세요.")[:200]
+                await self._call(client, "tts", "POST", "/api/tts", json={"text": text})
+
+    async def run(self, stages: list[tuple[int, float]]) -> list[dict]:
+        windows = []
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=300, limits=limits) as client:
+            tasks: dict[int, asyncio.Task] = {}
+            for users, dur in stages:
+                self.target = users
+                for i in range(users):
+                    if i not in tasks or tasks[i].done():
+                        tasks[i] = asyncio.create_task(self.user(i, client))
+                start = time.monotonic()
+                print(f"[loadtest] stage users={users} for {dur:.0f}s", flush=True)
+                await asyncio.sleep(dur)
+                windows.append((users, start, time.monotonic()))
+            self.target = 0
+            # 진행 중인 요청은 끝까지 기다림 (단계 구간 밖 기록은 집계에서 빠짐)
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return windows
+
+
+# ------------------------------------------------------------
+# 집계
+# ------------------------------------------------------------
+
+def _lat_summary(xs: list[float]) -> dict:
+    return {
+        "n": len(xs),
+        "p50": percentile(xs, 50),
+        "p90": percentile(xs, 90),
+        "p99": percentile(xs, 99),
+        "max": max(xs) if xs else None,
+    }
+
+
+def summarize(records, lag, windows) -> list[dict]:
+    stages = []
+    for users, start, end in windows:
+        recs = [r for r in records if start <= r[0] < end]
+        dur = end - start
+        by_ep = {}
+        for ep in sorted({r[1] for r in recs}):
+            ep_recs = [r for r in recs if r[1] == ep]
+            ok = [r[3] for r in ep_recs if r[2] == 200]
+            by_ep[ep] = {
+                "requests": len(ep_recs),
+                "ok": len(ok),
+                "rate_429": sum(r[2] == 429 for r in ep_recs) / len(ep_recs),
+                "errors": sum(r[2] not in (200, 429) for r in ep_recs),
+                "latency_s": _lat_summary(ok),
+            }
+        lags = [v for t, v in lag if start <= t < end]
+        stages.append({
+            "users": users,
+            "duration_s": round(dur, 3),
+            "requests": len(recs),
+            "throughput_rps": len(recs) / dur if dur else 0.0,
+            "ok_rps": sum(r[2] == 200 for r in recs) / dur if dur else 0.0,
+            "rate_429": (sum(r[2] == 429 for r in recs) / len(recs)) if recs else 0.0,
+            "endpoints": by_ep,
+            "loop_lag_s": _lat_summary(lags),
+        })
+    return stages
+
+
+def print_report(stages: list[dict]):
+    def ms(v):
+        return f"{v * 1000:8.0f}" if v is not None else f"{'-':>8}"
+
+    for s in stages:
+        lag = s["loop_lag_s"]
+        print(f"\n=== users={s['users']}  {s['throughput_rps']:.2f} req/s (ok {s['ok_rps']:.2f})  "
+              f"429 {s['rate_429']:.1%}  loop lag p50/p99/max {ms(lag['p50'])}/{ms(lag['p99'])}/{ms(lag['max'])} ms")
+        print(f"  {'endpoint':<14} {'req':>6} {'429':>6} {'err':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for ep, e in s["endpoints"].items():
+            lat = e["latency_s"]
+            print(f"  {ep:<14} {e['requests']:>6} {e['rate_429']:>6.1%} {e['errors']:>5} "
+                  f"{ms(lat['p50'])} {ms(lat['p90'])} {ms(lat['p99'])}")
+
+
+def configure_env(args, workdir: Path, tts_url: str):
+    """main import 전에 호출: 가짜 모델 + 임시 저장소 + 백그라운드 작업 끄기"""
+    os.environ.update({
+        "FAKE_MODEL": "1",
+        "DB_PATH": str(workdir / "loadtest.db"),
+        "BLOB_DIR": str(workdir / "blobs"),
+        "TTS_CACHE_DIR": str(workdir / "tts"),
+        "TRACE_DIR": str(workdir / "traces"),
+        "NAVER_TTS_URL": tts_url,
+        "MAX_CONCURRENCY": str(args.max_concurrency),
+        "MAX_QUEUE": str(args.max_queue),
+        "RETENTION_ENABLED": "0",
+        "FEEDBACK_WORKER_ENABLED": "0",
+    })
+
+
+def run(args) -> dict:
+    from scripts.stubs import NaverStub
+
+    stages = parse_stages(args.stages)
+    mix = parse_mix(args.mix)
+    os.chdir(BACKEND_DIR)  # main.py의 static 마운트가 상대 경로
+    with tempfile.TemporaryDirectory() as tmp, NaverStub(latency=args.tts_latency) as naver:
+        configure_env(args, Path(tmp), naver.tts_url)
+        server = AppServer(args.lag_interval).start()
+        try:
+            load = LoadRun(server.base_url, load_images(args.images), mix, args.think, args.seed)
+            windows = asyncio.run(load.run(stages))
+        finally:
+            server.stop()
+    report = {
+        "config": {
+            "stages": stages, "mix": mix, "think_s": args.think,
+            "max_concurrency": args.max_concurrency, "max_queue": args.max_queue,
+            "tts_latency_s": args.tts_latency,
+            "fake_model": {k: os.environ.get(k) for k in
+                           ("FAKE_VISION_SEC", "FAKE_PREFILL_SEC", "FAKE_PREFILL_PER_1K", "FAKE_DECODE_TOK_SEC")},
+        },
+        "stages": summarize(load.records, server.lag, windows),
+    }
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = Path(args.out).resolve() if args.out else None  # run()이 작업 디렉터리를 바꾸기 전에 고정
+    report = run(args)
+    print_report(report["stages"])
+    if out:
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n✅ 결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# backend/scripts/ref_logps.py
+#
+# DPO 기준(reference) 모델 log-prob 사전 계산 캐시.
+# 기준 모델(SFT 어댑터)은 학습 중 바뀌지 않으므로 (prompt, chosen, rejected)마다 한 번만 계산해
+# 데이터셋 옆에 ref_chosen_logps / ref_rejected_logps 컬럼으로 저장한다.
+#   {데이터셋 디렉터리}/.ref_logps/{키}/      datasets.save_to_disk 형식
+#   키 = sha256(어댑터 파일 + 베이스 모델 + 데이터 샤드 sha + 길이 설정)[:16]
+# DPO 학습은 이 컬럼을 읽으므로 두 번째 모델을 메모리에 올리거나 매 스텝 forward 하지 않는다.
+# 컬럼 이름은 TRL 버전에 따라 다르므로 계산/사용 전에 설치된 TRL 기준으로 확인한다.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # scripts
+from train_data import discover_shards  # noqa: E402
+
+REF_COLUMNS = ("ref_chosen_logps", "ref_rejected_logps")
+
+
+def adapter_hash(adapter_dir: str | os.PathLike) -> str:
+    """어댑터 가중치/설정 파일 내용 기준 해시 (재학습하면 바뀜)"""
+    d = Path(adapter_dir)
+    h = hashlib.sha256()
+    files = sorted(p for p in d.iterdir() if p.is_file() and p.name.startswith("adapter_"))
+    if not files:
+        raise FileNotFoundError(f"adapter files not found in {d}")
+    for p in files:
+        h.update(p.name.encode())
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(adapter_dir, base_model: str, source, **settings) -> str:
+    h = hashlib.sha256()
+    h.update(adapter_hash(adapter_dir).encode())
+    h.update(base_model.encode())
+    for _, sha in discover_shards(source):
+        h.update(sha.encode())
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def cache_dir(source, key: str) -> Path:
+    source = Path(source)
+    root = source if source.is_dir() else source.parent
+    return root / ".ref_logps" / key
+
+
+def load(source, key: str):
+    """캐시가 있으면 ref 컬럼이 붙은 datasets.Dataset, 없으면 None"""
+    path = cache_dir(source, key)
+    if not (path / "dataset_info.json").exists():
+        return None
+    from datasets import load_from_disk
+
+    ds = load_from_disk(str(path))
+    return ds if all(c in ds.column_names for c in REF_COLUMNS) else None
+
+
+def missing_columns(trl_source: str) -> list[str]:
+    """TRL DPOTrainer 소스에 없는 ref 컬럼 이름 (예전 버전은 reference_chosen_logps 등 다른 이름을 썼음)"""
+    return [c for c in REF_COLUMNS if f'"{c}"' not in trl_source]
+
+
+def check_trl_columns():
+    """설치된 TRL이 이 캐시의 컬럼 이름을 읽는지 확인. 다르면 캐시가 조용히 무시되고 ref forward가 돌게 됨"""
+    import inspect
+
+    import trl
+    from trl.trainer import dpo_trainer
+
+    missing = missing_columns(inspect.getsource(dpo_trainer))
+    if missing:
+        raise RuntimeError(f"installed TRL {trl.__version__} does not use reference columns {missing}")
+
+
+def use_precomputed(trainer):
+    """ref 컬럼이 이미 붙은 데이터셋으로 만든 DPOTrainer(precompute_ref_log_probs=True, ref_model=None)에
+    계산이 끝났다고 표시해 get_train_dataloader에서 다시 계산하지 않게 한다"""
+    if not hasattr(trainer, "_precomputed_train_ref_log_probs"):
+        raise RuntimeError("installed TRL has no precomputed reference log-prob state")
+    missing = [c for c in REF_COLUMNS if c not in trainer.train_dataset.column_names]
+    if missing:
+        raise RuntimeError(f"reference columns lost during dataset preparation: {missing}")
+    trainer._precomputed_train_ref_log_probs = True
+    return trainer
+
+
+def compute(ds, tok, model, args, ref_adapter_name: str | None = None):
+    """TRL의 precompute 경로로 ref log-prob을 계산 (토큰화/잘라내기 규칙이 학습과 동일해야 하므로).
+    ref_model=None + precompute_ref_log_probs=True로 모델은 한 개만 올린다.
+    model이 PEFT면 TRL은 ref 계산 때 어댑터를 끄므로(=베이스 모델), 기준 어댑터 이름을 ref_adapter_name으로 받는다."""
+    if hasattr(model, "peft_config") and not ref_adapter_name:
+        raise ValueError("PEFT model needs ref_adapter_name, otherwise TRL computes base-model log-probs")
+    from dataclasses import replace
+
+    from trl import DPOTrainer
+
+    check_trl_columns()
+    args = replace(
+        args, precompute_ref_log_probs=True,
+        ref_adapter_name=ref_adapter_name, model_adapter_name=ref_adapter_name,
+    )
+    trainer = DPOTrainer(
+        model=model,
+        ref_model=None,
+        args=args,
+        train_dataset=ds,
+        tokenizer=tok,
+    )
+    trainer.get_train_dataloader()  # 여기서 ref_chosen_logps / ref_rejected_logps 컬럼이 추가됨
+    out = trainer.train_dataset
+    missing = [c for c in REF_COLUMNS if c not in out.column_names]
+    if missing:
+        raise RuntimeError(f"TRL did not add reference columns: {missing}")
+    if len(out) != len(ds):
+        raise RuntimeError(f"row count changed during precompute: {len(ds)} -> {len(out)}")
+    # 토큰화 전 원본 행에 컬럼만 붙여 저장 (학습 시 TRL이 평소대로 토큰화, 순서는 비셔플 dataloader 기준)
+    for c in REF_COLUMNS:
+        ds = ds.add_column(c, out[c])
+    return ds
+
+
+def save(ds, source, key: str, meta: dict | None = None) -> Path:
+    path = cache_dir(source, key)
+    tmp = path.with_name(path.name + ".part")
+    shutil.rmtree(tmp, ignore_errors=True)
+    ds.save_to_disk(str(tmp))
+    with open(tmp / "ref_meta.json", "w", encoding="utf-8") as f:
+        json.dump({"key": key, "rows": len(ds), **(meta or {})}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,142 @@
+# backend/scripts/stubs.py
+#
+# 외부 API를 흉내 내는 로컬 스텁 서버 (부하 측정 스크립트/테스트 공용).
+# NaverStub: Naver STT/TTS
+#   POST /recog/v1/stt       → {"text": "stub:<바이트 수>"}
+#   POST /tts-premium/v1/tts → b"ID3" + 텍스트 UTF-8 바이트 (mp3 흉내)
+#   fail_first=N 이면 처음 N개 요청은 503
+# OpenAIStub: OpenAI chat.completions (피드백 워커 오프라인 테스트용)
+#   POST /v1/chat/completions → {"choices": [{"message": {"content": "개선:<지시 앞부분>"}}], ...}
+#   fail_first=N 이면 처음 N개 요청은 429
+# fail_first로 재시도 경로를, latency로 느린 응답을 확인할 수 있다.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class NaverStub:
+    def __init__(self, fail_first: int = 0, latency: float = 0.0):
+        self.fail_first = fail_first
+        self.latency = latency
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests.append((self.path, body))
+                    n = len(stub.requests)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if n <= stub.fail_first:
+                    return self._send(503, b"busy", "text/plain")
+                if self.path.startswith("/recog/v1/stt"):
+                    payload = json.dumps({"text": f"stub:{len(body)}"}).encode()
+                    return self._send(200, payload, "application/json")
+                if self.path.startswith("/tts-premium/v1/tts"):
+                    text = parse_qs(body.decode()).get("text", [""])[0]
+                    return self._send(200, b"ID3" + text.encode("utf-8"), "audio/mpeg")
+                return self._send(404, b"not found", "text/plain")
+
+            def _send(self, status, payload, ctype):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def stt_url(self) -> str:
+        return f"{self.base_url}/recog/v1/stt"
+
+    @property
+    def tts_url(self) -> str:
+        return f"{self.base_url}/tts-premium/v1/tts"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class OpenAIStub:
+    def __init__(self, fail_first: int = 0, latency: float = 0.0):
+        self.fail_first = fail_first
+        self.latency = latency
+        self.requests = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.requests.append(body)
+                    n = len(stub.requests)
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if n <= stub.fail_first:
+                        return self._send(429, {"error": {"message": "rate limited"}})
+                    user = body["messages"][-1]["content"]
+                    text = user[0]["text"] if isinstance(user, list) else user
+                    prompt = text.split("[지시]\n", 1)[-1]
+                    return self._send(200, {
+                        "id": f"chatcmpl-stub-{n}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": f"개선:{prompt[:20]}"},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                    })
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+            def _send(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
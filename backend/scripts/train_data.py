@@ -0,0 +1,446 @@
+# backend/scripts/train_data.py
+#
+# 학습용 스트리밍 데이터 로더 (SFT).
+# - 피드백 적재기(data_store.datasets)가 회전시킨 샤드를 샤드 단위로 지연 읽기
+# - 샤드는 처음 접근할 때 토큰화(여러 프로세스로 백그라운드 미리 토큰화 가능)하고 결과를 캐시
+#     {cache_dir}/{tokenizer 해시}_{max_length}/{샤드 sha}.tokens.npy / .offsets.npy
+#   같은 토크나이저/길이로 다시 돌리면 토큰화 없이 mmap으로 바로 읽는다
+# - 길이가 비슷한 예시끼리 묶는 샘플러, 여러 예시를 max_length로 채우는 packing + 경계 인식 collator
+# torch/transformers 없이도 import 되도록 numpy만 사용한다 (토크나이저는 호출 가능한 객체면 됨).
+
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend
+from data_store.datasets import iter_shard, list_shards  # noqa: E402
+
+FORMAT_VERSION = 2  # sft_text 형식/캐시 규칙이 바뀌면 올려서 캐시 무효화 (2: 빈 예시도 유지)
+
+
+def sft_text(ex: dict) -> str:
+    # 피드백 적재기는 instruction, 예전 학습 파일은 prompt 키를 사용
+    prompt = ex.get("prompt") or ex.get("instruction") or ""
+    return prompt + "\n\n" + (ex.get("output") or "")
+
+
+def tokenizer_hash(tok) -> str:
+    """토크나이저 내용(어휘/규칙/특수 토큰) 기준 해시. 경로가 같아도 내용이 바뀌면 캐시 분리"""
+    h = hashlib.sha256(type(tok).__name__.encode())
+    backend = getattr(tok, "backend_tokenizer", None)
+    if backend is not None and hasattr(backend, "to_str"):
+        h.update(backend.to_str().encode("utf-8"))
+    elif hasattr(tok, "get_vocab"):
+        h.update(json.dumps(sorted(tok.get_vocab().items()), ensure_ascii=False).encode("utf-8"))
+    else:
+        h.update(repr(getattr(tok, "name_or_path", tok)).encode("utf-8"))
+    special = getattr(tok, "special_tokens_map", None)
+    if special:
+        h.update(json.dumps(special, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _file_sha(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def discover_shards(source: str | os.PathLike) -> list[tuple[Path, str]]:
+    """(샤드 경로, 내용 sha) 목록. 디렉터리면 manifest 순서 + 활성 파일, 파일이면 그 파일 하나"""
+    source = Path(source)
+    if source.is_file():
+        return [(source, _file_sha(source))]
+    out = []
+    manifest_path = source / "manifest.json"
+    shas = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        shas = {str(source / s["file"]): s.get("sha256") for s in manifest["shards"]}
+    for p in list_shards(source):
+        out.append((p, shas.get(str(p)) or _file_sha(p)))
+    for p in sorted(source.glob("*.jsonl")):
+        if p.stat().st_size:
+            out.append((p, _file_sha(p)))
+    return out
+
+
+def _save_npy(path: Path, arr: np.ndarray):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".incoming-", suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _count_rows(shard: str | os.PathLike) -> int:
+    """토큰화 없이 샤드의 예시 수만 셈 (iter_shard와 같은 기준)"""
+    return sum(1 for _ in iter_shard(shard))
+
+
+def _tokenize_shard(shard: str, out_prefix: str, tok, max_length: int, text_fn, limit: int | None = None) -> int:
+    """샤드 하나를 토큰화해서 평탄화된 토큰 + 오프셋 배열로 저장. 예시 수 반환.
+    limit: 샤드를 찾을 때 센 예시 수. 활성 파일이 그 사이 늘어나도 길이가 어긋나지 않게 거기서 멈춘다"""
+    ids, offsets = [], [0]
+    for n, ex in enumerate(iter_shard(shard)):
+        if limit is not None and n >= limit:
+            break
+        # 빈 결과도 그대로 둔다: 예시 수가 _count_rows와 같아야 토큰화 전에 len()을 알 수 있음
+        ids.extend(tok(text_fn(ex), truncation=True, max_length=max_length)["input_ids"])
+        offsets.append(len(ids))
+    out_prefix = Path(out_prefix)
+    # offsets를 나중에 써서, offsets가 있으면 tokens도 완성된 상태가 되도록
+    _save_npy(out_prefix.with_suffix(".tokens.npy"), np.asarray(ids, dtype=np.int32))
+    _save_npy(out_prefix.with_suffix(".offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    return len(offsets) - 1
+
+
+class TokenizedShards:
+    """샤드별 토큰 캐시를 이어 붙인 map-style 데이터셋 (mmap이라 전체를 메모리에 올리지 않음).
+    생성 시에는 샤드 목록과 예시 수만 구하고, 각 샤드는 처음 접근할 때 캐시를 읽거나 토큰화한다.
+    num_workers > 1이면 캐시 없는 샤드를 백그라운드 프로세스에서 미리 토큰화해 둔다.
+    lengths(길이 그룹/packing용)는 모든 샤드가 필요하므로 처음 읽을 때 전부 준비된다."""
+
+    def __init__(
+        self,
+        source: str | os.PathLike,
+        tok,
+        max_length: int = 2048,
+        cache_dir: str | os.PathLike | None = None,
+        num_workers: int = 1,
+        text_fn=sft_text,
+    ):
+        self.source = Path(source)
+        self.max_length = max_length
+        root = Path(cache_dir) if cache_dir else (self.source if self.source.is_dir() else self.source.parent) / ".tokenized"
+        self.cache_dir = root / f"{tokenizer_hash(tok)}_{max_length}_v{FORMAT_VERSION}"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._tok, self._text_fn = tok, text_fn
+
+        shards = discover_shards(self.source)
+        self._paths = [str(p) for p, _ in shards]
+        self._prefixes = [self.cache_dir / sha[:32] for _, sha in shards]
+        self._loaded: list[tuple | None] = [None] * len(shards)
+        self._locks = [threading.Lock() for _ in shards]
+        self._futures = {}
+        self._lengths = None
+
+        counts, todo = [], []
+        for k, pre in enumerate(self._prefixes):
+            off = pre.with_suffix(".offsets.npy")
+            if off.exists():
+                counts.append(len(np.load(off, mmap_mode="r")) - 1)
+            else:
+                counts.append(_count_rows(self._paths[k]))
+                todo.append(k)
+        self._counts = counts
+        self._starts = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64)
+        # tokenized는 이 객체가 토큰화해서 열어 본 샤드 수 (접근할수록 늘어남)
+        self.stats = {"shards": len(shards), "cached": len(shards) - len(todo), "tokenized": 0}
+
+        if todo and num_workers > 1:
+            pool = ProcessPoolExecutor(max_workers=min(num_workers, len(todo)))
+            for k in todo:
+                self._futures[k] = pool.submit(
+                    _tokenize_shard, self._paths[k], str(self._prefixes[k]), tok, max_length, text_fn, counts[k])
+            pool.shutdown(wait=False)  # 제출한 작업은 계속 돌고, 접근한 샤드만 그 결과를 기다림
+
+    def __getstate__(self):
+        # DataLoader 워커로 넘길 때: 잠금/미리 토큰화 작업/mmap은 빼고 (워커는 캐시를 다시 열거나 직접 토큰화)
+        state = dict(self.__dict__)
+        state.update(_locks=None, _futures={}, _loaded=[None] * len(self._paths))
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._locks = [threading.Lock() for _ in self._paths]
+
+    def _shard(self, k: int) -> tuple:
+        """k번째 샤드의 (tokens mmap, offsets). 처음이면 캐시를 읽거나 토큰화"""
+        loaded = self._loaded[k]
+        if loaded is not None:
+            return loaded
+        with self._locks[k]:
+            if self._loaded[k] is None:
+                pre = self._prefixes[k]
+                fut = self._futures.pop(k, None)
+                if fut is not None:
+                    fut.result()
+                    self.stats["tokenized"] += 1
+                elif not pre.with_suffix(".offsets.npy").exists():
+                    _tokenize_shard(self._paths[k], str(pre), self._tok, self.max_length, self._text_fn, self._counts[k])
+                    self.stats["tokenized"] += 1
+                tokens = np.load(pre.with_suffix(".tokens.npy"), mmap_mode="r")
+                offsets = np.load(pre.with_suffix(".offsets.npy"))
+                if len(offsets) - 1 != self._counts[k]:
+                    raise RuntimeError(f"토큰 캐시 예시 수 불일치: {pre} ({len(offsets) - 1} != {self._counts[k]})")
+                self._loaded[k] = (tokens, offsets)
+            return self._loaded[k]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        if self._lengths is None:
+            parts = [np.diff(self._shard(k)[1]) for k in range(len(self._paths))]
+            self._lengths = np.concatenate(parts) if parts else np.zeros(0, np.int64)
+        return self._lengths
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def token_ids(self, i: int) -> np.ndarray:
+        if i < 0:
+            i += len(self)
+        s = int(np.searchsorted(self._starts, i, side="right")) - 1
+        j = i - int(self._starts[s])
+        tokens, off = self._shard(s)
+        return np.asarray(tokens[off[j]:off[j + 1]])
+
+    def __getitem__(self, i: int) -> dict:
+        ids = self.token_ids(i).tolist()
+        return {"input_ids": ids, "labels": list(ids)}
+
+
+def length_grouped_indices(lengths, batch_size: int, mega_batches: int = 50, seed: int = 0) -> list[int]:
+    """무작위로 섞은 뒤 (batch_size * mega_batches) 묶음 안에서만 길이순 정렬 → 배치 안 길이가 비슷해져 padding 감소"""
+    rng = random.Random(seed)
+    idx = list(range(len(lengths)))
+    rng.shuffle(idx)
+    mega = batch_size * mega_batches
+    batches = []
+    for k in range(0, len(idx), mega):
+        chunk = sorted(idx[k:k + mega], key=lambda i: -int(lengths[i]))
+        batches.extend(chunk[b:b + batch_size] for b in range(0, len(chunk), batch_size))
+    # 가장 긴 배치를 맨 앞에 두어 OOM을 첫 스텝에서 드러낸다
+    longest = max(range(len(batches)), key=lambda b: int(lengths[batches[b][0]]), default=0)
+    if batches:
+        first = batches.pop(longest)
+        rng.shuffle(batches)
+        batches.insert(0, first)
+    return [i for b in batches for i in b]
+
+
+class LengthGroupedSampler:
+    """Trainer/DataLoader용 인덱스 샘플러 (epoch마다 seed를 바꿔 다시 섞음)"""
+
+    def __init__(self, lengths, batch_size: int, seed: int = 0):
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __iter__(self):
+        return iter(length_grouped_indices(self.lengths, self.batch_size, seed=self.seed + self.epoch))
+
+
+def pack_bins(lengths, max_length: int) -> list[list[int]]:
+    """길이 내림차순 first-fit으로 예시들을 max_length 이하 묶음으로 채움"""
+    order = sorted(range(len(lengths)), key=lambda i: -int(lengths[i]))
+    bins, space = [], []
+    for i in order:
+        n = int(lengths[i])
+        for b, free in enumerate(space):
+            if n <= free:
+                bins[b].append(i)
+                space[b] -= n
+                break
+        else:
+            bins.append([i])
+            space.append(max_length - n)
+    return bins
+
+
+class PackedDataset:
+    """pack_bins 결과대로 예시를 이어 붙인 데이터셋. seq_lens로 예시 경계를 함께 넘긴다"""
+
+    def __init__(self, base: TokenizedShards, max_length: int | None = None, seed: int = 0):
+        self.base = base
+        self.max_length = max_length or base.max_length
+        self.bins = pack_bins(base.lengths, self.max_length)
+        random.Random(seed).shuffle(self.bins)
+
+    def __len__(self) -> int:
+        return len(self.bins)
+
+    def __getitem__(self, i: int) -> dict:
+        parts = [self.base.token_ids(j) for j in self.bins[i]]
+        ids = np.concatenate(parts).tolist()
+        return {"input_ids": ids, "labels": list(ids), "seq_lens": [len(p) for p in parts]}
+
+
+class PackingCollator:
+    """PackedDataset 배치를 모델 입력으로 변환. 묶인 예시끼리는 서로 보지 못하게 한다.
+    - position_ids: 예시마다 0부터 다시 시작
+    - labels: padding과 각 예시의 첫 토큰(이전 예시 마지막 토큰에서 예측되는 위치)은 -100
+    - mask="4d": (B, 1, L, L) 블록 대각 causal 마스크 (eager/sdpa)
+      mask="flash": 배치를 한 줄로 이어 붙이고 position_ids만 넘김 (flash_attention_2가 경계로 varlen 처리)
+    torch가 있으면 텐서로, 없으면 numpy 배열로 반환한다."""
+
+    def __init__(self, pad_token_id: int = 0, mask: str = "4d", label_pad: int = -100, dtype=None):
+        assert mask in ("4d", "flash")
+        self.pad_token_id = pad_token_id
+        self.mask = mask
+        self.label_pad = label_pad
+        self.dtype = dtype  # 4d 마스크를 더하기형(0 / -inf)으로 만들 dtype (torch 사용 시)
+
+    def __call__(self, features: list[dict]) -> dict:
+        if self.mask == "flash":
+            features = [{
+                "input_ids": [t for f in features for t in f["input_ids"]],
+                "seq_lens": [n for f in features for n in f["seq_lens"]],
+            }]
+        bsz = len(features)
+        width = max(len(f["input_ids"]) for f in features)
+        input_ids = np.full((bsz, width), self.pad_token_id, dtype=np.int64)
+        labels = np.full((bsz, width), self.label_pad, dtype=np.int64)
+        position_ids = np.zeros((bsz, width), dtype=np.int64)
+        segments = np.full((bsz, width), -1, dtype=np.int64)  # 예시 번호 (-1 = padding)
+        for b, f in enumerate(features):
+            ids = f["input_ids"]
+            input_ids[b, :len(ids)] = ids
+            labels[b, :len(ids)] = ids
+            start = 0
+            for k, n in enumerate(f["seq_lens"]):
+                position_ids[b, start:start + n] = np.arange(n)
+                segments[b, start:start + n] = k
+                labels[b, start] = self.label_pad
+                start += n
+        out = {"input_ids": input_ids, "labels": labels, "position_ids": position_ids}
+        if self.mask == "4d":
+            same = (segments[:, :, None] == segments[:, None, :]) & (segments[:, :, None] >= 0)
+            causal = np.tril(np.ones((width, width), dtype=bool))
+            allowed = same & causal
+            # padding 행도 자기 자신은 보게 해서 softmax NaN 방지
+            idx = np.arange(width)
+            allowed[:, idx, idx] = True
+            out["attention_mask"] = allowed[:, None, :, :]
+        return _to_tensors(out, self.dtype)
+
+
+class ThroughputMeter:
+    """collator를 감싸 실제 토큰 수 / 슬롯 수(padding 포함)를 세고 tokens/sec·padding 비율을 보고"""
+
+    def __init__(self, collate):
+        self.collate = collate
+        self.real = 0
+        self.slots = 0
+        self.t0 = time.perf_counter()
+
+    def __call__(self, features: list[dict]) -> dict:
+        out = self.collate(features)
+        bsz, width = tuple(out["input_ids"].shape)
+        self.real += sum(len(f["input_ids"]) for f in features)
+        self.slots += bsz * width
+        return out
+
+    def report(self) -> dict:
+        dt = max(1e-9, time.perf_counter() - self.t0)
+        return {
+            "tokens": self.real,
+            "tokens_per_sec": round(self.real / dt, 1),
+            "padding_ratio": round(1 - self.real / self.slots, 4) if self.slots else 0.0,
+        }
+
+
+def _to_tensors(batch: dict, dtype=None) -> dict:
+    try:
+        import torch
+    except Exception:
+        return batch
+    out = {}
+    for k, v in batch.items():
+        t = torch.from_numpy(v)
+        if k == "attention_mask" and t.dim() == 4:
+            # HF 모델은 4D 마스크를 이미 반전된 더하기형으로 받는다
+            dtype = dtype or torch.float32
+            t = torch.zeros(t.shape, dtype=dtype).masked_fill(~t, torch.finfo(dtype).min)
+        out[k] = t
+    return out
+
+
+def padding_ratio(lengths, batches: list[list[int]]) -> float:
+    """배치마다 가장 긴 길이로 맞출 때 padding 토큰 비율"""
+    real = padded = 0
+    for b in batches:
+        ls = [int(lengths[i]) for i in b]
+        real += sum(ls)
+        padded += max(ls) * len(ls)
+    return 1 - real / padded if padded else 0.0
+
+
+def collation_report(ds: TokenizedShards, batch_size: int, max_length: int | None = None) -> dict:
+    """현재 방식(순서대로 batch_size개 + 최장 길이 padding) vs 길이 그룹 vs packing의
+    padding 비율과 스텝당 실제 토큰 수 비교 (학습 전 빠른 확인용)"""
+    lengths = ds.lengths
+    n = len(lengths)
+    max_length = max_length or ds.max_length
+    plain = [list(range(k, min(k + batch_size, n))) for k in range(0, n, batch_size)]
+    order = length_grouped_indices(lengths, batch_size)
+    grouped = [order[k:k + batch_size] for k in range(0, n, batch_size)]
+    bins = pack_bins(lengths, max_length)
+    pack_lens = [sum(int(lengths[i]) for i in b) for b in bins]
+    packed = [list(range(k, min(k + batch_size, len(bins)))) for k in range(0, len(bins), batch_size)]
+    total = int(np.sum(lengths))
+
+    def row(batches, lens):
+        return {
+            "steps": len(batches),
+            "padding_ratio": round(padding_ratio(lens, batches), 4),
+            "real_tokens_per_step": round(total / max(1, len(batches)), 1),
+        }
+
+    return {
+        "examples": n,
+        "tokens": total,
+        "plain": row(plain, lengths),
+        "grouped": row(grouped, lengths),
+        "packed": row(packed, pack_lens),
+    }
+
+
+def iter_pairs(source: str | os.PathLike):
+    """DPO (prompt, chosen, rejected) 행 스트리밍. 디렉터리면 샤드 → 활성 파일 순서"""
+    for path, _ in discover_shards(source):
+        for ex in iter_shard(path):
+            if ex.get("chosen") and ex.get("rejected"):
+                yield {"prompt": ex.get("prompt") or "", "chosen": ex["chosen"], "rejected": ex["rejected"]}
+
+
+if __name__ == "__main__":
+    # python scripts/train_data.py --source data/sft_train --tokenizer Qwen/Qwen2.5-7B-Instruct
+    import argparse
+
+    ap = argparse.ArgumentParser(description="토큰 캐시 생성 + padding/packing 비교 리포트")
+    ap.add_argument("--source", required=True)
+    ap.add_argument("--tokenizer", required=True)
+    ap.add_argument("--max-length", type=int, default=2048)
+    ap.add_argument("--batch-size", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    ap.add_argument("--cache-dir")
+    a = ap.parse_args()
+
+    from transformers import AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(a.tokenizer, use_fast=True)
+    ds = TokenizedShards(a.source, tok, a.max_length, a.cache_dir, a.workers)
+    print(json.dumps({"cache": str(ds.cache_dir), **ds.stats, **collation_report(ds, a.batch_size, a.max_length)},
+                     ensure_ascii=False, indent=2))
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 import torch
 
@@ -19,6 +20,22 @@ OUT_DPO = ROOT / "outputs" / "dpo" / "policy"
 SFT_JSONL = DATA_DIR / "sft.jsonl"
 DPO_JSONL = DATA_DIR / "dpo.jsonl"
 
+# 스트리밍 모드: 피드백 적재기의 회전 샤드 디렉터리(또는 jsonl 파일)를 샤드 단위로 읽고
+# 토큰화 결과를 (토크나이저 해시, max_length) 캐시에 저장해 재사용한다
+STREAMING = os.getenv("STREAMING", "0") == "1"
+SFT_SOURCE = Path(os.getenv("SFT_SOURCE", ROOT / "data" / "sft_train"))
+DPO_SOURCE = Path(os.getenv("DPO_SOURCE", ROOT / "data" / "dpo_train"))
+TOKENIZE_WORKERS = int(os.getenv("TOKENIZE_WORKERS", str(min(8, os.cpu_count() or 1))))
+TOKENIZED_CACHE_DIR = os.getenv("TOKENIZED_CACHE_DIR")  # 없으면 소스 옆 .tokenized/
+GROUP_BY_LENGTH = os.getenv("GROUP_BY_LENGTH", "1") == "1"
+PACKING = os.getenv("PACKING", "0") == "1"  # 여러 예시를 MAX_LENGTH로 이어 붙임 (STREAMING 전용)
+ATTN_IMPL = os.getenv("ATTN_IMPL", "sdpa")  # flash_attention_2면 packing 경계를 position_ids로 처리
+# DPO 기준 log-prob을 SFT 어댑터 해시 기준으로 미리 계산/캐시 (0이면 기존처럼 학습 중 ref 모델 forward)
+PRECOMPUTE_REF = os.getenv("PRECOMPUTE_REF", "1") == "1"
+MAX_LENGTH = 2048
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
 # 4bit QLoRA (L4에 적합)
 bnb = BitsAndBytesConfig(
     load_in_4bit=True,
@@ -39,19 +56,35 @@ def train_sft():
     tok.pad_token = tok.eos_token
 
     model = AutoModelForCausalLM.from_pretrained(
-        BASE_MODEL, quantization_config=bnb, device_map="auto"
+        BASE_MODEL, quantization_config=bnb, device_map="auto",
+        attn_implementation=ATTN_IMPL,
     )
     model = get_peft_model(model, LORA_CFG)
 
-    ds = load_dataset("json", data_files=str(SFT_JSONL))["train"]
+    if STREAMING:
+        from train_data import (
+            LengthGroupedSampler, PackedDataset, PackingCollator, ThroughputMeter,
+            TokenizedShards, collation_report,
+        )
+
+        ds = TokenizedShards(
+            SFT_SOURCE, tok, max_length=MAX_LENGTH,
+            cache_dir=TOKENIZED_CACHE_DIR, num_workers=TOKENIZE_WORKERS,
+        )
+        print(f"[SFT] streaming examples={len(ds)} shards={ds.stats}")
+        print(f"[SFT] collation {collation_report(ds, 2, MAX_LENGTH)}")
+        if PACKING:
+            ds = PackedDataset(ds, MAX_LENGTH)
+    else:
+        ds = load_dataset("json", data_files=str(SFT_JSONL))["train"]
 
-    def fmt(ex):
-        text = ex["prompt"] + "\n\n" + ex["output"]
-        enc = tok(text, truncation=True, max_length=2048)
-        enc["labels"] = enc["input_ids"].copy()
-        return enc
+        def fmt(ex):
+            text = ex["prompt"] + "\n\n" + ex["output"]
+            enc = tok(text, truncation=True, max_length=MAX_LENGTH)
+            enc["labels"] = enc["input_ids"].copy()
+            return enc
 
-    ds = ds.map(fmt, remove_columns=ds.column_names)
+        ds = ds.map(fmt, remove_columns=ds.column_names)
 
     args = TrainingArguments(
         output_dir=str(OUT_SFT.parent),
@@ -60,32 +93,47 @@ def train_sft():
         learning_rate=1e-5,
         num_train_epochs=1,
         bf16=True,
-        logging_steps=20, save_steps=500
+        logging_steps=20, save_steps=500,
+        # 스트리밍 데이터셋은 HF Dataset이 아니라서 True면 Trainer가 collator 앞에서
+        # forward 인자에 없는 키(packing의 seq_lens)를 지워 버린다
+        remove_unused_columns=not STREAMING,
     )
 
-    trainer = Trainer(model=model, args=args, train_dataset=ds)
+    if STREAMING:
+        from transformers import DataCollatorForSeq2Seq, TrainerCallback
+
+        class StreamingTrainer(Trainer):
+            # 길이가 비슷한 예시끼리 배치 (lengths는 토큰 캐시에서 바로 얻음). packing이면 불필요
+            def _get_train_sampler(self, *a, **kw):
+                if PACKING or not GROUP_BY_LENGTH:
+                    return super()._get_train_sampler(*a, **kw)
+                return LengthGroupedSampler(ds.lengths, args.per_device_train_batch_size)
+
+        if PACKING:
+            mask = "flash" if ATTN_IMPL == "flash_attention_2" else "4d"
+            collator = PackingCollator(tok.pad_token_id, mask=mask, dtype=torch.bfloat16)
+        else:
+            collator = DataCollatorForSeq2Seq(tok, padding=True, label_pad_token_id=-100)
+        meter = ThroughputMeter(collator)
+
+        class ThroughputCallback(TrainerCallback):
+            def on_log(self, args, state, control, logs=None, **kw):
+                print(f"[SFT] step={state.global_step} {meter.report()}")
+
+        trainer = StreamingTrainer(
+            model=model, args=args, train_dataset=ds, data_collator=meter,
+            callbacks=[ThroughputCallback()],
+        )
+    else:
+        trainer = Trainer(model=model, args=args, train_dataset=ds)
     trainer.train()
 
     OUT_SFT.mkdir(parents=True, exist_ok=True)
     trainer.save_model(str(OUT_SFT))
     tok.save_pretrained(str(OUT_SFT))
 
-def train_dpo_from_sft():
-    print("== DPO (continue from SFT) ==")
-    tok = AutoTokenizer.from_pretrained(BASE_MODEL, use_fast=True)
-    tok.pad_token = tok.eos_token
-
-    # 정책(policy) 시작점: "SFT 어댑터가 장착된" 모델
-    base = AutoModelForCausalLM.from_pretrained(
-        BASE_MODEL, quantization_config=bnb, device_map="auto"
-    )
-    policy = PeftModel.from_pretrained(base, str(OUT_SFT))  # ← SFT에서 이어서
-
-    # ref_model 은 "고정된 기준"이어야 함: 보통 SFT 체크포인트를 참조로 둔다.
-    # TRL은 경로 문자열을 주면 내부에서 로드한다.
-    ref_model = str(OUT_SFT)
-
-    dpo_args = DPOConfig(
+def _dpo_args(**overrides):
+    return DPOConfig(
         output_dir=str(OUT_DPO.parent),
         per_device_train_batch_size=2,
         gradient_accumulation_steps=8,
@@ -96,18 +144,100 @@ def train_dpo_from_sft():
         max_length=2048,           # prompt+response 전체 길이
         max_target_length=512,     # response 길이 상한
         logging_steps=20, save_steps=500,
+        **overrides,
     )
 
-    ds = load_dataset("json", data_files=str(DPO_JSONL))["train"]
+
+def _dpo_source():
+    return DPO_SOURCE if STREAMING else DPO_JSONL
+
+
+def _load_dpo_dataset():
+    if STREAMING:
+        from datasets import Dataset
+        from train_data import iter_pairs
+
+        # 샤드를 순서대로 읽어 Arrow 캐시로 한 번 변환 (전체 jsonl을 한 번에 파싱하지 않음)
+        return Dataset.from_generator(iter_pairs, gen_kwargs={"source": str(DPO_SOURCE)})
+    return load_dataset("json", data_files=str(DPO_JSONL))["train"]
+
+
+def _ref_key():
+    import ref_logps
+
+    args = _dpo_args()
+    return ref_logps.cache_key(
+        OUT_SFT, BASE_MODEL, _dpo_source(),
+        max_length=args.max_length, max_prompt_length=getattr(args, "max_prompt_length", None),
+        max_target_length=getattr(args, "max_target_length", None),
+    )
+
+
+def precompute_ref_logps():
+    """SFT 어댑터(=DPO 기준 모델)의 log-prob을 한 번만 계산해 데이터셋 옆에 저장"""
+    import ref_logps
+
+    key = _ref_key()
+    if ref_logps.load(_dpo_source(), key) is not None:
+        print(f"== ref log-probs: cache hit {key} ==")
+        return key
+    print(f"== ref log-probs: computing {key} ==")
+    tok = AutoTokenizer.from_pretrained(BASE_MODEL, use_fast=True)
+    tok.pad_token = tok.eos_token
+    base = AutoModelForCausalLM.from_pretrained(
+        BASE_MODEL, quantization_config=bnb, device_map="auto"
+    )
+    # 어댑터 이름을 붙여 두어야 TRL이 ref 계산 때 어댑터를 끄지 않고 이 어댑터로 계산한다
+    ref = PeftModel.from_pretrained(base, str(OUT_SFT), adapter_name="reference")
+    ref.eval()
+    ds = ref_logps.compute(_load_dpo_dataset(), tok, ref, _dpo_args(), ref_adapter_name="reference")
+    path = ref_logps.save(ds, _dpo_source(), key, {"adapter": str(OUT_SFT), "base_model": BASE_MODEL})
+    print(f"[ref] saved {len(ds)} rows → {path}")
+    del ref, base
+    torch.cuda.empty_cache()
+    return key
+
+
+def train_dpo_from_sft():
+    print("== DPO (continue from SFT) ==")
+    tok = AutoTokenizer.from_pretrained(BASE_MODEL, use_fast=True)
+    tok.pad_token = tok.eos_token
+
+    # 정책(policy) 시작점: "SFT 어댑터가 장착된" 모델
+    base = AutoModelForCausalLM.from_pretrained(
+        BASE_MODEL, quantization_config=bnb, device_map="auto"
+    )
+    policy = PeftModel.from_pretrained(base, str(OUT_SFT))  # ← SFT에서 이어서
+
+    ds = None
+    if PRECOMPUTE_REF:
+        import ref_logps
+
+        ds = ref_logps.load(_dpo_source(), _ref_key())
+    if ds is not None:
+        # 데이터셋의 ref_chosen_logps / ref_rejected_logps 컬럼을 그대로 사용 → 기준 모델 없음
+        # (precompute_ref_log_probs=True여야 TRL이 ref 모델 사본을 만들지 않음)
+        ref_logps.check_trl_columns()
+        print(f"[DPO] using precomputed reference log-probs ({len(ds)} rows)")
+        ref_model = None
+        args = _dpo_args(precompute_ref_log_probs=True)
+    else:
+        # ref_model 은 "고정된 기준"이어야 함: 보통 SFT 체크포인트를 참조로 둔다.
+        # TRL은 경로 문자열을 주면 내부에서 로드한다.
+        ref_model = str(OUT_SFT)
+        ds = _load_dpo_dataset()
+        args = _dpo_args()
 
     trainer = DPOTrainer(
         model=policy,
-        ref_model=ref_model,         # ← SFT 체크포인트를 KL 기준으로 사용
-        args=dpo_args,
+        ref_model=ref_model,         # ← SFT 체크포인트를 KL 기준으로 사용 (사전 계산 시 None)
+        args=args,
         train_dataset=ds,
         tokenizer=tok,
         peft_config=LORA_CFG,        # LoRA 계속 학습
     )
+    if ref_model is None:
+        ref_logps.use_precomputed(trainer)  # 이미 붙은 컬럼을 쓰고 다시 계산하지 않음
     trainer.train()
 
     OUT_DPO.mkdir(parents=True, exist_ok=True)
@@ -115,8 +245,14 @@ def train_dpo_from_sft():
     tok.save_pretrained(str(OUT_DPO))
 
 if __name__ == "__main__":
-    assert SFT_JSONL.exists(), f"missing {SFT_JSONL}"
-    assert DPO_JSONL.exists(), f"missing {DPO_JSONL}"
+    if STREAMING:
+        assert SFT_SOURCE.exists(), f"missing {SFT_SOURCE}"
+        assert DPO_SOURCE.exists(), f"missing {DPO_SOURCE}"
+    else:
+        assert SFT_JSONL.exists(), f"missing {SFT_JSONL}"
+        assert DPO_JSONL.exists(), f"missing {DPO_JSONL}"
     train_sft()
+    if PRECOMPUTE_REF:
+        precompute_ref_logps()
     train_dpo_from_sft()
     print(f"[DONE] SFT→DPO complete. Final adapter: {OUT_DPO}")
\ No newline at end of file
@@ -0,0 +1,14 @@
+# backend/test/conftest.py
+# 모든 테스트 공통: trace 파일을 테스트별 임시 디렉터리로 보내고, 끝나면 내보내기 큐를 비움
+# (백그라운드 writer가 되돌려진 TRACE_DIR, 즉 backend/data/traces에 쓰지 않게)
+
+import pytest
+
+from infrastructure import tracing
+
+
+@pytest.fixture(autouse=True)
+def _trace_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_DIR", tmp_path / "traces")
+    yield
+    tracing.flush()
@@ -0,0 +1,83 @@
+# backend/test/test_attention.py
+# 가중치 하나로 attention 구현 전환: 하위 config까지 바뀌는지, 실행 중인 호출이 끝난 뒤에만 전환되는지
+
+import threading
+import time
+
+import pytest
+
+from langserve_app.attention import AttnBoundModel, attention_stats, current_attention, use_attention
+
+
+class _Cfg:
+    def __init__(self, impl):
+        self._attn_implementation = impl
+
+
+class _Module:
+    def __init__(self, config):
+        self.config = config
+
+
+class _Model:
+    """transformers 모델 흉내: 최상위/텍스트/비전 config가 따로 있음"""
+
+    def __init__(self, impl="sdpa"):
+        self.config = _Cfg(impl)
+        self.text = _Module(_Cfg(impl))
+        self.visual = _Module(_Cfg(impl))
+        self.seen = []
+
+    def modules(self):
+        return [self, self.text, self.visual]
+
+    def generate(self, tag, hold=0.0):
+        impls = {self.config._attn_implementation, self.text.config._attn_implementation,
+                 self.visual.config._attn_implementation}
+        assert len(impls) == 1  # 실행 중에는 구현이 섞이지 않음
+        time.sleep(hold)
+        self.seen.append((tag, impls.pop()))
+        return tag
+
+
+def test_views_share_weights_and_switch_all_configs():
+    model = _Model("sdpa")
+    eager = AttnBoundModel(model, "eager")
+    sdpa = AttnBoundModel(model, "sdpa")
+
+    assert eager.visual is model.visual  # 가중치(모듈) 공유
+    eager.generate("a")
+    sdpa.generate("b")
+    assert model.seen == [("a", "eager"), ("b", "sdpa")]
+    assert current_attention(model) == "sdpa"
+    assert attention_stats(model)["switches"] == 2
+
+    with pytest.raises(ValueError):
+        AttnBoundModel(model, "bogus")
+
+
+def test_switch_waits_for_running_calls_and_blocks_newcomers():
+    model = _Model("sdpa")
+    order = []
+
+    def call(impl, tag, hold):
+        with use_attention(model, impl):
+            order.append(("start", tag))
+            model.generate(tag, hold)
+            order.append(("end", tag))
+
+    a = threading.Thread(target=call, args=("sdpa", "a", 0.3))
+    a.start()
+    time.sleep(0.05)
+    b = threading.Thread(target=call, args=("eager", "b", 0.0))
+    b.start()
+    time.sleep(0.05)
+    c = threading.Thread(target=call, args=("sdpa", "c", 0.0))  # b가 기다리는 중이면 c도 줄을 선다
+    c.start()
+    for t in (a, b, c):
+        t.join(5)
+
+    assert order.index(("end", "a")) < order.index(("start", "b"))
+    assert order.index(("end", "a")) < order.index(("start", "c"))
+    assert dict(model.seen) == {"a": "sdpa", "b": "eager", "c": "sdpa"}
+    assert attention_stats(model)["active"] == 0
@@ -0,0 +1,103 @@
+# backend/test/test_bench_infer.py
+# ai/qwen/bench_infer.py: 백분위/요약 통계, 기준(baseline) 대비 회귀 판정, --tiny 모델로 끝까지 돌린 결과 JSON 확인
+
+import importlib.util
+import json
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+QWEN_DIR = Path(__file__).resolve().parents[2] / "ai" / "qwen"
+
+
+@pytest.fixture(scope="module")
+def bench():
+    # bench_infer는 같은 폴더의 prompts를 import하므로 로드하는 동안만 ai/qwen을 경로에 추가
+    # (계속 두면 ai/qwen/test.py가 backend의 test 패키지를 가림)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.syspath_prepend(str(QWEN_DIR))
+        spec = importlib.util.spec_from_file_location("bench_infer", QWEN_DIR / "bench_infer.py")
+        module = importlib.util.module_from_spec(spec)
+        mp.setitem(sys.modules, "bench_infer", module)
+        spec.loader.exec_module(module)
+    return module
+
+
+def test_percentile_matches_linear_interpolation(bench):
+    xs = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert bench.percentile(xs, 50) == 3.0
+    assert bench.percentile(xs, 0) == 1.0 and bench.percentile(xs, 100) == 5.0
+    assert math.isclose(bench.percentile(xs, 90), 4.6)
+    assert math.isclose(bench.percentile([1.0, 2.0], 99), 1.99)
+    assert bench.percentile([7.0], 99) == 7.0
+
+
+def test_summarize_empty_is_null_in_json(bench):
+    s = bench.summarize([])
+    assert s == {"p50": None, "p90": None, "p99": None, "mean": None, "n": 0}
+    assert json.loads(json.dumps(s)) == s  # NaN이 아니라 null로 직렬화
+
+
+def _result(key, e2e, dec, mem):
+    return {"key": key, "e2e_s": {"p50": e2e, "p90": e2e}, "prefill_s": {"p50": e2e / 2},
+            "decode_tok_s": {"p50": dec}, "peak_mem_mb": mem}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance(bench):
+    baseline = {"results": [
+        _result("a", 1.0, 100.0, 1000.0),
+        _result("b", 1.0, 100.0, 1000.0),
+        {"key": "c", "error": "load: oom"},
+    ]}
+    results = [
+        _result("a", 1.05, 80.0, 1000.0),  # 지연 5%는 허용, 처리량 20% 감소는 회귀
+        _result("b", 0.5, 150.0, 900.0),  # 전부 개선
+        _result("c", 9.0, 1.0, 1.0),  # 기준이 오류면 비교 안 함
+        _result("d", 9.0, 1.0, 1.0),  # 기준에 없는 설정
+        {"key": "a", "error": "oom"},
+    ]
+    regressions = bench.compare(results, baseline, tolerance=0.10)
+    assert [(r["key"], r["metric"]) for r in regressions] == [("a", "decode_tok_s.p50")]
+    assert regressions[0]["change"] == -0.2
+    assert results[0]["vs_baseline"]["e2e_s.p50"] == 0.05
+    assert results[1]["vs_baseline"]["peak_mem_mb"] == -0.1
+    assert "vs_baseline" not in results[2] and "vs_baseline" not in results[3]
+
+    # 측정값이 없으면(null) 해당 지표는 건너뜀
+    empty = {"key": "a", "e2e_s": {"p50": None, "p90": None}, "prefill_s": {"p50": None},
+             "decode_tok_s": {"p50": None}, "peak_mem_mb": None}
+    assert bench.compare([empty], baseline, tolerance=0.10) == [] and "vs_baseline" not in empty
+
+
+def test_tiny_end_to_end(bench, tmp_path):
+    from transformers import AutoProcessor
+
+    try:
+        AutoProcessor.from_pretrained(bench.TINY_MODEL_ID, use_fast=True)
+    except OSError as e:  # 오프라인 등으로 초소형 모델을 받을 수 없음
+        pytest.skip(f"tiny 모델 없음: {e}")
+
+    out = tmp_path / "run.json"
+    argv = ["--tiny", "--attn", "eager,sdpa", "--task", "classify", "--batch", "1,2",
+            "--max_new_tokens", "4", "--warmup", "0", "--trials", "1", "--images", "1"]
+    bench.main(argv + ["--out", str(out), "--save_baseline", str(tmp_path / "base.json")])
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["env"]["tiny"] and report["env"]["device"] == "cpu"
+    assert len(report["results"]) == 4
+    for r in report["results"]:
+        assert "error" not in r, r
+        assert r["config"]["dtype"] == "float32" and r["e2e_s"]["n"] == r["runs"] >= 1
+        assert r["e2e_s"]["p50"] > 0 and r["input_tokens"] > 0
+
+    # 같은 결과를 기준으로 다시 돌리면 회귀 판정까지 끝나고, 허용치를 크게 주면 실패하지 않음
+    again = tmp_path / "again.json"
+    bench.main(argv + ["--out", str(again), "--baseline", str(tmp_path / "base.json"),
+                       "--tolerance", "100", "--fail_on_regression"])
+    rerun = json.loads(again.read_text(encoding="utf-8"))
+    assert rerun["baseline"]["regressions"] == []
+    assert all("vs_baseline" in r for r in rerun["results"])
@@ -0,0 +1,146 @@
+# backend/test/test_blob_store.py
+# 내용 해시 blob 저장소: 중복 저장, 참조(최근 문서/피드백/개선 작업)가 남아 있으면 release 안 함, 파생 이미지 정리, GC,
+# 세션 시작 시 모델이 도는 동안에도 최근 문서 행이 blob을 참조하는지
+
+import asyncio
+import importlib
+import io
+import os
+import time
+
+import pytest
+from fastapi import Response, UploadFile
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config import Base
+from data_store import blob_store, conversations, recent_docs
+from models import Feedback, FeedbackJob, RecentDoc
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(blob_store, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "BLOB_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "DERIVED_DIR", tmp_path / "blobs" / "derived")
+    monkeypatch.setattr(blob_store, "RELEASE_GRACE_SEC", 0)
+    return Session
+
+
+def _jpeg(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def _add(Session, row):
+    db = Session()
+    try:
+        db.add(row)
+        db.commit()
+        return row.id
+    finally:
+        db.close()
+
+
+def _delete(Session, model, row_id):
+    db = Session()
+    try:
+        db.query(model).filter_by(id=row_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_put_dedups_by_content(store):
+    data = _jpeg("red")
+    a = blob_store.put_fileobj(io.BytesIO(data))
+    b = blob_store.put_bytes(data)
+    c = blob_store.put_bytes(_jpeg("blue"))
+    assert a == b != c
+    assert blob_store.is_blob(a) and not blob_store.is_blob("/tmp/x.jpg")
+    assert open(a, "rb").read() == data
+    assert len(list(blob_store.BLOB_DIR.glob("??/??/*.jpg"))) == 2
+    assert not list(blob_store.BLOB_DIR.glob(".incoming-*"))
+
+
+@pytest.mark.parametrize("ref", ["recent_doc", "feedback", "job"])
+def test_release_waits_for_every_reference(store, ref):
+    path = blob_store.put_bytes(_jpeg("red"))
+    thumb = blob_store.derivative(path, 320)
+    doc_id = _add(store, RecentDoc(user_id="u1", doc_id="d1", path=path))
+    other = {
+        "recent_doc": (RecentDoc, RecentDoc(user_id="u2", doc_id="d1", path=path)),
+        "feedback": (Feedback, Feedback(user_id="u1", doc_id="d1", image_path=path, feedback="bad")),
+        "job": (FeedbackJob, FeedbackJob(dedup_key="k", doc_id="d1", image_path=path, status="pending")),
+    }[ref]
+    other_id = _add(store, other[1])
+
+    _delete(store, RecentDoc, doc_id)
+    assert blob_store.refcount(path) == 1
+    assert not blob_store.release(path) and os.path.exists(path)
+
+    _delete(store, other[0], other_id)
+    assert blob_store.release(path)
+    assert not os.path.exists(path) and not os.path.exists(thumb)
+    assert not blob_store.release(path)  # 이미 없음
+
+
+def test_release_grace_and_gc(store, monkeypatch):
+    path = blob_store.put_bytes(_jpeg("red"))
+    monkeypatch.setattr(blob_store, "RELEASE_GRACE_SEC", 60)
+    assert not blob_store.release(path)  # 방금 올라온 blob (업로드 직후 DB 기록 전일 수 있음)
+    assert not blob_store.release("/tmp/not-a-blob.jpg")
+
+    kept = blob_store.put_bytes(_jpeg("blue"))
+    _add(store, FeedbackJob(dedup_key="k", doc_id="d1", image_path=kept, status="running"))
+    old = time.time() - 7200
+    for p in (path, kept):
+        os.utime(p, (old, old))
+
+    report = blob_store.gc_orphans(blob_store.referenced_paths(), grace_sec=3600)
+    assert report["removed"] == 1
+    assert not os.path.exists(path) and os.path.exists(kept)
+
+
+def test_start_session_references_blob_while_model_runs(store, monkeypatch):
+    monkeypatch.setenv("FAKE_MODEL", "1")  # session_router가 import 시점에 모델 클래스를 고름
+    session_router = importlib.import_module("langserve_app.session_router")
+    fake_model = importlib.import_module("langserve_app.fake_model")
+    for name, value in (("FAKE_VISION_SEC", 0), ("FAKE_PREFILL_SEC", 0), ("FAKE_DECODE_TOK_SEC", 0)):
+        monkeypatch.setattr(fake_model, name, value)
+    monkeypatch.setattr(conversations, "SessionLocal", store)
+    monkeypatch.setattr(recent_docs, "SessionLocal", store)
+    monkeypatch.setattr(session_router, "sessions", {})
+    data = _jpeg("red")
+
+    # 분류 도중 같은 이미지를 올린 다른 사용자가 문서를 지워도 blob은 남아야 함
+    other = blob_store.put_bytes(data)
+    _add(store, RecentDoc(user_id="u2", doc_id="d0", path=other))
+    seen = {}
+
+    def classify(self):
+        seen["refs"] = blob_store.refcount(other)
+        recent_docs.delete_recent_doc("u2", "d0")
+        seen["exists"] = os.path.exists(other)
+        return "고지서"
+
+    monkeypatch.setattr(fake_model.FakeImageChatRunnable, "classify", classify)
+    out = asyncio.run(session_router.start_session(UploadFile(io.BytesIO(data)), Response(), user_id="u1"))
+    assert seen == {"refs": 2, "exists": True}
+    doc = recent_docs.get_recent_doc_by_doc_id(out["doc_id"])
+    assert doc["path"] == other and doc["doc_type"] == "고지서" and doc["title"] == out["answer"][:60]
+
+    # 요약 중 실패하면 미리 넣은 최근 문서 행도 거둠
+    def boom(self, prompt):
+        raise RuntimeError("oom")
+
+    monkeypatch.setattr(fake_model.FakeImageChatRunnable, "invoke", boom)
+    with pytest.raises(RuntimeError):
+        asyncio.run(session_router.start_session(UploadFile(io.BytesIO(data)), Response(), user_id="u3"))
+    assert recent_docs.list_recent_docs("u3") == []
+    assert session_router._q_count == 0
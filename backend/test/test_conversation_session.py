@@ -0,0 +1,95 @@
+# backend/test/test_conversation_session.py
+# 대화 세션: 캐시된 비전 특징(build_inputs가 만든 dict 입력)으로 분류/질문이 끝까지 도는지 (작은 스텁 모델/프로세서)
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("qwen_vl_utils")
+pytest.importorskip("langchain")
+
+from langchain.memory import ConversationBufferMemory  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from langserve_app import conversation_session as cs  # noqa: E402
+
+
+class _Tokenizer:
+    """문자 하나 = 토큰 하나 (코드 포인트 그대로)"""
+    padding_side = "right"
+
+    def __call__(self, texts, padding=False, return_tensors=None):
+        width = max(len(t) for t in texts)
+        ids = [[0] * (width - len(t)) + [ord(c) for c in t] for t in texts]  # build_inputs가 왼쪽 패딩으로 바꿈
+        mask = [[0] * (width - len(t)) + [1] * len(t) for t in texts]
+        return {"input_ids": torch.tensor(ids), "attention_mask": torch.tensor(mask)}
+
+
+class _Processor:
+    image_token = "<|image_pad|>"
+    tokenizer = _Tokenizer()
+
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=True):
+        texts = [c["text"] for m in messages if isinstance(m["content"], list)
+                 for c in m["content"] if c["type"] == "text"]
+        return self.image_token + "".join(texts)
+
+    def batch_decode(self, ids, skip_special_tokens=True, clean_up_tokenization_spaces=False):
+        return ["".join(chr(int(t)) for t in row) for row in ids]
+
+
+class _Visual(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.proj = torch.nn.Linear(4, 8)
+        self.calls = 0
+
+    def forward(self, pixel_values, grid_thw=None):
+        self.calls += 1
+        return self.proj(pixel_values)
+
+
+class _Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.visual = _Visual()
+        self.device = torch.device("cpu")
+        self.reply = ""
+        self.seen = []
+
+    def generate(self, input_ids, attention_mask, pixel_values, image_grid_thw, **kw):
+        self.seen.append(self.visual(pixel_values, grid_thw=image_grid_thw))  # 캐시 특징이 대신 나와야 함
+        new = torch.tensor([[ord(c) for c in self.reply]] * input_ids.shape[0])
+        return torch.cat([input_ids, new], dim=1)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    model, proc = _Model(), _Processor()
+    monkeypatch.setattr(cs, "_get_model", lambda attn_impl=None: model)
+    monkeypatch.setattr(cs, "_get_processor", lambda: proc)
+
+    s = cs.ConversationSession.__new__(cs.ConversationSession)  # 모델 로드/이미지 전처리 없이
+    s.image = Image.new("RGB", (32, 32), "white")
+    s.messages = [{"role": "user", "content": [{"type": "image", "image": s.image}]}]
+    s.memory = ConversationBufferMemory(return_messages=True)
+    s.image_inputs = None
+    s.features = [(torch.randn(3, 8), torch.tensor([1, 2, 6]))]  # 이미지 토큰 3개
+    s.last_response = None
+    s.DOC_TYPE_PROMPT = "유형만 출력"
+    return s, model
+
+
+def test_classify_and_ask_with_cached_features(session):
+    s, model = session
+
+    model.reply = "고지서"
+    assert s.classify_document() == "고지서"
+
+    model.reply = "네, 이번 달 요금이에요."
+    assert s.ask("얼마예요?") == "네, 이번 달 요금이에요."  # 입력 토큰만큼 정확히 잘라냄
+    assert s.last_response == model.reply
+    assert [m.content for m in s.memory.chat_memory.messages] == ["얼마예요?", model.reply]
+
+    assert model.visual.calls == 0 and len(model.seen) == 2
+    assert all(torch.equal(out, s.features[0][0]) for out in model.seen)
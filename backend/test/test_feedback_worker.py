@@ -0,0 +1,171 @@
+# backend/test/test_feedback_worker.py
+# 👎 피드백 작업 큐 + 워커 (중복 제거, 재시도, 동시성, DPO 적재, 큐 상태는 관리자 전용) 확인
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config import Base
+from data_store import feedback_jobs
+from data_store.datasets import DatasetSink, iter_rows
+from infrastructure import feedback_worker, openai_client
+from models import Feedback
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(feedback_jobs, "SessionLocal", Session)
+    monkeypatch.setattr(feedback_worker, "DPO_SINK", DatasetSink(tmp_path / "dpo", "dpo", fsync=False))
+    monkeypatch.setattr(feedback_worker, "FEEDBACK_BACKOFF_SEC", 0.01)
+    monkeypatch.setattr(feedback_worker, "FEEDBACK_RATE_PER_MIN", 6000)
+    monkeypatch.setattr(feedback_worker, "FEEDBACK_POLL_SEC", 0.05)
+    for k in feedback_worker.WORKER_STATS:
+        monkeypatch.setitem(feedback_worker.WORKER_STATS, k, 0)
+    return Session
+
+
+def _add_feedback(Session, doc_id, output):
+    db = Session()
+    try:
+        fb = Feedback(doc_id=doc_id, prompt="요약해줘", output=output, feedback="bad")
+        db.add(fb)
+        db.commit()
+        return fb.id
+    finally:
+        db.close()
+
+
+def _enqueue(Session, doc_id, output):
+    fid = _add_feedback(Session, doc_id, output)
+    return feedback_jobs.enqueue_job(fid, "u1", doc_id, None, "요약해줘", output)
+
+
+def _drain(timeout=10.0):
+    async def main():
+        task = asyncio.create_task(feedback_worker.worker_loop())
+        try:
+            deadline = asyncio.get_running_loop().time() + timeout
+            while feedback_jobs.queue_stats()["backlog"] or feedback_worker.WORKER_STATS["in_flight"]:
+                assert asyncio.get_running_loop().time() < deadline, "워커가 backlog를 비우지 못함"
+                await asyncio.sleep(0.02)
+        finally:
+            task.cancel()
+    asyncio.run(main())
+
+
+def test_enqueue_dedups_same_doc_and_output(queue):
+    a, created_a = _enqueue(queue, "d1", "나쁜 요약")
+    b, created_b = _enqueue(queue, "d1", "나쁜 요약")
+    c, created_c = _enqueue(queue, "d2", "나쁜 요약")
+    assert created_a and not created_b and created_c
+    assert a == b != c
+    assert feedback_jobs.queue_stats()["backlog"] == 2
+
+
+def test_worker_retries_and_fills_dedup_rows(queue, monkeypatch):
+    calls = []
+
+    async def fake_improve(prompt, data_url):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("429")
+        return f"개선된 {prompt}", 0.01
+
+    monkeypatch.setattr(openai_client, "improve_summary", fake_improve)
+    _enqueue(queue, "d1", "나쁜 요약")
+    _enqueue(queue, "d1", "나쁜 요약")  # 같은 출력에 대한 두 번째 👎
+    _drain()
+
+    stats = feedback_worker.stats()
+    assert stats["counts"] == {"done": 1}
+    assert stats["worker"]["retried"] == 1 and stats["worker"]["succeeded"] == 1
+    # 이미 끝난 작업과 같은 출력에 대한 세 번째 👎: 다시 생성하지 않고 결과를 바로 채움
+    _, created = _enqueue(queue, "d1", "나쁜 요약")
+    assert not created and feedback_jobs.queue_stats()["backlog"] == 0
+    db = queue()
+    try:
+        assert [f.improved for f in db.query(Feedback).all()] == ["개선된 요약해줘"] * 3
+    finally:
+        db.close()
+    assert len(calls) == 2
+    feedback_worker.DPO_SINK.close()
+    rows = list(iter_rows(feedback_worker.DPO_SINK.dir, "dpo"))
+    assert len(rows) == 1 and rows[0]["rejected"] == "나쁜 요약"
+
+
+def test_worker_gives_up_after_max_attempts(queue, monkeypatch):
+    async def always_fail(prompt, data_url):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(openai_client, "improve_summary", always_fail)
+    monkeypatch.setattr(feedback_worker, "FEEDBACK_MAX_ATTEMPTS", 2)
+    _enqueue(queue, "d1", "x")
+    _drain()
+    assert feedback_jobs.queue_stats()["counts"] == {"failed": 1}
+
+
+def test_worker_against_openai_stub(queue, monkeypatch):
+    pytest.importorskip("openai")
+    from scripts.stubs import OpenAIStub
+
+    with OpenAIStub(fail_first=1, latency=0.05) as stub:
+        monkeypatch.setattr(openai_client, "OPENAI_BASE_URL", stub.base_url)
+        monkeypatch.setattr(openai_client, "_client", None)
+        monkeypatch.setattr(feedback_worker, "FEEDBACK_WORKER_CONCURRENCY", 3)
+        for i in range(6):
+            _enqueue(queue, f"d{i}", "요약")
+        _drain()
+        monkeypatch.setattr(openai_client, "_client", None)
+
+    assert feedback_jobs.queue_stats()["counts"] == {"done": 6}
+    assert len(stub.requests) == 7  # 429 한 번 + 성공 6
+    assert 1 < stub.max_in_flight <= 3
+
+
+def test_image_payload_encoded_once_per_content(tmp_path, monkeypatch):
+    from PIL import Image
+
+    monkeypatch.setattr(openai_client, "_image_cache", openai_client.OrderedDict())
+    monkeypatch.setattr(openai_client, "_cache_bytes", 0)
+    for k in openai_client.IMAGE_CACHE_STATS:
+        monkeypatch.setitem(openai_client.IMAGE_CACHE_STATS, k, 0)
+
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    Image.new("RGB", (3200, 2400), (200, 30, 30)).save(a, quality=95)
+    b.write_bytes(a.read_bytes())  # 같은 내용, 다른 경로
+
+    url1, n1 = openai_client.encode_image_as_data_url(str(a))
+    url2, n2 = openai_client.encode_image_as_data_url(str(b))
+    assert url1 == url2 and n1 == n2 > 0
+
+    import base64, io
+    with Image.open(io.BytesIO(base64.b64decode(url1.split(",", 1)[1]))) as im:
+        assert max(im.size) == openai_client.MAX_SIDE
+
+    stats = openai_client.image_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes_saved"] == n1
+
+    monkeypatch.setattr(openai_client, "MAX_SIDE", 800)  # 설정이 바뀌면 다른 키
+    _, n3 = openai_client.encode_image_as_data_url(str(a))
+    assert n3 < n1 and openai_client.image_cache_stats()["misses"] == 2
+
+
+def test_queue_stats_requires_admin(queue, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes import admin_router, feedback_router
+
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "secret")
+    _enqueue(queue, "d1", "요약 A")
+    app = FastAPI()
+    app.include_router(feedback_router.router)
+    client = TestClient(app)
+    assert client.get("/api/feedback/queue").status_code == 403
+    r = client.get("/api/feedback/queue", headers={"X-Admin-Token": "secret"})
+    assert r.status_code == 200 and r.json()["backlog"] == 1
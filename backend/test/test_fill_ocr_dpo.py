@@ -0,0 +1,114 @@
+# backend/test/test_fill_ocr_dpo.py
+# ai/qwen/fill_ocr_and_generate_dpo_v2.py: 단일 패스 DocScan이 기존 추출/정규화 함수와 같은 결과인지,
+# 스트리밍 모드가 중간에 끊긴 뒤 체크포인트에서 이어 써도 처음부터 돌린 결과와 같은지 확인
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _load(name: str):
+    # sys.path에 ai/qwen을 넣으면 ai/qwen/test.py가 backend의 test 패키지를 가리므로 파일 경로로 직접 로드
+    path = Path(__file__).resolve().parents[2] / "ai" / "qwen" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+fill = _load("fill_ocr_and_generate_dpo_v2")
+
+BILL_KW = ("납기내", "금액", "요금", "등록금", "보험료")
+LATE_KW = ("납기후", "가산금")
+DUE_KW = ("납부", "납기", "마감", "까지")
+APPLY_KW = ("신청", "마감", "까지", "접수")
+
+EDGE_DOCS = [
+    ("고지서", "금액 없는 고지서\n납부기한 2024.06.30 까지\n문의 02-123-4567"),
+    ("고지서", "수도요금\n금액 없음\n납부 미정"),
+    ("안내문-건강", "검진 일정\n1차 9월 3일, 2차 9월 10일\n결과 통보 2024-10-01\n재검 10월 15일"),
+    ("안내문-생활", "행사 기간 11월 1일 ~ 11월 30일\n접수 10월 20일부터 10월 25일까지\n09:30 ~ 17:00"),
+    ("안내문-생활", "매월 5일 모임\n회비 월 3,000원"),  # '월 5일'처럼 앞 숫자 없는 월
+    ("안내문-금융", "신고 기한 2024/06/30 까지\n과태료 최대 20억원\n02024.06.30 표기 오류"),
+    ("고지서", "요금 1,000원12:30 수납\n가산금 1,030원\n납기 7월 25일까지"),  # 서로 다른 패턴이 맞닿음
+    ("기타", "공지사항\n자세한 내용은 홈페이지 참고"),
+    ("기타", ""),
+]
+DOCS = [(dom, f"{txt}\n{fill._BENCH_BODY}\n관리번호 {i}") for i, (dom, txt) in enumerate(fill._BENCH_DOCS)] + EDGE_DOCS
+
+
+@pytest.mark.parametrize("domain,text", DOCS)
+def test_docscan_matches_legacy_extractors(domain, text):
+    sc = fill.DocScan(text)
+    assert sc.first_money() == fill.find_first_money(text)
+    for kw in (BILL_KW, LATE_KW):
+        assert sc.first_money(kw) == fill.find_first_money(text, kw)
+    assert sc.date_like() == fill.find_date_like(text)
+    for kw in (DUE_KW, APPLY_KW):
+        assert sc.date_like(kw) == fill.find_date_like(text, kw)
+    assert sc.first_phone() == fill.find_phone(text)
+    assert sc.normalized() == fill.normalize_read_friendly(text)
+
+    assert fill.build_chosen_summary_fast(text, domain) == fill.build_chosen_summary(text, domain)
+    assert fill.build_rejected_summary_fast(text, domain) == fill.build_rejected_summary(text, domain)
+
+
+def test_docscan_edge_values():
+    assert fill.DocScan("공지사항\n홈페이지 참고").first_money() is None
+    several = fill.DocScan("접수 9월 3일\n마감 9월 10일까지\n행사 2024.10.05")
+    assert several.date_like(APPLY_KW) == "9월 3일" and several.first_raw_date() == "2024.10.05"
+    ranged = fill.DocScan("기간 11월 1일 ~ 11월 30일\n09:30 ~ 17:00")
+    assert ranged.normalized() == "기간 11월 1일 ~ 11월 30일\n오전 9시 30분 ~ 오후 5시"
+
+
+class _CrashPool:
+    """n줄 처리 후 죽는 풀 (프로세스 강제 종료 흉내)"""
+
+    def __init__(self, n):
+        self.n = n
+
+    def imap(self, fn, it, chunksize=1):
+        for k, task in enumerate(it):
+            if k == self.n:
+                raise KeyboardInterrupt
+            yield fn(task)
+
+
+def _write_inputs(d: Path, n: int = 23) -> Path:
+    fill._write_bench_inputs(d, n)
+    with (d / "dpo_pairs.jsonl").open("a", encoding="utf-8") as f:
+        f.write("\n{깨진 줄\n[1, 2]\n")  # 빈 줄/잘못된 줄은 건너뜀 (read_jsonl과 동일)
+    meta_map, exact, bynum = fill.load_lookup(d / "metadata.csv", d / "ocr_texts.csv")
+    fill._init_worker(meta_map, exact, bynum, True)
+    return d / "dpo_pairs.jsonl"
+
+
+def test_stream_resumes_after_crash_with_identical_output(tmp_path):
+    in_p = _write_inputs(tmp_path)
+    whole = tmp_path / "whole.jsonl"
+    fill.stream_file("dpo", in_p, whole, fill._InlinePool(), 1, 5, False, 64)
+
+    out = tmp_path / "out.jsonl"
+    with pytest.raises(KeyboardInterrupt):
+        fill.stream_file("dpo", in_p, out, _CrashPool(13), 1, 5, False, 64)
+    ckpt = json.loads(fill._ckpt_path(out).read_text(encoding="utf-8"))
+    assert ckpt["rows_in"] == 10 and not ckpt["done"]
+    with out.open("ab") as f:
+        f.write(b'{"half-written": ')  # 체크포인트 뒤에 쓰다 만 꼬리
+
+    state = fill.stream_file("dpo", in_p, out, fill._InlinePool(), 1, 5, True, 64)
+    assert state["done"] and state["rows_out"] == 23 and state["rows_in"] == 26
+    assert out.read_bytes() == whole.read_bytes()
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert all(r["chosen"].startswith("어르신") or r["chosen"] == "" for r in rows)
+    legacy = [fill.fill_dpo_row(ex, fill._CTX["meta_map"], fill._CTX["exact"], fill._CTX["bynum"], True)
+              for ex in fill.read_jsonl(in_p)]
+    assert rows == legacy
+
+    # 완료된 체크포인트면 다시 돌려도 건드리지 않음
+    assert fill.stream_file("dpo", in_p, out, _CrashPool(0), 1, 5, True, 64)["done"]
@@ -0,0 +1,72 @@
+# backend/test/test_http_client.py
+# Naver 스텁 서버로 STT/TTS 비동기 클라이언트(풀/재시도) 확인
+
+import asyncio
+
+import pytest
+
+from infrastructure import http_client, stt_client, tts_client
+from scripts.stubs import NaverStub
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    with NaverStub(fail_first=2) as s:
+        monkeypatch.setattr(stt_client, "STT_URL", s.stt_url)
+        monkeypatch.setattr(tts_client, "TTS_URL", s.tts_url)
+        monkeypatch.setattr(http_client, "HTTP_BACKOFF", 0.01)
+        yield s
+
+
+def _run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await http_client.aclose()
+    return asyncio.run(main())
+
+
+def test_stt_retries_then_succeeds(stub):
+    text = _run(stt_client.speech_to_text_bytes(b"\x00" * 1234))
+    assert text == "stub:1234"
+    assert len(stub.requests) == 3  # 503 두 번 + 성공
+
+
+def test_tts_concurrent_requests_share_pool(stub):
+    async def many():
+        return await asyncio.gather(*(tts_client.text_to_speech(f"안녕{i}") for i in range(10)))
+
+    results = _run(many())
+    assert [r[3:].decode() for r in results] == [f"안녕{i}" for i in range(10)]
+
+
+def test_stt_router_reads_upload_in_memory(stub, monkeypatch):
+    import io
+    import tempfile
+    import wave
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from routes.stt_router import router
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(16000)
+        w.writeframes(b"\0\0" * 16000)
+    audio = buf.getvalue()
+
+    def no_tempfile(*a, **kw):
+        raise AssertionError("STT 경로에서 임시 파일을 만들면 안 됨")
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_tempfile)
+    monkeypatch.setattr(tempfile, "mkstemp", no_tempfile)
+
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        r = client.post("/api/stt", files={"file": ("q.wav", audio, "audio/wav")})
+        assert r.status_code == 200
+        assert r.json() == f"stub:{len(audio)}"
+        r = client.post("/api/stt", files={"file": ("q.wav", b"", "audio/wav")})
+        assert r.status_code == 422
@@ -0,0 +1,90 @@
+# backend/test/test_image_router.py
+# /api/image: 사용자 스코프, ETag/304, 원본 형식 판별, 축소본 캐시, stats 관리자 전용 확인
+
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config import Base
+from data_store import blob_store, recent_docs
+from routes import admin_router, image_router
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(recent_docs, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "BLOB_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "DERIVED_DIR", tmp_path / "blobs" / "derived")
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "secret")
+    for k in image_router.IMAGE_STATS:
+        monkeypatch.setitem(image_router.IMAGE_STATS, k, 0)
+
+    app = FastAPI()
+    app.include_router(image_router.router)
+    return TestClient(app)
+
+
+def _upload(user_id, doc_id, fmt="JPEG") -> str:
+    buf = io.BytesIO()
+    Image.new("RGB", (1000, 700), "red").save(buf, format=fmt)
+    path = blob_store.put_bytes(buf.getvalue())  # 확장자는 항상 .jpg
+    recent_docs.add_recent_doc(user_id, doc_id, path)
+    return path
+
+
+def test_only_owner_can_fetch(client):
+    path = _upload("u1", "d1")
+    assert client.get("/api/image", params={"doc_id": "d1"}).status_code == 401
+    client.cookies.set("user_id", "u2")
+    assert client.get("/api/image", params={"doc_id": "d1"}).status_code == 404
+    assert client.get("/api/image", params={"path": path}).status_code == 403
+    client.cookies.set("user_id", "u1")
+    assert client.get("/api/image", params={"path": path}).status_code == 200
+    assert client.get("/api/image").status_code == 400
+
+
+def test_etag_304_and_sniffed_type(client):
+    _upload("u1", "jpg")
+    _upload("u1", "png", fmt="PNG")
+    client.cookies.set("user_id", "u1")
+
+    r = client.get("/api/image", params={"doc_id": "jpg"})
+    assert r.status_code == 200 and r.headers["content-type"] == "image/jpeg"
+    assert r.headers["cache-control"] == image_router.CACHE_CONTROL_BLOB
+    etag = r.headers["etag"]
+
+    r = client.get("/api/image", params={"doc_id": "jpg"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b"" and r.headers["etag"] == etag
+    r = client.get("/api/image", params={"doc_id": "jpg"}, headers={"If-None-Match": '"other"'})
+    assert r.status_code == 200
+
+    r = client.get("/api/image", params={"doc_id": "png"})
+    assert r.headers["content-type"] == "image/png" and r.content.startswith(b"\x89PNG")
+    assert r.headers["etag"] != etag
+
+
+def test_thumbnails_are_cached_per_size(client):
+    _upload("u1", "d1")
+    client.cookies.set("user_id", "u1")
+    for w in (300, 320, 320):  # 300 -> 320으로 올림
+        r = client.get("/api/image", params={"doc_id": "d1", "w": w})
+        assert r.status_code == 200 and r.headers["content-type"] == "image/webp"
+        assert max(Image.open(io.BytesIO(r.content)).size) == 320
+    orig_etag = client.get("/api/image", params={"doc_id": "d1"}).headers["etag"]
+    assert r.headers["etag"] != orig_etag and r.headers["etag"].endswith('-320.webp"')
+    assert image_router.IMAGE_STATS["derived_misses"] == 1 and image_router.IMAGE_STATS["derived_hits"] == 2
+
+
+def test_stats_requires_admin(client):
+    assert client.get("/api/image/stats").status_code == 403
+    r = client.get("/api/image/stats", headers={"X-Admin-Token": "secret"})
+    assert r.status_code == 200 and "derived_hit_rate" in r.json()
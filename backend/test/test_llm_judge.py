@@ -0,0 +1,75 @@
+# backend/test/test_llm_judge.py
+# ai/qwen/qwen_test_LLM_as_judge.py를 로컬 가짜 심사 서버(fake_judge.py)로 오프라인 실행:
+# 재개 시 정상 라인은 건너뛰고 오류/파싱 실패(-1) 라인은 다시 채점, 다시 돌리면 같은 호출은 응답 캐시에서
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+
+def _load(name: str):
+    # sys.path에 ai/qwen을 넣으면 ai/qwen/test.py가 backend의 test 패키지를 가리므로 파일 경로로 직접 로드
+    path = Path(__file__).resolve().parents[2] / "ai" / "qwen" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+judge = _load("qwen_test_LLM_as_judge")
+FakeJudge = _load("fake_judge").FakeJudge
+
+
+def _args(tmp_path, **kw) -> argparse.Namespace:
+    base = dict(input=str(tmp_path / "results.jsonl"), output=str(tmp_path / "scores.jsonl"),
+                model="fake", concurrency=4, max_retries=0, timeout=10.0,
+                cache=str(tmp_path / "cache.jsonl"), no_cache=False, fresh=False, limit=0, log_every=1000)
+    base.update(kw)
+    return argparse.Namespace(**base)
+
+
+def _record(idx, score=80, comment="좋음"):
+    agents = {name: {"score": score, "comment": comment} for name in judge.SYSTEM_PROMPTS}
+    return {"idx": idx, "final": {**{k: score for k in judge.AGG_KEYS}, "comment": comment}, "agents": agents}
+
+
+def test_resume_rejudges_failed_lines(tmp_path):
+    args = _args(tmp_path)
+    with open(args.input, "w", encoding="utf-8") as f:
+        for i in range(5):
+            f.write(json.dumps({"output": f"어르신, 요약 {i}번이에요."}, ensure_ascii=False) + "\n")
+
+    error_agent = _record(1)
+    error_agent["agents"]["할머니 복례"] = {"score": -1, "comment": "오류:APITimeoutError"}
+    parse_fail = _record(2)
+    parse_fail["final"]["이해도"] = -1
+    with open(args.output, "w", encoding="utf-8") as f:
+        for rec in (_record(0, comment="이전 실행"), error_agent, parse_fail):
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.write('{"idx": 3, "fin')  # 중단으로 잘린 줄
+
+    assert set(judge.load_done(Path(args.output))) == {0}
+
+    with FakeJudge() as fj:
+        report = asyncio.run(judge.run(args, fj.base_url, "fake"))
+        assert report["lines"] == 4 and report["api_calls"] == 4 * 5 and report["failures"] == 0
+
+        lines = Path(args.output).read_text(encoding="utf-8").splitlines()
+        recs = [json.loads(line) for line in lines]
+        assert [r["idx"] for r in recs] == list(range(5))
+        assert recs[0]["final"]["comment"] == "이전 실행"
+        assert not any(judge.is_failed(r) for r in recs)
+
+        # 처음부터 다시: 이번에 채점한 라인은 캐시에서, 건너뛰었던 0번만 API 호출
+        again = asyncio.run(judge.run(_args(tmp_path, fresh=True), fj.base_url, "fake"))
+        assert again["api_calls"] == 5 and again["cache_hits"] == 4 * 5
+        assert fj.requests == 5 * 5
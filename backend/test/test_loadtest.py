@@ -0,0 +1,59 @@
+# backend/test/test_loadtest.py
+# 가짜 모델로 앱을 띄워 짧은 부하를 걸고 보고서 형식/집계 확인
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.loadtest import parse_mix, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_summarize_counts_429_and_lag_per_stage():
+    records = [
+        (0.1, "ask", 200, 0.5),
+        (0.2, "ask", 429, 0.01),
+        (0.3, "tts", 200, 0.1),
+        (1.5, "ask", 200, 0.7),   # 두 번째 단계
+    ]
+    lag = [(0.5, 0.002), (1.2, 0.3)]
+    stages = summarize(records, lag, [(2, 0.0, 1.0), (4, 1.0, 2.0)])
+    first, second = stages
+    assert first["requests"] == 3 and first["rate_429"] == 1 / 3
+    assert first["endpoints"]["ask"]["latency_s"]["n"] == 1  # 429는 지연 통계에서 제외
+    assert first["loop_lag_s"]["max"] == 0.002
+    assert second["endpoints"]["ask"]["ok"] == 1 and second["loop_lag_s"]["max"] == 0.3
+
+
+def test_parse_mix_rejects_unknown_endpoint():
+    assert parse_mix("ask=0.7,tts=0.3") == {"ask": 0.7, "tts": 0.3}
+    try:
+        parse_mix("ask=1,vlm=1")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown endpoint accepted")
+
+
+def test_loadtest_end_to_end(tmp_path):
+    # 모듈 수준 설정(DB 경로, TTS URL 등)이 이미 import 된 값에 묶이지 않도록 별도 프로세스로 실행
+    out = tmp_path / "report.json"
+    env = dict(os.environ, FAKE_VISION_SEC="0", FAKE_PREFILL_SEC="0.01", FAKE_DECODE_TOK_SEC="0.0005")
+    subprocess.run(
+        [sys.executable, "scripts/loadtest.py", "--stages", "2:1,4:1", "--think", "0.02",
+         "--tts_latency", "0.005", "--images", "2", "--out", str(out)],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, timeout=120,
+    )
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert [s["users"] for s in report["stages"]] == [2, 4]
+    total = {}
+    for s in report["stages"]:
+        assert s["loop_lag_s"]["n"] > 0
+        for ep, e in s["endpoints"].items():
+            assert e["errors"] == 0, (ep, e)
+            total[ep] = total.get(ep, 0) + e["requests"]
+    assert total.get("start_session", 0) >= 2
+    assert sum(total.values()) > 10
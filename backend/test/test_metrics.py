@@ -0,0 +1,120 @@
+# backend/test/test_metrics.py
+# /metrics: 스레드별 shard 합산(끝난 스레드 배열은 합쳐서 정리), Prometheus 텍스트 형식, span -> 히스토그램 매핑, 엔드포인트 확인
+
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from infrastructure import metrics, tracing
+from routes.metrics_router import router as metrics_router
+
+
+@pytest.fixture(autouse=True)
+def no_trace_log(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_LOG", False)  # TRACE_DIR/flush는 conftest에서
+
+
+def _samples(text: str) -> dict[str, float]:
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            out[name] = float(value)
+    return out
+
+
+def test_counter_and_histogram_sum_across_threads():
+    c = metrics.counter("test_threads_ops", "테스트", ["kind"])
+    h = metrics.histogram("test_threads_seconds", "테스트", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            c.labels(kind="a").inc()
+            h.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    h.observe(0.1)   # 경계값은 그 구간(le=0.1)에 포함
+    h.observe(5.0)
+
+    s = _samples(metrics.render())
+    assert s['test_threads_ops_total{kind="a"}'] == 8000
+    assert s['test_threads_seconds_bucket{le="0.1"}'] == 1
+    assert s['test_threads_seconds_bucket{le="1"}'] == 8001  # 누적
+    assert s['test_threads_seconds_bucket{le="+Inf"}'] == s["test_threads_seconds_count"] == 8002
+    assert s["test_threads_seconds_sum"] == pytest.approx(8000 * 0.5 + 5.1)
+
+
+def test_short_lived_threads_do_not_accumulate_shards():
+    c = metrics.counter("test_short_threads_ops", "테스트")
+    h = metrics.histogram("test_short_threads_seconds", "테스트", buckets=(1.0,))
+
+    def work():
+        c.inc()
+        h.observe(0.5)
+
+    for _ in range(50):
+        threads = [threading.Thread(target=work) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    c.inc()  # 살아 있는 스레드(현재) 배열 하나
+
+    assert c._default.value == 501
+    assert h._default.snapshot() == ([500.0, 0.0], 250.0)
+    assert len(c._default._shards._live) == 1 and not h._default._shards._live  # 끝난 스레드 배열은 합쳐짐
+
+
+def test_spans_feed_model_db_and_external_histograms():
+    before = _samples(metrics.render())
+    with tracing.span("job"):
+        with tracing.span("model.chat", input_tokens=100):
+            tracing.add_span("model.decode", 0, 2_000_000_000, task="chat", output_tokens=40)
+        tracing.add_span("db.query", 0, 1_000_000, **{"db.operation": "INSERT"})
+        with pytest.raises(RuntimeError):
+            with tracing.span("tts", kind=tracing.CLIENT):
+                raise RuntimeError("down")
+        with tracing.span("queue.wait", rejected=True):
+            pass
+
+    s = _samples(metrics.render())
+
+    def delta(key):
+        return s.get(key, 0) - before.get(key, 0)
+
+    assert delta('siseon_model_generated_tokens_total{task="chat"}') == 40
+    assert delta('siseon_model_decode_tokens_per_second_bucket{task="chat",le="20"}') == 1  # 40토큰/2초
+    assert delta('siseon_model_phase_seconds_count{phase="chat"}') == 1
+    assert delta('siseon_db_query_seconds_count{operation="INSERT"}') == 1
+    assert delta('siseon_external_request_seconds_count{service="naver_tts",outcome="error"}') == 1
+    assert delta("siseon_gate_rejected_total") == 1
+    assert delta('siseon_stage_seconds_count{stage="job"}') == 1
+
+
+def test_metrics_endpoint_uses_route_templates_and_skips_itself():
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/api/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for i in range(3):
+        client.get(f"/api/items/{i}")
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "x-request-id" not in r.headers  # 스크레이프는 트레이스하지 않음
+
+    s = _samples(r.text)
+    key = 'siseon_http_request_duration_seconds_count{method="GET",route="/api/items/{item_id}",status="200"}'
+    assert s[key] >= 3
+    assert not any('route="/metrics"' in k for k in s)
+    assert "# TYPE siseon_cache_lookups counter" in r.text
@@ -0,0 +1,89 @@
+# backend/test/test_profiler.py
+# 관리자 트리거 프로파일러: 다음 N번만 캡처, folded/Chrome trace 출력, 꺼져 있을 때는 그대로 통과, 관리자 API 권한
+
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from infrastructure import profiler, tracing
+from routes import admin_router
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(tracing, "TRACE_DIR", tmp_path / "traces")
+    monkeypatch.setattr(tracing, "TRACE_LOG", False)
+    yield tmp_path
+    profiler.disarm()
+    tracing.flush()
+
+
+def _busy_resize(sec):
+    end = time.perf_counter() + sec
+    while time.perf_counter() < end:
+        pass
+
+
+@profiler.profiled("ask")
+def ask(sec=0.05):
+    with tracing.span("processor"):
+        _busy_resize(sec)
+    return "ok"
+
+
+def test_disabled_passes_through(profile_dir):
+    before = profiler.status()["captured"]
+    assert ask(0.0) == "ok"
+    assert profiler.status()["captured"] == before
+    assert list(profile_dir.glob("*.folded")) == []
+
+
+def test_captures_next_n_calls(profile_dir):
+    before = profiler.status()["captured"]
+    profiler.arm(2, torch=False, interval_ms=1)
+    for _ in range(3):
+        assert ask() == "ok"
+
+    st = profiler.status()
+    assert st["remaining"] == 0 and st["captured"] - before == 2
+    entry = st["recent"][-1]
+    assert entry["call"] == "ask" and entry["samples"] > 0 and entry["error"] is None
+
+    folded = (profile_dir / entry["files"][0]).read_text(encoding="utf-8")
+    top = folded.splitlines()[0]
+    assert "_busy_resize (test_profiler.py" in top and top.rsplit(" ", 1)[1].isdigit()
+
+    trace = json.loads((profile_dir / entry["files"][1]).read_text(encoding="utf-8"))
+    spans = {e["name"]: e for e in trace["traceEvents"] if e["ph"] == "X"}
+    assert {"profile.ask", "processor"} <= set(spans)
+    assert spans["processor"]["dur"] <= spans["profile.ask"]["dur"]
+    leaf = trace["stackFrames"][trace["samples"][0]["sf"]]
+    assert leaf["name"].startswith(("_busy_resize", "ask"))
+    assert len(list(profile_dir.glob("*.folded"))) == 2
+
+
+def test_admin_api_requires_token(profile_dir, monkeypatch):
+    app = FastAPI()
+    app.include_router(admin_router.router)
+    client = TestClient(app)
+
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", None)
+    assert client.post("/api/admin/profile", json={"requests": 1}).status_code == 403
+
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    assert client.get("/api/admin/profile", headers={"X-Admin-Token": "nope"}).status_code == 403
+    r = client.post("/api/admin/profile", json={"requests": 1, "torch": False}, headers=headers)
+    assert r.status_code == 200 and r.json()["remaining"] == 1
+    assert client.post("/api/admin/profile", json={"requests": 10_000}, headers=headers).status_code == 422
+
+    ask()
+    name = client.get("/api/admin/profile", headers=headers).json()["recent"][-1]["files"][0]
+    r = client.get(f"/api/admin/profile/files/{name}", headers=headers)
+    assert r.status_code == 200 and "_busy_resize" in r.text
+    assert client.get("/api/admin/profile/files/..%2Fsecret", headers=headers).status_code == 404
+    assert client.delete("/api/admin/profile", headers=headers).json()["remaining"] == 0
@@ -0,0 +1,91 @@
+# backend/test/test_ref_logps.py
+# DPO 기준 log-prob 캐시: 어댑터/데이터/설정이 바뀌면 다른 키, TRL 컬럼 이름 확인, 사전 계산 표시, 저장/로드
+
+from types import SimpleNamespace
+
+import pytest
+
+from data_store.datasets import DatasetSink
+from scripts import ref_logps
+
+
+def _adapter(d, weights: bytes):
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "adapter_config.json").write_text('{"r": 16}', encoding="utf-8")
+    (d / "adapter_model.safetensors").write_bytes(weights)
+    (d / "README.md").write_text("무시되는 파일", encoding="utf-8")
+    return d
+
+
+def test_cache_key_tracks_adapter_data_and_settings(tmp_path):
+    sink = DatasetSink(tmp_path / "dpo", "dpo_dataset", fsync=False)
+    sink.append({"prompt": "p", "chosen": "좋음", "rejected": "나쁨"})
+    sink.flush()
+    adapter = _adapter(tmp_path / "sft", b"\x00" * 64)
+
+    key = ref_logps.cache_key(adapter, "base", sink.dir, max_length=2048)
+    assert key == ref_logps.cache_key(adapter, "base", sink.dir, max_length=2048)
+    assert key != ref_logps.cache_key(adapter, "base", sink.dir, max_length=1024)
+    assert key != ref_logps.cache_key(adapter, "other-base", sink.dir, max_length=2048)
+
+    (adapter / "README.md").write_text("바뀌어도 키는 그대로", encoding="utf-8")
+    assert key == ref_logps.cache_key(adapter, "base", sink.dir, max_length=2048)
+    _adapter(adapter, b"\x01" * 64)  # 재학습된 어댑터
+    retrained = ref_logps.cache_key(adapter, "base", sink.dir, max_length=2048)
+    assert retrained != key
+
+    sink.append({"prompt": "q", "chosen": "좋음", "rejected": "나쁨"})
+    sink.close()
+    assert ref_logps.cache_key(adapter, "base", sink.dir, max_length=2048) != retrained
+
+    assert ref_logps.cache_dir(sink.dir, key).parent == sink.dir / ".ref_logps"
+    assert ref_logps.load(sink.dir, key) is None
+
+
+def test_adapter_hash_requires_adapter_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ref_logps.adapter_hash(tmp_path)
+
+
+def test_column_names_checked_against_trl_source():
+    current = 'batch["ref_chosen_logps"], batch["ref_rejected_logps"]'
+    legacy = 'batch["reference_chosen_logps"], batch["reference_rejected_logps"]'
+    assert ref_logps.missing_columns(current) == []
+    assert ref_logps.missing_columns(legacy) == list(ref_logps.REF_COLUMNS)
+
+
+def test_use_precomputed_marks_trainer():
+    ds = SimpleNamespace(column_names=["prompt", "chosen", "rejected", *ref_logps.REF_COLUMNS])
+    trainer = SimpleNamespace(train_dataset=ds, _precomputed_train_ref_log_probs=False)
+    assert ref_logps.use_precomputed(trainer)._precomputed_train_ref_log_probs is True
+
+    trainer = SimpleNamespace(train_dataset=SimpleNamespace(column_names=["prompt"]),
+                              _precomputed_train_ref_log_probs=False)
+    with pytest.raises(RuntimeError):  # 데이터셋 준비 중 컬럼이 사라짐
+        ref_logps.use_precomputed(trainer)
+    with pytest.raises(RuntimeError):  # precompute 상태가 없는 TRL
+        ref_logps.use_precomputed(SimpleNamespace(train_dataset=ds))
+
+
+def test_compute_refuses_peft_model_without_reference_adapter():
+    peft_like = SimpleNamespace(peft_config={"default": None})
+    with pytest.raises(ValueError):  # 어댑터를 끈 베이스 모델 log-prob이 캐시될 뻔함
+        ref_logps.compute(None, None, peft_like, None)
+
+
+def test_save_then_load_round_trip(tmp_path):
+    datasets = pytest.importorskip("datasets")
+    sink = DatasetSink(tmp_path / "dpo", "dpo_dataset", fsync=False)
+    sink.append({"prompt": "p", "chosen": "좋음", "rejected": "나쁨"})
+    sink.close()
+
+    rows = {"prompt": ["p"], "chosen": ["좋음"], "rejected": ["나쁨"]}
+    path = ref_logps.save(datasets.Dataset.from_dict({**rows, "ref_chosen_logps": [-1.5],
+                                                      "ref_rejected_logps": [-3.0]}),
+                          sink.dir, "k1", {"adapter": "sft"})
+    assert (path / "ref_meta.json").exists() and not path.with_name("k1.part").exists()
+    loaded = ref_logps.load(sink.dir, "k1")
+    assert loaded["ref_rejected_logps"] == [-3.0]
+
+    ref_logps.save(datasets.Dataset.from_dict(rows), sink.dir, "k2")  # 컬럼 없는 캐시는 무시
+    assert ref_logps.load(sink.dir, "k2") is None
@@ -0,0 +1,125 @@
+# backend/test/test_retention.py
+# 보존 작업: 오래된 행 아카이브 후 삭제, 같은 시각 아카이브 이름 충돌, 고아 업로드/blob 정리, VACUUM 확인
+
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import zstandard
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config import Base
+from data_store import blob_store, retention
+from models import Conversation, Feedback, RecentDoc
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(retention, "SessionLocal", Session)
+    monkeypatch.setattr(retention, "engine", engine)
+    monkeypatch.setattr(retention, "DB_PATH", str(db_path))
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(blob_store, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "BLOB_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "DERIVED_DIR", tmp_path / "blobs" / "derived")
+    return Session
+
+
+def _add(Session, *rows):
+    db = Session()
+    try:
+        db.add_all(rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _read_archive(path) -> list[dict]:
+    with open(path, "rb") as f:
+        data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def _age(path, sec):
+    t = time.time() - sec
+    os.utime(path, (t, t))
+
+
+def test_archive_moves_old_rows_and_never_overwrites(store):
+    old = NOW - timedelta(days=100)
+    _add(store, *(Conversation(user_id="u1", doc_id="d1", role="user", text=f"옛날 {i}", ts=old) for i in range(3)))
+    _add(store, Conversation(user_id="u1", doc_id="d1", role="user", text="최근", ts=NOW))
+    policy = retention.TABLE_POLICIES["conversations"]
+
+    first = retention.archive_table("conversations", policy, now=NOW)
+    assert first["archived"] == 3
+    assert [r["text"] for r in _read_archive(first["archive"])] == ["옛날 0", "옛날 1", "옛날 2"]
+    db = store()
+    try:
+        assert [c.text for c in db.query(Conversation)] == ["최근"]
+    finally:
+        db.close()
+
+    # 같은 now로 한 번 더: 새 행만 별도 파일로, 기존 아카이브는 그대로
+    _add(store, Conversation(user_id="u1", doc_id="d1", role="user", text="옛날 3", ts=old))
+    second = retention.archive_table("conversations", policy, now=NOW)
+    assert second["archive"] != first["archive"]
+    assert len(_read_archive(first["archive"])) == 3
+    assert [r["text"] for r in _read_archive(second["archive"])] == ["옛날 3"]
+
+    assert retention.archive_table("conversations", policy, now=NOW) == {
+        "table": "conversations", "archived": 0, "archive": None}
+    assert not list((retention.ARCHIVE_DIR / "conversations").glob("*.part"))
+
+
+def test_sweep_keeps_referenced_and_recent_uploads(store, tmp_path):
+    up = tmp_path / "uploads"
+    up.mkdir()
+    names = {k: up / f"{k * 32}_1.jpg" for k in "abcd"}
+    for p in names.values():
+        p.write_bytes(b"x" * 10)
+    for k in "abc":
+        _age(names[k], 7200)
+    (up / "keep.txt").write_bytes(b"x")
+    _age(up / "keep.txt", 7200)
+
+    _add(store, RecentDoc(user_id="u1", doc_id="d1", path=str(names["a"])),
+         Feedback(user_id="u1", doc_id="d2", image_path=str(names["b"]), feedback="bad"))
+    policy = {"dir": str(up), "pattern": retention.FILE_POLICIES["uploads"]["pattern"], "grace_sec": 3600}
+
+    report = retention.sweep_orphan_files("uploads", policy)
+    assert report == {"files": "uploads", "removed": 1, "bytes": 10}
+    assert sorted(p.name for p in up.iterdir()) == sorted([names["a"].name, names["b"].name,
+                                                           names["d"].name, "keep.txt"])
+
+
+def test_run_retention_gcs_blobs_and_vacuums(store, monkeypatch):
+    monkeypatch.setitem(retention.FILE_POLICIES["uploads"], "dir", "/nonexistent")
+    monkeypatch.setitem(retention.FILE_POLICIES["uploads"], "grace_sec", 0)
+    kept = blob_store.put_fileobj(io.BytesIO(b"kept"))
+    orphan = blob_store.put_fileobj(io.BytesIO(b"orphan"))
+    _add(store, RecentDoc(user_id="u1", doc_id="d1", path=kept, mtime=datetime.utcnow()))
+    _age(kept, 10)
+    _age(orphan, 10)
+
+    report = retention.run_retention()
+    assert os.path.exists(kept) and not os.path.exists(orphan)
+    assert {"files": "blobs", "removed": 1, "bytes": len(b"orphan")} in report["files"]
+    assert report["vacuum"] is not None
+
+    # 참조 목록을 못 읽으면 파일은 건드리지 않음
+    monkeypatch.setattr(retention, "_referenced_paths", lambda: 1 / 0)
+    orphan = blob_store.put_fileobj(io.BytesIO(b"orphan2"))
+    _age(orphan, 10)
+    assert retention.run_retention()["files"] == []
+    assert os.path.exists(orphan)
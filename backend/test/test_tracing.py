@@ -0,0 +1,140 @@
+# backend/test/test_tracing.py
+# 요청 단위 트레이싱: span 부모 관계(스레드 포함), OTLP/JSON 파일 내보내기, DB span, 응답 헤더, 파일 보존/용량 상한 확인
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from infrastructure import tracing
+
+
+@pytest.fixture
+def trace_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_DIR", tmp_path)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "TRACE_LOG", False)
+    yield tmp_path
+    tracing.flush()
+
+
+def _exported(trace_dir) -> list[dict]:
+    assert tracing.flush()
+    spans = []
+    for line in tracing.trace_file().read_text(encoding="utf-8").splitlines():
+        for rs in json.loads(line)["resourceSpans"]:
+            for ss in rs["scopeSpans"]:
+                spans.extend(ss["spans"])
+    return spans
+
+
+def _attr(span: dict, key: str):
+    for a in span["attributes"]:
+        if a["key"] == key:
+            return next(iter(a["value"].values()))
+    return None
+
+
+def _db_write():
+    with tracing.span("db.write"):
+        pass
+
+
+def test_spans_nest_across_threads_and_export_otlp(trace_dir):
+    async def handler():
+        with tracing.span("root", request_id="req-1") as root:
+            with tracing.span("classify", input_tokens=12):
+                pass
+            await asyncio.to_thread(_db_write)  # to_thread는 context를 복사
+            t = threading.Thread(target=tracing.wrap(lambda: tracing.add_span("model.decode", 1, 2, output_tokens=3)))
+            t.start()
+            t.join()
+            return root
+
+    root = asyncio.run(handler())
+    by_name = {s["name"]: s for s in _exported(trace_dir)}
+
+    assert {"root", "classify", "db.write", "model.decode"} <= set(by_name)
+    assert "parentSpanId" not in by_name["root"]
+    for name in ("classify", "db.write", "model.decode"):
+        assert by_name[name]["parentSpanId"] == root.span_id
+        assert by_name[name]["traceId"] == by_name["root"]["traceId"]
+        assert _attr(by_name[name], "request.id") == "req-1"
+    assert _attr(by_name["classify"], "input_tokens") == "12"  # OTLP intValue는 문자열
+    assert _attr(by_name["model.decode"], "output_tokens") == "3"
+
+
+def test_error_status_and_db_spans(trace_dir):
+    engine = tracing.instrument_engine(create_engine("sqlite://"))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # span 밖: 기록 안 됨
+    with pytest.raises(RuntimeError):
+        with tracing.span("job"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            raise RuntimeError("boom")
+
+    spans = _exported(trace_dir)
+    job = next(s for s in spans if s["name"] == "job")
+    db = [s for s in spans if s["name"] == "db.query"]
+    assert job["status"] == {"code": 2, "message": "RuntimeError: boom"}
+    assert len(db) == 1 and db[0]["parentSpanId"] == job["spanId"]
+    assert _attr(db[0], "db.operation") == "SELECT"
+
+
+def test_middleware_sets_request_id_and_server_timing(trace_dir):
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        with tracing.span("classify"):
+            time.sleep(0.01)
+        return {"rid": tracing.request_id()}
+
+    client = TestClient(app)
+    r = client.get("/work", headers={"X-Request-ID": "abc123"})
+    assert r.headers["x-request-id"] == "abc123" == r.json()["rid"]
+    timing = dict(part.split(";dur=") for part in r.headers["server-timing"].split(", "))
+    assert float(timing["classify"]) >= 10 and "total" in timing
+
+    r = client.get("/work")
+    assert len(r.headers["x-request-id"]) == 16  # 없으면 새로 발급
+
+    roots = [s for s in _exported(trace_dir) if s["name"] == "GET /work"]
+    assert {_attr(s, "request.id") for s in roots} == {"abc123", r.headers["x-request-id"]}
+    assert all(_attr(s, "http.status_code") == "200" for s in roots)
+
+
+def test_old_and_oversized_trace_files_are_pruned(trace_dir, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_RETENTION_DAYS", 7)
+    monkeypatch.setattr(tracing, "TRACE_MAX_MB", 3 / 1024)  # 3KB
+    old = time.time() - 10 * 86400
+    for day, size, mtime in (("20250101", 10, old), ("20250601", 2048, None), ("20250602", 512, None)):
+        p = trace_dir / f"traces-{day}.jsonl"
+        p.write_bytes(b"x" * size)
+        if mtime:
+            os.utime(p, (mtime, mtime))
+    current = trace_dir / "traces-20250603.jsonl"
+    current.write_bytes(b"x" * 1024)
+    (trace_dir / "other.jsonl").write_bytes(b"x")
+
+    assert tracing.prune_traces(current) == 2  # 기간 초과 1 + 용량 초과(가장 오래된 날) 1
+    assert sorted(p.name for p in trace_dir.iterdir()) == ["other.jsonl", "traces-20250602.jsonl", current.name]
+
+
+def test_todays_file_stops_growing_at_cap(trace_dir, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_MB", 2 / 1024)  # 2KB
+    capped = tracing.TRACE_STATS["capped"]
+    for i in range(30):
+        with tracing.span("root", i=i):
+            pass
+        assert tracing.flush()  # 한 번에 묶여 통째로 넘치지 않게 하나씩
+    assert 0 < tracing.trace_file().stat().st_size <= 2048
+    assert tracing.TRACE_STATS["capped"] > capped
@@ -0,0 +1,187 @@
+# backend/test/test_train_data.py
+# 학습 스트리밍 로더: 회전 샤드 지연 읽기, 접근 시/백그라운드 토큰화, 토큰 캐시 재사용, 길이 그룹/packing (CPU, 작은 토크나이저)
+
+import pytest
+
+from data_store.datasets import DatasetSink
+from scripts.train_data import (
+    PackedDataset,
+    TokenizedShards,
+    iter_pairs,
+    length_grouped_indices,
+    pack_bins,
+    padding_ratio,
+    tokenizer_hash,
+)
+
+
+class CharTokenizer:
+    """문자 단위 토크나이저 (HF 토크나이저 호출 형태만 흉내)"""
+
+    def __init__(self, offset: int = 0):
+        self.offset = offset
+        self.calls = 0
+
+    def get_vocab(self):
+        return {"<offset>": self.offset}
+
+    def __call__(self, text, truncation=False, max_length=None):
+        self.calls += 1
+        ids = [ord(c) % 1000 + self.offset for c in text]
+        return {"input_ids": ids[:max_length] if truncation else ids}
+
+
+def _make_source(tmp_path, n=120):
+    sink = DatasetSink(tmp_path / "sft", "sft", rotate_bytes=1024, batch=10, fsync=False)
+    for i in range(n):
+        sink.append({"instruction": f"요약{i}", "output": "가" * (i % 37 + 1)})
+    sink.close()
+    return sink.dir
+
+
+def test_tokenized_shards_match_direct_tokenization(tmp_path):
+    src = _make_source(tmp_path)
+    tok = CharTokenizer()
+    ds = TokenizedShards(src, tok, max_length=32, num_workers=2)  # 백그라운드 프로세스에서 미리 토큰화
+    assert ds.stats["shards"] >= 3 and ds.stats["tokenized"] == 0
+
+    assert len(ds) == 120
+    for i in (0, 57, 119, -1):
+        k = i % 120
+        expect = tok(f"요약{k}\n\n" + "가" * (k % 37 + 1), truncation=True, max_length=32)["input_ids"]
+        assert ds[i]["input_ids"] == expect == ds[i]["labels"]
+    assert max(ds.lengths) == 32
+    assert ds.stats["tokenized"] == ds.stats["shards"]
+
+
+def test_shards_are_tokenized_on_first_access(tmp_path):
+    src = _make_source(tmp_path)
+    tok = CharTokenizer()
+    ds = TokenizedShards(src, tok, max_length=32)
+    assert len(ds) == 120 and tok.calls == 0  # 예시 수는 토큰화 없이 셈
+
+    ds[0]
+    first = tok.calls
+    assert ds.stats["tokenized"] == 1 and 0 < first < 120
+    ds[1]
+    assert tok.calls == first  # 같은 샤드는 다시 토큰화하지 않음
+    ds[-1]
+    assert ds.stats["tokenized"] == 2
+
+    ds.lengths  # 길이 그룹/packing은 전체 샤드가 필요
+    assert ds.stats["tokenized"] == ds.stats["shards"] and tok.calls == 120
+
+
+def test_cache_keyed_by_tokenizer_and_max_length(tmp_path):
+    src = _make_source(tmp_path)
+    first = TokenizedShards(src, CharTokenizer(), max_length=32)
+    first.lengths
+    tok = CharTokenizer()
+    again = TokenizedShards(src, tok, max_length=32)
+    assert again.stats["cached"] == again.stats["shards"]
+    assert again.lengths.tolist() == first.lengths.tolist() and tok.calls == 0
+    assert again.cache_dir == first.cache_dir
+
+    other = TokenizedShards(src, CharTokenizer(offset=1), max_length=32)
+    assert other.cache_dir != first.cache_dir and other.stats["cached"] == 0
+    assert TokenizedShards(src, CharTokenizer(), max_length=16).stats["cached"] == 0
+    assert tokenizer_hash(CharTokenizer()) != tokenizer_hash(CharTokenizer(offset=1))
+
+
+def test_length_grouping_and_packing_cut_padding(tmp_path):
+    ds = TokenizedShards(_make_source(tmp_path), CharTokenizer(), max_length=32)
+    lengths, bs = ds.lengths, 4
+
+    order = length_grouped_indices(lengths, bs, mega_batches=8)
+    assert sorted(order) == list(range(len(ds)))
+    plain = [list(range(k, min(k + bs, len(ds)))) for k in range(0, len(ds), bs)]
+    grouped = [order[k:k + bs] for k in range(0, len(order), bs)]
+    assert padding_ratio(lengths, grouped) < padding_ratio(lengths, plain)
+
+    bins = pack_bins(lengths, 64)
+    assert sorted(i for b in bins for i in b) == list(range(len(ds)))
+    assert all(sum(lengths[i] for i in b) <= 64 for b in bins)
+    assert len(bins) < len(ds) / 2
+
+    packed = PackedDataset(ds, 64)
+    item = packed[0]
+    assert sum(item["seq_lens"]) == len(item["input_ids"]) <= 64
+
+
+def test_iter_pairs_streams_dpo_rows(tmp_path):
+    sink = DatasetSink(tmp_path / "dpo", "dpo_dataset", rotate_bytes=256, fsync=False)
+    for i in range(20):
+        sink.append({"prompt": f"p{i}", "chosen": "좋음", "rejected": "나쁨", "doc_id": "d"})
+    sink.append({"prompt": "x", "chosen": None, "rejected": "나쁨"})
+    sink.close()
+    rows = list(iter_pairs(sink.dir))
+    assert [r["prompt"] for r in rows] == [f"p{i}" for i in range(20)]
+    assert set(rows[0]) == {"prompt", "chosen", "rejected"}
+
+
+def test_packing_collator_isolates_examples():
+    import numpy as np
+
+    from scripts.train_data import PackingCollator, ThroughputMeter
+
+    feats = [
+        {"input_ids": [5, 6, 7, 8, 9], "seq_lens": [3, 2]},
+        {"input_ids": [1, 2], "seq_lens": [2]},
+    ]
+    meter = ThroughputMeter(PackingCollator(pad_token_id=0, mask="4d"))
+    out = {k: np.asarray(v) for k, v in meter(feats).items()}
+
+    assert out["position_ids"].tolist() == [[0, 1, 2, 0, 1], [0, 1, 0, 0, 0]]
+    # 각 예시의 첫 토큰과 padding은 loss에서 제외
+    assert out["labels"].tolist() == [[-100, 6, 7, -100, 9], [-100, 2, -100, -100, -100]]
+
+    mask = out["attention_mask"]
+    if mask.dtype != bool:  # torch가 있으면 더하기형 마스크
+        mask = mask == 0
+    m = mask[0, 0]
+    assert m[2, :3].all() and not m[2, 3:].any()        # 첫 예시 마지막 토큰
+    assert m[4, 3:].all() and not m[4, :3].any()        # 두 번째 예시는 첫 예시를 보지 못함
+    assert not m[0, 1]                                  # causal
+    assert meter.report()["padding_ratio"] == round(1 - 7 / 10, 4)
+
+    flat = PackingCollator(mask="flash")(feats)
+    assert "attention_mask" not in flat
+    assert np.asarray(flat["position_ids"]).tolist() == [[0, 1, 2, 0, 1, 0, 1]]
+
+
+def test_collation_report_prefers_packing(tmp_path):
+    from scripts.train_data import collation_report
+
+    ds = TokenizedShards(_make_source(tmp_path), CharTokenizer(), max_length=32)
+    r = collation_report(ds, batch_size=2, max_length=64)
+    assert r["packed"]["steps"] < r["plain"]["steps"]
+    assert r["packed"]["padding_ratio"] < r["grouped"]["padding_ratio"] <= r["plain"]["padding_ratio"]
+
+
+def test_trainer_step_keeps_packing_columns(tmp_path):
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    from scripts.train_data import PackingCollator, ThroughputMeter
+
+    ds = PackedDataset(TokenizedShards(_make_source(tmp_path), CharTokenizer(), max_length=32), 64)
+    model = transformers.GPT2LMHeadModel(transformers.GPT2Config(
+        vocab_size=1000, n_positions=64, n_embd=16, n_layer=1, n_head=2))
+
+    def trainer(remove_unused_columns):
+        # train_sft_then_dpo.py 스트리밍 경로와 같은 설정 (remove_unused_columns=not STREAMING)
+        args = transformers.TrainingArguments(
+            output_dir=str(tmp_path / "out"), per_device_train_batch_size=2, max_steps=1,
+            report_to=[], use_cpu=True, remove_unused_columns=remove_unused_columns)
+        meter = ThroughputMeter(PackingCollator(mask="flash"))
+        return transformers.Trainer(model=model, args=args, train_dataset=ds, data_collator=meter), meter
+
+    with pytest.raises(KeyError):  # 기본값이면 seq_lens가 collator 전에 지워짐
+        next(iter(trainer(True)[0].get_train_dataloader()))
+
+    t, meter = trainer(False)
+    batch = next(iter(t.get_train_dataloader()))
+    assert batch["position_ids"].shape == batch["input_ids"].shape
+    assert (batch["position_ids"] == 0).sum() > 1  # 예시 경계마다 0부터 다시
+    t.train()
+    assert t.state.global_step == 1 and meter.report()["tokens"] > 0
+    assert torch.isfinite(torch.tensor(t.state.log_history[-1]["train_loss"]))
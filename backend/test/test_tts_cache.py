@@ -0,0 +1,113 @@
+# backend/test/test_tts_cache.py
+# 같은 텍스트 반복 TTS는 API를 한 번만 호출하고, 용량 초과 시 오래된 항목부터 제거되는지 확인
+# (/api/tts 캐시 상태 헤더·JSON, stats 관리자 전용 포함)
+
+import asyncio
+
+import pytest
+
+from infrastructure import http_client, tts_cache, tts_client
+from scripts.stubs import NaverStub
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(tts_cache, "_index", None)
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_STATS", dict.fromkeys(tts_cache.TTS_CACHE_STATS, 0))
+    with NaverStub() as s:
+        monkeypatch.setattr(tts_client, "TTS_URL", s.tts_url)
+        yield s
+
+
+def _run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await http_client.aclose()
+    return asyncio.run(main())
+
+
+def test_replay_hits_cache(stub):
+    async def replay():
+        first = await asyncio.gather(*(tts_client.text_to_speech_file("요약입니다") for _ in range(3)))
+        again = await tts_client.text_to_speech_file("요약입니다")
+        return first + [again]
+
+    results = _run(replay())
+    assert len(stub.requests) == 1
+    assert all(path == results[0][0] for path, _ in results)
+    assert [cache for _, cache in results] == ["miss", "coalesced", "coalesced", "hit"]
+    stats = tts_cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 2, 1)  # 동시 요청 2개는 합류
+    assert stats["hit_rate"] == 0.25
+
+
+def test_router_reports_cache_state(stub, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes import admin_router, tts_router
+
+    key = tts_cache.cache_key("안녕하세요", tts_client.DEFAULT_SPEAKER, tts_client.DEFAULT_SPEED, tts_client.DEFAULT_FORMAT)
+    tts_cache.store(key, tts_client.DEFAULT_FORMAT, b"ID3audio")
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(tts_router.router)
+    with TestClient(app) as client:
+        r = client.post("/api/tts", json={"text": "안녕하세요"})
+        assert r.headers["X-TTS-Cache"] == "hit" and r.content == b"ID3audio"
+        body = client.post("/api/tts/url", json={"text": "안녕하세요"}).json()
+        assert client.get("/api/tts/stats").status_code == 403  # 통계는 관리자 전용
+        stats = client.get("/api/tts/stats", headers={"X-Admin-Token": "secret"}).json()
+    assert body == {"url": f"/static/audio/tts/{key}.{tts_client.DEFAULT_FORMAT}", "cache": "hit"}
+    assert stats["hits"] == 2
+    assert not stub.requests
+
+
+def test_lru_eviction(stub, monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_MAX_BYTES", 30)
+    monkeypatch.setattr(tts_cache, "TTS_EVICT_GRACE_SEC", 0)
+
+    async def fill():
+        for i in range(4):
+            await tts_client.text_to_speech(f"문장{i}")  # 각 10바이트
+
+    _run(fill())
+    stats = tts_cache.stats()
+    assert stats["bytes"] <= 30
+    assert stats["evictions"] == 1
+
+
+def test_eviction_spares_recently_served(stub, monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_MAX_BYTES", 30)
+
+    async def fill():
+        return [(await tts_client.text_to_speech_file(f"문장{i}"))[0] for i in range(4)]
+
+    paths = _run(fill())
+    stats = tts_cache.stats()
+    assert stats["evictions"] == 0 and stats["bytes"] == 40  # 방금 돌려준 URL은 아직 받아 가기 전일 수 있음
+    assert all(p.exists() for p in paths)
+
+    monkeypatch.setattr(tts_cache, "TTS_EVICT_GRACE_SEC", 0)
+    _run(tts_client.text_to_speech("문장4"))
+    assert tts_cache.stats()["bytes"] <= 30
+
+
+def test_stream_tts_orders_chunks_and_reuses_cache(stub):
+    from infrastructure.tts_stream import stream_tts
+
+    text = "첫 번째 문장입니다. 두 번째 문장입니다. 세 번째 문장입니다."
+
+    async def collect():
+        timings = {}
+        chunks = [c async for c in stream_tts(text, timings=timings)]
+        again = [c async for c in stream_tts(text)]
+        return chunks, again, timings
+
+    chunks, again, timings = _run(collect())
+    assert [c[3:].decode() for c in chunks] == ["첫 번째 문장입니다.", "두 번째 문장입니다.", "세 번째 문장입니다."]
+    assert again == chunks
+    assert len(stub.requests) == 3  # 두 번째 스트림은 문장 캐시 히트
+    assert timings["tts_chunks"] == 3 and "tts_first_audio_s" in timings
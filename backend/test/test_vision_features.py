@@ -0,0 +1,73 @@
+# backend/test/test_vision_features.py
+# 비전 특징 저장소: 저장/재오픈 후 읽기, 버전 분리, 무결성 검사, 추론 시 비전 타워 우회
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("safetensors")
+
+from data_store import vision_features as vf  # noqa: E402
+
+
+class _Visual(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.proj = torch.nn.Linear(4, 8)
+        self.calls = 0
+
+    def forward(self, pixel_values, grid_thw=None):
+        self.calls += 1
+        return self.proj(pixel_values)
+
+
+class _Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.visual = _Visual()
+        self.config = type("Cfg", (), {"_name_or_path": "tiny/qwen", "_commit_hash": "abc123"})()
+
+
+def _feat(tokens, seed):
+    g = torch.Generator().manual_seed(seed)
+    return torch.randn(tokens, 8, generator=g, dtype=torch.float32), torch.tensor([1, 2, tokens * 2])
+
+
+def test_roundtrip_and_reopen(tmp_path):
+    store = vf.VisionFeatureStore(tmp_path, "tiny/qwen", "abc123", {"max_pixels": 100}, "float32")
+    items = {vf.image_key(bytes([i])): _feat(3 + i, i) for i in range(5)}
+    store.put_many(items)
+
+    reopened = vf.VisionFeatureStore(tmp_path, "tiny/qwen", "abc123", {"max_pixels": 100}, "float32")
+    assert len(reopened) == 5
+    for key, (embeds, grid) in items.items():
+        got_e, got_g = reopened.get(key)
+        assert torch.equal(got_e, embeds)
+        assert got_g.tolist() == grid.tolist()
+    assert reopened.get("missing") is None
+    assert reopened.stats == {"hits": 5, "misses": 1, "writes": 0}
+    assert reopened.validate(merge_size=2) == []
+
+
+def test_processor_or_revision_change_uses_new_namespace(tmp_path):
+    a = vf.VisionFeatureStore(tmp_path, "tiny/qwen", "abc123", {"max_pixels": 100}, "float32")
+    a.put("k", *_feat(2, 0))
+    b = vf.VisionFeatureStore(tmp_path, "tiny/qwen", "abc123", {"max_pixels": 200}, "float32")
+    c = vf.VisionFeatureStore(tmp_path, "tiny/qwen", "def456", {"max_pixels": 100}, "float32")
+    assert "k" in a and "k" not in b and "k" not in c
+    assert len({a.dir, b.dir, c.dir}) == 3
+
+
+def test_cached_features_bypass_vision_tower(tmp_path):
+    model = _Model()
+    store = vf.VisionFeatureStore.for_model(model, type("P", (), {"image_processor": {}})(), tmp_path)
+    cached = [_feat(3, 1)]
+
+    with vf.use_cached_features(model, cached):
+        out = model.visual(torch.zeros(1, 4), grid_thw=None)
+    assert torch.equal(out, cached[0][0])
+    assert model.visual.calls == 0
+
+    # 블록 밖에서는 원래 비전 타워
+    model.visual(torch.zeros(2, 4))
+    assert model.visual.calls == 1
+    assert store.manifest["revision"] == "abc123"
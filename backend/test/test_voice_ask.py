@@ -0,0 +1,118 @@
+# backend/test/test_voice_ask.py
+# /api/voice_ask: 가짜 모델 + Naver 스텁으로 NDJSON 이벤트 순서와, 어떤 경로로 끝나도 게이트 슬롯이 반납되는지 확인
+
+import asyncio
+import base64
+import importlib
+import io
+import json
+import wave
+
+import pytest
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+
+from db_config import Base
+from data_store import conversations, recent_docs
+from infrastructure import http_client, stt_client, tts_cache, tts_client
+from scripts.stubs import NaverStub
+
+
+def _wav(sec=1.0) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(16000)
+        w.writeframes(b"\0\0" * int(16000 * sec))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def voice(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_MODEL", "1")  # session_router가 import 시점에 모델 클래스를 고름
+    session_router = importlib.import_module("langserve_app.session_router")
+    voice_router = importlib.import_module("routes.voice_router")
+    fake_model = importlib.import_module("langserve_app.fake_model")
+    for name, value in (("FAKE_VISION_SEC", 0), ("FAKE_PREFILL_SEC", 0.01), ("FAKE_DECODE_TOK_SEC", 0.0005)):
+        monkeypatch.setattr(fake_model, name, value)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(conversations, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(recent_docs, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path / "tts")
+    monkeypatch.setattr(tts_cache, "_index", None)
+
+    img = tmp_path / "doc.jpg"
+    Image.new("RGB", (64, 64), "white").save(img)
+    monkeypatch.setitem(session_router.sessions, "u1", fake_model.FakeImageChatRunnable(str(img)))
+
+    with NaverStub() as stub:
+        monkeypatch.setattr(stt_client, "STT_URL", stub.stt_url)
+        monkeypatch.setattr(tts_client, "TTS_URL", stub.tts_url)
+        yield session_router, voice_router
+    assert session_router._q_count == 0
+    assert session_router._sema._value == session_router.MAX_CONCURRENCY
+
+
+def _client(voice_router) -> TestClient:
+    app = FastAPI()
+    app.include_router(voice_router.router)
+    return TestClient(app)
+
+
+def test_streams_transcript_answer_and_audio(voice):
+    _, voice_router = voice
+    with _client(voice_router) as client:
+        client.cookies.set("user_id", "u1")
+        r = client.post("/api/voice_ask", data={"doc_id": "d1"}, files={"file": ("q.wav", _wav(), "audio/wav")})
+    assert r.status_code == 200 and r.headers["content-type"] == "application/x-ndjson"
+
+    events = [json.loads(line) for line in r.text.splitlines()]
+    kinds = [e["type"] for e in events]
+    assert kinds[0] == "transcript" and kinds[-1] == "done" and "error" not in kinds
+    assert events[0]["text"].startswith("stub:")
+    answer = next(e for e in events if e["type"] == "answer")
+    assert answer["doc_id"] == "d1"
+    assert "".join(e["text"] for e in events if e["type"] == "delta") == answer["text"]
+
+    audio = [e for e in events if e["type"] == "audio"]
+    assert [e["seq"] for e in audio] == list(range(len(audio))) and audio
+    spoken = b"".join(base64.b64decode(e["data"])[3:] for e in audio).decode("utf-8")
+    assert spoken.replace(" ", "") == answer["text"].replace(" ", "")  # 문장 단위로 나뉘어 전부 합성
+    assert {"stt_s", "queue_wait_s", "first_token_s", "generate_s", "total_s"} <= set(events[-1]["timings"])
+
+
+def test_missing_session_releases_slot(voice):
+    _, voice_router = voice
+    with _client(voice_router) as client:
+        client.cookies.set("user_id", "nobody")
+        r = client.post("/api/voice_ask", files={"file": ("q.wav", _wav(), "audio/wav")})
+    assert r.status_code == 409  # fixture teardown에서 슬롯 반납 확인
+
+
+def test_disconnect_before_first_byte_releases_slot(voice):
+    session_router, voice_router = voice
+
+    async def main():
+        try:
+            upload = UploadFile(io.BytesIO(_wav()), filename="q.wav", headers=Headers({"content-type": "audio/wav"}))
+            response = await voice_router.voice_ask(file=upload, doc_id="d1", user_id="u1")
+            assert session_router._q_count == 1  # 슬롯을 쥔 채 응답 객체가 만들어짐
+
+            async def send(message):
+                raise OSError("client went away")
+
+            async def receive():
+                return {"type": "http.disconnect"}
+
+            with pytest.raises(ClientDisconnect):
+                await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+        finally:
+            await http_client.aclose()
+
+    asyncio.run(main())
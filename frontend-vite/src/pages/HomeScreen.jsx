@@ -23,7 +23,9 @@ export default function HomeScreen() {
           docId: it.doc_id || String(it.mtime || ''),
           date: new Date((it.mtime || 0) * 1000).toLocaleDateString('ko-KR').slice(2),
           title: '문서',
-          thumb: `${API_BASE}/api/image?path=${encodeURIComponent(it.path || '')}`
+          // 목록에는 작은 미리보기만, 확대 보기는 원본
+          thumb: `${API_BASE}/api/image?doc_id=${encodeURIComponent(it.doc_id || '')}&w=160`,
+          full: `${API_BASE}/api/image?doc_id=${encodeURIComponent(it.doc_id || '')}`
         }));
         setDocs(items);
       } catch (e) {
@@ -51,7 +53,7 @@ export default function HomeScreen() {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         credentials: 'include',
-        body: JSON.stringify({ doc_id: doc.docId, path: doc.thumb?.includes('/api/image?path=') ? decodeURIComponent(doc.thumb.split('=')[1] || '') : undefined })
+        body: JSON.stringify({ doc_id: doc.docId })
       });
       const data = await res.json();
       if (!res.ok || !data.removed) throw new Error(data.error || 'delete failed');
@@ -97,7 +99,7 @@ export default function HomeScreen() {
               className="w-[70px] h-[70px] rounded-[5px] bg-gray-700 overflow-hidden flex-shrink-0 focus-visible:outline-none"
               onClick={(e) => {
                 e.stopPropagation();
-                handleImageClick(doc.thumb);
+                handleImageClick(doc.full);
               }}
               aria-label="썸네일 확대"
             >
@@ -34,6 +34,9 @@ export default function SummaryPage() {
   const [showFeedbackModal, setShowFeedbackModal] = useState(false);
   const pendingAnswerIndexRef = useRef(null);
   const pendingQuestionIndexRef = useRef(null);
+  // 음성 질문 답변: 서버가 문장별로 보내는 음성 조각을 순서대로 재생
+  const voiceQueueRef = useRef([]);
+  const voiceTokenRef = useRef(0);
 
   // 파형 시각화용 ref들
   const waveformCanvasRef = useRef(null);
@@ -78,8 +81,11 @@ export default function SummaryPage() {
 
   const ROUTES = {
     TTS: '/api/tts',
+    TTS_URL: '/api/tts/url',
+    TTS_STREAM: '/api/tts/stream',
     STT: '/api/stt',
     ASK: '/api/ask',
+    VOICE_ASK: '/api/voice_ask',
     CONV: '/api/conversation',
     RECENT: '/api/recent_docs',
     IMAGE: '/api/image',
@@ -101,6 +107,8 @@ export default function SummaryPage() {
 
   // 자원 정리
   const stopVoice = () => {
+    voiceQueueRef.current = [];
+    voiceTokenRef.current += 1; // 진행 중인 음성 질문 스트림의 남은 조각은 재생하지 않음
     try {
       if (audioRef.current) {
         audioRef.current.pause();
@@ -254,17 +262,8 @@ export default function SummaryPage() {
       if (!text) return;
 
       try {
-        const res = await axios.post(
-          u(ROUTES.TTS),
-          { text },
-          { responseType: 'blob', withCredentials: true }
-        );
-
-        const audioBlob = new Blob([res.data], { type: res.data.type || 'audio/mpeg' });
-        const audioUrl = URL.createObjectURL(audioBlob);
-        audioUrlRef.current = audioUrl;
-
-        const audio = new Audio(audioUrl);
+        // 문장 단위 스트리밍 TTS: 첫 문장이 합성되는 즉시 재생 시작 (문장별 결과는 서버 캐시 재사용)
+        const audio = new Audio(`${u(ROUTES.TTS_STREAM)}?text=${encodeURIComponent(text)}`);
         audioRef.current = audio;
 
         setIsPlaying(true);
@@ -281,6 +280,7 @@ export default function SummaryPage() {
 
         audio.addEventListener('ended', onEndOrPause);
         audio.addEventListener('pause', onEndOrPause);
+        audio.addEventListener('error', onEndOrPause);
 
         audio.play().catch(() => {
           onEndOrPause();
@@ -370,47 +370,8 @@ export default function SummaryPage() {
             return [...prev, { type: 'question-pending', text: '' }];
           });
 
-          await axios.post(u(ROUTES.STT), formData, {
-            headers: { 'Content-Type': 'multipart/form-data' },
-            withCredentials: true,
-          }).then((res) => {
-            const sttResult = res.data;
-            let recognized = '';
-            if (typeof sttResult === 'string') recognized = sttResult.trim();
-            else if (sttResult?.text) recognized = String(sttResult.text).trim();
-
-            if (recognized) {
-              // 2) 대기 말풍선을 실제 질문으로 교체 후 답변 요청
-              setChatList((prev) => {
-                const arr = [...prev];
-                const idx = pendingQuestionIndexRef.current;
-                if (idx != null && arr[idx]) arr[idx] = { type: 'question', text: recognized };
-                else arr.push({ type: 'question', text: recognized });
-                return arr;
-              });
-              // 비동기로 답변 요청 + 대기 말풍선 처리
-              requestAnswerWithPending(recognized);
-            } else {
-              // STT 실패 메시지 표시
-              setChatList((prev) => {
-                const arr = [...prev];
-                const idx = pendingQuestionIndexRef.current;
-                const fallback = { type: 'question', text: '음성 인식 결과가 비어있습니다.' };
-                if (idx != null && arr[idx]) arr[idx] = fallback;
-                else arr.push(fallback);
-                return arr;
-              });
-            }
-          }).catch(() => {
-            setChatList((prev) => {
-              const arr = [...prev];
-              const idx = pendingQuestionIndexRef.current;
-              const fallback = { type: 'question', text: 'STT 요청 실패' };
-              if (idx != null && arr[idx]) arr[idx] = fallback;
-              else arr.push(fallback);
-              return arr;
-            });
-          });
+          // 2) STT → 답변 → 문장별 음성을 한 번의 요청으로
+          await askByVoice(formData);
         } finally {
           stopStream(); // 마이크 해제
           stopVisualization(); // 파형 중지
@@ -437,6 +398,115 @@ export default function SummaryPage() {
 
   const isSendActive = inputValue.trim().length > 0;
 
+  const replaceAt = (indexRef, item) => {
+    setChatList((prev) => {
+      const arr = [...prev];
+      const idx = indexRef.current;
+      if (idx != null && arr[idx]) arr[idx] = item;
+      else arr.push(item);
+      return arr;
+    });
+  };
+
+  // 음성 조각 순차 재생 (재생 중이면 끝난 뒤 이어서)
+  const playQueuedVoice = (id) => {
+    if (audioRef.current) return;
+    const blob = voiceQueueRef.current.shift();
+    if (!blob) {
+      setIsPlaying(false);
+      setPlayingId(null);
+      return;
+    }
+    const url = URL.createObjectURL(blob);
+    const audio = new Audio(url);
+    audioRef.current = audio;
+    audioUrlRef.current = url;
+    setIsPlaying(true);
+    setPlayingId(id);
+
+    const next = () => {
+      if (audioRef.current !== audio) return; // stopVoice로 이미 정리됨
+      audioRef.current = null;
+      audioUrlRef.current = null;
+      URL.revokeObjectURL(url);
+      playQueuedVoice(id);
+    };
+    audio.addEventListener('ended', next);
+    audio.addEventListener('error', next);
+    audio.play().catch(next);
+  };
+
+  // 음성 질문: /api/voice_ask 한 번으로 인식 결과, 답변 조각, 문장별 음성을 NDJSON 스트림으로 받음
+  const askByVoice = async (formData, retried = false) => {
+    if (docId) formData.set('doc_id', docId);
+    let res;
+    try {
+      res = await fetch(u(ROUTES.VOICE_ASK), { method: 'POST', body: formData, credentials: 'include' });
+    } catch {
+      replaceAt(pendingQuestionIndexRef, { type: 'question', text: 'STT 요청 실패' });
+      return;
+    }
+    // 세션 미존재 케이스 자동 복구 시도
+    if (res.status === 409 && !retried && (await recoverSessionFromRecentDoc())) {
+      await askByVoice(formData, true);
+      return;
+    }
+    if (!res.ok || !res.body) {
+      const detail = await res.json().then((d) => d?.detail).catch(() => null);
+      const text = res.status === 422 && typeof detail === 'string' ? detail : 'STT 요청 실패';
+      replaceAt(pendingQuestionIndexRef, { type: 'question', text });
+      return;
+    }
+
+    stopVoice();
+    const token = voiceTokenRef.current;
+    let answer = '';
+    let answerIdx = null;
+    const onEvent = (ev) => {
+      if (ev.type === 'transcript') {
+        replaceAt(pendingQuestionIndexRef, { type: 'question', text: ev.text });
+        pendingAnswerIndexRef.current = null;
+        setChatList((prev) => {
+          answerIdx = prev.length;
+          pendingAnswerIndexRef.current = answerIdx;
+          return [...prev, { type: 'answer-pending', text: '' }];
+        });
+      } else if (ev.type === 'delta' || ev.type === 'answer') {
+        answer = ev.type === 'delta' ? answer + ev.text : ev.text;
+        replaceAt(pendingAnswerIndexRef, { type: 'answer', text: answer });
+      } else if (ev.type === 'audio') {
+        if (token !== voiceTokenRef.current) return; // 중지 버튼 또는 다른 재생 시작
+        const bytes = Uint8Array.from(atob(ev.data), (c) => c.charCodeAt(0));
+        const type = ev.format === 'mp3' ? 'audio/mpeg' : `audio/${ev.format}`;
+        voiceQueueRef.current.push(new Blob([bytes], { type }));
+        playQueuedVoice(answerIdx ?? pendingAnswerIndexRef.current);
+      } else if (ev.type === 'error' && !answer) {
+        replaceAt(pendingAnswerIndexRef, { type: 'answer', text: '서버 오류로 답변을 가져오지 못했습니다.' });
+      }
+    };
+
+    try {
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buf = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buf += decoder.decode(value, { stream: true });
+        let nl;
+        while ((nl = buf.indexOf('\n')) >= 0) {
+          const line = buf.slice(0, nl).trim();
+          buf = buf.slice(nl + 1);
+          if (line) onEvent(JSON.parse(line));
+        }
+      }
+    } catch {
+      if (!answer) {
+        replaceAt(pendingAnswerIndexRef, { type: 'answer', text: '서버 오류로 답변을 가져오지 못했습니다.' });
+      }
+    }
+  };
+
   // 질문 전송
   const requestAnswerWithPending = async (finalText) => {
     // 1) 답변 대기 말풍선 추가
@@ -503,9 +573,8 @@ export default function SummaryPage() {
       const data = await res.json();
       const items = Array.isArray(data.items) ? data.items : [];
       const found = items.find((it) => String(it.doc_id) === String(docId));
-      const path = found?.path || null;
-      if (!path) return false;
-      const imgRes = await fetch(`${u(ROUTES.IMAGE)}?path=${encodeURIComponent(path)}`, { credentials: 'include' });
+      if (!found?.path) return false;
+      const imgRes = await fetch(`${u(ROUTES.IMAGE)}?doc_id=${encodeURIComponent(found.doc_id)}`, { credentials: 'include' });
       if (!imgRes.ok) return false;
       const blob = await imgRes.blob();
       const fd = new FormData();